@@ -0,0 +1,286 @@
+"""
+Asyncio HTTP/1.1 server that drives the existing request handler class.
+
+SERVER_MODE=async serves MyHTTPRequestHandler without a thread per
+connection:
+
+- Connections are asyncio streams with HTTP/1.1 keep-alive (idle timeout)
+- Each request is parsed on the event loop, then the unchanged handler
+  (route table, apply_route_checks middleware, do_GET/do_POST...) runs on a
+  bounded worker pool; at most `max_concurrency` requests execute at once
+- Bodies larger than `max_body_bytes` are rejected with 413 before reading
+- SIGTERM/SIGINT stop accepting, let in-flight requests finish within the
+  grace period, then close idle connections
+
+The adapter builds a handler instance without a socket: rfile holds the
+request body and wfile buffers the response, which is framed with
+Content-Length so the connection can be reused.
+NO side effects at import time.
+"""
+import asyncio
+import http.client
+import io
+import signal
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from core.config import Config
+from core.logging import get_logger
+
+logger = get_logger(__name__)
+
+MAX_HEADER_BYTES = 64 * 1024
+
+
+class _Request:
+    __slots__ = ('command', 'path', 'request_version', 'requestline', 'headers', 'body', 'keep_alive')
+
+    def __init__(self, command, path, request_version, requestline, headers, body, keep_alive):
+        self.command = command
+        self.path = path
+        self.request_version = request_version
+        self.requestline = requestline
+        self.headers = headers
+        self.body = body
+        self.keep_alive = keep_alive
+
+
+class _HTTPError(Exception):
+    def __init__(self, status: int, reason: str):
+        super().__init__(reason)
+        self.status = status
+        self.reason = reason
+
+
+def _simple_response(status: int, reason: str, keep_alive: bool = False) -> bytes:
+    body = f'{{"error": "{reason}"}}'.encode()
+    return (
+        f"HTTP/1.1 {status} {reason}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    ).encode() + body
+
+
+def frame_response(raw: bytes, keep_alive: bool, head_only: bool = False) -> bytes:
+    """
+    Make a handler's buffered output reusable on a keep-alive connection.
+
+    Forces HTTP/1.1, adds Content-Length when the handler didn't set one and
+    sets the Connection header.
+    """
+    head, sep, body = raw.partition(b'\r\n\r\n')
+    if not sep:
+        return _simple_response(500, 'Internal Server Error')
+
+    lines = head.split(b'\r\n')
+    status_parts = lines[0].split(b' ', 1)
+    status_line = b'HTTP/1.1 ' + (status_parts[1] if len(status_parts) > 1 else b'200 OK')
+    headers = [
+        line for line in lines[1:]
+        if not line.lower().startswith(b'connection:')
+    ]
+    names = {line.split(b':', 1)[0].strip().lower() for line in headers}
+    if b'content-length' not in names and b'transfer-encoding' not in names and not head_only:
+        headers.append(b'Content-Length: ' + str(len(body)).encode())
+    headers.append(b'Connection: keep-alive' if keep_alive else b'Connection: close')
+    return b'\r\n'.join([status_line] + headers) + b'\r\n\r\n' + body
+
+
+class AsyncHTTPServer:
+    """Serve a BaseHTTPRequestHandler subclass from an asyncio event loop."""
+
+    def __init__(self, handler_class, host: str, port: int, directory: str = '.',
+                 max_concurrency: Optional[int] = None, max_body_bytes: Optional[int] = None,
+                 keepalive_timeout: Optional[float] = None, shutdown_grace: Optional[float] = None):
+        self.handler_class = handler_class
+        self.host = host
+        self.port = port
+        self.directory = directory
+        self.max_concurrency = max_concurrency or Config.get_http_max_concurrency()
+        self.max_body_bytes = Config.get_http_max_body_bytes() if max_body_bytes is None else max_body_bytes
+        self.keepalive_timeout = keepalive_timeout or Config.get_http_keepalive_timeout()
+        self.shutdown_grace = Config.get_http_shutdown_grace_seconds() if shutdown_grace is None else shutdown_grace
+
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix='http-worker')
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self._connections = set()
+        self._inflight = 0
+        self._idle: Optional[asyncio.Event] = None
+        self.closing = False
+
+    # ------------------------------------------------------------------
+    # Request parsing
+    # ------------------------------------------------------------------
+
+    async def _read_request(self, reader: asyncio.StreamReader, writer) -> Optional[_Request]:
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+        except asyncio.IncompleteReadError as e:
+            if e.partial.strip():
+                raise _HTTPError(400, 'Bad Request')
+            return None
+        except asyncio.LimitOverrunError:
+            raise _HTTPError(431, 'Request Header Fields Too Large')
+
+        requestline, _, header_block = head.partition(b'\r\n')
+        requestline = requestline.decode('latin-1').rstrip('\r\n')
+        parts = requestline.split()
+        if len(parts) != 3 or not parts[2].startswith('HTTP/'):
+            raise _HTTPError(400, 'Bad Request')
+        command, path, version = parts
+
+        try:
+            headers = http.client.parse_headers(io.BytesIO(header_block))
+        except http.client.HTTPException:
+            raise _HTTPError(400, 'Bad Request')
+
+        connection = (headers.get('Connection') or '').lower()
+        if version == 'HTTP/1.1':
+            keep_alive = 'close' not in connection
+        else:
+            keep_alive = 'keep-alive' in connection
+
+        if 'chunked' in (headers.get('Transfer-Encoding') or '').lower():
+            raise _HTTPError(411, 'Length Required')
+        try:
+            length = int(headers.get('Content-Length') or 0)
+        except ValueError:
+            raise _HTTPError(400, 'Bad Request')
+        if length < 0:
+            raise _HTTPError(400, 'Bad Request')
+        if length > self.max_body_bytes:
+            raise _HTTPError(413, 'Payload Too Large')
+
+        if length and (headers.get('Expect') or '').lower() == '100-continue':
+            writer.write(b'HTTP/1.1 100 Continue\r\n\r\n')
+            await writer.drain()
+        body = await reader.readexactly(length) if length else b''
+        return _Request(command, path, version, requestline, headers, body, keep_alive)
+
+    # ------------------------------------------------------------------
+    # Handler adapter (runs on a worker thread)
+    # ------------------------------------------------------------------
+
+    def _run_handler(self, request: _Request, peer) -> bytes:
+        handler = self.handler_class.__new__(self.handler_class)
+        handler.directory = self.directory
+        handler.client_address = peer or ('', 0)
+        handler.server = self
+        handler.request = None
+        handler.rfile = io.BytesIO(request.body)
+        handler.wfile = io.BytesIO()
+        handler.command = request.command
+        handler.path = request.path
+        handler.request_version = request.request_version
+        handler.requestline = request.requestline
+        handler.headers = request.headers
+        handler.protocol_version = 'HTTP/1.1'
+        handler.close_connection = not request.keep_alive
+
+        try:
+            method = getattr(handler, 'do_' + request.command, None)
+            if method is None:
+                handler.send_error(501, f"Unsupported method ({request.command!r})")
+            else:
+                method()
+            if hasattr(handler, '_headers_buffer') and handler._headers_buffer:
+                handler.flush_headers()
+        except Exception:
+            logger.exception(f"Unhandled error serving {request.command} {request.path}")
+            return _simple_response(500, 'Internal Server Error')
+
+        keep_alive = request.keep_alive and not handler.close_connection and not self.closing
+        return frame_response(handler.wfile.getvalue(), keep_alive, head_only=request.command == 'HEAD')
+
+    # ------------------------------------------------------------------
+    # Connection loop
+    # ------------------------------------------------------------------
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._connections.add(writer)
+        peer = writer.get_extra_info('peername')
+        loop = asyncio.get_running_loop()
+        try:
+            while not self.closing:
+                try:
+                    request = await asyncio.wait_for(self._read_request(reader, writer), self.keepalive_timeout)
+                except _HTTPError as e:
+                    writer.write(_simple_response(e.status, e.reason))
+                    await writer.drain()
+                    break
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    break
+                if request is None:
+                    break
+
+                async with self._slots:
+                    self._inflight += 1
+                    self._idle.clear()
+                    try:
+                        response = await loop.run_in_executor(self._executor, self._run_handler, request, peer)
+                    finally:
+                        self._inflight -= 1
+                        if self._inflight == 0:
+                            self._idle.set()
+
+                writer.write(response)
+                await writer.drain()
+                if b'\r\nConnection: close\r\n' in response.partition(b'\r\n\r\n')[0] + b'\r\n':
+                    break
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    async def start(self):
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self._stopping = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._server = await asyncio.start_server(
+            self._handle_connection, self.host, self.port, limit=MAX_HEADER_BYTES, reuse_address=True
+        )
+        logger.info(
+            f"Async HTTP server on {self.host}:{self.port} "
+            f"(max_concurrency={self.max_concurrency}, max_body={self.max_body_bytes}B, "
+            f"keepalive={self.keepalive_timeout}s)"
+        )
+
+    def request_shutdown(self):
+        if self._stopping is not None:
+            self._stopping.set()
+
+    async def shutdown(self):
+        """Stop accepting, drain in-flight requests within the grace period, close connections."""
+        self.closing = True
+        if self._server is not None:
+            self._server.close()
+        try:
+            await asyncio.wait_for(self._idle.wait(), self.shutdown_grace)
+        except asyncio.TimeoutError:
+            logger.warning(f"Shutdown grace period elapsed with {self._inflight} requests in flight")
+        for writer in list(self._connections):
+            writer.close()
+        self._executor.shutdown(wait=False)
+        logger.info("Async HTTP server stopped")
+
+    async def serve_forever(self):
+        await self.start()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(sig, self.request_shutdown)
+            except (NotImplementedError, RuntimeError):
+                pass
+        try:
+            await self._stopping.wait()
+        finally:
+            await self.shutdown()
@@ -4,10 +4,10 @@ Centralized request dispatcher for the HTTP API.
 Provides a single entry point for routing requests through the route table
 and applying middleware checks.
 """
-from typing import List
+from typing import List, Union
 from urllib.parse import urlparse
 
-from api.routes import Route, match_route
+from api.routes import Route, RouteIndex
 from api.middleware import apply_route_checks
 from core.host_context import HostContext
 
@@ -15,14 +15,14 @@ from core.logging import get_logger
 logger = get_logger(__name__)
 
 
-def dispatch_request(handler, method: str, path: str, routes: List[Route], 
+def dispatch_request(handler, method: str, path: str, routes: Union[RouteIndex, List[Route]],
                      host_context: HostContext, db_available: bool) -> bool:
     """
     Dispatch a request through the routing table.
     
     This function:
     1. Normalizes trailing slashes (redirect /api/foo/ to /api/foo)
-    2. Matches the route
+    2. Matches the route and stores its captured params on handler.path_params
     3. If no match: returns False (caller falls back to static files)
     4. If match: applies route checks (auth, db requirements)
     5. If middleware denies: returns True (response already sent)
@@ -32,7 +32,7 @@ def dispatch_request(handler, method: str, path: str, routes: List[Route],
         handler: The MyHTTPRequestHandler instance
         method: HTTP method ('GET', 'POST', 'PUT', 'DELETE')
         path: The URL path (without query string)
-        routes: List of Route objects to match against
+        routes: Compiled RouteIndex (see get_route_index) or a list of Routes
         host_context: Parsed host context for routing decisions
         db_available: Whether database is available
         
@@ -53,9 +53,12 @@ def dispatch_request(handler, method: str, path: str, routes: List[Route],
         handler.end_headers()
         return True
     
-    route = match_route(method, clean_path, routes)
-    if not route:
+    index = routes if isinstance(routes, RouteIndex) else RouteIndex(routes)
+    match = index.match(method, clean_path)
+    if not match:
         return False
+    route = match.route
+    handler.path_params = match.params
     
     if not apply_route_checks(route, handler, db_available, host_context.host_type):
         return True
@@ -0,0 +1,283 @@
+"""
+Threaded HTTP server with fixed worker pools and load shedding.
+
+SERVER_MODE=pooled replaces ThreadingTCPServer's thread-per-connection with
+bounded resources:
+
+- Two lanes, each a fixed set of worker threads fed by a bounded queue:
+  'webhook' for is_webhook_exempt_route paths (Telegram, Stripe) and
+  'dashboard' for everything else, so a burst of slow dashboard requests
+  can't starve webhook delivery (and vice versa)
+- The accept thread only hands new connections to a classifier thread,
+  which waits (in one selector, never per client) for each request line to
+  arrive, peeks at it to pick the lane and gives up after PEEK_TIMEOUT
+  (dashboard lane); a client that is slow to send its request line never
+  holds up accept()
+- When the chosen lane's queue is full the connection is answered with
+  503 + Retry-After and closed instead of spawning another thread
+- Worker count bounds concurrent DB usage below the connection pool size
+
+NO side effects at import time.
+"""
+import queue
+import selectors
+import socket
+import socketserver
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from api.middleware import is_webhook_exempt_route
+from core.config import Config
+from core.logging import get_logger
+
+logger = get_logger(__name__)
+
+WEBHOOK_LANE = 'webhook'
+DASHBOARD_LANE = 'dashboard'
+PEEK_BYTES = 2048
+PEEK_TIMEOUT = 0.2
+
+_STOP = object()
+
+
+def peek_request_path(sock, timeout: float = PEEK_TIMEOUT) -> Optional[str]:
+    """Path from the request line without consuming it (None if not yet sent)."""
+    previous = sock.gettimeout()
+    try:
+        sock.settimeout(timeout)
+        data = sock.recv(PEEK_BYTES, socket.MSG_PEEK)
+    except OSError:
+        return None
+    finally:
+        try:
+            sock.settimeout(previous)
+        except OSError:
+            pass
+    parts = data.split(b'\r\n', 1)[0].split()
+    if len(parts) < 2:
+        return None
+    return parts[1].decode('latin-1')
+
+
+def lane_for_path(path: Optional[str]) -> str:
+    if path and is_webhook_exempt_route(path):
+        return WEBHOOK_LANE
+    return DASHBOARD_LANE
+
+
+class WorkerLane:
+    """Fixed pool of worker threads consuming a bounded connection queue."""
+
+    def __init__(self, name: str, workers: int, queue_size: int, handle):
+        self.name = name
+        self.workers = max(1, workers)
+        self.queue = queue.Queue(maxsize=max(1, queue_size))
+        self.handle = handle
+        self.threads = []
+        self.rejected = 0
+        self.busy = 0
+        self._lock = threading.Lock()
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"http-{self.name}-{i}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def submit(self, item) -> bool:
+        try:
+            self.queue.put_nowait(item)
+            return True
+        except queue.Full:
+            with self._lock:
+                self.rejected += 1
+            return False
+
+    def stop(self):
+        for _ in self.threads:
+            self.queue.put(_STOP)
+
+    def _work(self):
+        while True:
+            item = self.queue.get()
+            if item is _STOP:
+                return
+            with self._lock:
+                self.busy += 1
+            try:
+                self.handle(*item)
+            finally:
+                with self._lock:
+                    self.busy -= 1
+
+    def stats(self) -> dict:
+        return {
+            'workers': self.workers,
+            'busy': self.busy,
+            'queued': self.queue.qsize(),
+            'rejected': self.rejected,
+        }
+
+
+class LaneClassifier:
+    """
+    One thread that routes new connections once their request line is readable.
+
+    add() never blocks: the connection is registered with a selector and
+    routed as soon as data arrives, or without a path after `timeout`.
+    """
+
+    def __init__(self, route: Callable, timeout: float = PEEK_TIMEOUT, max_pending: int = 1024):
+        self.route = route
+        self.timeout = timeout
+        self.max_pending = max(1, max_pending)
+        self._selector = selectors.DefaultSelector()
+        self._incoming = queue.SimpleQueue()
+        self._wake_recv, self._wake_send = socket.socketpair()
+        self._wake_recv.setblocking(False)
+        self._selector.register(self._wake_recv, selectors.EVENT_READ)
+        self._pending: Dict[socket.socket, tuple] = {}
+        self._stopped = False
+        self.timeouts = 0
+        self.thread = threading.Thread(target=self._run, name="http-classifier", daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def add(self, request, client_address) -> None:
+        self._incoming.put((request, client_address))
+        self._wake()
+
+    def stop(self):
+        self._stopped = True
+        self._wake()
+        self.thread.join(timeout=1)
+
+    def _wake(self):
+        try:
+            self._wake_send.send(b'\0')
+        except OSError:
+            pass
+
+    def _register_incoming(self):
+        while True:
+            try:
+                request, client_address = self._incoming.get_nowait()
+            except queue.Empty:
+                return
+            if len(self._pending) >= self.max_pending:
+                self.route(request, client_address, None)
+                continue
+            try:
+                self._selector.register(request, selectors.EVENT_READ)
+            except (OSError, ValueError):
+                self.route(request, client_address, None)
+                continue
+            self._pending[request] = (client_address, time.monotonic() + self.timeout)
+
+    def _dispatch(self, request, path: Optional[str]):
+        client_address, _ = self._pending.pop(request)
+        try:
+            self._selector.unregister(request)
+        except (KeyError, ValueError):
+            pass
+        try:
+            self.route(request, client_address, path)
+        except Exception as e:
+            logger.error(f"HTTP classifier failed to route {client_address[0]}: {e}")
+
+    def _run(self):
+        while not self._stopped:
+            self._register_incoming()
+            now = time.monotonic()
+            wait = min((deadline for _, deadline in self._pending.values()), default=now + 1) - now
+            for key, _ in self._selector.select(max(0.0, wait)):
+                if key.fileobj is self._wake_recv:
+                    try:
+                        self._wake_recv.recv(4096)
+                    except OSError:
+                        pass
+                elif key.fileobj in self._pending:
+                    self._dispatch(key.fileobj, peek_request_path(key.fileobj, timeout=0))
+            now = time.monotonic()
+            for request in [r for r, (_, deadline) in self._pending.items() if deadline <= now]:
+                self.timeouts += 1
+                self._dispatch(request, None)
+        for request in list(self._pending):
+            self._dispatch(request, None)
+        self._selector.close()
+        self._wake_recv.close()
+        self._wake_send.close()
+
+
+class PooledHTTPServer(socketserver.TCPServer):
+    """TCPServer that hands connections to per-lane worker pools."""
+
+    allow_reuse_address = True
+
+    def __init__(self, server_address, handler_class, workers: Optional[int] = None,
+                 webhook_workers: Optional[int] = None, queue_size: Optional[int] = None,
+                 retry_after: Optional[int] = None, bind_and_activate: bool = True):
+        queue_size = Config.get_http_accept_queue() if queue_size is None else queue_size
+        self.retry_after = Config.get_http_retry_after_seconds() if retry_after is None else retry_after
+        self.lanes: Dict[str, WorkerLane] = {
+            WEBHOOK_LANE: WorkerLane(
+                WEBHOOK_LANE, webhook_workers or Config.get_http_webhook_workers(), queue_size, self._process
+            ),
+            DASHBOARD_LANE: WorkerLane(
+                DASHBOARD_LANE, workers or Config.get_http_workers(), queue_size, self._process
+            ),
+        }
+        # Let the kernel hold a burst while the accept thread classifies.
+        self.request_queue_size = max(socketserver.TCPServer.request_queue_size, queue_size)
+        self.classifier = LaneClassifier(self.route_request, max_pending=self.request_queue_size)
+        super().__init__(server_address, handler_class, bind_and_activate)
+        for lane in self.lanes.values():
+            lane.start()
+        self.classifier.start()
+
+    def process_request(self, request, client_address):
+        self.classifier.add(request, client_address)
+
+    def route_request(self, request, client_address, path: Optional[str]):
+        """Queue the connection on the lane for `path` (called from the classifier thread)."""
+        lane = self.lanes[lane_for_path(path)]
+        if not lane.submit((request, client_address)):
+            logger.warning(f"HTTP {lane.name} lane saturated, shedding {client_address[0]}")
+            self.reject_request(request)
+
+    def reject_request(self, request):
+        body = b'{"error": "Server busy, retry later"}'
+        response = (
+            b"HTTP/1.1 503 Service Unavailable\r\n"
+            b"Content-Type: application/json\r\n"
+            b"Retry-After: " + str(self.retry_after).encode() + b"\r\n"
+            b"Content-Length: " + str(len(body)).encode() + b"\r\n"
+            b"Connection: close\r\n\r\n" + body
+        )
+        try:
+            # Runs on the classifier thread: never wait on the client, the
+            # response fits in an empty socket send buffer
+            request.setblocking(False)
+            request.send(response)
+        except OSError:
+            pass
+        self.shutdown_request(request)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def stats(self) -> dict:
+        return {name: lane.stats() for name, lane in self.lanes.items()}
+
+    def server_close(self):
+        super().server_close()
+        self.classifier.stop()
+        for lane in self.lanes.values():
+            lane.stop()
@@ -3,9 +3,14 @@ Route definitions for the HTTP API.
 
 Each Route maps (method, path) to a handler method name on MyHTTPRequestHandler.
 Handler names are validated at startup to fail fast if any are missing.
+
+Route tables are compiled once into a RouteIndex (exact-match dict + prefix
+segment trie) that keeps the list-order precedence of match_route and
+extracts path params from each route's optional `pattern`.
 """
-from dataclasses import dataclass
-from typing import List, Optional
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
 
 
 @dataclass
@@ -21,6 +26,8 @@ class Route:
         db_required: If True, DATABASE_AVAILABLE must be True
         is_prefix: If True, match path.startswith() instead of ==
         contains: Optional substring that must also be in the path (for compound matches)
+        pattern: Optional path template naming segments to capture, e.g.
+                 '/api/journeys/{journey_id}' -> handler.path_params['journey_id']
     """
     method: str
     path: str
@@ -29,6 +36,7 @@ class Route:
     db_required: bool = False
     is_prefix: bool = False
     contains: Optional[str] = None
+    pattern: Optional[str] = None
 
 
 # ============================================================================
@@ -46,9 +54,11 @@ GET_ROUTES: List[Route] = [
     
     # Campaigns (order matters: more specific patterns first)
     Route('GET', '/api/campaigns/', 'handle_api_campaign_submissions',
-          auth_required=True, db_required=True, is_prefix=True, contains='/submissions'),
+          auth_required=True, db_required=True, is_prefix=True, contains='/submissions',
+          pattern='/api/campaigns/{campaign_id}'),
     Route('GET', '/api/campaigns/', 'handle_api_campaign_by_id',
-          db_required=True, is_prefix=True),
+          db_required=True, is_prefix=True,
+          pattern='/api/campaigns/{campaign_id}'),
     Route('GET', '/api/campaigns', 'handle_api_campaigns', db_required=True),
     
     # Bot stats
@@ -95,7 +105,8 @@ GET_ROUTES: List[Route] = [
     
     # Broadcast
     Route('GET', '/api/broadcast-status/', 'handle_api_broadcast_status',
-          auth_required=True, db_required=True, is_prefix=True),
+          auth_required=True, db_required=True, is_prefix=True,
+          pattern='/api/broadcast-status/{job_id}'),
     Route('GET', '/api/broadcast-jobs', 'handle_api_broadcast_jobs',
           auth_required=True, db_required=True),
     
@@ -103,7 +114,8 @@ GET_ROUTES: List[Route] = [
     Route('GET', '/api/bot-users', 'handle_api_bot_users',
           auth_required=True, db_required=True),
     Route('GET', '/api/user-activity/', 'handle_api_user_activity',
-          auth_required=True, db_required=True, is_prefix=True),
+          auth_required=True, db_required=True, is_prefix=True,
+          pattern='/api/user-activity/{chat_id}'),
     
     # Invalid coupons
     Route('GET', '/api/invalid-coupons', 'handle_api_invalid_coupons',
@@ -125,7 +137,7 @@ GET_ROUTES: List[Route] = [
     
     # Journey link click redirect (public, no auth)
     Route('GET', '/api/j/c/', 'handle_api_journey_link_click',
-          is_prefix=True),
+          is_prefix=True, pattern='/api/j/c/{track_id}'),
 
     # Journeys
     Route('GET', '/api/journeys/user-account', 'handle_api_journey_user_account',
@@ -133,11 +145,14 @@ GET_ROUTES: List[Route] = [
     Route('GET', '/api/journeys/debug/sessions', 'handle_api_journeys_debug_sessions',
           auth_required=True, db_required=True),
     Route('GET', '/api/journeys/', 'handle_api_journey_analytics',
-          auth_required=True, db_required=True, is_prefix=True, contains='/analytics'),
+          auth_required=True, db_required=True, is_prefix=True, contains='/analytics',
+          pattern='/api/journeys/{journey_id}'),
     Route('GET', '/api/journeys/', 'handle_api_journey_steps_get',
-          auth_required=True, db_required=True, is_prefix=True, contains='/steps'),
+          auth_required=True, db_required=True, is_prefix=True, contains='/steps',
+          pattern='/api/journeys/{journey_id}'),
     Route('GET', '/api/journeys/', 'handle_api_journey_get',
-          auth_required=True, db_required=True, is_prefix=True),
+          auth_required=True, db_required=True, is_prefix=True,
+          pattern='/api/journeys/{journey_id}'),
     Route('GET', '/api/journeys', 'handle_api_journeys_list',
           auth_required=True, db_required=True),
     
@@ -159,11 +174,14 @@ GET_ROUTES: List[Route] = [
 
     # Hype Chat
     Route('GET', '/api/hypechat/flows/', 'handle_api_hypechat_flow_analytics',
-          auth_required=True, db_required=True, is_prefix=True, contains='/analytics'),
+          auth_required=True, db_required=True, is_prefix=True, contains='/analytics',
+          pattern='/api/hypechat/flows/{flow_id}'),
     Route('GET', '/api/hypechat/flows/', 'handle_api_hypechat_flow_steps_list',
-          auth_required=True, db_required=True, is_prefix=True, contains='/steps'),
+          auth_required=True, db_required=True, is_prefix=True, contains='/steps',
+          pattern='/api/hypechat/flows/{flow_id}'),
     Route('GET', '/api/hypechat/flows/', 'handle_api_hypechat_flow_get',
-          auth_required=True, db_required=True, is_prefix=True),
+          auth_required=True, db_required=True, is_prefix=True,
+          pattern='/api/hypechat/flows/{flow_id}'),
     Route('GET', '/api/hypechat/flows', 'handle_api_hypechat_flows_list',
           auth_required=True, db_required=True),
     Route('GET', '/api/hypechat/prompts', 'handle_api_hypechat_prompts_list',
@@ -241,11 +259,14 @@ POST_ROUTES: List[Route] = [
     
     # Campaigns (POST)
     Route('POST', '/api/campaigns/', 'handle_api_campaign_submit',
-          db_required=True, is_prefix=True, contains='/submit'),
+          db_required=True, is_prefix=True, contains='/submit',
+          pattern='/api/campaigns/{campaign_id}'),
     Route('POST', '/api/campaigns/', 'handle_api_campaign_update',
-          auth_required=True, db_required=True, is_prefix=True, contains='/update'),
+          auth_required=True, db_required=True, is_prefix=True, contains='/update',
+          pattern='/api/campaigns/{campaign_id}'),
     Route('POST', '/api/campaigns/', 'handle_api_campaign_delete',
-          auth_required=True, db_required=True, is_prefix=True, contains='/delete'),
+          auth_required=True, db_required=True, is_prefix=True, contains='/delete',
+          pattern='/api/campaigns/{campaign_id}'),
     Route('POST', '/api/campaigns', 'handle_api_campaigns_create',
           auth_required=True, db_required=True),
     
@@ -270,15 +291,20 @@ POST_ROUTES: List[Route] = [
     
     # Journeys
     Route('POST', '/api/journeys/', 'handle_api_journey_publish',
-          auth_required=True, db_required=True, is_prefix=True, contains='/publish'),
+          auth_required=True, db_required=True, is_prefix=True, contains='/publish',
+          pattern='/api/journeys/{journey_id}'),
     Route('POST', '/api/journeys/', 'handle_api_journey_stop',
-          auth_required=True, db_required=True, is_prefix=True, contains='/stop'),
+          auth_required=True, db_required=True, is_prefix=True, contains='/stop',
+          pattern='/api/journeys/{journey_id}'),
     Route('POST', '/api/journeys/', 'handle_api_journey_duplicate',
-          auth_required=True, db_required=True, is_prefix=True, contains='/duplicate'),
+          auth_required=True, db_required=True, is_prefix=True, contains='/duplicate',
+          pattern='/api/journeys/{journey_id}'),
     Route('POST', '/api/journeys/', 'handle_api_journey_lock',
-          auth_required=True, db_required=True, is_prefix=True, contains='/lock'),
+          auth_required=True, db_required=True, is_prefix=True, contains='/lock',
+          pattern='/api/journeys/{journey_id}'),
     Route('POST', '/api/journeys/', 'handle_api_journey_triggers',
-          auth_required=True, db_required=True, is_prefix=True, contains='/triggers'),
+          auth_required=True, db_required=True, is_prefix=True, contains='/triggers',
+          pattern='/api/journeys/{journey_id}'),
     Route('POST', '/api/journeys', 'handle_api_journey_create',
           auth_required=True, db_required=True),
     
@@ -330,15 +356,20 @@ POST_ROUTES: List[Route] = [
 
     # Hype Chat
     Route('POST', '/api/hypechat/flows/', 'handle_api_hypechat_flow_status',
-          auth_required=True, db_required=True, is_prefix=True, contains='/status'),
+          auth_required=True, db_required=True, is_prefix=True, contains='/status',
+          pattern='/api/hypechat/flows/{flow_id}'),
     Route('POST', '/api/hypechat/flows/', 'handle_api_hypechat_flow_trigger',
-          auth_required=True, db_required=True, is_prefix=True, contains='/trigger'),
+          auth_required=True, db_required=True, is_prefix=True, contains='/trigger',
+          pattern='/api/hypechat/flows/{flow_id}'),
     Route('POST', '/api/hypechat/flows/', 'handle_api_hypechat_flow_step_insert',
-          auth_required=True, db_required=True, is_prefix=True, contains='/steps/insert'),
+          auth_required=True, db_required=True, is_prefix=True, contains='/steps/insert',
+          pattern='/api/hypechat/flows/{flow_id}'),
     Route('POST', '/api/hypechat/flows/', 'handle_api_hypechat_flow_step_reorder',
-          auth_required=True, db_required=True, is_prefix=True, contains='/steps/reorder'),
+          auth_required=True, db_required=True, is_prefix=True, contains='/steps/reorder',
+          pattern='/api/hypechat/flows/{flow_id}'),
     Route('POST', '/api/hypechat/flows/', 'handle_api_hypechat_flow_step_create',
-          auth_required=True, db_required=True, is_prefix=True, contains='/steps'),
+          auth_required=True, db_required=True, is_prefix=True, contains='/steps',
+          pattern='/api/hypechat/flows/{flow_id}'),
     Route('POST', '/api/hypechat/flows', 'handle_api_hypechat_flow_create',
           auth_required=True, db_required=True),
     Route('POST', '/api/hypechat/prompts', 'handle_api_hypechat_prompt_create',
@@ -355,17 +386,22 @@ POST_ROUTES: List[Route] = [
 PUT_ROUTES: List[Route] = [
     # Journeys
     Route('PUT', '/api/journeys/', 'handle_api_journey_steps_set',
-          auth_required=True, db_required=True, is_prefix=True, contains='/steps'),
+          auth_required=True, db_required=True, is_prefix=True, contains='/steps',
+          pattern='/api/journeys/{journey_id}'),
     Route('PUT', '/api/journeys/', 'handle_api_journey_update',
-          auth_required=True, db_required=True, is_prefix=True),
+          auth_required=True, db_required=True, is_prefix=True,
+          pattern='/api/journeys/{journey_id}'),
 
     # Hype Chat
     Route('PUT', '/api/hypechat/prompts/', 'handle_api_hypechat_prompt_update',
-          auth_required=True, db_required=True, is_prefix=True),
+          auth_required=True, db_required=True, is_prefix=True,
+          pattern='/api/hypechat/prompts/{prompt_id}'),
     Route('PUT', '/api/hypechat/flows/', 'handle_api_hypechat_flow_step_update',
-          auth_required=True, db_required=True, is_prefix=True, contains='/steps/'),
+          auth_required=True, db_required=True, is_prefix=True, contains='/steps/',
+          pattern='/api/hypechat/flows/{flow_id}/steps/{step_id}'),
     Route('PUT', '/api/hypechat/flows/', 'handle_api_hypechat_flow_update',
-          auth_required=True, db_required=True, is_prefix=True),
+          auth_required=True, db_required=True, is_prefix=True,
+          pattern='/api/hypechat/flows/{flow_id}'),
 ]
 
 
@@ -376,19 +412,24 @@ PUT_ROUTES: List[Route] = [
 DELETE_ROUTES: List[Route] = [
     # Journeys
     Route('DELETE', '/api/journeys/', 'handle_api_journey_delete',
-          auth_required=True, db_required=True, is_prefix=True),
+          auth_required=True, db_required=True, is_prefix=True,
+          pattern='/api/journeys/{journey_id}'),
     
     # Connections
     Route('DELETE', '/api/connections/', 'handle_api_connection_delete',
-          auth_required=True, db_required=True, is_prefix=True),
+          auth_required=True, db_required=True, is_prefix=True,
+          pattern='/api/connections/{bot_role}'),
 
     # Hype Chat
     Route('DELETE', '/api/hypechat/prompts/', 'handle_api_hypechat_prompt_delete',
-          auth_required=True, db_required=True, is_prefix=True),
+          auth_required=True, db_required=True, is_prefix=True,
+          pattern='/api/hypechat/prompts/{prompt_id}'),
     Route('DELETE', '/api/hypechat/flows/', 'handle_api_hypechat_flow_step_delete',
-          auth_required=True, db_required=True, is_prefix=True, contains='/steps/'),
+          auth_required=True, db_required=True, is_prefix=True, contains='/steps/',
+          pattern='/api/hypechat/flows/{flow_id}/steps/{step_id}'),
     Route('DELETE', '/api/hypechat/flows/', 'handle_api_hypechat_flow_delete',
-          auth_required=True, db_required=True, is_prefix=True),
+          auth_required=True, db_required=True, is_prefix=True,
+          pattern='/api/hypechat/flows/{flow_id}'),
 ]
 
 
@@ -427,12 +468,22 @@ ADMIN_ROUTES: List[Route] = [
 # Combined routes for easy lookup
 ALL_ROUTES = GET_ROUTES + POST_ROUTES + PUT_ROUTES + DELETE_ROUTES + PAGE_ROUTES + AUTH_ROUTES + ADMIN_ROUTES
 
+# Route table searched for each HTTP method (order = precedence)
+ROUTE_TABLES: Dict[str, List[Route]] = {
+    'GET': GET_ROUTES + PAGE_ROUTES + ADMIN_ROUTES,
+    'POST': POST_ROUTES + AUTH_ROUTES,
+    'PUT': PUT_ROUTES,
+    'DELETE': DELETE_ROUTES,
+}
+
 
 def match_route(method: str, path: str, routes: List[Route]) -> Optional[Route]:
     """
     Find a matching route for the given method and path.
     
     Routes are checked in order, so more specific patterns should come first.
+    This is the reference linear scan; request dispatch uses the equivalent
+    compiled RouteIndex from get_route_index().
     
     Args:
         method: HTTP method ('GET' or 'POST')
@@ -459,6 +510,116 @@ def match_route(method: str, path: str, routes: List[Route]) -> Optional[Route]:
     return None
 
 
+@dataclass(frozen=True)
+class RouteMatch:
+    """A matched route plus the path params captured by its pattern."""
+    route: Route
+    params: Dict[str, Optional[str]] = field(default_factory=dict)
+
+
+@dataclass
+class _PrefixNode:
+    children: Dict[str, '_PrefixNode'] = field(default_factory=dict)
+    routes: List[Tuple[int, Route]] = field(default_factory=list)
+
+
+def _captures(pattern: Optional[str]) -> Tuple[Tuple[int, str], ...]:
+    """(segment index, name) pairs for each {name} in a route pattern."""
+    if not pattern:
+        return ()
+    return tuple(
+        (i, segment[1:-1]) for i, segment in enumerate(pattern.split('/'))
+        if segment.startswith('{') and segment.endswith('}')
+    )
+
+
+class RouteIndex:
+    """
+    Compiled form of a route table.
+    
+    - Exact routes: dict keyed by (method, path)
+    - Prefix routes ending in '/': trie over path segments
+    - Other prefix routes: small linear fallback
+    
+    Every route keeps its position in the source table, and match() returns
+    the lowest-positioned candidate, so results are identical to match_route()
+    scanning the same list.
+    """
+    
+    def __init__(self, routes: List[Route]):
+        self._exact: Dict[Tuple[str, str], Tuple[int, Route]] = {}
+        self._tries: Dict[str, _PrefixNode] = {}
+        self._loose: Dict[str, List[Tuple[int, Route]]] = {}
+        self._captures: Dict[int, Tuple[Tuple[int, str], ...]] = {}
+        
+        for order, route in enumerate(routes):
+            self._captures[id(route)] = _captures(route.pattern)
+            if not route.is_prefix:
+                self._exact.setdefault((route.method, route.path), (order, route))
+            elif route.path.endswith('/'):
+                node = self._tries.setdefault(route.method, _PrefixNode())
+                for segment in route.path.split('/')[:-1]:
+                    node = node.children.setdefault(segment, _PrefixNode())
+                node.routes.append((order, route))
+            else:
+                self._loose.setdefault(route.method, []).append((order, route))
+    
+    def _best_prefix(self, method: str, path: str, segments: List[str]) -> Optional[Tuple[int, Route]]:
+        best = None
+        node = self._tries.get(method)
+        # A prefix 'a/b/' matches when 'a', 'b' are leading segments and more follow
+        for depth, segment in enumerate(segments[:-1]):
+            if node is None:
+                break
+            node = node.children.get(segment)
+            if node is None:
+                break
+            for order, route in node.routes:
+                if best is not None and order > best[0]:
+                    break
+                if not route.contains or route.contains in path:
+                    best = (order, route)
+                    break
+        for order, route in self._loose.get(method, ()):
+            if best is not None and order > best[0]:
+                break
+            if path.startswith(route.path) and (not route.contains or route.contains in path):
+                best = (order, route)
+                break
+        return best
+    
+    def match(self, method: str, path: str) -> Optional[RouteMatch]:
+        """Find the route for method + path and capture its path params."""
+        segments = path.split('/')
+        best = self._exact.get((method, path))
+        prefix = self._best_prefix(method, path, segments)
+        if prefix is not None and (best is None or prefix[0] < best[0]):
+            best = prefix
+        if best is None:
+            return None
+        
+        route = best[1]
+        params = {
+            name: (segments[i] if i < len(segments) else None)
+            for i, name in self._captures[id(route)]
+        }
+        return RouteMatch(route, params)
+
+
+_route_indexes: Optional[Dict[str, RouteIndex]] = None
+_route_indexes_lock = threading.Lock()
+
+
+def get_route_index(method: str) -> RouteIndex:
+    """Compiled index for an HTTP method's route table (built once per process)."""
+    global _route_indexes
+    if _route_indexes is None:
+        with _route_indexes_lock:
+            if _route_indexes is None:
+                _route_indexes = {m: RouteIndex(routes) for m, routes in ROUTE_TABLES.items()}
+    return _route_indexes.get(method) or RouteIndex([])
+
+
 def validate_routes(handler_class) -> None:
     """
     Validate that all route handlers exist on the handler class.
@@ -0,0 +1,48 @@
+"""
+HTTP server bootstrap: picks the serving mode from SERVER_MODE.
+
+- threaded (default): socketserver.ThreadingTCPServer, one thread per connection
+- pooled: api.pooled_server.PooledHTTPServer (fixed webhook/dashboard worker
+  pools, 503 + Retry-After when saturated)
+- async: api.async_server.AsyncHTTPServer (keep-alive, bounded concurrency,
+  graceful shutdown)
+
+NO side effects at import time.
+"""
+import asyncio
+import socketserver
+
+from core.config import Config
+from core.logging import get_logger
+
+logger = get_logger(__name__)
+
+SERVER_MODES = ('threaded', 'pooled', 'async')
+
+
+def serve_forever(handler_class, port: int, host: str = '0.0.0.0', directory: str = '.'):
+    """Serve handler_class on host:port until interrupted."""
+    mode = Config.get_server_mode()
+    if mode not in SERVER_MODES:
+        logger.warning(f"Unknown SERVER_MODE '{mode}', falling back to threaded")
+        mode = 'threaded'
+
+    if mode == 'async':
+        from api.async_server import AsyncHTTPServer
+        server = AsyncHTTPServer(handler_class, host, port, directory=directory)
+        print(f"Server running at http://{host}:{port}/ (async)")
+        asyncio.run(server.serve_forever())
+        return
+
+    if mode == 'pooled':
+        from api.pooled_server import PooledHTTPServer
+        with PooledHTTPServer((host, port), handler_class) as httpd:
+            lanes = ', '.join(f"{name}={lane.workers}" for name, lane in httpd.lanes.items())
+            print(f"Server running at http://{host}:{port}/ (pooled: {lanes})")
+            httpd.serve_forever()
+        return
+
+    socketserver.TCPServer.allow_reuse_address = True
+    with socketserver.ThreadingTCPServer((host, port), handler_class) as httpd:
+        print(f"Server running at http://{host}:{port}/")
+        httpd.serve_forever()
@@ -2,10 +2,20 @@
 Indicator utilities for signal generation
 Wraps Twelve Data API calls with rate limiting
 Uses asyncio for non-blocking operations
+
+When the shared candle store is enabled, indicator values are read from the
+incremental IndicatorEngine for (symbol, timeframe) instead of being fetched
+one by one: the engine advances once per bar for every tenant reading it.
 """
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
 from forex_api import twelve_data_client
+from indicator_config import get_engine_specs, extract_indicator_value
+
+TREND_EMA_SPECS = {
+    'ema50': ('ema', {'time_period': 50}),
+    'ema200': ('ema', {'time_period': 200}),
+}
 
 
 class IndicatorUtils:
@@ -33,6 +43,64 @@ class IndicatorUtils:
         """Get current price"""
         return self.api.get_price(self.symbol)
     
+    def get_engine(self, timeframe='15min', specs=None):
+        """
+        Get the shared incremental IndicatorEngine for this symbol/timeframe.
+        
+        Args:
+            timeframe: Candle interval
+            specs: {key: (api_indicator, api_params)} (default: indicator_config registry)
+        
+        Returns:
+            IndicatorEngine or None if the candle store is disabled/unavailable
+        """
+        store = getattr(self.api, 'candle_store', None)
+        if store is None:
+            return None
+        return store.get_engine(self.symbol, timeframe, specs or get_engine_specs())
+    
+    def get_current_values(self, timeframe='15min', indicator_keys=None):
+        """
+        Current scalar indicator values from the incremental engine (no recompute).
+        
+        Returns:
+            dict: {indicator_key: value} for registry indicators with a value,
+                  or None if the engine is unavailable
+        """
+        engine = self.get_engine(timeframe)
+        if engine is None:
+            return None
+        
+        values = engine.values()
+        keys = indicator_keys if indicator_keys is not None else values.keys()
+        current = {}
+        for key in keys:
+            value = extract_indicator_value(key, values.get(key))
+            if value is not None:
+                current[key] = value
+        return current
+    
+    def _get_all_from_engine(self, timeframe):
+        """get_all_indicators() payload built from incremental engines, or None"""
+        engine = self.get_engine(timeframe)
+        trend_engine = self.get_engine('1h', TREND_EMA_SPECS)
+        if engine is None or trend_engine is None:
+            return None
+        
+        values = engine.values()
+        trend = trend_engine.values()
+        return {
+            'price': self.api.get_price(self.symbol),
+            'rsi': values.get('rsi'),
+            'macd': values.get('macd'),
+            'atr': values.get('atr'),
+            'adx': values.get('adx'),
+            'bbands': values.get('bollinger'),
+            'stoch': values.get('stochastic'),
+            'ema50': trend.get('ema50'),
+            'ema200': trend.get('ema200'),
+        }
+    
     def get_rsi(self, timeframe='15min', period=14):
         """Get RSI value"""
         return self.fetch_with_rate_limit(self.api.get_rsi, self.symbol, timeframe)
@@ -67,6 +135,13 @@ class IndicatorUtils:
         Returns dict with all indicator values or None if any failed
         """
         try:
+            loop = asyncio.get_event_loop()
+            local = await loop.run_in_executor(self._executor, self._get_all_from_engine, timeframe)
+            if local and all(local.values()):
+                local['trend_bullish'] = local['ema50'] > local['ema200']
+                local['trend_bearish'] = local['ema50'] < local['ema200']
+                return local
+            
             price = await self.fetch_with_rate_limit(self.api.get_price, self.symbol)
             rsi = await self.fetch_with_rate_limit(self.api.get_rsi, self.symbol, timeframe)
             macd = await self.fetch_with_rate_limit(self.api.get_macd, self.symbol, timeframe)
@@ -6,7 +6,7 @@ and enforces 5-hour auto-close
 import os
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any, List
-from forex_api import twelve_data_client
+from integrations.market_data.price_feed import get_price_feed
 from core.pip_calculator import calculate_pips as calc_pips, PIPS_MULTIPLIER
 from db import (
     get_open_signal, 
@@ -31,9 +31,9 @@ class PriceMonitor:
         self.check_interval_minutes = 5
     
     def get_current_price(self) -> Optional[float]:
-        """Get current market price"""
+        """Get current market price (shared per-symbol price feed)"""
         try:
-            return twelve_data_client.get_price(self.symbol)
+            return get_price_feed().get_price(self.symbol)
         except Exception as e:
             print(f"[MONITOR] Error fetching price: {e}")
             return None
@@ -14,6 +14,7 @@ import threading
 import asyncio
 
 from core.app_context import AppContext
+from core.db_pool import SCHEDULER, set_pool_role
 from core.logging import configure_logging, get_logger
 
 _started = False
@@ -126,6 +127,8 @@ def start_app(ctx: AppContext) -> None:
             logger.info("Initializing coupon bot webhook...")
             telegram_bot.start_webhook_bot(ctx.coupon_bot_token)
             logger.info("Coupon bot webhook started")
+            from telegram_image_gen import discover_fonts
+            logger.info(f"Coupon image fonts resolved: {discover_fonts()}")
         except Exception as e:
             logger.exception("Coupon bot startup failed")
     
@@ -141,6 +144,7 @@ def start_app(ctx: AppContext) -> None:
                 if ctx.forex_scheduler_available:
                     from workers.scheduler import start_forex_scheduler
                     def run_forex_scheduler():
+                        set_pool_role(SCHEDULER)
                         loop = asyncio.new_event_loop()
                         asyncio.set_event_loop(loop)
                         try:
@@ -166,6 +170,27 @@ def start_app(ctx: AppContext) -> None:
                 except Exception as e:
                     logger.exception("Cross promo worker startup failed")
 
+                try:
+                    from core.telegram_outbox import start_outbox_worker
+                    start_outbox_worker()
+                    logger.info("Telegram outbox worker started")
+                except Exception as e:
+                    logger.exception("Telegram outbox worker startup failed")
+
+                try:
+                    from domains.broadcasts.engine import start_resume_sweeper
+                    start_resume_sweeper()
+                    logger.info("Broadcast resume sweeper started")
+                except Exception as e:
+                    logger.exception("Broadcast resume sweeper startup failed")
+
+                try:
+                    from workers.usage_rollups import start_usage_compactor
+                    start_usage_compactor()
+                    logger.info("Bot usage rollup compactor started")
+                except Exception as e:
+                    logger.exception("Bot usage rollup compactor startup failed")
+
                 telethon_auto_connect = os.environ.get('TELETHON_AUTO_CONNECT', 'true').lower()
                 if telethon_auto_connect == 'false':
                     logger.info("Telethon auto-connect disabled (TELETHON_AUTO_CONNECT=false)")
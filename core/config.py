@@ -13,6 +13,66 @@ class Config:
     def get_port():
         return int(os.environ.get('PORT', 5000))
     
+    @staticmethod
+    def get_server_mode():
+        """HTTP serving mode: 'threaded' (default), 'pooled' or 'async'."""
+        return os.environ.get('SERVER_MODE', 'threaded').strip().lower()
+    
+    @staticmethod
+    def get_http_max_concurrency():
+        """Max requests handled at once by the async server."""
+        return int(os.environ.get('HTTP_MAX_CONCURRENCY', 32))
+    
+    @staticmethod
+    def get_http_max_body_bytes():
+        """Largest accepted request body; bigger requests get 413."""
+        return int(os.environ.get('HTTP_MAX_BODY_BYTES', 25 * 1024 * 1024))
+    
+    @staticmethod
+    def get_http_keepalive_timeout():
+        """Seconds an idle keep-alive connection stays open."""
+        return float(os.environ.get('HTTP_KEEPALIVE_TIMEOUT', 15))
+    
+    @staticmethod
+    def get_http_shutdown_grace_seconds():
+        """Seconds in-flight requests get to finish on shutdown."""
+        return float(os.environ.get('HTTP_SHUTDOWN_GRACE_SECONDS', 20))
+    
+    @staticmethod
+    def get_http_workers():
+        """Worker threads for dashboard/API requests in pooled mode."""
+        return int(os.environ.get('HTTP_WORKERS', 16))
+    
+    @staticmethod
+    def get_http_webhook_workers():
+        """Worker threads reserved for webhook requests in pooled mode."""
+        return int(os.environ.get('HTTP_WEBHOOK_WORKERS', 4))
+    
+    @staticmethod
+    def get_http_accept_queue():
+        """Connections allowed to wait per lane before shedding with 503."""
+        return int(os.environ.get('HTTP_ACCEPT_QUEUE', 64))
+    
+    @staticmethod
+    def get_http_retry_after_seconds():
+        """Retry-After sent with 503 when the server is saturated."""
+        return int(os.environ.get('HTTP_RETRY_AFTER_SECONDS', 5))
+    
+    @staticmethod
+    def get_render_workers():
+        """Image render worker processes (0 renders in-process)."""
+        return int(os.environ.get('RENDER_WORKERS', 2))
+    
+    @staticmethod
+    def get_render_queue_size():
+        """Render jobs allowed to wait for a worker before new ones are rejected."""
+        return int(os.environ.get('RENDER_QUEUE_SIZE', 16))
+    
+    @staticmethod
+    def get_render_timeout_seconds():
+        """Time budget for one image render job."""
+        return float(os.environ.get('RENDER_TIMEOUT_SECONDS', 20))
+    
     @staticmethod
     def get_admin_password():
         return os.environ.get('ADMIN_PASSWORD')
@@ -41,10 +101,38 @@ class Config:
     def get_spaces_region():
         return os.environ.get('SPACES_REGION', 'lon1')
     
+    @staticmethod
+    def get_template_cache_max_bytes():
+        """Byte budget for decoded template images and parsed metadata."""
+        return int(os.environ.get('TEMPLATE_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+    
+    @staticmethod
+    def get_render_cache_max_bytes():
+        """Byte budget for rendered coupon PNGs."""
+        return int(os.environ.get('RENDER_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+    
+    @staticmethod
+    def get_template_cache_ttl_seconds():
+        """Max age of a cached template asset or render."""
+        return float(os.environ.get('TEMPLATE_CACHE_TTL_SECONDS', 3600))
+    
     @staticmethod
     def get_telegram_bot_token():
         return os.environ.get('TELEGRAM_BOT_TOKEN')
     
+    @staticmethod
+    def get_telegram_webhook_mode():
+        """'sync' handles bot updates before answering; 'ingest' answers first and queues them."""
+        return os.environ.get('TELEGRAM_WEBHOOK_MODE', 'sync').lower()
+    
+    @staticmethod
+    def get_telegram_webhook_workers():
+        return int(os.environ.get('TELEGRAM_WEBHOOK_WORKERS', 4))
+    
+    @staticmethod
+    def get_telegram_webhook_queue_size():
+        return int(os.environ.get('TELEGRAM_WEBHOOK_QUEUE_SIZE', 1000))
+    
     @staticmethod
     def is_replit_deployment():
         return os.environ.get('REPLIT_DEPLOYMENT') == '1'
@@ -85,6 +173,61 @@ class Config:
     def get_db_sslmode():
         return os.environ.get('DB_SSLMODE', 'require')
     
+    @staticmethod
+    def get_db_pool_http_max():
+        """Connections reserved for request handlers."""
+        return int(os.environ.get('DB_POOL_HTTP_MAX', 14))
+    
+    @staticmethod
+    def get_db_pool_scheduler_max():
+        """Connections reserved for schedulers and background workers."""
+        return int(os.environ.get('DB_POOL_SCHEDULER_MAX', 6))
+    
+    @staticmethod
+    def get_db_pool_acquire_timeout_seconds():
+        """How long getconn() waits for a free connection before failing."""
+        return float(os.environ.get('DB_POOL_ACQUIRE_TIMEOUT_SECONDS', 10))
+    
+    @staticmethod
+    def get_db_pool_max_age_seconds():
+        """Connections older than this are closed and replaced."""
+        return float(os.environ.get('DB_POOL_MAX_AGE_SECONDS', 1800))
+    
+    @staticmethod
+    def get_db_pool_health_check_idle_seconds():
+        """Connections idle longer than this get a SELECT 1 on checkout."""
+        return float(os.environ.get('DB_POOL_HEALTH_CHECK_IDLE_SECONDS', 30))
+    
+    @staticmethod
+    def get_webhook_secret_cache_ttl_seconds():
+        """How long the in-memory webhook secret index is trusted before reloading."""
+        return float(os.environ.get('WEBHOOK_SECRET_CACHE_TTL_SECONDS', 300))
+    
+    @staticmethod
+    def get_webhook_secret_recheck_seconds():
+        """How long a cached webhook secret is trusted before it is re-checked against the database."""
+        return float(os.environ.get('WEBHOOK_SECRET_RECHECK_SECONDS', 30))
+    
+    @staticmethod
+    def get_idempotency_retention_days():
+        """Days idempotency keys are kept (whole daily partitions are dropped after this)."""
+        return int(os.environ.get('IDEMPOTENCY_RETENTION_DAYS', 7))
+    
+    @staticmethod
+    def get_idempotency_lease_seconds():
+        """How long a Stripe event claim blocks redeliveries before another attempt may take it."""
+        return float(os.environ.get('IDEMPOTENCY_LEASE_SECONDS', 600))
+    
+    @staticmethod
+    def get_idempotency_lru_size():
+        """Recently seen idempotency keys answered from memory per process."""
+        return int(os.environ.get('IDEMPOTENCY_LRU_SIZE', 10000))
+    
+    @staticmethod
+    def get_db_prepared_statements():
+        """Use server-side PREPARE/EXECUTE for hot queries (disable behind transaction-mode poolers)."""
+        return os.environ.get('DB_PREPARED_STATEMENTS', '1') == '1'
+    
     @staticmethod
     def get_stripe_secret_key():
         return os.environ.get('STRIPE_SECRET_KEY') or os.environ.get('STRIPE_SECRET')
@@ -141,3 +284,76 @@ class Config:
         Format: https://<your-clerk-domain>/.well-known/jwks.json
         """
         return os.environ.get('CLERK_JWKS_URL')
+    
+    @staticmethod
+    def is_local_indicators_enabled():
+        """Compute indicators from the shared candle store instead of per-indicator API calls."""
+        return os.environ.get('MARKET_DATA_LOCAL_INDICATORS', 'true').lower() not in ('0', 'false', 'no')
+    
+    @staticmethod
+    def get_candle_store_max_bars():
+        return int(os.environ.get('CANDLE_STORE_MAX_BARS', 1000))
+    
+    @staticmethod
+    def get_candle_store_ttl_seconds():
+        return int(os.environ.get('CANDLE_STORE_TTL_SECONDS', 60))
+    
+    @staticmethod
+    def get_price_feed_max_age_seconds():
+        """Ticks younger than this are shared instead of re-fetched."""
+        return float(os.environ.get('PRICE_FEED_MAX_AGE_SECONDS', 4))
+    
+    @staticmethod
+    def get_price_feed_max_stale_seconds():
+        """Oldest tick served when the upstream price fetch fails."""
+        return float(os.environ.get('PRICE_FEED_MAX_STALE_SECONDS', 30))
+    
+    @staticmethod
+    def get_price_feed_poll_seconds():
+        """Background poll interval for subscribed symbols (0 = on-demand only)."""
+        return float(os.environ.get('PRICE_FEED_POLL_SECONDS', 0))
+    
+    @staticmethod
+    def get_scheduler_lease_ttl_seconds():
+        """Tenant lease / node heartbeat lifetime for --all-tenants --leases."""
+        return float(os.environ.get('SCHEDULER_LEASE_TTL_SECONDS', 60))
+    
+    @staticmethod
+    def get_scheduler_heartbeat_seconds():
+        """How often a lease-mode scheduler heartbeats and rebalances tenants."""
+        return float(os.environ.get('SCHEDULER_HEARTBEAT_SECONDS', 15))
+    
+    @staticmethod
+    def get_ai_max_concurrency():
+        """Max concurrent blocking AI (OpenAI) calls offloaded from the scheduler loop."""
+        return int(os.environ.get('AI_MAX_CONCURRENCY', 4))
+    
+    @staticmethod
+    def get_ai_timeout_seconds():
+        """Time budget for one offloaded AI generation."""
+        return float(os.environ.get('AI_TIMEOUT_SECONDS', 45))
+    
+    @staticmethod
+    def get_image_max_concurrency():
+        """Max concurrent image renders offloaded from the scheduler loop."""
+        return int(os.environ.get('IMAGE_MAX_CONCURRENCY', 2))
+    
+    @staticmethod
+    def get_image_timeout_seconds():
+        """Time budget for one offloaded image render."""
+        return float(os.environ.get('IMAGE_TIMEOUT_SECONDS', 20))
+    
+    @staticmethod
+    def get_llm_cache_ttl_seconds():
+        """How long an identical LLM completion is reused across tenants."""
+        return float(os.environ.get('LLM_CACHE_TTL_SECONDS', 900))
+    
+    @staticmethod
+    def get_llm_cache_max_entries():
+        """LRU bound on cached LLM completions."""
+        return int(os.environ.get('LLM_CACHE_MAX_ENTRIES', 512))
+    
+    @staticmethod
+    def get_llm_max_concurrency():
+        """Max concurrent upstream LLM requests per process."""
+        return int(os.environ.get('LLM_MAX_CONCURRENCY', 8))
@@ -0,0 +1,275 @@
+"""
+Database Connection Pool
+
+Thread-safe replacement for psycopg2.pool.SimpleConnectionPool, which is not
+safe to share between threads and raises PoolError the moment it runs out.
+The HTTP server threads and the background workers (forex scheduler, journey
+scheduler, crosspromo worker, broadcasts, rollups) all share one pool, so:
+
+- getconn() blocks up to an acquire timeout for a free connection, then
+  raises PoolTimeout (a PoolError, so existing handlers still catch it)
+- Connections are checked on checkout: closed ones are dropped, ones idle
+  longer than health_check_idle_seconds get a SELECT 1 first
+- Connections older than max_age_seconds are closed and replaced
+- Returned connections are rolled back if a transaction was left open
+- Capacity is split into sub-pools per role ('http', 'scheduler'), so a
+  busy scheduler cannot take every connection from request handlers and
+  vice versa. Background threads call set_pool_role(SCHEDULER) once; all
+  other code runs as HTTP
+- stats() reports size, in-use, waits, wait time, timeouts and recycling
+  per sub-pool
+
+getconn()/putconn()/closeall() keep psycopg2's pool signatures, so existing
+call sites work unchanged.
+
+NO side effects at import time.
+"""
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Optional
+
+from psycopg2 import extensions
+from psycopg2.pool import PoolError
+
+from core.logging import get_logger
+
+logger = get_logger(__name__)
+
+HTTP = 'http'
+SCHEDULER = 'scheduler'
+
+_role: ContextVar[str] = ContextVar('db_pool_role', default=HTTP)
+
+
+class PoolTimeout(PoolError):
+    """No connection became free within the acquire timeout."""
+
+
+def set_pool_role(role: str) -> None:
+    """Use the given sub-pool for the rest of this thread (call at thread start)."""
+    _role.set(role)
+
+
+def current_pool_role() -> str:
+    return _role.get()
+
+
+@contextmanager
+def pool_role(role: str):
+    """Use the given sub-pool inside the with block."""
+    token = _role.set(role)
+    try:
+        yield
+    finally:
+        _role.reset(token)
+
+
+class BoundedPool:
+    """Thread-safe pool of at most max_size connections made by connect()."""
+
+    def __init__(self, name: str, connect: Callable[[], object], max_size: int, min_size: int = 0,
+                 acquire_timeout: float = 10.0, max_age_seconds: float = 1800.0,
+                 health_check_idle_seconds: float = 30.0):
+        self.name = name
+        self.max_size = max(1, max_size)
+        self.acquire_timeout = acquire_timeout
+        self.max_age_seconds = max_age_seconds
+        self.health_check_idle_seconds = health_check_idle_seconds
+        self._connect = connect
+        self._cond = threading.Condition()
+        self._idle = deque()
+        self._born: Dict[int, float] = {}
+        self._size = 0
+        self._in_use = 0
+        self._closed = False
+        self.acquired = 0
+        self.waits = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.timeouts = 0
+        self.recycled = 0
+        self.health_check_failures = 0
+        for _ in range(min(min_size, self.max_size)):
+            conn = self._open()
+            self._size += 1
+            self._idle.append((conn, time.monotonic()))
+
+    def _open(self):
+        conn = self._connect()
+        self._born[id(conn)] = time.monotonic()
+        return conn
+
+    def _close(self, conn) -> None:
+        self._born.pop(id(conn), None)
+        try:
+            if not conn.closed:
+                conn.close()
+        except Exception as e:
+            logger.debug(f"[DB-POOL] {self.name}: close failed: {e}")
+
+    def _too_old(self, conn) -> bool:
+        return time.monotonic() - self._born.get(id(conn), 0.0) > self.max_age_seconds
+
+    def _usable(self, conn, idle_since: float) -> bool:
+        if conn.closed:
+            self.health_check_failures += 1
+            return False
+        if self._too_old(conn):
+            self.recycled += 1
+            return False
+        if time.monotonic() - idle_since > self.health_check_idle_seconds:
+            try:
+                cursor = conn.cursor()
+                cursor.execute("SELECT 1")
+                cursor.close()
+                conn.rollback()
+            except Exception as e:
+                self.health_check_failures += 1
+                logger.warning(f"[DB-POOL] {self.name}: dropping dead connection ({e})")
+                return False
+        return True
+
+    def getconn(self, timeout: Optional[float] = None):
+        """Check out a healthy connection, waiting up to timeout (default acquire_timeout)."""
+        budget = self.acquire_timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + budget
+        waited = False
+        while True:
+            with self._cond:
+                if self._closed:
+                    raise PoolError("connection pool is closed")
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        raise PoolTimeout(
+                            f"No '{self.name}' database connection free after {budget}s "
+                            f"({self._in_use}/{self.max_size} in use)"
+                        )
+                    waited = True
+                    self._cond.wait(remaining)
+                self._in_use += 1
+                if self._idle:
+                    conn, idle_since = self._idle.pop()
+                else:
+                    conn = None
+                    self._size += 1
+
+            if conn is None:
+                try:
+                    conn = self._open()
+                except Exception:
+                    self._release(None, discard=True)
+                    raise
+                break
+            if self._usable(conn, idle_since):
+                break
+            self._release(conn, discard=True)
+
+        elapsed = time.monotonic() - started
+        with self._cond:
+            self.acquired += 1
+            if waited:
+                self.waits += 1
+                self.wait_seconds_total += elapsed
+                self.wait_seconds_max = max(self.wait_seconds_max, elapsed)
+        return conn
+
+    def putconn(self, conn, close: bool = False) -> None:
+        """Return a checked-out connection (close=True drops it)."""
+        if id(conn) not in self._born:
+            raise PoolError("trying to put unkeyed connection")
+        discard = close or self._closed or conn.closed
+        if not discard:
+            status = conn.info.transaction_status
+            if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                discard = True
+            elif status != extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    conn.rollback()
+                except Exception:
+                    discard = True
+        if not discard and self._too_old(conn):
+            self.recycled += 1
+            discard = True
+        self._release(conn, discard)
+
+    def _release(self, conn, discard: bool) -> None:
+        with self._cond:
+            self._in_use -= 1
+            if discard:
+                self._size -= 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+        if discard and conn is not None:
+            self._close(conn)
+
+    def closeall(self) -> None:
+        with self._cond:
+            self._closed = True
+            idle, self._idle = list(self._idle), deque()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn, _ in idle:
+            self._close(conn)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                'max_size': self.max_size,
+                'size': self._size,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'acquired': self.acquired,
+                'waits': self.waits,
+                'wait_seconds_total': round(self.wait_seconds_total, 3),
+                'wait_seconds_max': round(self.wait_seconds_max, 3),
+                'timeouts': self.timeouts,
+                'recycled': self.recycled,
+                'health_check_failures': self.health_check_failures,
+            }
+
+
+class PartitionedPool:
+    """
+    One BoundedPool per role; getconn() picks the sub-pool of the calling
+    thread's role (see set_pool_role), putconn() returns to the owner.
+    """
+
+    def __init__(self, connect: Callable[[], object], limits: Dict[str, int],
+                 default_role: str = HTTP, min_size: int = 1, **options):
+        if default_role not in limits:
+            raise ValueError(f"No limit configured for default role '{default_role}'")
+        self.default_role = default_role
+        self.pools = {
+            role: BoundedPool(role, connect, size, min_size if role == default_role else 0, **options)
+            for role, size in limits.items()
+        }
+        self._owners: Dict[int, BoundedPool] = {}
+        self._lock = threading.Lock()
+
+    def getconn(self, key=None, role: Optional[str] = None, timeout: Optional[float] = None):
+        pool = self.pools.get(role or current_pool_role()) or self.pools[self.default_role]
+        conn = pool.getconn(timeout)
+        with self._lock:
+            self._owners[id(conn)] = pool
+        return conn
+
+    def putconn(self, conn=None, key=None, close: bool = False) -> None:
+        with self._lock:
+            pool = self._owners.pop(id(conn), None)
+        if pool is None:
+            raise PoolError("trying to put unkeyed connection")
+        pool.putconn(conn, close=close)
+
+    def closeall(self) -> None:
+        for pool in self.pools.values():
+            pool.closeall()
+
+    def stats(self) -> dict:
+        return {role: pool.stats() for role, pool in self.pools.items()}
@@ -0,0 +1,287 @@
+"""
+Idempotency Store - atomic claims for webhook and inbound-message dedupe.
+
+Stripe events and journey inbound messages are deduplicated through one
+table, idempotency_keys(scope, tenant_id, key, bucket, status, lease_until),
+range-partitioned by bucket (the database's CURRENT_DATE at claim time):
+
+- claim() is one round trip: under a per-key transaction advisory lock it
+  looks for a live row in the retention window ('done', or 'processing'
+  with an unexpired lease) and otherwise inserts today's row, returning
+  CLAIMED, DUPLICATE or IN_PROGRESS. Concurrent deliveries of the same key
+  cannot both get CLAIMED
+- claim(lease_seconds=None) records the key as done at once (fire-and-forget
+  dedupe); with a lease the caller finishes with complete() or release(),
+  and a crashed claimer's key becomes claimable again when the lease ends
+- A bounded in-process LRU answers repeat deliveries of keys this process
+  has completed (or is still processing) without touching the database
+- Daily partitions are created ahead of time and partitions older than the
+  retention window are dropped (maintain()), so old keys go away without
+  DELETE scans. A claim that finds no partition for today creates it and
+  retries once
+
+Raises IdempotencyUnavailable when the database cannot be used; callers
+decide whether to fail open (Stripe) or skip (journeys).
+
+NO side effects at import time.
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Iterable, List, Optional
+
+from psycopg2 import errors
+
+from core.config import Config
+from core.logging import get_logger
+
+logger = get_logger(__name__)
+
+CLAIMED = 'claimed'
+DUPLICATE = 'duplicate'
+IN_PROGRESS = 'in_progress'
+
+TABLE = 'idempotency_keys'
+_PARTITION = re.compile(r'^idempotency_keys_p(\d{8})$')
+
+_CLAIM_SQL = """
+    SELECT pg_advisory_xact_lock(hashtext(%(scope)s || ':' || %(tenant_id)s || ':' || %(key)s));
+    WITH prior AS (
+        SELECT status FROM idempotency_keys
+        WHERE scope = %(scope)s AND tenant_id = %(tenant_id)s AND key = %(key)s
+          AND bucket >= CURRENT_DATE - %(retention_days)s
+          AND (status = 'done' OR lease_until > NOW())
+        ORDER BY (status = 'done') DESC
+        LIMIT 1
+    ), taken AS (
+        INSERT INTO idempotency_keys (scope, tenant_id, key, bucket, status, lease_until)
+        SELECT %(scope)s, %(tenant_id)s, %(key)s, CURRENT_DATE, %(status)s,
+               NOW() + make_interval(secs => %(lease_seconds)s)
+        WHERE NOT EXISTS (SELECT 1 FROM prior)
+        ON CONFLICT (scope, tenant_id, key, bucket) DO UPDATE
+            SET status = EXCLUDED.status, lease_until = EXCLUDED.lease_until, claimed_at = NOW()
+        RETURNING status
+    )
+    SELECT (SELECT status FROM taken), (SELECT status FROM prior)
+"""
+
+_COMPLETE_SQL = """
+    INSERT INTO idempotency_keys (scope, tenant_id, key, bucket, status, lease_until)
+    VALUES (%s, %s, %s, CURRENT_DATE, 'done', NOW())
+    ON CONFLICT (scope, tenant_id, key, bucket) DO UPDATE
+        SET status = 'done', lease_until = NOW()
+"""
+
+_RELEASE_SQL = """
+    DELETE FROM idempotency_keys
+    WHERE scope = %s AND tenant_id = %s AND key = %s
+      AND status = 'processing' AND bucket >= CURRENT_DATE - %s
+"""
+
+
+class IdempotencyUnavailable(Exception):
+    """The idempotency table could not be read or written."""
+
+
+def partition_name(day: date) -> str:
+    return f"{TABLE}_p{day:%Y%m%d}"
+
+
+def expired_partitions(names: Iterable[str], today: date, retention_days: int) -> List[str]:
+    """Partition names whose whole day is older than the retention window."""
+    cutoff = today - timedelta(days=retention_days)
+    expired = []
+    for name in names:
+        match = _PARTITION.match(name)
+        if match and datetime.strptime(match.group(1), '%Y%m%d').date() < cutoff:
+            expired.append(name)
+    return sorted(expired)
+
+
+class IdempotencyStore:
+    """Atomic claim/complete/release of (scope, tenant_id, key) with an LRU front."""
+
+    def __init__(self, pool, retention_days: int = 7, lru_size: int = 10000):
+        self.pool = pool
+        self.retention_days = retention_days
+        self.lru_size = lru_size
+        self._recent: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.local_hits = 0
+        self.claims = 0
+        self.duplicates = 0
+
+    def _remember(self, entry: tuple, status: str, until: Optional[float] = None) -> None:
+        with self._lock:
+            self._recent[entry] = (status, until)
+            self._recent.move_to_end(entry)
+            while len(self._recent) > self.lru_size:
+                self._recent.popitem(last=False)
+
+    def _forget(self, entry: tuple) -> None:
+        with self._lock:
+            self._recent.pop(entry, None)
+
+    def _recall(self, entry: tuple) -> Optional[str]:
+        with self._lock:
+            cached = self._recent.get(entry)
+            if cached is None:
+                return None
+            status, until = cached
+            if until is not None and until <= time.monotonic():
+                del self._recent[entry]
+                return None
+            self._recent.move_to_end(entry)
+            self.local_hits += 1
+            return DUPLICATE if status == 'done' else IN_PROGRESS
+
+    def _execute(self, tenant_id: str, sql: str, params, fetch: bool = False):
+        if not self.pool or not self.pool.connection_pool:
+            raise IdempotencyUnavailable("Database pool not initialized")
+        try:
+            with self.pool.get_connection(tenant_id) as conn:
+                cursor = conn.cursor()
+                cursor.execute(sql, params)
+                row = cursor.fetchone() if fetch else None
+                conn.commit()
+                return row
+        except errors.CheckViolation:
+            raise
+        except Exception as e:
+            raise IdempotencyUnavailable(str(e)) from e
+
+    def _execute_with_partitions(self, tenant_id: str, sql: str, params, fetch: bool = False):
+        """_execute, creating the current partitions and retrying once if the row had none."""
+        try:
+            return self._execute(tenant_id, sql, params, fetch)
+        except errors.CheckViolation:
+            logger.info("[IDEMPOTENCY] No partition for today, creating partitions")
+        self.ensure_partitions()
+        try:
+            return self._execute(tenant_id, sql, params, fetch)
+        except errors.CheckViolation as e:
+            raise IdempotencyUnavailable(str(e)) from e
+
+    def claim(self, scope: str, tenant_id: str, key: str,
+              lease_seconds: Optional[float] = None) -> str:
+        """CLAIMED, DUPLICATE or IN_PROGRESS. lease_seconds=None records the key as done."""
+        entry = (scope, tenant_id, str(key))
+        local = self._recall(entry)
+        if local is not None:
+            return local
+
+        params = {
+            'scope': scope, 'tenant_id': tenant_id, 'key': str(key),
+            'retention_days': self.retention_days,
+            'status': 'processing' if lease_seconds else 'done',
+            'lease_seconds': lease_seconds or 0,
+        }
+        row = self._execute_with_partitions(tenant_id, _CLAIM_SQL, params, fetch=True)
+        taken, prior = row if row else (None, None)
+        if taken:
+            self.claims += 1
+            if lease_seconds:
+                self._remember(entry, 'processing', time.monotonic() + lease_seconds)
+            else:
+                self._remember(entry, 'done')
+            return CLAIMED
+        if prior == 'done':
+            self.duplicates += 1
+            self._remember(entry, 'done')
+            return DUPLICATE
+        return IN_PROGRESS
+
+    def complete(self, scope: str, tenant_id: str, key: str) -> None:
+        """Mark a claimed key done; later claims return DUPLICATE."""
+        entry = (scope, tenant_id, str(key))
+        self._execute_with_partitions(tenant_id, _COMPLETE_SQL, (scope, tenant_id, str(key)))
+        self._remember(entry, 'done')
+
+    def release(self, scope: str, tenant_id: str, key: str) -> None:
+        """Give up a claim (processing failed) so a redelivery can claim it again."""
+        self._forget((scope, tenant_id, str(key)))
+        self._execute(tenant_id, _RELEASE_SQL, (scope, tenant_id, str(key), self.retention_days))
+
+    def ensure_partitions(self, days_ahead: int = 2) -> List[str]:
+        """Create the daily partitions for today through today + days_ahead. Returns their names."""
+        if not self.pool or not self.pool.connection_pool:
+            raise IdempotencyUnavailable("Database pool not initialized")
+        try:
+            with self.pool.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT CURRENT_DATE")
+                today = cursor.fetchone()[0]
+                names = []
+                for offset in range(days_ahead + 1):
+                    day = today + timedelta(days=offset)
+                    name = partition_name(day)
+                    cursor.execute(
+                        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {TABLE} "
+                        "FOR VALUES FROM (%s) TO (%s)",
+                        (day, day + timedelta(days=1)),
+                    )
+                    names.append(name)
+                conn.commit()
+                return names
+        except Exception as e:
+            raise IdempotencyUnavailable(str(e)) from e
+
+    def drop_expired_partitions(self) -> List[str]:
+        """Drop partitions older than the retention window. Returns the dropped names."""
+        if not self.pool or not self.pool.connection_pool:
+            raise IdempotencyUnavailable("Database pool not initialized")
+        try:
+            with self.pool.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT child.relname, CURRENT_DATE FROM pg_inherits i
+                    JOIN pg_class child ON child.oid = i.inhrelid
+                    JOIN pg_class parent ON parent.oid = i.inhparent
+                    WHERE parent.relname = %s
+                """, (TABLE,))
+                rows = cursor.fetchall()
+                if not rows:
+                    return []
+                dropped = expired_partitions([name for name, _ in rows], rows[0][1], self.retention_days)
+                for name in dropped:
+                    cursor.execute(f"DROP TABLE IF EXISTS {name}")
+                conn.commit()
+        except Exception as e:
+            raise IdempotencyUnavailable(str(e)) from e
+        if dropped:
+            logger.info(f"[IDEMPOTENCY] Dropped {len(dropped)} expired partitions")
+        return dropped
+
+    def maintain(self) -> List[str]:
+        """Create upcoming partitions and drop expired ones. Returns the dropped names."""
+        self.ensure_partitions()
+        return self.drop_expired_partitions()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'recent': len(self._recent),
+                'local_hits': self.local_hits,
+                'claims': self.claims,
+                'duplicates': self.duplicates,
+            }
+
+
+_store: Optional[IdempotencyStore] = None
+_store_lock = threading.Lock()
+
+
+def get_idempotency_store() -> IdempotencyStore:
+    """Get or create the shared store over db.db_pool (sized from Config)."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            from db import db_pool
+            _store = IdempotencyStore(
+                db_pool,
+                retention_days=Config.get_idempotency_retention_days(),
+                lru_size=Config.get_idempotency_lru_size(),
+            )
+        return _store
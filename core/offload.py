@@ -0,0 +1,202 @@
+"""
+Run blocking AI and image work off the event loop, and measure loop lag.
+
+The scheduler's price monitor ticks every 5 seconds on the same event loop
+as message generation. OpenAI calls (forex_ai.*) and PIL rendering
+(showcase.generate_trade_win_image) are synchronous and take seconds, so
+they are run through a bounded executor instead:
+
+    message = await run_ai(generate_timeout_message, signal_id=..., ...)
+    image = await run_image(generate_trade_win_image, trades)
+
+- Each kind has its own fixed-size thread pool (AI_MAX_CONCURRENCY,
+  IMAGE_MAX_CONCURRENCY), so a burst of generations queues instead of
+  spawning threads or starving the other kind
+- The call runs in a copy of the caller's context, so ContextVars such as
+  the DB pool role and the tenant logging context carry over to the thread
+- Each call has a time budget (AI_TIMEOUT_SECONDS, IMAGE_TIMEOUT_SECONDS);
+  on timeout the caller gets OffloadTimeout and moves on (the worker thread
+  finishes in the background, it cannot be interrupted)
+- LoopLagMonitor samples how late the loop wakes up from a short sleep;
+  get_loop_lag_stats() exposes the last/max/average lag per loop
+
+NO side effects at import time (pools and monitors are created lazily).
+"""
+import asyncio
+import contextvars
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from core.config import Config
+from core.logging import get_logger
+
+logger = get_logger(__name__)
+
+LOOP_LAG_INTERVAL = 0.5
+LOOP_LAG_WARN_SECONDS = 1.0
+
+
+class OffloadTimeout(TimeoutError):
+    """An offloaded call exceeded its time budget."""
+
+
+class BlockingPool:
+    """Fixed-size thread pool with a per-call timeout and simple counters."""
+
+    def __init__(self, name: str, max_workers: int, timeout: float):
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.timeouts = 0
+        self.errors = 0
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=f"offload-{self.name}")
+            return self._executor
+
+    async def run(self, fn: Callable, *args, timeout: Optional[float] = None, **kwargs):
+        """Await fn(*args, **kwargs) on the pool; raises OffloadTimeout after the budget."""
+        loop = asyncio.get_running_loop()
+        budget = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        self.in_flight += 1
+        try:
+            # run_in_executor does not copy ContextVars (unlike asyncio.to_thread)
+            call = functools.partial(contextvars.copy_context().run, fn, *args, **kwargs)
+            future = loop.run_in_executor(self.executor, call)
+            result = await asyncio.wait_for(future, budget)
+            self.completed += 1
+            return result
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            name = getattr(fn, '__name__', repr(fn))
+            logger.warning(f"[OFFLOAD] {self.name}:{name} exceeded {budget}s budget")
+            raise OffloadTimeout(f"{name} exceeded {budget}s")
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            logger.debug(f"[OFFLOAD] {self.name} call took {time.monotonic() - started:.2f}s")
+
+    def stats(self) -> dict:
+        return {
+            'max_workers': self.max_workers,
+            'in_flight': self.in_flight,
+            'completed': self.completed,
+            'timeouts': self.timeouts,
+            'errors': self.errors,
+        }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+
+_pools: Dict[str, BlockingPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(name: str) -> BlockingPool:
+    """Shared pool by name ('ai' or 'image'), sized from Config on first use."""
+    with _pools_lock:
+        pool = _pools.get(name)
+        if pool is None:
+            if name == 'ai':
+                pool = BlockingPool('ai', Config.get_ai_max_concurrency(), Config.get_ai_timeout_seconds())
+            elif name == 'image':
+                pool = BlockingPool('image', Config.get_image_max_concurrency(), Config.get_image_timeout_seconds())
+            else:
+                raise ValueError(f"Unknown offload pool '{name}'")
+            _pools[name] = pool
+        return pool
+
+
+async def run_ai(fn: Callable, *args, timeout: Optional[float] = None, **kwargs):
+    """Run a blocking AI generation (e.g. forex_ai.generate_*) off the loop."""
+    return await get_pool('ai').run(fn, *args, timeout=timeout, **kwargs)
+
+
+async def run_image(fn: Callable, *args, timeout: Optional[float] = None, **kwargs):
+    """Run a blocking image render off the loop."""
+    return await get_pool('image').run(fn, *args, timeout=timeout, **kwargs)
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes from a fixed sleep."""
+
+    def __init__(self, name: str, interval: float = LOOP_LAG_INTERVAL,
+                 warn_threshold: float = LOOP_LAG_WARN_SECONDS):
+        self.name = name
+        self.interval = interval
+        self.warn_threshold = warn_threshold
+        self.last = 0.0
+        self.max = 0.0
+        self.avg = 0.0
+        self.samples = 0
+        self.task: Optional[asyncio.Task] = None
+
+    def record(self, lag: float) -> None:
+        lag = max(0.0, lag)
+        self.last = lag
+        self.max = max(self.max, lag)
+        self.samples += 1
+        # Exponentially weighted so the average tracks recent behaviour
+        self.avg = lag if self.samples == 1 else self.avg * 0.9 + lag * 0.1
+        if lag >= self.warn_threshold:
+            logger.warning(f"[LOOP-LAG] {self.name} event loop blocked for {lag:.2f}s")
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self.record(loop.time() - started - self.interval)
+
+    def stats(self) -> dict:
+        return {
+            'last_seconds': round(self.last, 4),
+            'max_seconds': round(self.max, 4),
+            'avg_seconds': round(self.avg, 4),
+            'samples': self.samples,
+        }
+
+
+_monitors: Dict[str, LoopLagMonitor] = {}
+
+
+def ensure_loop_lag_monitor(name: str) -> LoopLagMonitor:
+    """
+    Start a LoopLagMonitor for the running loop, registered under name.
+
+    Idempotent per loop: if this loop is already monitored (under any name),
+    that monitor is returned, so every tenant runner on a shared loop can call it.
+    """
+    loop = asyncio.get_running_loop()
+    for monitor in _monitors.values():
+        if monitor.task is not None and not monitor.task.done() and monitor.task.get_loop() is loop:
+            return monitor
+    monitor = LoopLagMonitor(name)
+    monitor.task = loop.create_task(monitor.run(), name=f"loop-lag:{name}")
+    _monitors[name] = monitor
+    return monitor
+
+
+def get_loop_lag_stats() -> dict:
+    """Loop-lag metrics for every monitored loop plus offload pool counters."""
+    return {
+        'loops': {name: monitor.stats() for name, monitor in _monitors.items()},
+        'pools': {name: pool.stats() for name, pool in _pools.items()},
+    }
@@ -0,0 +1,170 @@
+"""
+Query Layer - prepared statements and compiled row mappers for hot queries.
+
+The forex monitor reads the same wide SELECTs every few seconds per tenant.
+Two helpers cut the per-call cost:
+
+- PreparedStatement: the SQL is PREPAREd once per connection (tracked in a
+  weak registry, so recycled connections simply prepare again) and then run
+  with EXECUTE, skipping parse/plan. If the server has lost the statement
+  (e.g. a pooler ran DISCARD ALL) it is prepared again and retried once.
+  DB_PREPARED_STATEMENTS=0 falls back to plain execute (use behind
+  transaction-mode poolers)
+- RowMapper: a table's columns with their conversions (float, isoformat,
+  defaults). for_columns(cols) returns the column list plus two functions
+  compiled once per column set: row -> dict and row -> slotted record. The
+  record supports record.field, record['field'] and record.get('field').
+
+Callers pass only the columns they need; each column set gets its own
+statement and mappers.
+
+    mapper = RowMapper('ForexSignal', [('id', RAW), ('entry_price', FLOAT)])
+    cols, to_dict, to_record = mapper.for_columns(('id',))
+
+NO side effects at import time.
+"""
+import hashlib
+import threading
+import weakref
+from typing import Callable, Iterable, Optional, Sequence, Tuple
+
+from psycopg2 import errors
+
+from core.config import Config
+from core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Conversion templates; {0} is the row item
+RAW = "{0}"
+FLOAT = "float({0}) if {0} else None"
+ISO = "{0}.isoformat() if {0} else None"
+
+
+def default(value) -> str:
+    """Conversion: the value, or `value` when it is falsy."""
+    return "{0} or " + repr(value)
+
+
+_prepared: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_prepared_lock = threading.Lock()
+
+
+def _prepared_on(conn) -> set:
+    with _prepared_lock:
+        names = _prepared.get(conn)
+        if names is None:
+            names = _prepared[conn] = set()
+        return names
+
+
+class PreparedStatement:
+    """SQL with %s placeholders, PREPAREd once per connection and run with EXECUTE."""
+
+    def __init__(self, name: str, sql: str):
+        self.name = name
+        self.sql = sql
+        parts = sql.split('%s')
+        self.param_count = len(parts) - 1
+        numbered = parts[0] + ''.join(f"${i}{part}" for i, part in enumerate(parts[1:], start=1))
+        self.prepare_sql = f"PREPARE {name} AS {numbered}"
+        if self.param_count:
+            self.execute_sql = f"EXECUTE {name} ({', '.join(['%s'] * self.param_count)})"
+        else:
+            self.execute_sql = f"EXECUTE {name}"
+
+    def execute(self, cursor, params: Sequence = ()):
+        """Run on cursor. A retry after a lost statement rolls back the current transaction."""
+        if not Config.get_db_prepared_statements():
+            cursor.execute(self.sql, params)
+            return cursor
+        names = _prepared_on(cursor.connection)
+        if self.name not in names:
+            cursor.execute(self.prepare_sql)
+            names.add(self.name)
+        try:
+            cursor.execute(self.execute_sql, params)
+        except errors.InvalidSqlStatementName:
+            logger.info(f"[QUERY] Prepared statement {self.name} missing on server, preparing again")
+            cursor.connection.rollback()
+            names.clear()
+            cursor.execute(self.prepare_sql)
+            names.add(self.name)
+            cursor.execute(self.execute_sql, params)
+        return cursor
+
+
+class Record:
+    """Base for generated slotted records; also readable like a dict."""
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key, fallback=None):
+        return getattr(self, key, fallback)
+
+    def __contains__(self, key) -> bool:
+        return hasattr(self, key)
+
+    def keys(self):
+        return [name for name in self.__slots__ if hasattr(self, name)]
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.keys()}
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Record):
+            other = other.to_dict()
+        return self.to_dict() == other
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class RowMapper:
+    """Columns of one table with their conversions; compiles mappers per column set."""
+
+    def __init__(self, name: str, columns: Iterable[Tuple[str, str]]):
+        self.name = name
+        self.columns = tuple(columns)
+        self.conversions = dict(self.columns)
+        self.all_columns = tuple(column for column, _ in self.columns)
+        self._compiled = {}
+        self._lock = threading.Lock()
+
+    def for_columns(self, columns: Optional[Sequence[str]] = None) -> Tuple[Tuple[str, ...], Callable, Callable]:
+        """(columns, row -> dict, row -> record) for columns (default: all). Raises ValueError on unknown names."""
+        key = self.all_columns if columns is None else tuple(columns)
+        compiled = self._compiled.get(key)
+        if compiled is None:
+            unknown = [column for column in key if column not in self.conversions]
+            if unknown or not key:
+                raise ValueError(f"Unknown {self.name} columns: {unknown or 'none requested'}")
+            with self._lock:
+                compiled = self._compiled.get(key)
+                if compiled is None:
+                    compiled = self._compiled[key] = (key,) + self._compile(key)
+        return compiled
+
+    def statement_name(self, prefix: str, columns: Sequence[str]) -> str:
+        """Stable statement name for a query shape and column set."""
+        digest = hashlib.md5(','.join(columns).encode()).hexdigest()[:10]
+        return f"{prefix}_{digest}"
+
+    def _compile(self, columns: Tuple[str, ...]):
+        values = [self.conversions[column].format(f"row[{i}]") for i, column in enumerate(columns)]
+        record_type = type(f"{self.name}Record", (Record,), {'__slots__': columns})
+        dict_source = "def to_dict(row):\n    return {" + ", ".join(
+            f"{column!r}: {value}" for column, value in zip(columns, values)
+        ) + "}\n"
+        record_source = "def to_record(row):\n    record = _new(_cls)\n" + "".join(
+            f"    record.{column} = {value}\n" for column, value in zip(columns, values)
+        ) + "    return record\n"
+        namespace = {'_new': object.__new__, '_cls': record_type}
+        exec(dict_source, namespace)
+        exec(record_source, namespace)
+        return namespace['to_dict'], namespace['to_record']
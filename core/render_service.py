@@ -0,0 +1,211 @@
+"""
+Render Service - CPU-bound Pillow rendering on a process pool.
+
+Coupon images (telegram_image_gen) and showcase images
+(showcase.trade_win_generator) are pure CPU work. On threads they hold the
+GIL and slow down HTTP/webhook handling in the same process, so they are
+rendered in worker processes instead:
+
+    png = get_render_service().render(render_promo_png, slug, variant, url, code, box, max_px, color, version)
+    png = await get_render_service().render_async(render_trade_win_png, trades)
+
+- Workers are started with 'spawn' and warmed by an initializer that
+  resolves fonts and loads the showcase arrow asset; each worker keeps its
+  own template asset cache, keyed on the template version the parent sends
+  with every job (workers never see the parent's invalidations)
+- Jobs return PNG bytes
+- At most RENDER_WORKERS jobs run and RENDER_QUEUE_SIZE wait; beyond that
+  render() raises RenderQueueFull immediately rather than queueing unbounded
+- Each job has a time budget (RENDER_TIMEOUT_SECONDS) -> RenderTimeout
+- RENDER_WORKERS=0 renders in-process (async callers go through
+  core.offload's image pool)
+
+A broken pool (worker crash) is replaced on the next job.
+
+NO side effects at import time (the pool starts on first use).
+"""
+import asyncio
+import io
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, List, Optional
+
+from core.config import Config
+from core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class RenderQueueFull(RuntimeError):
+    """Every worker is busy and the job queue is full."""
+
+
+class RenderTimeout(TimeoutError):
+    """A render job exceeded its time budget."""
+
+
+def _warm_worker() -> None:
+    """Process-pool initializer: load fonts and assets once per worker."""
+    from telegram_image_gen import discover_fonts
+    from showcase.trade_win_generator import warm_assets
+    discover_fonts()
+    warm_assets()
+
+
+def render_promo_png(slug: str, variant: str, image_url: str, coupon_code: str,
+                     box=None, max_font_px=None, font_color=None, template_version: str = '') -> bytes:
+    """Render a coupon image to PNG bytes (runs in a worker)."""
+    from telegram_image_gen import generate_promo_image, load_image_from_url_or_path
+    from domains.coupons import template_cache
+    base_image = template_cache.get_base_image(slug, variant, image_url, load_image_from_url_or_path,
+                                               template_version)
+    image = generate_promo_image(
+        template_image_url=image_url,
+        coupon_code=coupon_code,
+        box=box,
+        max_font_px=max_font_px,
+        font_color=font_color,
+        logo_url=None,
+        variant=variant,
+        template_image=base_image
+    )
+    bio = io.BytesIO()
+    image.save(bio, format='PNG')
+    return bio.getvalue()
+
+
+def render_trade_win_png(trades: List) -> bytes:
+    """Render a showcase trade-win image to PNG bytes (runs in a worker)."""
+    from showcase.trade_win_generator import generate_trade_win_image
+    return generate_trade_win_image(trades)
+
+
+class RenderService:
+    """Bounded process pool for render jobs."""
+
+    def __init__(self, workers: int, queue_size: int, timeout: float):
+        self.workers = max(0, workers)
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max(1, self.workers + max(0, queue_size)))
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_warm_worker,
+                )
+                logger.info(f"[RENDER] Started {self.workers} render workers")
+            return self._executor
+
+    def _reset_executor(self, broken: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._executor is broken:
+                self._executor = None
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, fn: Callable[..., bytes], *args) -> Future:
+        """Queue a job; raises RenderQueueFull when workers and queue are all taken."""
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise RenderQueueFull("Render queue is full")
+        executor = self._get_executor()
+        try:
+            future = executor.submit(fn, *args)
+        except BrokenProcessPool:
+            logger.warning("[RENDER] Process pool broken, restarting")
+            self._reset_executor(executor)
+            try:
+                future = self._get_executor().submit(fn, *args)
+            except Exception:
+                self._slots.release()
+                raise
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def _finish(self, future: Future) -> bytes:
+        try:
+            result = future.result(timeout=0)
+        except BrokenProcessPool:
+            executor = self._executor
+            if executor is not None:
+                self._reset_executor(executor)
+            raise
+        self.completed += 1
+        return result
+
+    def render(self, fn: Callable[..., bytes], *args, timeout: Optional[float] = None) -> bytes:
+        """Run a render job and wait for its PNG bytes (blocking)."""
+        if self.workers == 0:
+            return fn(*args)
+        budget = self.timeout if timeout is None else timeout
+        future = self.submit(fn, *args)
+        try:
+            future.result(timeout=budget)
+        except FutureTimeout:
+            future.cancel()
+            self.timeouts += 1
+            raise RenderTimeout(f"Render exceeded {budget}s")
+        except Exception:
+            pass
+        return self._finish(future)
+
+    async def render_async(self, fn: Callable[..., bytes], *args, timeout: Optional[float] = None) -> bytes:
+        """Await a render job without blocking the event loop."""
+        budget = self.timeout if timeout is None else timeout
+        if self.workers == 0:
+            from core.offload import run_image
+            return await run_image(fn, *args, timeout=budget)
+        future = self.submit(fn, *args)
+        try:
+            await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), budget)
+        except asyncio.TimeoutError:
+            future.cancel()
+            self.timeouts += 1
+            raise RenderTimeout(f"Render exceeded {budget}s")
+        except Exception:
+            pass
+        return self._finish(future)
+
+    def stats(self) -> dict:
+        return {
+            'workers': self.workers,
+            'completed': self.completed,
+            'rejected': self.rejected,
+            'timeouts': self.timeouts,
+        }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+_service: Optional[RenderService] = None
+_service_lock = threading.Lock()
+
+
+def get_render_service() -> RenderService:
+    """Get or create the shared render service (sized from Config)."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = RenderService(
+                workers=Config.get_render_workers(),
+                queue_size=Config.get_render_queue_size(),
+                timeout=Config.get_render_timeout_seconds(),
+            )
+        return _service
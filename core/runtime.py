@@ -67,6 +67,7 @@ class TenantRuntime:
         self._milestone_tracker: Optional[Any] = None
         self._twelve_data_client: Optional[Any] = None
         self._db_module: Optional[Any] = None
+        self.latest_ticks: Dict[str, Any] = {}
         
         logger.debug(f"TenantRuntime initialized for tenant: {tenant_id}")
     
@@ -144,22 +145,39 @@ class TenantRuntime:
         return self._milestone_tracker
     
     def get_price_client(self):
-        """Get the Twelve Data price client."""
+        """
+        Get the shared price feed (exposes get_price(symbol) like TwelveDataClient).
+        
+        Prices come from the process-wide PriceFeedService, so all tenants on a
+        symbol share one upstream fetch per staleness window.
+        """
         if self._twelve_data_client is None:
-            from forex_api import twelve_data_client
-            self._twelve_data_client = twelve_data_client
+            from integrations.market_data.price_feed import get_price_feed
+            self._twelve_data_client = get_price_feed()
         return self._twelve_data_client
     
-    def get_forex_signals(self, status: Optional[str] = None, limit: int = 10) -> list:
+    def subscribe_prices(self, symbol: str) -> None:
+        """Receive ticks for symbol from the shared price feed into latest_ticks."""
+        self.get_price_client().subscribe(symbol, self)
+    
+    def on_price_tick(self, tick) -> None:
+        """PriceFeed subscriber callback."""
+        self.latest_ticks[tick.symbol] = tick
+    
+    def get_forex_signals(self, status: Optional[str] = None, limit: int = 10,
+                          columns: Optional[tuple] = None, as_records: bool = False) -> list:
         """
         Get forex signals for this tenant.
         
-        Ensures tenant_id is always passed.
+        Ensures tenant_id is always passed. columns/as_records narrow the
+        fetch for read-only callers (see db.get_forex_signals).
         """
         return self.db.get_forex_signals(
             status=status,
             limit=limit,
-            tenant_id=self.tenant_id
+            tenant_id=self.tenant_id,
+            columns=columns,
+            as_records=as_records
         )
     
     def update_forex_signal_status(self, signal_id: int, status: str, pips: float, exit_price: float):
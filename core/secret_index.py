@@ -0,0 +1,186 @@
+"""
+Secret Index - in-memory secret -> record lookup for webhook authentication.
+
+Webhook requests are authenticated by a secret (URL path or header). Looking
+it up in Postgres on every update puts a query in front of every webhook, so
+the whole secret table is loaded into a dict keyed by sha256(secret) and
+served from memory:
+
+- Keys are hashes, so plaintext secrets are never kept as dictionary keys
+- invalidate() (called by the writers in this process) drops the index;
+  the next lookup reloads it
+- The index also expires after ttl_seconds, so changes made by another
+  process are picked up
+- With a verifier, a hit whose entry is older than recheck_seconds is
+  re-checked with one point lookup before it is trusted again, so a secret
+  deleted or rotated by another process stops working within
+  recheck_seconds instead of ttl_seconds
+- A miss reloads at most once per miss_refresh_seconds, so a secret created
+  by another process works at once, while garbage secrets cannot turn into
+  a reload per request
+- Loads and rechecks run outside the lock and single-flight: one thread
+  queries while others wait for its load, or keep using the cached entry
+  while it rechecks
+
+NO side effects at import time.
+"""
+import hashlib
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+def hash_secret(secret: str) -> str:
+    return hashlib.sha256(secret.encode()).hexdigest()
+
+
+class _Flight:
+    """An index load in progress; callers that need it meanwhile wait for its result."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[BaseException] = None
+
+
+class SecretIndex:
+    """Lazily loaded {sha256(secret): record} map."""
+
+    def __init__(self, name: str, loader: Callable[[], Iterable[Tuple[str, Any]]],
+                 ttl_seconds: float = 300.0, miss_refresh_seconds: float = 5.0,
+                 verifier: Optional[Callable[[str, Any], Optional[Any]]] = None,
+                 recheck_seconds: float = 30.0):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.miss_refresh_seconds = miss_refresh_seconds
+        self.recheck_seconds = recheck_seconds
+        self._loader = loader
+        self._verifier = verifier
+        self._index: Optional[Dict[str, Any]] = None
+        self._loaded_at = 0.0
+        self._verified: Dict[str, float] = {}
+        self._generation = 0
+        self._loading: Optional[_Flight] = None
+        self._rechecking = set()
+        # Guards the fields above; never held across a loader or verifier query
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.rechecks = 0
+
+    def _reload(self) -> Dict[str, Any]:
+        """Load the index; concurrent callers share one loader query."""
+        with self._lock:
+            flight = self._loading
+            if flight is not None:
+                leader = False
+            else:
+                leader = True
+                flight = self._loading = _Flight()
+                generation = self._generation
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            index = dict(self._loader())
+            with self._lock:
+                # An invalidate() during the query means it may predate that write
+                if self._generation == generation:
+                    self._index = index
+                    self._loaded_at = time.monotonic()
+                    self._verified = {}
+                self.loads += 1
+            logger.debug(f"[SECRET-INDEX] {self.name}: loaded {len(index)} secrets")
+            flight.result = index
+            return index
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._loading = None
+            flight.done.set()
+
+    def _recheck(self, index: Dict[str, Any], secret_hash: str, record: Any) -> Optional[Any]:
+        """
+        Current record for a hit older than recheck_seconds (None if deleted or rotated).
+
+        One caller per secret runs the verifier; others keep getting the cached
+        record until it answers.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if (now - self._verified.get(secret_hash, self._loaded_at) <= self.recheck_seconds
+                    or secret_hash in self._rechecking):
+                return record
+            self._rechecking.add(secret_hash)
+            self.rechecks += 1
+        try:
+            current = self._verifier(secret_hash, record)
+        except Exception as e:
+            # Keep serving the cached record; try again after another recheck_seconds
+            logger.warning(f"[SECRET-INDEX] {self.name}: recheck failed, using cached secret: {e}")
+            current = record
+        with self._lock:
+            self._rechecking.discard(secret_hash)
+            if index is not self._index:
+                # Reloaded meanwhile; the new index is authoritative
+                return current
+            if current is None:
+                index.pop(secret_hash, None)
+                self._verified.pop(secret_hash, None)
+            else:
+                index[secret_hash] = current
+                self._verified[secret_hash] = now
+        if current is None:
+            logger.info(f"[SECRET-INDEX] {self.name}: dropped a secret that no longer exists")
+        return current
+
+    def lookup_hash(self, secret_hash: str) -> Optional[Any]:
+        with self._lock:
+            index = self._index
+            now = time.monotonic()
+            expired = index is None or now - self._loaded_at > self.ttl_seconds
+            record = None if expired else index.get(secret_hash)
+            refresh_miss = now - self._loaded_at > self.miss_refresh_seconds
+        if expired or (record is None and refresh_miss):
+            index = self._reload()
+            with self._lock:
+                record = index.get(secret_hash)
+        elif record is not None and self._verifier is not None:
+            record = self._recheck(index, secret_hash, record)
+        with self._lock:
+            if record is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return record
+
+    def lookup(self, secret: str) -> Optional[Any]:
+        """Record for a plaintext secret, or None. Loader errors propagate."""
+        if not secret:
+            return None
+        return self.lookup_hash(hash_secret(secret))
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._index = None
+            self._generation += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'secrets': len(self._index) if self._index is not None else None,
+                'hits': self.hits,
+                'misses': self.misses,
+                'loads': self.loads,
+                'rechecks': self.rechecks,
+            }
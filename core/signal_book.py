@@ -0,0 +1,182 @@
+"""
+Array-backed book of open signals with a vectorized TP/SL/timeout evaluator.
+
+monitor_active_signals used to re-parse floats, posted_at and TP percentages
+for every pending signal on every tick. OpenSignalBook parses them ONCE into
+NumPy columns and is only rebuilt when the pending signals change
+(see OpenSignalBook.key). evaluate(price) then produces boolean event masks
+for the whole book in one pass, reproducing the sequential rules:
+
+- timeout: open >= 4 hours; excludes every other event
+- tp1: TP1 not yet hit and reached; closes the signal when it is the only TP
+- tp2: TP1 already hit, TP2 set, not yet hit and reached; closes a 2-TP signal
+- tp3: TP2 already hit, TP3 set, not yet hit and reached; always closes
+- sl: effective (or original) SL reached and not closed by a TP above
+- breakeven: TP1 not hit (before or now), breakeven not set and >= 70% of the
+  way to TP1
+
+Books for several tenants on the same symbol can be merged and evaluated
+against one price together. NO side effects at import time.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+SIGNAL_TIMEOUT_HOURS = 4
+BREAKEVEN_PROGRESS_PCT = 70
+
+_FLOAT_COLUMNS = ('entry', 'tp1', 'tp2', 'tp3', 'sl', 'original_sl', 'posted_ts')
+_BOOL_COLUMNS = ('is_buy', 'has_effective_sl', 'tp1_hit', 'tp2_hit', 'tp3_hit', 'breakeven_set')
+_INT_COLUMNS = ('ids', 'tp1_pct', 'tp2_pct', 'tp3_pct')
+
+
+def _timestamp(value) -> float:
+    """Epoch seconds for a posted_at value (naive datetimes are UTC)."""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def signal_key(signal: dict) -> tuple:
+    """The fields the evaluator depends on; the book is rebuilt when any change."""
+    return (
+        signal['id'], signal['signal_type'], signal['entry_price'], signal['take_profit'],
+        signal.get('take_profit_2'), signal.get('take_profit_3'), signal['stop_loss'],
+        signal.get('effective_sl'), signal['posted_at'],
+        signal.get('tp1_hit') or signal.get('tp_hit_1'), signal.get('tp2_hit') or signal.get('tp_hit_2'),
+        signal.get('tp3_hit') or signal.get('tp_hit_3'),
+        signal.get('breakeven_set') or signal.get('breakeven_triggered'),
+        signal.get('tp1_percentage'), signal.get('tp2_percentage'), signal.get('tp3_percentage'),
+    )
+
+
+@dataclass
+class SignalEvents:
+    """Per-row event masks from OpenSignalBook.evaluate()."""
+    timeout: np.ndarray
+    tp1: np.ndarray
+    tp2: np.ndarray
+    tp3: np.ndarray
+    sl: np.ndarray
+    closed_on_tp: np.ndarray
+    breakeven: np.ndarray
+    hours_elapsed: np.ndarray
+
+    @property
+    def any(self) -> np.ndarray:
+        return self.timeout | self.tp1 | self.tp2 | self.tp3 | self.sl
+
+    def rows(self) -> np.ndarray:
+        """Indices of rows with at least one TP/SL/timeout event."""
+        return np.flatnonzero(self.any)
+
+
+class OpenSignalBook:
+    """Columnar snapshot of pending signals (one row per signal)."""
+
+    def __init__(self, signals: Iterable[dict] = (), tenant_id: Optional[str] = None):
+        signals = list(signals)
+        self.signals: List[dict] = signals
+        self.key = tuple(signal_key(s) for s in signals)
+        self.tenant_ids = np.array([s.get('tenant_id', tenant_id) for s in signals], dtype=object)
+
+        n = len(signals)
+        self.ids = np.fromiter((s['id'] for s in signals), dtype=np.int64, count=n)
+        self.is_buy = np.fromiter((s['signal_type'] == 'BUY' for s in signals), dtype=bool, count=n)
+        self.entry = np.fromiter((float(s['entry_price']) for s in signals), dtype=float, count=n)
+        self.tp1 = np.fromiter((float(s['take_profit']) for s in signals), dtype=float, count=n)
+        self.tp2 = np.fromiter((float(s.get('take_profit_2') or 0) for s in signals), dtype=float, count=n)
+        self.tp3 = np.fromiter((float(s.get('take_profit_3') or 0) for s in signals), dtype=float, count=n)
+        self.original_sl = np.fromiter((float(s['stop_loss']) for s in signals), dtype=float, count=n)
+        self.has_effective_sl = np.fromiter((bool(s.get('effective_sl')) for s in signals), dtype=bool, count=n)
+        self.sl = np.where(
+            self.has_effective_sl,
+            np.fromiter((float(s.get('effective_sl') or 0) for s in signals), dtype=float, count=n),
+            self.original_sl,
+        )
+        self.posted_ts = np.fromiter((_timestamp(s['posted_at']) for s in signals), dtype=float, count=n)
+        self.tp1_hit = np.fromiter((bool(s.get('tp1_hit') or s.get('tp_hit_1')) for s in signals), dtype=bool, count=n)
+        self.tp2_hit = np.fromiter((bool(s.get('tp2_hit') or s.get('tp_hit_2')) for s in signals), dtype=bool, count=n)
+        self.tp3_hit = np.fromiter((bool(s.get('tp3_hit') or s.get('tp_hit_3')) for s in signals), dtype=bool, count=n)
+        self.breakeven_set = np.fromiter(
+            (bool(s.get('breakeven_set') or s.get('breakeven_triggered')) for s in signals), dtype=bool, count=n
+        )
+        self.tp1_pct = np.fromiter((s.get('tp1_percentage') or 50 for s in signals), dtype=np.int64, count=n)
+        self.tp2_pct = np.fromiter((s.get('tp2_percentage') or 30 for s in signals), dtype=np.int64, count=n)
+        self.tp3_pct = np.fromiter((s.get('tp3_percentage') or 20 for s in signals), dtype=np.int64, count=n)
+
+    def __len__(self) -> int:
+        return len(self.signals)
+
+    def is_current(self, signals: Iterable[dict]) -> bool:
+        """True when `signals` would build an identical book."""
+        return self.key == tuple(signal_key(s) for s in signals)
+
+    @classmethod
+    def merge(cls, books: Iterable['OpenSignalBook']) -> 'OpenSignalBook':
+        """Concatenate books (e.g. every tenant on one symbol) into one."""
+        books = list(books)
+        merged = cls.__new__(cls)
+        merged.signals = [s for book in books for s in book.signals]
+        merged.key = tuple(k for book in books for k in book.key)
+        for column in ('tenant_ids',) + _FLOAT_COLUMNS + _BOOL_COLUMNS + _INT_COLUMNS:
+            parts = [getattr(book, column) for book in books]
+            setattr(merged, column, np.concatenate(parts) if parts else np.array([]))
+        return merged
+
+    def evaluate(self, price: float, now: Optional[datetime] = None) -> SignalEvents:
+        """Event masks for every row at `price` (now defaults to utcnow)."""
+        now_ts = _timestamp(now or datetime.utcnow())
+        hours_elapsed = (now_ts - self.posted_ts) / 3600
+        timeout = hours_elapsed >= SIGNAL_TIMEOUT_HOURS
+        live = ~timeout
+
+        def reached(target):
+            return np.where(self.is_buy, price >= target, price <= target)
+
+        has_tp2 = self.tp2 > 0
+        has_tp3 = self.tp3 > 0
+        tp_count = 1 + has_tp2.astype(int) + has_tp3.astype(int)
+
+        tp1 = live & ~self.tp1_hit & reached(self.tp1)
+        closed_tp1 = tp1 & (tp_count == 1)
+        tp2 = live & ~closed_tp1 & has_tp2 & self.tp1_hit & ~self.tp2_hit & reached(self.tp2)
+        closed_tp2 = tp2 & (tp_count == 2)
+        tp3 = live & ~closed_tp1 & ~closed_tp2 & has_tp3 & self.tp2_hit & ~self.tp3_hit & reached(self.tp3)
+        closed_on_tp = closed_tp1 | closed_tp2 | tp3
+
+        sl_reached = np.where(self.is_buy, price <= self.sl, price >= self.sl)
+        sl = live & ~closed_on_tp & sl_reached
+
+        tp1_distance = np.where(self.is_buy, self.tp1 - self.entry, self.entry - self.tp1)
+        moved = np.where(self.is_buy, price - self.entry, self.entry - price)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            progress = np.where(tp1_distance > 0, moved / tp1_distance * 100, 0.0)
+        breakeven = (live & ~tp1 & ~closed_on_tp & ~sl & ~self.tp1_hit & ~self.breakeven_set
+                     & (progress >= BREAKEVEN_PROGRESS_PCT))
+
+        return SignalEvents(
+            timeout=timeout, tp1=tp1, tp2=tp2, tp3=tp3, sl=sl,
+            closed_on_tp=closed_on_tp, breakeven=breakeven, hours_elapsed=hours_elapsed,
+        )
+
+
+def evaluate_books(books: Dict[str, OpenSignalBook], price: float,
+                   now: Optional[datetime] = None) -> Dict[str, SignalEvents]:
+    """Evaluate several tenants' books on the same symbol in one pass."""
+    tenants = list(books)
+    merged = OpenSignalBook.merge(books[t] for t in tenants)
+    events = merged.evaluate(price, now)
+    out = {}
+    start = 0
+    for tenant_id in tenants:
+        end = start + len(books[tenant_id])
+        out[tenant_id] = SignalEvents(**{
+            field: getattr(events, field)[start:end] for field in SignalEvents.__dataclass_fields__
+        })
+        start = end
+    return out
@@ -0,0 +1,481 @@
+"""
+Outbound Telegram rate shaping and durable send queue.
+
+Two layers, both keyed by bot token (Telegram limits apply per bot):
+
+- RateShaper: token buckets for the global limit (30 msg/s), each chat
+  (1 msg/s) and each group/channel (20 msg/min). Every send in
+  core/telegram_sender awaits RateShaper.acquire() before calling the API,
+  so inline sends (signal posts, TP celebrations) and queued sends share
+  one budget. When several senders wait on the global bucket the
+  lowest priority number goes first, so a signal post beats a broadcast.
+  A RetryAfter from Telegram blocks that chat for the requested time;
+  other chats keep sending.
+- telegram_outbound_queue: persistent queue for fire-and-forget sends
+  (broadcasts via domains/broadcasts, Messenger notifications via
+  telegram_sender.enqueue_to_channel). OutboxDispatcher claims due rows in
+  priority order (FOR UPDATE SKIP LOCKED + lease), delivers each chat's
+  rows in order through telegram_sender and reschedules failures, honoring
+  RetryAfter. Each row is marked as soon as it is delivered, and a claim
+  takes at most OUTBOX_MAX_ROWS_PER_CHAT rows per chat, so a batch finishes
+  well inside its lease. Final outcomes of broadcast rows are written back
+  to their broadcast job in the same transaction that marks the row.
+
+start_outbox_worker() runs a dispatcher for all tenants in a background
+thread (started on the worker leader); the multi-tenant
+scheduler also runs one for the tenants it serves. SKIP LOCKED keeps
+concurrent dispatchers from sending a row twice.
+
+NO side effects at import time.
+"""
+import asyncio
+import json
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Callable, Dict, Iterable, List, Optional
+
+from core.logging import get_logger
+
+logger = get_logger(__name__)
+
+PRIORITY_SIGNAL = 0
+PRIORITY_NOTIFICATION = 5
+PRIORITY_BROADCAST = 9
+
+GLOBAL_MESSAGES_PER_SECOND = 30
+CHAT_MESSAGES_PER_SECOND = 1
+GROUP_MESSAGES_PER_MINUTE = 20
+MAX_TRACKED_CHATS = 10000
+
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_LEASE_SECONDS = 300
+# A group chat drains 20 msg/min, so 10 rows take ~30s of the lease
+OUTBOX_MAX_ROWS_PER_CHAT = 10
+OUTBOX_POLL_SECONDS = 1.0
+OUTBOX_MAX_ATTEMPTS = 5
+# Telegram errors that will not succeed on retry (blocked, chat not found, bad request)
+PERMANENT_ERROR_CODES = (400, 403)
+
+
+def is_group_chat(chat_id) -> bool:
+    """Groups, supergroups and channels have negative chat ids."""
+    return str(chat_id).startswith('-')
+
+
+class TokenBucket:
+    """Classic token bucket; `rate` tokens per second up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def delay(self, now: float) -> float:
+        """Seconds until one token is available (0 when available now)."""
+        self._refill(now)
+        wait = max(0.0, self.blocked_until - now)
+        if self.tokens < 1:
+            wait = max(wait, (1 - self.tokens) / self.rate)
+        return wait
+
+    def take(self, now: float) -> None:
+        self._refill(now)
+        self.tokens -= 1
+
+    def block(self, until: float) -> None:
+        self.blocked_until = max(self.blocked_until, until)
+        self.tokens = min(self.tokens, 0)
+
+    def idle(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity and now >= self.blocked_until
+
+
+class RateShaper:
+    """Global, per-chat and per-group token buckets for one bot."""
+
+    def __init__(self, global_rate: float = GLOBAL_MESSAGES_PER_SECOND,
+                 chat_rate: float = CHAT_MESSAGES_PER_SECOND,
+                 group_per_minute: float = GROUP_MESSAGES_PER_MINUTE,
+                 clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self.chat_rate = chat_rate
+        self.group_rate = group_per_minute / 60.0
+        self.global_bucket = TokenBucket(global_rate, global_rate, clock())
+        self.chats: Dict[str, TokenBucket] = {}
+        self.groups: Dict[str, TokenBucket] = {}
+        self._global_waiters = Counter()
+        self._lock = threading.Lock()
+
+    def _chat_buckets(self, chat_id, now: float) -> List[TokenBucket]:
+        key = str(chat_id)
+        if len(self.chats) > MAX_TRACKED_CHATS:
+            self._prune(now)
+        buckets = [self.chats.setdefault(key, TokenBucket(self.chat_rate, 1, now))]
+        if is_group_chat(key):
+            buckets.append(self.groups.setdefault(key, TokenBucket(self.group_rate, 1, now)))
+        return buckets
+
+    def _prune(self, now: float) -> None:
+        for table in (self.chats, self.groups):
+            for key in [k for k, bucket in table.items() if bucket.idle(now)]:
+                del table[key]
+
+    def _try_acquire(self, chat_id, priority: int) -> tuple:
+        with self._lock:
+            now = self.clock()
+            chat_buckets = self._chat_buckets(chat_id, now)
+            chat_wait = max(bucket.delay(now) for bucket in chat_buckets)
+            if chat_wait > 0:
+                return chat_wait, False
+            global_wait = self.global_bucket.delay(now)
+            if global_wait == 0 and any(n and p < priority for p, n in self._global_waiters.items()):
+                global_wait = 1.0 / self.global_bucket.rate
+            if global_wait > 0:
+                return global_wait, True
+            for bucket in chat_buckets:
+                bucket.take(now)
+            self.global_bucket.take(now)
+            return 0.0, False
+
+    def try_acquire(self, chat_id, priority: int = PRIORITY_NOTIFICATION) -> float:
+        """
+        Take a send slot for chat_id if one is free now.
+
+        Returns 0 when the slot was taken, otherwise the seconds to wait
+        before trying again. Yields the global bucket to higher-priority
+        senders that are only waiting on it.
+        """
+        return self._try_acquire(chat_id, priority)[0]
+
+    async def acquire(self, chat_id, priority: int = PRIORITY_NOTIFICATION) -> None:
+        """Wait until chat_id may be sent to, then take the slot."""
+        registered = False
+        try:
+            while True:
+                wait, on_global = self._try_acquire(chat_id, priority)
+                if wait == 0:
+                    return
+                if on_global != registered:
+                    with self._lock:
+                        self._global_waiters[priority] += 1 if on_global else -1
+                    registered = on_global
+                await asyncio.sleep(wait)
+        finally:
+            if registered:
+                with self._lock:
+                    self._global_waiters[priority] -= 1
+
+    def penalize(self, chat_id, retry_after: float) -> None:
+        """Honor a Telegram RetryAfter: block that chat (not the whole bot)."""
+        with self._lock:
+            now = self.clock()
+            until = now + retry_after
+            for bucket in self._chat_buckets(chat_id, now):
+                bucket.block(until)
+
+
+_shapers: Dict[str, RateShaper] = {}
+_shapers_lock = threading.Lock()
+
+
+def get_rate_shaper(token: str) -> RateShaper:
+    """Shared RateShaper for a bot token (created on first use)."""
+    with _shapers_lock:
+        shaper = _shapers.get(token)
+        if shaper is None:
+            shaper = _shapers[token] = RateShaper()
+        return shaper
+
+
+def retry_after_seconds(error) -> float:
+    """RetryAfter.retry_after as seconds (int or timedelta depending on PTB version)."""
+    value = getattr(error, 'retry_after', 0) or 0
+    if hasattr(value, 'total_seconds'):
+        value = value.total_seconds()
+    return float(value)
+
+
+# ----------------------------------------------------------------------
+# Durable queue
+# ----------------------------------------------------------------------
+
+def _connection():
+    import db as db_module
+    if not db_module.db_pool or not db_module.db_pool.connection_pool:
+        raise RuntimeError("Database connection pool not initialized")
+    return db_module.db_pool.get_connection()
+
+
+def enqueue(tenant_id: str, bot_role: str, chat_id, payload: dict, kind: str = 'message',
+            priority: int = PRIORITY_BROADCAST, delay_seconds: float = 0) -> int:
+    """Persist one outbound send; returns the queue row id."""
+    return enqueue_many(tenant_id, bot_role, [(chat_id, payload)], kind, priority, delay_seconds)[0]
+
+
+def enqueue_many(tenant_id: str, bot_role: str, items: Iterable[tuple], kind: str = 'message',
+                 priority: int = PRIORITY_BROADCAST, delay_seconds: float = 0) -> List[int]:
+    """Persist many (chat_id, payload) sends in one statement; returns row ids in order."""
+    from psycopg2.extras import execute_values
+    rows = [
+        (tenant_id, bot_role, str(chat_id), kind, json.dumps(payload), priority, delay_seconds)
+        for chat_id, payload in items
+    ]
+    if not rows:
+        return []
+    with _connection() as conn:
+        cursor = conn.cursor()
+        ids = execute_values(cursor, """
+            INSERT INTO telegram_outbound_queue
+                (tenant_id, bot_role, chat_id, kind, payload, priority, not_before)
+            VALUES %s
+            RETURNING id
+        """, rows, template="(%s, %s, %s, %s, %s::jsonb, %s, NOW() + make_interval(secs => %s))",
+            fetch=True)
+        conn.commit()
+    return [row[0] for row in ids]
+
+
+def claim_due(tenant_ids: Optional[Iterable[str]], limit: int = OUTBOX_BATCH_SIZE,
+              lease_seconds: float = OUTBOX_LEASE_SECONDS,
+              per_chat: int = OUTBOX_MAX_ROWS_PER_CHAT) -> List[dict]:
+    """
+    Lease up to `limit` due rows for `tenant_ids` (None: every tenant), highest priority first.
+
+    At most `per_chat` rows are taken per chat; the rest stay pending for a
+    later claim. Rows stuck in 'sending' past their lease (crashed
+    dispatcher) are due again.
+    """
+    if tenant_ids is not None:
+        tenant_ids = sorted(set(tenant_ids))
+        if not tenant_ids:
+            return []
+    with _connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            WITH due AS (
+                SELECT id, tenant_id, bot_role, chat_id, priority FROM telegram_outbound_queue
+                WHERE (%s::text[] IS NULL OR tenant_id = ANY(%s))
+                  AND ((status = 'pending' AND not_before <= NOW())
+                       OR (status = 'sending' AND locked_until < NOW()))
+                ORDER BY priority, id
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            ), ranked AS (
+                SELECT id, ROW_NUMBER() OVER (
+                    PARTITION BY tenant_id, bot_role, chat_id ORDER BY priority, id
+                ) AS n
+                FROM due
+            )
+            UPDATE telegram_outbound_queue AS q
+            SET status = 'sending', attempts = q.attempts + 1,
+                locked_until = NOW() + make_interval(secs => %s)
+            FROM ranked
+            WHERE q.id = ranked.id AND ranked.n <= %s
+            RETURNING q.id, q.tenant_id, q.bot_role, q.chat_id, q.kind, q.payload, q.priority, q.attempts
+        """, (tenant_ids, tenant_ids, limit, lease_seconds, per_chat))
+        columns = ('id', 'tenant_id', 'bot_role', 'chat_id', 'kind', 'payload', 'priority', 'attempts')
+        rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        conn.commit()
+    for row in rows:
+        if isinstance(row['payload'], str):
+            row['payload'] = json.loads(row['payload'])
+    rows.sort(key=lambda r: (r['priority'], r['id']))
+    return rows
+
+
+def _settle_broadcasts(cursor, settled: Iterable[tuple]) -> None:
+    settled = list(settled)
+    if settled:
+        from domains.broadcasts import repo as broadcast_repo
+        broadcast_repo.record_outbox_results(settled, cursor=cursor)
+
+
+def mark_sent(results: Iterable[tuple], settled: Iterable[tuple] = ()) -> None:
+    """
+    Mark (id, tenant_id, message_id) rows as sent in one statement.
+
+    `settled` broadcast outcomes (see domains.broadcasts.repo.record_outbox_results)
+    are committed in the same transaction.
+    """
+    from psycopg2.extras import execute_values
+    results = list(results)
+    if not results:
+        return
+    with _connection() as conn:
+        cursor = conn.cursor()
+        execute_values(cursor, """
+            UPDATE telegram_outbound_queue AS q
+            SET status = 'sent', sent_at = NOW(), message_id = v.message_id,
+                locked_until = NULL, last_error = NULL
+            FROM (VALUES %s) AS v(id, tenant_id, message_id)
+            WHERE q.id = v.id AND q.tenant_id = v.tenant_id
+        """, results, template="(%s::bigint, %s, %s::bigint)")
+        _settle_broadcasts(cursor, settled)
+        conn.commit()
+
+
+def reschedule(row_id: int, tenant_id: str, delay_seconds: float, error: str) -> None:
+    """Put a claimed row back to pending, due again after delay_seconds."""
+    with _connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            UPDATE telegram_outbound_queue
+            SET status = 'pending', locked_until = NULL, last_error = %s,
+                not_before = NOW() + make_interval(secs => %s)
+            WHERE id = %s AND tenant_id = %s
+        """, (error, delay_seconds, row_id, tenant_id))
+        conn.commit()
+
+
+def mark_failed(row_id: int, tenant_id: str, error: str, settled: Iterable[tuple] = ()) -> None:
+    """Give up on a row, committing its `settled` broadcast outcome with it."""
+    with _connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            UPDATE telegram_outbound_queue
+            SET status = 'failed', locked_until = NULL, last_error = %s
+            WHERE id = %s AND tenant_id = %s
+        """, (error, row_id, tenant_id))
+        _settle_broadcasts(cursor, settled)
+        conn.commit()
+
+
+# ----------------------------------------------------------------------
+# Dispatcher
+# ----------------------------------------------------------------------
+
+class OutboxDispatcher:
+    """
+    Drains telegram_outbound_queue for the tenants this process serves.
+
+    `tenants` is called before each claim, so a scheduler node only sends
+    for the tenants it currently runs (and therefore for their bots);
+    tenants=None drains every tenant.
+    """
+
+    def __init__(self, tenants: Optional[Callable[[], Iterable[str]]], batch_size: int = OUTBOX_BATCH_SIZE,
+                 poll_interval: float = OUTBOX_POLL_SECONDS, max_attempts: int = OUTBOX_MAX_ATTEMPTS):
+        self.tenants = tenants
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.sent = 0
+        self.failed = 0
+
+    async def _send(self, row: dict):
+        from core import telegram_sender
+        payload = row['payload']
+        if row['kind'] == 'copy':
+            return await telegram_sender.copy_message(
+                tenant_id=row['tenant_id'],
+                bot_role=row['bot_role'],
+                from_chat_id=payload['from_chat_id'],
+                to_chat_id=row['chat_id'],
+                message_id=payload['message_id'],
+                priority=row['priority'],
+            )
+        return await telegram_sender.send_message(
+            tenant_id=row['tenant_id'],
+            bot_role=row['bot_role'],
+            chat_id=row['chat_id'],
+            text=payload['text'],
+            parse_mode=payload.get('parse_mode', 'HTML'),
+            disable_notification=payload.get('disable_notification', False),
+            priority=row['priority'],
+        )
+
+    async def _deliver_chat(self, rows: List[dict]) -> None:
+        """
+        Send one chat's rows in order; stop the chat at the first retry.
+
+        Each row is marked as soon as it is delivered, so a row is never
+        still 'sending' when its lease runs out after it was sent.
+        """
+        for index, row in enumerate(rows):
+            result = await self._send(row)
+            job_id = row['payload'].get('broadcast_job_id')
+            if result.success:
+                settled = [(job_id, row['tenant_id'], row['chat_id'], 'sent', None)] if job_id else []
+                await asyncio.to_thread(mark_sent, [(row['id'], row['tenant_id'], result.message_id)], settled)
+                self.sent += 1
+                continue
+
+            error = result.error or 'send failed'
+            if result.retry_after:
+                # Keep per-chat order: everything after this row waits too
+                for pending in rows[index:]:
+                    await asyncio.to_thread(reschedule, pending['id'], pending['tenant_id'], result.retry_after, error)
+                return
+            if result.error_code in PERMANENT_ERROR_CODES or row['attempts'] >= self.max_attempts:
+                status = 'blocked' if result.error_code == 403 else 'failed'
+                settled = [(job_id, row['tenant_id'], row['chat_id'], status, error)] if job_id else []
+                await asyncio.to_thread(mark_failed, row['id'], row['tenant_id'], error, settled)
+                self.failed += 1
+            else:
+                delay = min(300, 5 * 2 ** row['attempts'])
+                await asyncio.to_thread(reschedule, row['id'], row['tenant_id'], delay, error)
+
+    async def run_once(self) -> int:
+        """Claim and deliver one batch; returns the number of rows claimed."""
+        tenant_ids = list(self.tenants()) if self.tenants is not None else None
+        rows = await asyncio.to_thread(claim_due, tenant_ids, self.batch_size)
+        if not rows:
+            return 0
+        by_chat = defaultdict(list)
+        for row in rows:
+            by_chat[(row['tenant_id'], row['bot_role'], row['chat_id'])].append(row)
+
+        results = await asyncio.gather(
+            *(self._deliver_chat(chat_rows) for chat_rows in by_chat.values()),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error(f"Outbox delivery error: {result}")
+        return len(rows)
+
+    async def run(self) -> None:
+        """Dispatch until cancelled."""
+        logger.info("Telegram outbox dispatcher started")
+        while True:
+            try:
+                claimed = await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Outbox dispatch failed: {e}")
+                claimed = 0
+            if claimed < self.batch_size:
+                await asyncio.sleep(self.poll_interval)
+
+
+def start_outbox_worker() -> threading.Thread:
+    """Run an OutboxDispatcher for all tenants on a private event loop in a daemon thread."""
+    from core.db_pool import SCHEDULER, set_pool_role
+
+    async def _main():
+        from core.telegram_sender import close_bot_clients
+        try:
+            await OutboxDispatcher(tenants=None).run()
+        finally:
+            await close_bot_clients()
+
+    def _target():
+        set_pool_role(SCHEDULER)
+        try:
+            asyncio.run(_main())
+        except Exception as e:
+            logger.exception(f"Outbox worker error: {e}")
+
+    thread = threading.Thread(target=_target, daemon=True, name="telegram-outbox")
+    thread.start()
+    return thread
@@ -4,7 +4,7 @@ Telegram Send Infrastructure - Production-grade, tenant-isolated message sending
 This module provides the ONLY authorized way to send Telegram messages.
 All sends go through _send_message() which:
 1. Resolves fresh credentials from DB (with short TTL cache)
-2. Constructs a short-lived telegram.Bot per send
+2. Reuses a long-lived telegram.Bot per token (keep-alive HTTP pool)
 3. Handles failures gracefully with crisp logging
 4. Never falls back to a default bot - missing credentials = fail fast
 
@@ -12,23 +12,36 @@ Architecture:
 - _resolve_bot_connection(tenant_id, bot_role) -> connection dict with token, channel_id, etc.
 - _send_message(tenant_id, bot_role, chat_id, text, ...) -> sends message using fresh credentials
 - TTL cache (60s) prevents DB hammering during bursts while ensuring near-instant token updates
+- BotClientPool keeps one Bot per (event loop, token) so sends reuse warm TLS
+  connections; clients are shut down when the connection cache is invalidated
+  or the token for a tenant/role rotates
+- Every send waits on the bot's RateShaper (core/telegram_outbox) for
+  Telegram's global/per-chat/per-group limits and honors RetryAfter;
+  enqueue_message() persists fire-and-forget sends for the outbox dispatcher
 - send_message_sync() - sync wrapper for use in non-async contexts (e.g., scheduler, engine)
 """
 import asyncio
 import time
 import threading
 from dataclasses import dataclass
-from typing import Optional, Dict, Any, Union
+from typing import Optional, Dict, Any, Union, List, Tuple
 from telegram import Bot, InputFile
-from telegram.error import TelegramError
+from telegram.error import TelegramError, RetryAfter, Forbidden, BadRequest
+from telegram.request import HTTPXRequest
 import io
 
 from core.logging import get_logger
 from core.bot_credentials import get_bot_credentials, BotNotConfiguredError, SIGNAL_BOT, MESSAGE_BOT
+from core import telegram_outbox
+from core.telegram_outbox import PRIORITY_NOTIFICATION, PRIORITY_BROADCAST, get_rate_shaper, retry_after_seconds
 
 logger = get_logger(__name__)
 
 CACHE_TTL_SECONDS = 60
+BOT_POOL_CONNECTIONS = 16
+BOT_EVICT_GRACE_SECONDS = 5
+# Longest RetryAfter an inline send waits out itself before reporting failure
+MAX_INLINE_RETRY_AFTER = 30
 
 
 @dataclass
@@ -98,7 +111,132 @@ class ConnectionCache:
             self._cache.clear()
 
 
+@dataclass(frozen=True)
+class PooledBotClient:
+    """A pooled Bot and the HTTP request objects it sends through."""
+    bot: Bot
+    requests: Tuple[HTTPXRequest, ...]
+
+
+class BotClientPool:
+    """
+    Long-lived telegram.Bot clients keyed by (event loop, token).
+
+    httpx clients are bound to the loop that created them, so each loop gets
+    its own Bot per token. Entries for closed loops are dropped (and their
+    HTTP pools closed) on access. The pool also remembers which token each
+    tenant/role uses so a rotated or invalidated token's clients are shut down.
+
+    Bots are not initialize()d: that only adds a getMe round trip per new
+    client, and senders never read the bot's own profile. An invalid token
+    fails on its first send instead. Because Bot.shutdown() does nothing for
+    a bot that was never initialized, clients are closed through their
+    request objects.
+    """
+    
+    def __init__(self, connection_pool_size: int = BOT_POOL_CONNECTIONS):
+        self.connection_pool_size = connection_pool_size
+        self._bots: Dict[tuple, PooledBotClient] = {}
+        self._tokens: Dict[str, str] = {}
+        self._orphans: List[PooledBotClient] = []
+        self._lock = threading.Lock()
+    
+    def _new_client(self, token: str) -> PooledBotClient:
+        request = HTTPXRequest(connection_pool_size=self.connection_pool_size)
+        get_updates_request = HTTPXRequest(connection_pool_size=1)
+        bot = Bot(token=token, request=request, get_updates_request=get_updates_request)
+        return PooledBotClient(bot, (request, get_updates_request))
+    
+    @staticmethod
+    async def _shutdown(client: PooledBotClient) -> None:
+        try:
+            await asyncio.gather(*(request.shutdown() for request in client.requests))
+        except Exception as e:
+            logger.warning(f"Bot client shutdown failed: {e}")
+    
+    def _prune_closed_loops(self) -> List[PooledBotClient]:
+        pruned, self._orphans = self._orphans, []
+        for key in [k for k in self._bots if k[0].is_closed()]:
+            pruned.append(self._bots.pop(key))
+        return pruned
+    
+    async def get(self, token: str) -> Bot:
+        """Bot for token on the running loop (created on first use)."""
+        loop = asyncio.get_running_loop()
+        key = (loop, token)
+        with self._lock:
+            client = self._bots.get(key)
+        if client is not None:
+            return client.bot
+        
+        client = self._new_client(token)
+        with self._lock:
+            stale = self._prune_closed_loops()
+            existing = self._bots.setdefault(key, client)
+        if existing is not client:
+            stale.append(client)
+        # Clients of closed loops can't be closed on their own loop; closing
+        # them here still releases their pooled connections
+        for old in stale:
+            await self._shutdown(old)
+        return existing.bot
+    
+    def track(self, tenant_id: str, bot_role: str, token: str) -> None:
+        """Record the token for tenant/role; evict the previous one if it rotated."""
+        key = f"{tenant_id}:{bot_role}"
+        with self._lock:
+            previous = self._tokens.get(key)
+            self._tokens[key] = token
+        if previous and previous != token:
+            logger.info(f"Bot token rotated: tenant={tenant_id}, role={bot_role}")
+            self.evict_token(previous)
+    
+    def release(self, tenant_id: str, bot_role: str) -> None:
+        """Forget tenant/role and shut down its token's clients."""
+        with self._lock:
+            token = self._tokens.pop(f"{tenant_id}:{bot_role}", None)
+        if token:
+            self.evict_token(token)
+    
+    def evict_token(self, token: str) -> None:
+        """Remove every client for token and shut them down on their own loops."""
+        with self._lock:
+            evicted = [(key[0], self._bots.pop(key)) for key in list(self._bots) if key[1] == token]
+        for loop, client in evicted:
+            if loop.is_closed():
+                # Closed by the next get() on a live loop
+                with self._lock:
+                    self._orphans.append(client)
+            else:
+                self._schedule_shutdown(loop, client)
+    
+    @classmethod
+    def _schedule_shutdown(cls, loop, client: PooledBotClient) -> None:
+        async def _shutdown():
+            # Let sends already holding this client finish first.
+            await asyncio.sleep(BOT_EVICT_GRACE_SECONDS)
+            await cls._shutdown(client)
+        
+        try:
+            asyncio.run_coroutine_threadsafe(_shutdown(), loop)
+        except RuntimeError:
+            pass
+    
+    async def close_loop(self) -> None:
+        """Shut down every client owned by the running loop."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = [self._bots.pop(key) for key in list(self._bots) if key[0] is loop]
+        for client in clients:
+            await self._shutdown(client)
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._bots)
+
+
 _connection_cache = ConnectionCache()
+_bot_pool = BotClientPool()
 
 
 def _resolve_bot_connection(tenant_id: str, bot_role: str, force_refresh: bool = False) -> BotConnection:
@@ -149,6 +287,7 @@ def _resolve_bot_connection(tenant_id: str, bot_role: str, force_refresh: bool =
     )
     
     _connection_cache.set(connection)
+    _bot_pool.track(tenant_id, bot_role, connection.token)
     
     if bot_role == 'signal_bot':
         logger.info(
@@ -170,8 +309,20 @@ def invalidate_connection_cache(tenant_id: str, bot_role: str) -> None:
     """
     Explicitly invalidate cached connection after token update.
     Call this from Connections API when credentials are updated.
+    Also shuts down the pooled Bot clients for the old token.
     """
     _connection_cache.invalidate(tenant_id, bot_role)
+    _bot_pool.release(tenant_id, bot_role)
+
+
+async def get_bot(token: str) -> Bot:
+    """Pooled Bot for token on the running event loop."""
+    return await _bot_pool.get(token)
+
+
+async def close_bot_clients() -> None:
+    """Shut down pooled Bot clients owned by the running loop (call before it stops)."""
+    await _bot_pool.close_loop()
 
 
 @dataclass
@@ -181,6 +332,42 @@ class SendResult:
     message_id: Optional[int] = None
     error: Optional[str] = None
     error_code: Optional[int] = None
+    retry_after: Optional[float] = None
+
+
+async def _shaped_send(connection: BotConnection, chat_id, priority: int, call):
+    """
+    Run call(bot) once the bot's rate shaper allows a send to chat_id.
+
+    On RetryAfter the chat and bot are blocked for the requested time and
+    the send is retried once if the wait is short; otherwise it re-raises.
+    """
+    shaper = get_rate_shaper(connection.token)
+    bot = await _bot_pool.get(connection.token)
+    for attempt in range(2):
+        await shaper.acquire(chat_id, priority)
+        try:
+            return await call(bot)
+        except RetryAfter as e:
+            wait = retry_after_seconds(e)
+            shaper.penalize(chat_id, wait)
+            if attempt or wait > MAX_INLINE_RETRY_AFTER:
+                raise
+            logger.warning(
+                f"RATE LIMITED: tenant={connection.tenant_id}, role={connection.bot_role}, "
+                f"chat={chat_id}, retry_after={wait}s"
+            )
+
+
+def _telegram_error_result(e: TelegramError) -> SendResult:
+    if isinstance(e, RetryAfter):
+        return SendResult(success=False, error=e.message, error_code=429, retry_after=retry_after_seconds(e))
+    if isinstance(e, Forbidden):
+        # Bot blocked by the user / kicked from the chat
+        return SendResult(success=False, error=e.message, error_code=403)
+    if isinstance(e, BadRequest):
+        return SendResult(success=False, error=e.message, error_code=400)
+    return SendResult(success=False, error=e.message, error_code=getattr(e, 'error_code', None))
 
 
 async def send_message(
@@ -190,13 +377,14 @@ async def send_message(
     text: str,
     parse_mode: str = 'HTML',
     reply_to_message_id: Optional[int] = None,
-    disable_notification: bool = False
+    disable_notification: bool = False,
+    priority: int = PRIORITY_NOTIFICATION
 ) -> SendResult:
     """
     Send a Telegram message using fresh credentials.
     
     This is the SINGLE entrypoint for all Telegram sends.
-    Creates a short-lived Bot instance per send - no caching.
+    Credentials are re-resolved (TTL cache); the Bot client is pooled per token.
     
     Args:
         tenant_id: Tenant ID (required)
@@ -206,6 +394,7 @@ async def send_message(
         parse_mode: 'HTML' or 'Markdown'
         reply_to_message_id: Optional message to reply to
         disable_notification: Send silently
+        priority: Rate-shaper priority (lower goes first)
         
     Returns:
         SendResult with success status, message_id if sent, error details if failed
@@ -226,15 +415,13 @@ async def send_message(
         return SendResult(success=False, error=f"Credential resolution error: {e}")
     
     try:
-        bot = Bot(token=connection.token)
-        
-        sent = await bot.send_message(
+        sent = await _shaped_send(connection, chat_id, priority, lambda bot: bot.send_message(
             chat_id=chat_id,
             text=text,
             parse_mode=parse_mode,
             reply_to_message_id=reply_to_message_id,
             disable_notification=disable_notification
-        )
+        ))
         
         logger.info(
             f"SEND OK: tenant={tenant_id}, role={bot_role}, "
@@ -249,11 +436,7 @@ async def send_message(
             f"tenant={tenant_id}, role={bot_role}, bot={connection.bot_username}, "
             f"chat={chat_id}, error={e.message}"
         )
-        return SendResult(
-            success=False, 
-            error=e.message,
-            error_code=getattr(e, 'error_code', None)
-        )
+        return _telegram_error_result(e)
     except Exception as e:
         logger.exception(
             f"SEND FAILED: Unexpected error | "
@@ -285,14 +468,20 @@ def send_message_sync(
     Returns:
         True if sent successfully, False otherwise
     """
+    async def _send():
+        try:
+            return await send_message(
+                tenant_id=tenant_id,
+                bot_role=bot_role,
+                chat_id=str(chat_id),
+                text=text,
+                parse_mode=parse_mode
+            )
+        finally:
+            await _bot_pool.close_loop()
+    
     try:
-        result = asyncio.run(send_message(
-            tenant_id=tenant_id,
-            bot_role=bot_role,
-            chat_id=str(chat_id),
-            text=text,
-            parse_mode=parse_mode
-        ))
+        result = asyncio.run(_send())
         return result.success
     except Exception as e:
         logger.exception(f"send_message_sync failed: tenant={tenant_id}, chat={chat_id}, error={e}")
@@ -304,7 +493,8 @@ async def send_to_channel(
     bot_role: str,
     text: str,
     parse_mode: str = 'HTML',
-    channel_type: str = 'default'
+    channel_type: str = 'default',
+    priority: int = PRIORITY_NOTIFICATION
 ) -> SendResult:
     """
     Send message to the configured channel for a bot.
@@ -315,6 +505,7 @@ async def send_to_channel(
         text: Message text
         parse_mode: 'HTML' or 'Markdown'
         channel_type: 'default', 'vip', or 'free' (for signal_bot)
+        priority: Rate-shaper priority (lower goes first)
         
     Returns:
         SendResult
@@ -341,7 +532,8 @@ async def send_to_channel(
         bot_role=bot_role,
         chat_id=chat_id,
         text=text,
-        parse_mode=parse_mode
+        parse_mode=parse_mode,
+        priority=priority
     )
 
 
@@ -352,7 +544,8 @@ async def send_photo(
     photo: Union[bytes, io.BytesIO, str],
     caption: Optional[str] = None,
     parse_mode: str = 'HTML',
-    disable_notification: bool = False
+    disable_notification: bool = False,
+    priority: int = PRIORITY_NOTIFICATION
 ) -> SendResult:
     """
     Send a photo to a Telegram chat.
@@ -365,6 +558,7 @@ async def send_photo(
         caption: Optional caption text
         parse_mode: 'HTML' or 'Markdown'
         disable_notification: Send silently
+        priority: Rate-shaper priority (lower goes first)
         
     Returns:
         SendResult with success status, message_id if sent, error details if failed
@@ -385,8 +579,6 @@ async def send_photo(
         return SendResult(success=False, error=f"Credential resolution error: {e}")
     
     try:
-        bot = Bot(token=connection.token)
-        
         if isinstance(photo, bytes):
             photo_file = io.BytesIO(photo)
             photo_file.name = 'trade_win.png'
@@ -397,13 +589,13 @@ async def send_photo(
         else:
             input_file = photo
         
-        sent = await bot.send_photo(
+        sent = await _shaped_send(connection, chat_id, priority, lambda bot: bot.send_photo(
             chat_id=chat_id,
             photo=input_file,
             caption=caption,
             parse_mode=parse_mode if caption else None,
             disable_notification=disable_notification
-        )
+        ))
         
         logger.info(
             f"PHOTO SEND OK: tenant={tenant_id}, role={bot_role}, "
@@ -418,11 +610,7 @@ async def send_photo(
             f"tenant={tenant_id}, role={bot_role}, bot={connection.bot_username}, "
             f"chat={chat_id}, error={e.message}"
         )
-        return SendResult(
-            success=False, 
-            error=e.message,
-            error_code=getattr(e, 'error_code', None)
-        )
+        return _telegram_error_result(e)
     except Exception as e:
         logger.exception(
             f"PHOTO SEND FAILED: Unexpected error | "
@@ -437,7 +625,8 @@ async def send_photo_to_channel(
     photo: Union[bytes, io.BytesIO, str],
     caption: Optional[str] = None,
     parse_mode: str = 'HTML',
-    channel_type: str = 'default'
+    channel_type: str = 'default',
+    priority: int = PRIORITY_NOTIFICATION
 ) -> SendResult:
     """
     Send photo to the configured channel for a bot.
@@ -449,6 +638,7 @@ async def send_photo_to_channel(
         caption: Optional caption text
         parse_mode: 'HTML' or 'Markdown'
         channel_type: 'default', 'vip', or 'free' (for signal_bot)
+        priority: Rate-shaper priority (lower goes first)
         
     Returns:
         SendResult
@@ -476,7 +666,8 @@ async def send_photo_to_channel(
         chat_id=chat_id,
         photo=photo,
         caption=caption,
-        parse_mode=parse_mode
+        parse_mode=parse_mode,
+        priority=priority
     )
 
 
@@ -485,7 +676,8 @@ async def copy_message(
     bot_role: str,
     from_chat_id: str,
     to_chat_id: str,
-    message_id: int
+    message_id: int,
+    priority: int = PRIORITY_NOTIFICATION
 ) -> SendResult:
     """
     Copy a message from one chat to another (no attribution).
@@ -496,6 +688,7 @@ async def copy_message(
         from_chat_id: Source chat ID
         to_chat_id: Destination chat ID
         message_id: Message to copy
+        priority: Rate-shaper priority (lower goes first)
         
     Returns:
         SendResult
@@ -506,13 +699,11 @@ async def copy_message(
         return SendResult(success=False, error=str(e))
     
     try:
-        bot = Bot(token=connection.token)
-        
-        result = await bot.copy_message(
+        result = await _shaped_send(connection, to_chat_id, priority, lambda bot: bot.copy_message(
             chat_id=to_chat_id,
             from_chat_id=from_chat_id,
             message_id=message_id
-        )
+        ))
         
         logger.info(
             f"COPY OK: tenant={tenant_id}, role={bot_role}, "
@@ -526,7 +717,57 @@ async def copy_message(
             f"COPY FAILED: Telegram API error | "
             f"tenant={tenant_id}, role={bot_role}, error={e.message}"
         )
-        return SendResult(success=False, error=e.message)
+        return _telegram_error_result(e)
+
+
+def enqueue_message(
+    tenant_id: str,
+    bot_role: str,
+    chat_id: str,
+    text: str,
+    parse_mode: str = 'HTML',
+    disable_notification: bool = False,
+    priority: int = PRIORITY_BROADCAST,
+    delay_seconds: float = 0
+) -> int:
+    """
+    Queue a message in telegram_outbound_queue instead of sending inline.
+    
+    Use for fire-and-forget traffic (broadcasts, bulk notifications); the
+    outbox dispatcher delivers it within the bot's rate limits and retries
+    on RetryAfter. Returns the queue row id.
+    """
+    if not tenant_id:
+        raise ValueError("tenant_id is required - no implicit tenant inference allowed")
+    return telegram_outbox.enqueue(
+        tenant_id, bot_role, chat_id,
+        {'text': text, 'parse_mode': parse_mode, 'disable_notification': disable_notification},
+        priority=priority, delay_seconds=delay_seconds
+    )
+
+
+def enqueue_to_channel(
+    tenant_id: str,
+    bot_role: str,
+    text: str,
+    parse_mode: str = 'HTML',
+    channel_type: str = 'default',
+    priority: int = PRIORITY_NOTIFICATION
+) -> Optional[int]:
+    """Queue a message for the configured channel; None if no channel is configured."""
+    connection = get_connection_for_send(tenant_id, bot_role)
+    if connection is None:
+        return None
+    if channel_type == 'vip':
+        chat_id = connection.vip_channel_id
+    elif channel_type == 'free':
+        chat_id = connection.free_channel_id
+    else:
+        chat_id = connection.channel_id
+    if not chat_id:
+        logger.error(f"ENQUEUE BLOCKED: No {channel_type} channel configured for tenant={tenant_id}, role={bot_role}")
+        return None
+    return enqueue_message(tenant_id, bot_role, chat_id, text, parse_mode=parse_mode, priority=priority)
 
 
 async def validate_bot_credentials(tenant_id: str, bot_role: str) -> Dict[str, Any]:
@@ -566,6 +807,7 @@ async def validate_bot_credentials(tenant_id: str, bot_role: str) -> Dict[str, A
         return result
     
     try:
+        # One-off dry run on the caller's loop; not worth pooling.
         bot = Bot(token=connection.token)
         me = await bot.get_me()
         
@@ -2,12 +2,17 @@
 Database module for PromoStack campaigns and submissions
 """
 import os
+import threading
 import psycopg2
-from psycopg2 import pool
 from contextlib import contextmanager
-from datetime import datetime
+from datetime import datetime, timedelta
 
+from core.config import Config
+from core.db_pool import HTTP, SCHEDULER, PartitionedPool
+from core.idempotency import CLAIMED, IdempotencyUnavailable, get_idempotency_store
 from core.logging import get_logger
+from core.query_layer import FLOAT, ISO, RAW, PreparedStatement, RowMapper, default
+from core.secret_index import SecretIndex, hash_secret
 
 logger = get_logger(__name__)
 
@@ -95,44 +100,60 @@ class DatabasePool:
         self._initialize_pool()
     
     def _initialize_pool(self):
-        """Initialize PostgreSQL connection pool"""
+        """Initialize PostgreSQL connection pool (core.db_pool, split into http/scheduler sub-pools)"""
         try:
             database_url = os.environ.get('DATABASE_URL')
             db_host = os.environ.get('DB_HOST')
             
             if database_url:
-                self.connection_pool = psycopg2.pool.SimpleConnectionPool(
-                    1,
-                    20,
-                    database_url,
-                    sslmode='prefer',
-                    connect_timeout=10,
-                    options='-c statement_timeout=30000'
-                )
-                logger.info("Database connection pool initialized (using DATABASE_URL, timeout=10s)")
+                def connect():
+                    return psycopg2.connect(
+                        database_url,
+                        sslmode='prefer',
+                        connect_timeout=10,
+                        options='-c statement_timeout=30000'
+                    )
+                source = 'DATABASE_URL'
             elif db_host:
-                self.connection_pool = psycopg2.pool.SimpleConnectionPool(
-                    1,
-                    20,
-                    host=db_host,
-                    port=os.environ.get('DB_PORT'),
-                    database=os.environ.get('DB_NAME'),
-                    user=os.environ.get('DB_USER'),
-                    password=os.environ.get('DB_PASSWORD'),
-                    sslmode='prefer',
-                    connect_timeout=10,
-                    options='-c statement_timeout=30000'
-                )
-                logger.info("Database connection pool initialized (using DB_HOST, timeout=10s)")
+                def connect():
+                    return psycopg2.connect(
+                        host=db_host,
+                        port=os.environ.get('DB_PORT'),
+                        database=os.environ.get('DB_NAME'),
+                        user=os.environ.get('DB_USER'),
+                        password=os.environ.get('DB_PASSWORD'),
+                        sslmode='prefer',
+                        connect_timeout=10,
+                        options='-c statement_timeout=30000'
+                    )
+                source = 'DB_HOST'
             else:
                 logger.info("Database not configured (missing DATABASE_URL or DB_HOST), campaigns feature disabled")
                 self.connection_pool = None
                 return
+            
+            self.connection_pool = PartitionedPool(
+                connect,
+                limits={
+                    HTTP: Config.get_db_pool_http_max(),
+                    SCHEDULER: Config.get_db_pool_scheduler_max(),
+                },
+                acquire_timeout=Config.get_db_pool_acquire_timeout_seconds(),
+                max_age_seconds=Config.get_db_pool_max_age_seconds(),
+                health_check_idle_seconds=Config.get_db_pool_health_check_idle_seconds(),
+            )
+            logger.info(f"Database connection pool initialized (using {source}, timeout=10s)")
                 
         except Exception as e:
             logger.exception(f"Failed to initialize database pool: {e}")
             self.connection_pool = None
     
+    def stats(self) -> dict:
+        """Per sub-pool size, in-use, wait and recycling counters (empty when not configured)."""
+        if not self.connection_pool:
+            return {}
+        return self.connection_pool.stats()
+    
     @contextmanager
     def get_connection(self, tenant_id: str = None):
         """Context manager for database connections.
@@ -174,7 +195,30 @@ class DatabasePool:
                     logger.exception(f"Connection cleanup error: {cleanup_error}")
     
     def initialize_schema(self):
-        """Create campaigns and submissions tables if they don't exist. Returns True on success."""
+        """
+        Bring the schema up to date via the versioned migration runner. Returns True on success.
+        
+        When schema_migrations is already at the latest version this is a single
+        query; see migrations/runner.py.
+        """
+        if not self.connection_pool:
+            return False
+        
+        try:
+            from migrations.runner import migrate
+            migrate(self)
+            return True
+        except Exception as e:
+            logger.exception(f"Failed to initialize schema: {e}")
+            return False
+    
+    def apply_baseline_schema(self):
+        """
+        Create all tables, columns and indexes as of migration 0001 (idempotent). Returns True on success.
+        
+        Only called by migrations/versions/0001_baseline.py; new schema changes
+        go in a new numbered migration, not here.
+        """
         if not self.connection_pool:
             return False
         
@@ -1078,7 +1122,23 @@ class DatabasePool:
                 else:
                     logger.info("tenant_id already exists on broadcast_jobs, skipping")
                 cursor.execute("CREATE INDEX IF NOT EXISTS idx_broadcast_jobs_tenant_id ON broadcast_jobs(tenant_id)")
-                
+
+                # Resumable broadcasts (domains/broadcasts): recipients are handed to
+                # telegram_outbound_queue and their outcome is recorded in broadcast_recipients
+                cursor.execute("ALTER TABLE broadcast_jobs ADD COLUMN IF NOT EXISTS worker_id VARCHAR")
+                cursor.execute("ALTER TABLE broadcast_jobs ADD COLUMN IF NOT EXISTS heartbeat_at TIMESTAMP")
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS broadcast_recipients (
+                        job_id INTEGER NOT NULL,
+                        tenant_id VARCHAR(50) NOT NULL,
+                        chat_id BIGINT NOT NULL,
+                        status VARCHAR(20) NOT NULL DEFAULT 'pending',
+                        error TEXT,
+                        updated_at TIMESTAMP,
+                        PRIMARY KEY (job_id, chat_id)
+                    )
+                """)
+
                 # Add tenant_id to bot_config
                 cursor.execute("""
                     SELECT 1 FROM information_schema.columns 
@@ -1913,6 +1973,77 @@ class DatabasePool:
                 """)
                 cursor.execute("CREATE INDEX IF NOT EXISTS idx_markus_signal_pause_expires ON markus_signal_pause(expires_at)")
                 logger.info("markus_signal_pause table ready")
+
+                # Scheduler node registry + tenant leases (forex_scheduler --leases).
+                # Nodes heartbeat into scheduler_nodes; a node runs a tenant only
+                # while it holds an unexpired scheduler_tenant_leases row.
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS scheduler_nodes (
+                        node_id VARCHAR PRIMARY KEY,
+                        hostname VARCHAR,
+                        started_at TIMESTAMP NOT NULL DEFAULT NOW(),
+                        heartbeat_at TIMESTAMP NOT NULL DEFAULT NOW()
+                    )
+                """)
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS scheduler_tenant_leases (
+                        tenant_id VARCHAR PRIMARY KEY,
+                        node_id VARCHAR NOT NULL,
+                        acquired_at TIMESTAMP NOT NULL DEFAULT NOW(),
+                        expires_at TIMESTAMP NOT NULL
+                    )
+                """)
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_scheduler_tenant_leases_node ON scheduler_tenant_leases(node_id)")
+                logger.info("scheduler_nodes / scheduler_tenant_leases tables ready")
+
+                # Durable outbound Telegram queue (core/telegram_outbox.py).
+                # Dispatchers claim due rows by priority with SKIP LOCKED + locked_until lease.
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS telegram_outbound_queue (
+                        id BIGSERIAL PRIMARY KEY,
+                        tenant_id VARCHAR NOT NULL,
+                        bot_role VARCHAR NOT NULL,
+                        chat_id VARCHAR NOT NULL,
+                        kind VARCHAR NOT NULL DEFAULT 'message',
+                        payload JSONB NOT NULL,
+                        priority SMALLINT NOT NULL DEFAULT 5,
+                        status VARCHAR NOT NULL DEFAULT 'pending',
+                        attempts INTEGER NOT NULL DEFAULT 0,
+                        not_before TIMESTAMP NOT NULL DEFAULT NOW(),
+                        locked_until TIMESTAMP,
+                        message_id BIGINT,
+                        last_error TEXT,
+                        created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+                        sent_at TIMESTAMP
+                    )
+                """)
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_telegram_outbound_queue_due
+                    ON telegram_outbound_queue(tenant_id, priority, id)
+                    WHERE status IN ('pending', 'sending')
+                """)
+                logger.info("telegram_outbound_queue table ready")
+
+                # Cohort retention: one row per day a user generated successfully
+                # (written by log_bot_usage). Backfilled from bot_usage once, when empty.
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS bot_user_activity (
+                        tenant_id VARCHAR(50) NOT NULL,
+                        chat_id BIGINT NOT NULL,
+                        active_day DATE NOT NULL,
+                        PRIMARY KEY (tenant_id, chat_id, active_day)
+                    )
+                """)
+                cursor.execute("SELECT 1 FROM bot_user_activity LIMIT 1")
+                if not cursor.fetchone():
+                    cursor.execute("""
+                        INSERT INTO bot_user_activity (tenant_id, chat_id, active_day)
+                        SELECT DISTINCT tenant_id, chat_id, created_at::date
+                        FROM bot_usage
+                        WHERE success = true AND tenant_id IS NOT NULL AND created_at IS NOT NULL
+                        ON CONFLICT DO NOTHING
+                    """)
+                    logger.info(f"bot_user_activity backfilled ({cursor.rowcount} rows)")
                 
                 cursor.execute("""
                     SELECT 1 FROM information_schema.columns 
@@ -1965,7 +2096,7 @@ class DatabasePool:
                     logger.info("Crosspromo settings already up to date (no 09:00 defaults found)")
                 
                 conn.commit()
-                logger.info("Database schema initialized")
+                logger.info("Baseline database schema applied")
                 
                 # Initialize default forex config
                 initialize_default_forex_config()
@@ -1975,7 +2106,7 @@ class DatabasePool:
                 
                 return True
         except Exception as e:
-            logger.exception(f"Failed to initialize schema: {e}")
+            logger.exception(f"Failed to apply baseline schema: {e}")
             return False
 
 # Global database pool instance
@@ -2238,15 +2369,170 @@ def log_bot_usage(chat_id, template_slug, coupon_code, success, tenant_id, error
                 (tenant_id, chat_id, template_slug, coupon_code, success, error_type, device_type)
                 VALUES (%s, %s, %s, %s, %s, %s, %s)
             """, (tenant_id, chat_id, template_slug, coupon_code, success, error_type, device_type))
+            if success:
+                cursor.execute("""
+                    INSERT INTO bot_user_activity (tenant_id, chat_id, active_day)
+                    VALUES (%s, %s, CURRENT_DATE)
+                    ON CONFLICT DO NOTHING
+                """, (tenant_id, chat_id))
+                if coupon_code:
+                    # Per-coupon unique and first users for get_bot_stats
+                    cursor.execute("""
+                        WITH activity AS (
+                            INSERT INTO bot_coupon_activity (tenant_id, coupon_code, chat_id, active_day, template_slug)
+                            VALUES (%s, %s, %s, CURRENT_DATE, COALESCE(%s, ''))
+                            ON CONFLICT DO NOTHING
+                        )
+                        INSERT INTO bot_coupon_first_user (tenant_id, coupon_code, chat_id, first_at)
+                        VALUES (%s, %s, %s, NOW())
+                        ON CONFLICT DO NOTHING
+                    """, (tenant_id, coupon_code, chat_id, template_slug, tenant_id, coupon_code, chat_id))
             conn.commit()
             logger.info("Successfully logged usage")
     except Exception as e:
         logger.exception(f"Failed to log usage: {e}")
 
+BOT_USAGE_ROLLUP_LOCK = 7_310_019
+BOT_USAGE_SETTLE_MINUTES = 5
+BOT_USAGE_COMPACT_CHUNK_HOURS = 24
+
+
+def compact_bot_usage(settle_minutes=BOT_USAGE_SETTLE_MINUTES, chunk_hours=BOT_USAGE_COMPACT_CHUNK_HOURS):
+    """
+    Roll raw bot_usage rows up into bot_usage_rollup, hour by hour.
+    
+    One rollup row per (tenant, hour, template, coupon, outcome); per-user
+    figures live in bot_user_activity / bot_coupon_activity instead. Advances bot_usage_rollup_state.watermark to the last whole hour that is
+    at least settle_minutes old, chunk_hours at a time (the first run
+    backfills history). bot_usage is append-only, so rolled-up hours never
+    change. Safe to run from several processes: only the holder of the
+    advisory lock compacts.
+    
+    Returns:
+        int: Rollup rows written
+    """
+    if not db_pool.connection_pool:
+        return 0
+    
+    written = 0
+    while True:
+        with db_pool.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT pg_try_advisory_xact_lock(%s)", (BOT_USAGE_ROLLUP_LOCK,))
+            if not cursor.fetchone()[0]:
+                conn.rollback()
+                return written
+            
+            cursor.execute("SELECT watermark FROM bot_usage_rollup_state WHERE id = 1")
+            row = cursor.fetchone()
+            if row:
+                watermark = row[0]
+            else:
+                cursor.execute("SELECT date_trunc('hour', MIN(created_at)) FROM bot_usage")
+                watermark = cursor.fetchone()[0]
+                if watermark is None:
+                    conn.rollback()
+                    return written
+            
+            cursor.execute("""
+                SELECT LEAST(date_trunc('hour', NOW()::timestamp - make_interval(mins => %s)),
+                             %s::timestamp + make_interval(hours => %s))
+            """, (settle_minutes, watermark, chunk_hours))
+            target = cursor.fetchone()[0]
+            if target <= watermark:
+                conn.rollback()
+                return written
+            
+            cursor.execute("""
+                INSERT INTO bot_usage_rollup
+                    (tenant_id, bucket_hour, template_slug, coupon_code, success, error_type, uses)
+                SELECT tenant_id, date_trunc('hour', created_at),
+                       COALESCE(template_slug, ''), COALESCE(coupon_code, ''), success,
+                       COALESCE(error_type, ''), COUNT(*)
+                FROM bot_usage
+                WHERE created_at >= %s AND created_at < %s AND tenant_id IS NOT NULL
+                GROUP BY 1, 2, 3, 4, 5, 6
+                ON CONFLICT (tenant_id, bucket_hour, template_slug, coupon_code, success, error_type)
+                DO UPDATE SET uses = bot_usage_rollup.uses + EXCLUDED.uses
+            """, (watermark, target))
+            written += cursor.rowcount
+            cursor.execute("""
+                INSERT INTO bot_usage_rollup_state (id, watermark) VALUES (1, %s)
+                ON CONFLICT (id) DO UPDATE SET watermark = EXCLUDED.watermark
+            """, (target,))
+            conn.commit()
+            logger.info(f"Compacted bot_usage up to {target} ({written} rollup rows)")
+
+
+def _bot_usage_window(days):
+    """SQL expressions (start, end) and params for a stats window."""
+    if days == 'today':
+        return "CURRENT_DATE::timestamp", "CURRENT_DATE + INTERVAL '1 day'", ()
+    if days == 'yesterday':
+        return "CURRENT_DATE - INTERVAL '1 day'", "CURRENT_DATE::timestamp", ()
+    return "CURRENT_TIMESTAMP::timestamp - %s::interval", "'infinity'::timestamp", (f"{days} days",)
+
+
+def _bot_usage_days(days):
+    """SQL date expressions (first day, day after last) and params for a stats window."""
+    if days == 'today':
+        return "CURRENT_DATE", "CURRENT_DATE + 1", ()
+    if days == 'yesterday':
+        return "CURRENT_DATE - 1", "CURRENT_DATE", ()
+    return "(CURRENT_TIMESTAMP - %s::interval)::date", "CURRENT_DATE + 1", (f"{days} days",)
+
+
+def _bot_usage_source(tenant_id, days):
+    """
+    CTEs yielding a tenant's usage in the window as `usage_rows`.
+    
+    Whole hours below the rollup watermark come from bot_usage_rollup; the
+    partial first hour and everything since the watermark come from raw
+    bot_usage (each raw row counts as uses=1). Columns: bucket (hour),
+    template_slug, coupon_code, success, error_type, uses.
+    
+    Returns:
+        tuple: (sql for a WITH clause body, params)
+    """
+    start, end, window_params = _bot_usage_window(days)
+    sql = f"""
+        bounds AS (
+            SELECT s.window_start, s.window_end,
+                   CASE WHEN s.window_start = date_trunc('hour', s.window_start) THEN s.window_start
+                        ELSE date_trunc('hour', s.window_start) + INTERVAL '1 hour' END AS start_ceil,
+                   COALESCE((SELECT watermark FROM bot_usage_rollup_state WHERE id = 1),
+                            '-infinity'::timestamp) AS watermark
+            FROM (SELECT ({start})::timestamp AS window_start, ({end})::timestamp AS window_end) s
+        ),
+        usage_rows AS (
+            SELECT r.bucket_hour AS bucket, NULLIF(r.template_slug, '') AS template_slug,
+                   NULLIF(r.coupon_code, '') AS coupon_code, r.success,
+                   NULLIF(r.error_type, '') AS error_type, r.uses
+            FROM bot_usage_rollup r, bounds b
+            WHERE r.tenant_id = %s
+              AND r.bucket_hour >= b.start_ceil AND r.bucket_hour < LEAST(b.window_end, b.watermark)
+            UNION ALL
+            SELECT date_trunc('hour', u.created_at), u.template_slug, u.coupon_code,
+                   u.success, u.error_type, 1
+            FROM bot_usage u, bounds b
+            WHERE u.tenant_id = %s
+              AND u.created_at >= b.window_start AND u.created_at < b.window_end
+              AND (u.created_at < b.start_ceil OR u.created_at >= b.watermark)
+        )"""
+    return sql, window_params + (tenant_id, tenant_id)
+
+
 def get_bot_stats(tenant_id, days=30, template_filter=None):
     """
     Get bot usage statistics for the last N days, or 'today'/'yesterday' for exact day filtering.
     
+    Usage counts are served from bot_usage_rollup plus the raw rows not yet
+    compacted (see _bot_usage_source), materialized once per call into a
+    temp table that every breakdown reads. Unique users (users with a
+    successful generation) come from bot_user_activity, per-coupon unique
+    users from bot_coupon_activity and a coupon's first generator from
+    bot_coupon_first_user; these are counted by whole days.
+    
     Args:
         days (int|str): Number of days, or 'today'/'yesterday' for exact date filtering (default: 30)
         template_filter (str, optional): Filter popular coupons by specific template slug
@@ -2269,130 +2555,109 @@ def get_bot_stats(tenant_id, days=30, template_filter=None):
         else:
             raise TypeError(f"Invalid days type: {type(days).__name__}. Must be int or str ('today'/'yesterday').")
         
+        source_sql, source_params = _bot_usage_source(tenant_id, days)
+        first_day, end_day, day_params = _bot_usage_days(days)
+        
         with db_pool.get_connection() as conn:
             cursor = conn.cursor()
             
-            # Build WHERE clause based on filter type
-            # Use bu. prefix for joined queries
-            if days == 'today':
-                where_clause = "tenant_id = %s AND created_at >= CURRENT_DATE AND created_at < CURRENT_DATE + INTERVAL '1 day'"
-                where_clause_bu = "bu.tenant_id = %s AND bu.created_at >= CURRENT_DATE AND bu.created_at < CURRENT_DATE + INTERVAL '1 day'"
-                where_params = (tenant_id,)
-            elif days == 'yesterday':
-                where_clause = "tenant_id = %s AND created_at >= CURRENT_DATE - INTERVAL '1 day' AND created_at < CURRENT_DATE"
-                where_clause_bu = "bu.tenant_id = %s AND bu.created_at >= CURRENT_DATE - INTERVAL '1 day' AND bu.created_at < CURRENT_DATE"
-                where_params = (tenant_id,)
-            else:
-                where_clause = "tenant_id = %s AND created_at >= CURRENT_TIMESTAMP - %s::interval"
-                where_clause_bu = "bu.tenant_id = %s AND bu.created_at >= CURRENT_TIMESTAMP - %s::interval"
-                where_params = (tenant_id, f"{days} days")
-            
-            # Total usage count
+            # Expand the rollup + raw tail once; dropped at commit
             cursor.execute(f"""
-                SELECT COUNT(*) FROM bot_usage
-                WHERE {where_clause}
-            """, where_params)
-            total_uses = cursor.fetchone()[0]
+                CREATE TEMP TABLE bot_stats_usage ON COMMIT DROP AS
+                WITH {source_sql}
+                SELECT * FROM usage_rows
+            """, source_params)
             
-            # Success count
+            # Totals, successes and unique users
             cursor.execute(f"""
-                SELECT COUNT(*) FROM bot_usage
-                WHERE {where_clause}
-                AND success = true
-            """, where_params)
-            successful_uses = cursor.fetchone()[0]
+                SELECT COALESCE(SUM(uses), 0),
+                       COALESCE(SUM(uses) FILTER (WHERE success = true), 0),
+                       (SELECT COUNT(DISTINCT a.chat_id) FROM bot_user_activity a
+                        WHERE a.tenant_id = %s AND a.active_day >= {first_day} AND a.active_day < {end_day})
+                FROM bot_stats_usage
+            """, (tenant_id,) + day_params)
+            total_uses, successful_uses, unique_users = (int(v) for v in cursor.fetchone())
             
             # Popular templates
-            cursor.execute(f"""
-                SELECT template_slug, COUNT(*) as count
-                FROM bot_usage
-                WHERE {where_clause}
-                AND template_slug IS NOT NULL
+            cursor.execute("""
+                SELECT template_slug, SUM(uses) as count
+                FROM bot_stats_usage
+                WHERE template_slug IS NOT NULL
                 GROUP BY template_slug
                 ORDER BY count DESC
                 LIMIT 10
-            """, where_params)
-            popular_templates = [{'template': row[0], 'count': row[1]} for row in cursor.fetchall()]
+            """)
+            popular_templates = [{'template': row[0], 'count': int(row[1])} for row in cursor.fetchall()]
             
             # Popular coupon codes with unique user counts (fetch all for pagination and CSV export)
             # Add template filter if provided
-            template_where = ""
-            template_params = list(where_params)
+            usage_template_where = ""
+            activity_template_where = ""
+            template_params = ()
             if template_filter:
-                template_where = " AND template_slug = %s"
-                template_params.append(template_filter)
-            
-            # Duplicate template_params for the CTE query
-            cte_params = list(template_params)
+                usage_template_where = " AND template_slug = %s"
+                activity_template_where = " AND a.template_slug = %s"
+                template_params = (template_filter,)
             
             cursor.execute(f"""
-                WITH first_usage AS (
-                    SELECT DISTINCT ON (coupon_code)
-                        coupon_code,
-                        chat_id
-                    FROM bot_usage
-                    WHERE {where_clause}
-                    AND coupon_code IS NOT NULL
+                WITH coupon_uses AS (
+                    SELECT coupon_code, SUM(uses) AS total_uses
+                    FROM bot_stats_usage
+                    WHERE coupon_code IS NOT NULL
                     AND success = true
-                    {template_where}
-                    ORDER BY coupon_code, created_at ASC
+                    {usage_template_where}
+                    GROUP BY coupon_code
+                ),
+                coupon_users AS (
+                    SELECT a.coupon_code, COUNT(DISTINCT a.chat_id) AS unique_users
+                    FROM bot_coupon_activity a
+                    WHERE a.tenant_id = %s AND a.active_day >= {first_day} AND a.active_day < {end_day}
+                    {activity_template_where}
+                    GROUP BY a.coupon_code
                 )
                 SELECT 
-                    bu.coupon_code, 
-                    COUNT(*) as total_uses,
-                    COUNT(DISTINCT bu.chat_id) as unique_users,
+                    c.coupon_code, 
+                    c.total_uses,
+                    COALESCE(cu.unique_users, 0) as unique_users,
                     COALESCE(u.username, u.first_name, u.last_name, 'Unknown') as generated_by
-                FROM bot_usage bu
-                LEFT JOIN first_usage fu ON bu.coupon_code = fu.coupon_code
-                LEFT JOIN bot_users u ON fu.chat_id = u.chat_id AND u.tenant_id = %s
-                WHERE {where_clause_bu}
-                AND bu.coupon_code IS NOT NULL
-                AND bu.success = true
-                {template_where}
-                GROUP BY bu.coupon_code, COALESCE(u.username, u.first_name, u.last_name, 'Unknown')
+                FROM coupon_uses c
+                LEFT JOIN coupon_users cu ON cu.coupon_code = c.coupon_code
+                LEFT JOIN bot_coupon_first_user f ON f.tenant_id = %s AND f.coupon_code = c.coupon_code
+                LEFT JOIN bot_users u ON f.chat_id = u.chat_id AND u.tenant_id = %s
                 ORDER BY total_uses DESC
-            """, tuple(cte_params + [tenant_id] + template_params))
-            popular_coupons = [{'coupon': row[0], 'count': row[1], 'unique_users': row[2], 'generated_by': row[3]} for row in cursor.fetchall()]
+            """, template_params + (tenant_id,) + day_params + template_params + (tenant_id, tenant_id))
+            popular_coupons = [{'coupon': row[0], 'count': int(row[1]), 'unique_users': row[2], 'generated_by': row[3]} for row in cursor.fetchall()]
             
             # Error breakdown
-            cursor.execute(f"""
-                SELECT error_type, COUNT(*) as count
-                FROM bot_usage
-                WHERE {where_clause}
-                AND success = false
+            cursor.execute("""
+                SELECT error_type, SUM(uses) as count
+                FROM bot_stats_usage
+                WHERE success = false
                 AND error_type IS NOT NULL
                 GROUP BY error_type
                 ORDER BY count DESC
-            """, where_params)
-            errors = [{'type': row[0], 'count': row[1]} for row in cursor.fetchall()]
-            
-            # Unique users
-            cursor.execute(f"""
-                SELECT COUNT(DISTINCT chat_id) FROM bot_usage
-                WHERE {where_clause}
-            """, where_params)
-            unique_users = cursor.fetchone()[0]
+            """)
+            errors = [{'type': row[0], 'count': int(row[1])} for row in cursor.fetchall()]
             
             # Usage chart - hourly for today/yesterday, daily for longer periods
             if days in ['today', 'yesterday']:
                 # Hourly aggregation for single-day views
-                cursor.execute(f"""
+                cursor.execute("""
                     SELECT 
-                        EXTRACT(HOUR FROM created_at)::INTEGER as hour, 
-                        DATE(created_at) as date,
-                        COUNT(*) as count
-                    FROM bot_usage
-                    WHERE {where_clause}
-                    GROUP BY EXTRACT(HOUR FROM created_at), DATE(created_at)
-                    ORDER BY date DESC, hour ASC
-                """, where_params)
+                        EXTRACT(HOUR FROM bucket)::INTEGER as hour_num, 
+                        DATE(bucket) as date,
+                        SUM(uses) as count
+                    FROM bot_stats_usage
+                    GROUP BY EXTRACT(HOUR FROM bucket), DATE(bucket)
+                    ORDER BY date DESC, hour_num ASC
+                """)
                 
                 # Build hourly data map and get the date
                 hourly_data = {}
                 target_date = None
                 for row in cursor.fetchall():
                     hour, date_val, count = row
-                    hourly_data[hour] = count
+                    hourly_data[hour] = int(count)
                     if target_date is None:
                         target_date = date_val.isoformat()
                 
@@ -2413,17 +2678,17 @@ def get_bot_stats(tenant_id, days=30, template_filter=None):
                 granularity = 'hourly'
             else:
                 # Daily aggregation for multi-day views
-                cursor.execute(f"""
-                    SELECT DATE(created_at) as date, COUNT(*) as count
-                    FROM bot_usage
-                    WHERE {where_clause}
-                    GROUP BY DATE(created_at)
+                cursor.execute("""
+                    SELECT DATE(bucket) as date, SUM(uses) as count
+                    FROM bot_stats_usage
+                    GROUP BY DATE(bucket)
                     ORDER BY date DESC
-                """, where_params)
+                """)
                 # Include both 'label' and 'date' for backward compatibility
-                usage_data = [{'label': row[0].isoformat(), 'date': row[0].isoformat(), 'count': row[1]} for row in cursor.fetchall()]
+                usage_data = [{'label': row[0].isoformat(), 'date': row[0].isoformat(), 'count': int(row[1])} for row in cursor.fetchall()]
                 granularity = 'daily'
             
+            conn.commit()
             success_rate = (successful_uses / total_uses * 100) if total_uses > 0 else 0
             
             return {
@@ -2446,6 +2711,8 @@ def get_day_of_week_stats(tenant_id, days=30):
     """
     Get day-of-week or hour-of-day usage statistics.
     
+    Served from bot_usage_rollup plus uncompacted raw rows, like get_bot_stats.
+    
     Args:
         days (int or str): Number of days to analyze, or 'today'/'yesterday' for hourly stats
         tenant_id (str): Tenant ID (default: 'entrylab')
@@ -2460,33 +2727,29 @@ def get_day_of_week_stats(tenant_id, days=30):
         if not db_pool.connection_pool:
             return {'type': 'daily', 'data': []}
         
+        source_sql, source_params = _bot_usage_source(tenant_id, days)
+        
         with db_pool.get_connection() as conn:
             cursor = conn.cursor()
             
             # For today/yesterday, show hourly breakdown (0-23)
             if days in ['today', 'yesterday']:
-                if days == 'today':
-                    where_clause = "created_at >= CURRENT_DATE AND created_at < CURRENT_DATE + INTERVAL '1 day'"
-                else:  # yesterday
-                    where_clause = "created_at >= CURRENT_DATE - INTERVAL '1 day' AND created_at < CURRENT_DATE"
-                
                 cursor.execute(f"""
+                    WITH {source_sql}
                     SELECT 
-                        EXTRACT(HOUR FROM created_at) as hour_num,
-                        COUNT(*) as count
-                    FROM bot_usage
-                    WHERE {where_clause}
-                    AND success = true
-                    AND tenant_id = %s
+                        EXTRACT(HOUR FROM bucket) as hour_num,
+                        SUM(uses) as count
+                    FROM usage_rows
+                    WHERE success = true
                     GROUP BY hour_num
                     ORDER BY hour_num
-                """, (tenant_id,))
+                """, source_params)
                 
                 # Ensure all 24 hours are present (0-23)
                 hour_data = {i: 0 for i in range(24)}
                 for row in cursor.fetchall():
                     hour_num = int(row[0])
-                    count = row[1]
+                    count = int(row[1])
                     hour_data[hour_num] = count
                 
                 # Format as list
@@ -2501,28 +2764,24 @@ def get_day_of_week_stats(tenant_id, days=30):
             
             # For 7/30/90 days, show day-of-week breakdown
             else:
-                interval = f"{days} days"
-                
-                cursor.execute("""
+                cursor.execute(f"""
+                    WITH {source_sql}
                     SELECT 
-                        TO_CHAR(created_at, 'Day') as day_name,
-                        EXTRACT(DOW FROM created_at) as day_num,
-                        COUNT(*) as count
-                    FROM bot_usage
-                    WHERE created_at >= CURRENT_TIMESTAMP - %s::interval
-                    AND success = true
-                    AND tenant_id = %s
-                    GROUP BY day_name, day_num
+                        EXTRACT(DOW FROM bucket) as day_num,
+                        SUM(uses) as count
+                    FROM usage_rows
+                    WHERE success = true
+                    GROUP BY day_num
                     ORDER BY day_num
-                """, (interval, tenant_id))
+                """, source_params)
                 
                 # Map to ensure all days are present
                 day_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
                 day_data = {i: 0 for i in range(7)}  # 0=Sunday, 1=Monday, etc.
                 
                 for row in cursor.fetchall():
-                    day_num = int(row[1])
-                    count = row[2]
+                    day_num = int(row[0])
+                    count = int(row[1])
                     day_data[day_num] = count
                 
                 # Reorder to start with Monday (PostgreSQL: 0=Sunday, 1=Monday, ... 6=Saturday)
@@ -2693,12 +2952,156 @@ def get_bot_user_count(tenant_id, days=30):
         logger.exception(f"Error getting bot user count: {e}")
         return 0
 
+RETENTION_DAYS = (1, 7, 30)
+RETENTION_PERIOD_DAYS = {'day': 1, 'week': 7, 'month': 30}
+# Cohorts are period_days-long blocks counted from a Monday, so week cohorts start on Mondays
+RETENTION_COHORT_EPOCH = '1970-01-05'
+
+
+def get_retention_curve(tenant_id, days=RETENTION_DAYS):
+    """
+    Day-N retention for any set of N, in one pass over bot_user_activity.
+    
+    A user is retained at Day N if they generated successfully on a day
+    N to 2N-1 days after their first use (Day 1 = the next day). Only users
+    whose whole window has elapsed are in the cohort.
+    
+    Args:
+        tenant_id (str): Tenant ID
+        days (iterable of int): Day offsets, e.g. (1, 7, 30)
+    
+    Returns:
+        dict: {N: {'cohort': int, 'returned': int, 'rate': float (0-100)}}
+    """
+    days = sorted({int(n) for n in days if int(n) > 0})
+    if not days or not db_pool.connection_pool:
+        return {}
+    
+    flags = ",\n".join(
+        f"bool_or(a.active_day - u.cohort_day >= {n} AND a.active_day - u.cohort_day < {2 * n}) AS r{n}"
+        for n in days
+    )
+    counts = ",\n".join(
+        f"COUNT(*) FILTER (WHERE cohort_day <= CURRENT_DATE - {2 * n}), "
+        f"COUNT(*) FILTER (WHERE cohort_day <= CURRENT_DATE - {2 * n} AND r{n})"
+        for n in days
+    )
+    with db_pool.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            WITH per_user AS (
+                SELECT u.chat_id, u.cohort_day,
+                    {flags}
+                FROM (
+                    SELECT chat_id, first_used::date AS cohort_day
+                    FROM bot_users
+                    WHERE tenant_id = %s AND first_used IS NOT NULL
+                ) u
+                LEFT JOIN bot_user_activity a
+                    ON a.tenant_id = %s AND a.chat_id = u.chat_id AND a.active_day > u.cohort_day
+                GROUP BY u.chat_id, u.cohort_day
+            )
+            SELECT {counts}
+            FROM per_user
+        """, (tenant_id, tenant_id))
+        row = cursor.fetchone()
+    
+    curve = {}
+    for i, n in enumerate(days):
+        cohort = row[2 * i] or 0
+        returned = row[2 * i + 1] or 0
+        curve[n] = {
+            'cohort': cohort,
+            'returned': returned,
+            'rate': round(returned / cohort * 100, 1) if cohort > 0 else 0,
+        }
+    return curve
+
+
+def get_retention_cohorts(tenant_id, period='week', periods=12):
+    """
+    Cohort retention grid: users grouped by the period of their first use.
+    
+    Cell k of a cohort is the percentage of its users active again k periods
+    after their own first use (k=0 is always 100). Cohorts and k windows use
+    the same unit ('month' is 30 days for both). A cell is None until it has
+    fully elapsed for the cohort's latest possible joiner, i.e. until
+    cohort_last_day + (k+1) periods.
+    
+    Args:
+        tenant_id (str): Tenant ID
+        period (str): 'day', 'week' or 'month' (30 days)
+        periods (int): Number of cohorts and of columns per cohort
+    
+    Returns:
+        dict: {'period': str, 'periods': int, 'cohorts': [{'cohort': 'YYYY-MM-DD', 'size': int, 'retention': [float|None, ...]}]}
+    """
+    if period not in RETENTION_PERIOD_DAYS:
+        raise ValueError(f"Invalid period: '{period}'. Must be one of {sorted(RETENTION_PERIOD_DAYS)}.")
+    periods = max(1, min(int(periods), 52))
+    result = {'period': period, 'periods': periods, 'cohorts': []}
+    if not db_pool.connection_pool:
+        return result
+    
+    period_days = RETENTION_PERIOD_DAYS[period]
+    with db_pool.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            WITH users AS (
+                SELECT chat_id, first_day,
+                       first_day - (first_day - %(epoch)s::date) %% %(days)s AS cohort
+                FROM (
+                    SELECT chat_id, first_used::date AS first_day
+                    FROM bot_users
+                    WHERE tenant_id = %(tenant)s AND first_used IS NOT NULL
+                      AND first_used >= CURRENT_DATE - (CURRENT_DATE - %(epoch)s::date) %% %(days)s - %(span)s
+                ) b
+            )
+            SELECT u.cohort, NULL::integer AS k, COUNT(*)
+            FROM users u
+            GROUP BY u.cohort
+            UNION ALL
+            SELECT u.cohort, (a.active_day - u.first_day) / %(days)s AS k, COUNT(DISTINCT u.chat_id)
+            FROM users u
+            JOIN bot_user_activity a
+                ON a.tenant_id = %(tenant)s AND a.chat_id = u.chat_id AND a.active_day >= u.first_day + %(days)s
+            WHERE (a.active_day - u.first_day) / %(days)s < %(periods)s
+            GROUP BY u.cohort, k
+        """, {'tenant': tenant_id, 'epoch': RETENTION_COHORT_EPOCH, 'days': period_days,
+              'span': period_days * (periods - 1), 'periods': periods})
+        rows = cursor.fetchall()
+        cursor.execute("SELECT CURRENT_DATE")
+        today = cursor.fetchone()[0]
+    
+    sizes = {}
+    active = {}
+    for cohort, k, count in rows:
+        if k is None:
+            sizes[cohort] = count
+        else:
+            active[(cohort, k)] = count
+    
+    for cohort in sorted(sizes, reverse=True)[:periods]:
+        size = sizes[cohort]
+        # Window k of a user who joined on the cohort's last day closes at last_day + (k+1) periods
+        last_day = cohort + timedelta(days=period_days - 1)
+        complete = (today - last_day).days // period_days - 1
+        retention = [100.0]
+        for k in range(1, periods):
+            if k > complete:
+                retention.append(None)
+            else:
+                retention.append(round(active.get((cohort, k), 0) / size * 100, 1))
+        result['cohorts'].append({'cohort': cohort.isoformat(), 'size': size, 'retention': retention})
+    return result
+
+
 def get_retention_rates(tenant_id):
     """
     Calculate Day 1, Day 7, and Day 30 retention rates.
     
     Retention is calculated as the percentage of users who returned to use the bot
-    after their first usage.
+    after their first usage (see get_retention_curve).
     
     Args:
         tenant_id (str): Tenant ID (default: 'entrylab')
@@ -2714,98 +3117,8 @@ def get_retention_rates(tenant_id):
         if not db_pool.connection_pool:
             return {'day1': 0, 'day7': 0, 'day30': 0}
         
-        with db_pool.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Day 1 retention: Users who joined 2+ days ago and came back within 24-48 hours
-            cursor.execute("""
-                WITH cohort AS (
-                    SELECT chat_id, first_used
-                    FROM bot_users
-                    WHERE first_used < CURRENT_TIMESTAMP - INTERVAL '2 days'
-                    AND tenant_id = %s
-                ),
-                returned AS (
-                    SELECT DISTINCT c.chat_id
-                    FROM cohort c
-                    INNER JOIN bot_usage b ON c.chat_id = b.chat_id
-                    WHERE b.created_at >= c.first_used + INTERVAL '1 day'
-                    AND b.created_at < c.first_used + INTERVAL '2 days'
-                    AND b.success = true
-                    AND b.tenant_id = %s
-                )
-                SELECT 
-                    COUNT(DISTINCT c.chat_id) as cohort_size,
-                    COUNT(DISTINCT r.chat_id) as returned_count
-                FROM cohort c
-                LEFT JOIN returned r ON c.chat_id = r.chat_id
-            """, (tenant_id, tenant_id))
-            row = cursor.fetchone()
-            day1_cohort = row[0] or 0
-            day1_returned = row[1] or 0
-            day1_retention = round((day1_returned / day1_cohort * 100), 1) if day1_cohort > 0 else 0
-            
-            # Day 7 retention: Users who joined 14+ days ago and came back within days 7-14
-            cursor.execute("""
-                WITH cohort AS (
-                    SELECT chat_id, first_used
-                    FROM bot_users
-                    WHERE first_used < CURRENT_TIMESTAMP - INTERVAL '14 days'
-                    AND tenant_id = %s
-                ),
-                returned AS (
-                    SELECT DISTINCT c.chat_id
-                    FROM cohort c
-                    INNER JOIN bot_usage b ON c.chat_id = b.chat_id
-                    WHERE b.created_at >= c.first_used + INTERVAL '7 days'
-                    AND b.created_at < c.first_used + INTERVAL '14 days'
-                    AND b.success = true
-                    AND b.tenant_id = %s
-                )
-                SELECT 
-                    COUNT(DISTINCT c.chat_id) as cohort_size,
-                    COUNT(DISTINCT r.chat_id) as returned_count
-                FROM cohort c
-                LEFT JOIN returned r ON c.chat_id = r.chat_id
-            """, (tenant_id, tenant_id))
-            row = cursor.fetchone()
-            day7_cohort = row[0] or 0
-            day7_returned = row[1] or 0
-            day7_retention = round((day7_returned / day7_cohort * 100), 1) if day7_cohort > 0 else 0
-            
-            # Day 30 retention: Users who joined 60+ days ago and came back within days 30-60
-            cursor.execute("""
-                WITH cohort AS (
-                    SELECT chat_id, first_used
-                    FROM bot_users
-                    WHERE first_used < CURRENT_TIMESTAMP - INTERVAL '60 days'
-                    AND tenant_id = %s
-                ),
-                returned AS (
-                    SELECT DISTINCT c.chat_id
-                    FROM cohort c
-                    INNER JOIN bot_usage b ON c.chat_id = b.chat_id
-                    WHERE b.created_at >= c.first_used + INTERVAL '30 days'
-                    AND b.created_at < c.first_used + INTERVAL '60 days'
-                    AND b.success = true
-                    AND b.tenant_id = %s
-                )
-                SELECT 
-                    COUNT(DISTINCT c.chat_id) as cohort_size,
-                    COUNT(DISTINCT r.chat_id) as returned_count
-                FROM cohort c
-                LEFT JOIN returned r ON c.chat_id = r.chat_id
-            """, (tenant_id, tenant_id))
-            row = cursor.fetchone()
-            day30_cohort = row[0] or 0
-            day30_returned = row[1] or 0
-            day30_retention = round((day30_returned / day30_cohort * 100), 1) if day30_cohort > 0 else 0
-            
-            return {
-                'day1': day1_retention,
-                'day7': day7_retention,
-                'day30': day30_retention
-            }
+        curve = get_retention_curve(tenant_id, RETENTION_DAYS)
+        return {f'day{n}': curve[n]['rate'] for n in RETENTION_DAYS}
     except Exception as e:
         logger.exception(f"Error calculating retention rates: {e}")
         return {'day1': 0, 'day7': 0, 'day30': 0}
@@ -3282,7 +3595,90 @@ def update_signal_status(signal_id, new_status, tenant_id, telegram_message_id=N
             except Exception as cleanup_error:
                 logger.exception(f"Connection cleanup error: {cleanup_error}")
 
-def get_forex_signals(tenant_id, status=None, limit=100):
+FOREX_SIGNAL_ROWS = RowMapper('ForexSignal', [
+    ('id', RAW),
+    ('signal_type', RAW),
+    ('pair', RAW),
+    ('timeframe', RAW),
+    ('entry_price', FLOAT),
+    ('take_profit', FLOAT),
+    ('stop_loss', FLOAT),
+    ('status', RAW),
+    ('rsi_value', FLOAT),
+    ('macd_value', FLOAT),
+    ('atr_value', FLOAT),
+    ('posted_at', ISO),
+    ('closed_at', ISO),
+    ('result_pips', FLOAT),
+    ('bot_type', default('custom')),
+    ('breakeven_set', default(False)),
+    ('guidance_count', default(0)),
+    ('last_guidance_at', ISO),
+    ('last_progress_zone', default(0)),
+    ('last_caution_zone', default(0)),
+    ('original_rsi', FLOAT),
+    ('original_macd', FLOAT),
+    ('original_adx', FLOAT),
+    ('original_stoch_k', FLOAT),
+    ('last_revalidation_at', ISO),
+    ('revalidation_count', default(0)),
+    ('thesis_status', default('intact')),
+    ('thesis_changed_at', ISO),
+    ('timeout_notified', default(False)),
+    ('original_indicators_json', RAW),
+    ('take_profit_2', FLOAT),
+    ('take_profit_3', FLOAT),
+    ('tp1_percentage', default(100)),
+    ('tp2_percentage', default(0)),
+    ('tp3_percentage', default(0)),
+    ('tp1_hit', default(False)),
+    ('tp2_hit', default(False)),
+    ('tp3_hit', default(False)),
+    ('tp1_hit_at', ISO),
+    ('tp2_hit_at', ISO),
+    ('tp3_hit_at', ISO),
+    ('breakeven_triggered', default(False)),
+    ('breakeven_triggered_at', ISO),
+    ('close_price', FLOAT),
+    ('effective_sl', FLOAT),
+    ('telegram_message_id', RAW),
+])
+
+_FOREX_SIGNAL_QUERIES = {
+    'status': """
+        FROM forex_signals
+        WHERE tenant_id = %s AND status = %s
+        ORDER BY posted_at DESC
+        LIMIT %s
+    """,
+    'visible': """
+        FROM forex_signals
+        WHERE tenant_id = %s AND status NOT IN ('draft', 'broadcast_failed')
+        ORDER BY posted_at DESC
+        LIMIT %s
+    """,
+    'by_id': """
+        FROM forex_signals
+        WHERE id = %s AND tenant_id = %s
+    """,
+}
+_forex_signal_statements = {}
+
+
+def _forex_signal_statement(query, columns=None):
+    """(prepared statement, row -> dict, row -> record) for a forex_signals query and column set."""
+    columns, to_dict, to_record = FOREX_SIGNAL_ROWS.for_columns(columns)
+    key = (query, columns)
+    statement = _forex_signal_statements.get(key)
+    if statement is None:
+        statement = _forex_signal_statements[key] = PreparedStatement(
+            FOREX_SIGNAL_ROWS.statement_name(f"fx_signals_{query}", columns),
+            f"SELECT {', '.join(columns)} {_FOREX_SIGNAL_QUERIES[query]}"
+        )
+    return statement, to_dict, to_record
+
+
+def get_forex_signals(tenant_id, status=None, limit=100, columns=None, as_records=False):
     """
     Get forex signals with optional status filtering.
     
@@ -3290,201 +3686,53 @@ def get_forex_signals(tenant_id, status=None, limit=100):
         status (str, optional): Filter by status ('pending', 'won', 'lost', 'expired')
         limit (int): Maximum number of signals to return (default: 100)
         tenant_id (str): Tenant ID (default: 'entrylab')
+        columns (sequence, optional): Only these FOREX_SIGNAL_ROWS columns (default: all)
+        as_records (bool): Return slotted records instead of dicts (read-only callers)
     
     Returns:
-        list: List of signal dictionaries
+        list: List of signal dictionaries (or records)
     """
     try:
+        if status:
+            statement, to_dict, to_record = _forex_signal_statement('status', columns)
+            params = (tenant_id, status, limit)
+        else:
+            statement, to_dict, to_record = _forex_signal_statement('visible', columns)
+            params = (tenant_id, limit)
+        mapper = to_record if as_records else to_dict
+        
         with db_pool.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            if status:
-                cursor.execute("""
-                    SELECT id, signal_type, pair, timeframe, entry_price, take_profit, 
-                           stop_loss, status, rsi_value, macd_value, atr_value, 
-                           posted_at, closed_at, result_pips, bot_type,
-                           breakeven_set, guidance_count, last_guidance_at,
-                           last_progress_zone, last_caution_zone,
-                           original_rsi, original_macd, original_adx, original_stoch_k,
-                           last_revalidation_at, revalidation_count, thesis_status,
-                           thesis_changed_at, timeout_notified, original_indicators_json,
-                           take_profit_2, take_profit_3,
-                           tp1_percentage, tp2_percentage, tp3_percentage,
-                           tp1_hit, tp2_hit, tp3_hit,
-                           tp1_hit_at, tp2_hit_at, tp3_hit_at,
-                           breakeven_triggered, breakeven_triggered_at, close_price, effective_sl,
-                           telegram_message_id
-                    FROM forex_signals
-                    WHERE tenant_id = %s AND status = %s
-                    ORDER BY posted_at DESC
-                    LIMIT %s
-                """, (tenant_id, status, limit))
-            else:
-                cursor.execute("""
-                    SELECT id, signal_type, pair, timeframe, entry_price, take_profit, 
-                           stop_loss, status, rsi_value, macd_value, atr_value, 
-                           posted_at, closed_at, result_pips, bot_type,
-                           breakeven_set, guidance_count, last_guidance_at,
-                           last_progress_zone, last_caution_zone,
-                           original_rsi, original_macd, original_adx, original_stoch_k,
-                           last_revalidation_at, revalidation_count, thesis_status,
-                           thesis_changed_at, timeout_notified, original_indicators_json,
-                           take_profit_2, take_profit_3,
-                           tp1_percentage, tp2_percentage, tp3_percentage,
-                           tp1_hit, tp2_hit, tp3_hit,
-                           tp1_hit_at, tp2_hit_at, tp3_hit_at,
-                           breakeven_triggered, breakeven_triggered_at, close_price, effective_sl,
-                           telegram_message_id
-                    FROM forex_signals
-                    WHERE tenant_id = %s AND status NOT IN ('draft', 'broadcast_failed')
-                    ORDER BY posted_at DESC
-                    LIMIT %s
-                """, (tenant_id, limit))
-            
-            signals = []
-            for row in cursor.fetchall():
-                signals.append({
-                    'id': row[0],
-                    'signal_type': row[1],
-                    'pair': row[2],
-                    'timeframe': row[3],
-                    'entry_price': float(row[4]) if row[4] else None,
-                    'take_profit': float(row[5]) if row[5] else None,
-                    'stop_loss': float(row[6]) if row[6] else None,
-                    'status': row[7],
-                    'rsi_value': float(row[8]) if row[8] else None,
-                    'macd_value': float(row[9]) if row[9] else None,
-                    'atr_value': float(row[10]) if row[10] else None,
-                    'posted_at': row[11].isoformat() if row[11] else None,
-                    'closed_at': row[12].isoformat() if row[12] else None,
-                    'result_pips': float(row[13]) if row[13] else None,
-                    'bot_type': row[14] if row[14] else 'custom',
-                    'breakeven_set': row[15] or False,
-                    'guidance_count': row[16] or 0,
-                    'last_guidance_at': row[17].isoformat() if row[17] else None,
-                    'last_progress_zone': row[18] or 0,
-                    'last_caution_zone': row[19] or 0,
-                    'original_rsi': float(row[20]) if row[20] else None,
-                    'original_macd': float(row[21]) if row[21] else None,
-                    'original_adx': float(row[22]) if row[22] else None,
-                    'original_stoch_k': float(row[23]) if row[23] else None,
-                    'last_revalidation_at': row[24].isoformat() if row[24] else None,
-                    'revalidation_count': row[25] or 0,
-                    'thesis_status': row[26] or 'intact',
-                    'thesis_changed_at': row[27].isoformat() if row[27] else None,
-                    'timeout_notified': row[28] or False,
-                    'original_indicators_json': row[29] if row[29] else None,
-                    'take_profit_2': float(row[30]) if row[30] else None,
-                    'take_profit_3': float(row[31]) if row[31] else None,
-                    'tp1_percentage': row[32] or 100,
-                    'tp2_percentage': row[33] or 0,
-                    'tp3_percentage': row[34] or 0,
-                    'tp1_hit': row[35] or False,
-                    'tp2_hit': row[36] or False,
-                    'tp3_hit': row[37] or False,
-                    'tp1_hit_at': row[38].isoformat() if row[38] else None,
-                    'tp2_hit_at': row[39].isoformat() if row[39] else None,
-                    'tp3_hit_at': row[40].isoformat() if row[40] else None,
-                    'breakeven_triggered': row[41] or False,
-                    'breakeven_triggered_at': row[42].isoformat() if row[42] else None,
-                    'close_price': float(row[43]) if row[43] else None,
-                    'effective_sl': float(row[44]) if row[44] else None,
-                    'telegram_message_id': row[45]
-                })
-            return signals
+            cursor = statement.execute(conn.cursor(), params)
+            return [mapper(row) for row in cursor.fetchall()]
     except Exception as e:
         logger.exception(f"Error getting forex signals: {e}")
         return []
 
 
-def get_forex_signal_by_id(signal_id: int, tenant_id: str):
+def get_forex_signal_by_id(signal_id: int, tenant_id: str, columns=None, as_records=False):
     """
     Get a single forex signal by its ID.
     
     Args:
         signal_id: The signal ID
         tenant_id: Tenant ID
+        columns: Only these FOREX_SIGNAL_ROWS columns (default: all)
+        as_records: Return a slotted record instead of a dict
     
     Returns:
-        Signal dictionary or None if not found
+        Signal dictionary (or record) or None if not found
     """
     try:
         if not db_pool.connection_pool:
             return None
         
+        statement, to_dict, to_record = _forex_signal_statement('by_id', columns)
         with db_pool.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT id, signal_type, pair, timeframe, entry_price, take_profit, 
-                       stop_loss, status, rsi_value, macd_value, atr_value, 
-                       posted_at, closed_at, result_pips, bot_type,
-                       breakeven_set, guidance_count, last_guidance_at,
-                       last_progress_zone, last_caution_zone,
-                       original_rsi, original_macd, original_adx, original_stoch_k,
-                       last_revalidation_at, revalidation_count, thesis_status,
-                       thesis_changed_at, timeout_notified, original_indicators_json,
-                       take_profit_2, take_profit_3,
-                       tp1_percentage, tp2_percentage, tp3_percentage,
-                       tp1_hit, tp2_hit, tp3_hit,
-                       tp1_hit_at, tp2_hit_at, tp3_hit_at,
-                       breakeven_triggered, breakeven_triggered_at, close_price, effective_sl,
-                       telegram_message_id
-                FROM forex_signals
-                WHERE id = %s AND tenant_id = %s
-            """, (signal_id, tenant_id))
-            
+            cursor = statement.execute(conn.cursor(), (signal_id, tenant_id))
             row = cursor.fetchone()
             if not row:
                 return None
-            
-            return {
-                'id': row[0],
-                'signal_type': row[1],
-                'pair': row[2],
-                'timeframe': row[3],
-                'entry_price': float(row[4]) if row[4] else None,
-                'take_profit': float(row[5]) if row[5] else None,
-                'stop_loss': float(row[6]) if row[6] else None,
-                'status': row[7],
-                'rsi_value': float(row[8]) if row[8] else None,
-                'macd_value': float(row[9]) if row[9] else None,
-                'atr_value': float(row[10]) if row[10] else None,
-                'posted_at': row[11].isoformat() if row[11] else None,
-                'closed_at': row[12].isoformat() if row[12] else None,
-                'result_pips': float(row[13]) if row[13] else None,
-                'bot_type': row[14] if row[14] else 'custom',
-                'breakeven_set': row[15] or False,
-                'guidance_count': row[16] or 0,
-                'last_guidance_at': row[17].isoformat() if row[17] else None,
-                'last_progress_zone': row[18] or 0,
-                'last_caution_zone': row[19] or 0,
-                'original_rsi': float(row[20]) if row[20] else None,
-                'original_macd': float(row[21]) if row[21] else None,
-                'original_adx': float(row[22]) if row[22] else None,
-                'original_stoch_k': float(row[23]) if row[23] else None,
-                'last_revalidation_at': row[24].isoformat() if row[24] else None,
-                'revalidation_count': row[25] or 0,
-                'thesis_status': row[26] or 'intact',
-                'thesis_changed_at': row[27].isoformat() if row[27] else None,
-                'timeout_notified': row[28] or False,
-                'original_indicators_json': row[29] if row[29] else None,
-                'take_profit_2': float(row[30]) if row[30] else None,
-                'take_profit_3': float(row[31]) if row[31] else None,
-                'tp1_percentage': row[32] or 100,
-                'tp2_percentage': row[33] or 0,
-                'tp3_percentage': row[34] or 0,
-                'tp1_hit': row[35] or False,
-                'tp2_hit': row[36] or False,
-                'tp3_hit': row[37] or False,
-                'tp1_hit_at': row[38].isoformat() if row[38] else None,
-                'tp2_hit_at': row[39].isoformat() if row[39] else None,
-                'tp3_hit_at': row[40].isoformat() if row[40] else None,
-                'breakeven_triggered': row[41] or False,
-                'breakeven_triggered_at': row[42].isoformat() if row[42] else None,
-                'close_price': float(row[43]) if row[43] else None,
-                'effective_sl': float(row[44]) if row[44] else None,
-                'telegram_message_id': row[45]
-            }
+            return to_record(row) if as_records else to_dict(row)
     except Exception as e:
         logger.exception(f"Error getting forex signal by id {signal_id}: {e}")
         return None
@@ -5194,6 +5442,98 @@ def update_tp_hit(signal_id, tp_level, tenant_id):
         logger.exception(f"Error updating TP{tp_level} hit: {e}")
         return False
 
+def apply_signal_state_batch(tenant_id, tp_hits=(), breakevens=(), closes=()):
+    """
+    Apply one monitoring pass worth of signal state transitions in ONE transaction.
+    
+    Batched equivalent of update_tp_hit / update_signal_breakeven (plus
+    update_effective_sl to the breakeven price) / update_forex_signal_status:
+    each kind of transition is a single
+    UPDATE ... FROM (VALUES ...) and everything commits together, so callers
+    can emit events only after the whole pass is durable.
+    
+    Args:
+        tenant_id (str): Tenant ID (every row is scoped to it)
+        tp_hits: Iterable of (signal_id, tp_level) with tp_level in 1..3
+        breakevens: Iterable of (signal_id, breakeven_price)
+        closes: Iterable of (signal_id, status, result_pips, close_price)
+    
+    Returns:
+        int: Number of rows updated
+    
+    Raises:
+        Exception: On any database error (nothing is committed)
+    """
+    from psycopg2.extras import execute_values
+    
+    tp_flags = {}
+    for signal_id, tp_level in tp_hits:
+        if tp_level not in (1, 2, 3):
+            raise ValueError(f"Invalid TP level: {tp_level}")
+        tp_flags.setdefault(signal_id, [False, False, False])[tp_level - 1] = True
+    breakevens = list(breakevens)
+    closes = list(closes)
+    
+    if not (tp_flags or breakevens or closes):
+        return 0
+    
+    updated = 0
+    try:
+        with db_pool.get_connection() as conn:
+            cursor = conn.cursor()
+            
+            if tp_flags:
+                execute_values(cursor, """
+                    UPDATE forex_signals AS s
+                    SET tp1_hit = s.tp1_hit OR v.tp1,
+                        tp1_hit_at = CASE WHEN v.tp1 THEN CURRENT_TIMESTAMP ELSE s.tp1_hit_at END,
+                        tp2_hit = s.tp2_hit OR v.tp2,
+                        tp2_hit_at = CASE WHEN v.tp2 THEN CURRENT_TIMESTAMP ELSE s.tp2_hit_at END,
+                        tp3_hit = s.tp3_hit OR v.tp3,
+                        tp3_hit_at = CASE WHEN v.tp3 THEN CURRENT_TIMESTAMP ELSE s.tp3_hit_at END
+                    FROM (VALUES %s) AS v(id, tenant_id, tp1, tp2, tp3)
+                    WHERE s.id = v.id AND s.tenant_id = v.tenant_id
+                """, [(signal_id, tenant_id, *flags) for signal_id, flags in tp_flags.items()],
+                    template="(%s::integer, %s::varchar, %s::boolean, %s::boolean, %s::boolean)")
+                updated += cursor.rowcount
+            
+            if breakevens:
+                execute_values(cursor, """
+                    UPDATE forex_signals AS s
+                    SET breakeven_set = TRUE,
+                        breakeven_price = v.breakeven_price,
+                        effective_sl = v.breakeven_price
+                    FROM (VALUES %s) AS v(id, tenant_id, breakeven_price)
+                    WHERE s.id = v.id AND s.tenant_id = v.tenant_id
+                """, [(signal_id, tenant_id, price) for signal_id, price in breakevens],
+                    template="(%s::integer, %s::varchar, %s::double precision)")
+                updated += cursor.rowcount
+            
+            if closes:
+                execute_values(cursor, """
+                    UPDATE forex_signals AS s
+                    SET status = v.status,
+                        result_pips = COALESCE(v.result_pips, s.result_pips),
+                        close_price = COALESCE(v.close_price, s.close_price),
+                        closed_at = CURRENT_TIMESTAMP
+                    FROM (VALUES %s) AS v(id, tenant_id, status, result_pips, close_price)
+                    WHERE s.id = v.id AND s.tenant_id = v.tenant_id
+                """, [(signal_id, tenant_id, status, pips, price) for signal_id, status, pips, price in closes],
+                    template="(%s::integer, %s::varchar, %s::varchar, %s::double precision, %s::double precision)")
+                updated += cursor.rowcount
+            
+            conn.commit()
+    except Exception as e:
+        logger.exception(f"Error applying signal state batch: {e}")
+        raise
+    
+    if any(status in ('won', 'lost', 'expired', 'cancelled') for _, status, _, _ in closes):
+        promoted = promote_queued_bot(tenant_id)
+        if promoted:
+            logger.info(f"[SIGNAL CLOSE] Automatically activated queued bot: {promoted}")
+    
+    return updated
+
 def update_signal_guidance(signal_id, notes, tenant_id, progress_zone=None, caution_zone=None):
     """
     Update guidance information for a signal with zone tracking.
@@ -6925,93 +7265,56 @@ def backfill_free_signups_from_bot_users(tenant_id):
 
 # ===== Webhook Idempotency Functions =====
 
-def is_webhook_event_processed(event_id, tenant_id):
+def claim_webhook_event(event_id, tenant_id, event_source='stripe'):
     """
-    Check if a webhook event has already been processed.
-    Used to prevent duplicate processing of Stripe webhook events.
+    Atomically claim a webhook event for processing (core/idempotency.py).
     
     Args:
         event_id (str): The Stripe event ID (e.g., 'evt_xxx')
-        tenant_id (str): The tenant ID (default: 'entrylab')
+        tenant_id (str): The tenant ID
+        event_source (str): The event source (e.g., 'stripe'), used as the key scope
     
     Returns:
-        bool: True if event was already processed, False otherwise
+        str: CLAIMED (process it, then complete/release), DUPLICATE (already
+        processed) or IN_PROGRESS (another delivery holds the claim). Fails
+        open with CLAIMED when the idempotency store is unavailable.
     """
     try:
-        if not db_pool.connection_pool:
-            return False
-        
-        with db_pool.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT 1 FROM processed_webhook_events 
-                WHERE event_id = %s AND tenant_id = %s
-            """, (event_id, tenant_id))
-            return cursor.fetchone() is not None
-    except Exception as e:
-        logger.exception(f"Error checking webhook event: {e}")
-        return False
+        return get_idempotency_store().claim(
+            event_source, tenant_id, event_id, lease_seconds=Config.get_idempotency_lease_seconds()
+        )
+    except IdempotencyUnavailable as e:
+        logger.error(f"[IDEMPOTENCY] Could not claim {event_source} event {event_id}, processing anyway: {e}")
+        return CLAIMED
 
-def record_webhook_event_processed(event_id, tenant_id, event_source='stripe'):
+def complete_webhook_event(event_id, tenant_id, event_source='stripe'):
     """
-    Record that a webhook event has been processed.
-    
-    Args:
-        event_id (str): The Stripe event ID
-        event_source (str): The event source (e.g., 'stripe', 'telegram')
-        tenant_id (str): The tenant ID (default: 'entrylab')
+    Record that a claimed webhook event has been processed.
     
     Returns:
         bool: True if recorded successfully
     """
     try:
-        if not db_pool.connection_pool:
-            return False
-        
-        with db_pool.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO processed_webhook_events (tenant_id, event_id, event_source, processed_at)
-                VALUES (%s, %s, %s, CURRENT_TIMESTAMP)
-                ON CONFLICT (tenant_id, event_id) DO NOTHING
-            """, (tenant_id, event_id, event_source))
-            conn.commit()
-            return True
-    except Exception as e:
-        logger.exception(f"Error recording webhook event: {e}")
+        get_idempotency_store().complete(event_source, tenant_id, event_id)
+        return True
+    except IdempotencyUnavailable as e:
+        logger.error(f"[IDEMPOTENCY] Could not record {event_source} event {event_id}: {e}")
         return False
 
-def cleanup_old_webhook_events(tenant_id, hours=24):
+def release_webhook_event(event_id, tenant_id, event_source='stripe'):
     """
-    Clean up old processed webhook events to prevent table growth.
-    Events older than specified hours are deleted.
-    
-    Args:
-        hours (int): Delete events older than this many hours
-        tenant_id (str): The tenant ID (default: 'entrylab')
+    Release the claim on a webhook event whose processing failed, so the
+    provider's retry is processed instead of waiting out the lease.
     
     Returns:
-        int: Number of events deleted
+        bool: True if released
     """
     try:
-        if not db_pool.connection_pool:
-            return 0
-        
-        with db_pool.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                DELETE FROM processed_webhook_events 
-                WHERE tenant_id = %s 
-                AND processed_at < (CURRENT_TIMESTAMP - (%s * INTERVAL '1 hour'))
-            """, (tenant_id, hours))
-            deleted = cursor.rowcount
-            conn.commit()
-            if deleted > 0:
-                logger.info(f"Cleaned up {deleted} old webhook events")
-            return deleted
-    except Exception as e:
-        logger.exception(f"Error cleaning up webhook events: {e}")
-        return 0
+        get_idempotency_store().release(event_source, tenant_id, event_id)
+        return True
+    except IdempotencyUnavailable as e:
+        logger.error(f"[IDEMPOTENCY] Could not release {event_source} event {event_id}: {e}")
+        return False
 
 
 def get_tenant_metrics(tenant_id, days=7):
@@ -8122,24 +8425,116 @@ def upsert_telegram_webhook_secret(tenant_id: str, bot_id: str, secret_token: st
             """, (tenant_id, bot_id, secret_hash))
             conn.commit()
             logger.info(f"Upserted webhook secret for tenant={tenant_id}, bot={bot_id}")
+            invalidate_webhook_secret_cache()
             return True
     except Exception as e:
         logger.exception(f"Error upserting telegram webhook secret: {e}")
         return False
 
 
+def _load_telegram_webhook_secrets():
+    """(secret_token_hash, (tenant_id, bot_id)) for every stored webhook secret."""
+    with db_pool.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT secret_token_hash, tenant_id, bot_id
+            FROM telegram_webhook_secrets
+        """)
+        return [(row[0], (row[1], row[2])) for row in cursor.fetchall()]
+
+
+def _load_bot_connection_secrets():
+    """(sha256(webhook_secret), connection) for every tenant bot connection."""
+    with db_pool.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT tenant_id, bot_role, bot_token, bot_username, webhook_secret
+            FROM tenant_bot_connections
+            WHERE webhook_secret IS NOT NULL AND webhook_secret <> ''
+        """)
+        return [
+            (hash_secret(row[4]), {
+                'tenant_id': row[0],
+                'bot_role': row[1],
+                'bot_token': row[2],
+                'bot_username': row[3]
+            })
+            for row in cursor.fetchall()
+        ]
+
+
+def _verify_telegram_webhook_secret(secret_hash, record):
+    """Current (tenant_id, bot_id) for a cached secret, or None if it was deleted or rotated."""
+    tenant_id, bot_id = record
+    with db_pool.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT 1 FROM telegram_webhook_secrets
+            WHERE tenant_id = %s AND bot_id = %s AND secret_token_hash = %s
+        """, (tenant_id, bot_id, secret_hash))
+        return record if cursor.fetchone() else None
+
+
+def _verify_bot_connection_secret(secret_hash, connection):
+    """Current connection for a cached secret, or None if it was deleted or rotated."""
+    with db_pool.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT tenant_id, bot_role, bot_token, bot_username, webhook_secret
+            FROM tenant_bot_connections
+            WHERE tenant_id = %s AND bot_role = %s
+        """, (connection['tenant_id'], connection['bot_role']))
+        row = cursor.fetchone()
+    if not row or not row[4] or hash_secret(row[4]) != secret_hash:
+        return None
+    return {'tenant_id': row[0], 'bot_role': row[1], 'bot_token': row[2], 'bot_username': row[3]}
+
+
+_webhook_secret_index = None
+_bot_connection_secret_index = None
+_webhook_secret_index_lock = threading.Lock()
+
+
+def _webhook_secret_indexes():
+    global _webhook_secret_index, _bot_connection_secret_index
+    with _webhook_secret_index_lock:
+        if _webhook_secret_index is None:
+            ttl = Config.get_webhook_secret_cache_ttl_seconds()
+            recheck = Config.get_webhook_secret_recheck_seconds()
+            _webhook_secret_index = SecretIndex(
+                'telegram_webhook_secrets', _load_telegram_webhook_secrets, ttl,
+                verifier=_verify_telegram_webhook_secret, recheck_seconds=recheck,
+            )
+            _bot_connection_secret_index = SecretIndex(
+                'tenant_bot_connections', _load_bot_connection_secrets, ttl,
+                verifier=_verify_bot_connection_secret, recheck_seconds=recheck,
+            )
+        return _webhook_secret_index, _bot_connection_secret_index
+
+
+def invalidate_webhook_secret_cache():
+    """Drop the in-memory webhook secret indexes (call after changing secrets or bot connections)."""
+    for index in _webhook_secret_indexes():
+        index.invalidate()
+
+
+def get_webhook_secret_cache_stats() -> dict:
+    webhook_secrets, bot_connections = _webhook_secret_indexes()
+    return {'webhook_secrets': webhook_secrets.stats(), 'bot_connections': bot_connections.stats()}
+
+
 def resolve_tenant_from_webhook_secret(secret_token: str) -> tuple:
     """
     Resolve tenant_id and bot_id from a webhook secret token.
     
+    Served from an in-memory index of secret hashes (see core.secret_index).
+    
     Args:
         secret_token: Plain text secret token from X-Telegram-Bot-Api-Secret-Token header
         
     Returns:
         Tuple of (tenant_id, bot_id) if found, (None, None) otherwise
     """
-    import hashlib
-    
     if not db_pool or not db_pool.connection_pool:
         return (None, None)
     
@@ -8147,20 +8542,8 @@ def resolve_tenant_from_webhook_secret(secret_token: str) -> tuple:
         return (None, None)
     
     try:
-        secret_hash = hashlib.sha256(secret_token.encode()).hexdigest()
-        
-        with db_pool.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT tenant_id, bot_id 
-                FROM telegram_webhook_secrets 
-                WHERE secret_token_hash = %s
-            """, (secret_hash,))
-            row = cursor.fetchone()
-            
-            if row:
-                return (row[0], row[1])
-            return (None, None)
+        found = _webhook_secret_indexes()[0].lookup(secret_token)
+        return found if found else (None, None)
     except Exception as e:
         logger.exception(f"Error resolving tenant from webhook secret: {e}")
         return (None, None)
@@ -8272,6 +8655,7 @@ def upsert_bot_connection(tenant_id: str, bot_role: str, bot_token: str = None,
                   channel_id, vip_channel_id, free_channel_id, free_channel_link, last_error, last_error))
             conn.commit()
             logger.info(f"Upserted bot connection for tenant={tenant_id}, role={bot_role}")
+            invalidate_webhook_secret_cache()
             return True
     except Exception as e:
         logger.exception(f"Error upserting bot connection for tenant={tenant_id}, role={bot_role}: {e}")
@@ -8333,6 +8717,9 @@ def resolve_bot_connection_from_webhook_secret(webhook_secret: str) -> dict:
     """
     Resolve bot connection from webhook_secret stored in tenant_bot_connections.
     
+    Served from an in-memory index keyed by the secret's hash (see
+    core.secret_index); upsert_bot_connection and delete_connection invalidate it.
+    
     Args:
         webhook_secret: Plain text webhook secret from URL path
         
@@ -8346,23 +8733,8 @@ def resolve_bot_connection_from_webhook_secret(webhook_secret: str) -> dict:
         return None
     
     try:
-        with db_pool.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT tenant_id, bot_role, bot_token, bot_username
-                FROM tenant_bot_connections
-                WHERE webhook_secret = %s
-            """, (webhook_secret,))
-            
-            row = cursor.fetchone()
-            if row:
-                return {
-                    'tenant_id': row[0],
-                    'bot_role': row[1],
-                    'bot_token': row[2],
-                    'bot_username': row[3]
-                }
-            return None
+        connection = _webhook_secret_indexes()[1].lookup(webhook_secret)
+        return dict(connection) if connection else None
     except Exception as e:
         logger.exception(f"Error resolving bot connection from webhook secret: {e}")
         return None
@@ -0,0 +1 @@
+"""Broadcast domain - resumable, rate-shaped bot broadcasts to bot_users."""
@@ -0,0 +1,129 @@
+"""
+Broadcast Engine - durable bot broadcasts delivered through the Telegram outbox.
+
+- Recipients are stored per job in broadcast_recipients
+- A job is handed to the outbox in one transaction: every pending recipient
+  becomes a telegram_outbound_queue row at PRIORITY_BROADCAST (and is marked
+  'queued'), so broadcasts share the bot's rate shaper (30 msg/s, 1 msg/s
+  per chat), yield to signal posts and are retried on RetryAfter by the
+  outbox dispatcher (core/telegram_outbox.py)
+- The dispatcher writes each recipient's final outcome back
+  (repo.record_outbox_results): job counters, recipient status, and one
+  DELETE for users who blocked the bot; the job completes when no recipient
+  is pending or queued
+- A job whose hand-off was interrupted is picked up by the sweeper
+  (start_resume_sweeper, started on the scheduler leader); only recipients
+  still pending are queued
+
+Delivery is at-least-once: a row sent just before its dispatcher crashed is
+sent again once its outbox lease expires.
+"""
+import os
+import socket
+import threading
+import time
+import uuid
+from typing import List, Optional
+
+from core.bot_credentials import MESSAGE_BOT
+from core.db_pool import SCHEDULER, set_pool_role
+from core.logging import get_logger
+from core.telegram_outbox import PRIORITY_BROADCAST
+from . import repo
+
+logger = get_logger(__name__)
+
+STALE_JOB_SECONDS = 120
+BROADCAST_PARSE_MODE = 'Markdown'
+
+
+def make_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def queue_job(job_id: int, tenant_id: str, worker_id: Optional[str] = None,
+              bot_role: str = MESSAGE_BOT) -> Optional[str]:
+    """
+    Claim a job and hand its pending recipients to the outbox.
+
+    Returns 'queued', 'failed' (no recipients or the hand-off errored),
+    'lost' (claimed by another worker meanwhile) or None if another worker
+    owns the job.
+    """
+    worker_id = worker_id or make_worker_id()
+    job = repo.claim_job(job_id, tenant_id, worker_id, STALE_JOB_SECONDS)
+    if job is None:
+        logger.info(f"[BROADCAST] Job {job_id} is owned by another worker, skipping")
+        return None
+    try:
+        counts = repo.queue_to_outbox(job_id, tenant_id, worker_id, bot_role,
+                                      BROADCAST_PARSE_MODE, PRIORITY_BROADCAST)
+    except Exception as e:
+        logger.exception(f"[BROADCAST] Job {job_id} could not be queued: {e}")
+        repo.finish_job(job_id, tenant_id, worker_id, 'failed')
+        return 'failed'
+    if counts is None:
+        logger.warning(f"[BROADCAST] Job {job_id} taken over by another worker, stopping")
+        return 'lost'
+
+    total, queued = counts
+    if total == 0:
+        logger.warning(f"[BROADCAST] Job {job_id} has no recipients, marking failed")
+        repo.finish_job(job_id, tenant_id, worker_id, 'failed')
+        return 'failed'
+    logger.info(f"[BROADCAST] Job {job_id}: queued {queued}/{total} recipients in the outbox")
+    return 'queued'
+
+
+def start_broadcast(tenant_id: str, users: List[dict], message: str, target_days: int = 30) -> dict:
+    """
+    Create a broadcast job with its recipient list and queue it for delivery.
+
+    Returns job info immediately; progress is visible via db.get_broadcast_job.
+    """
+    import db
+    chat_ids = list(dict.fromkeys(int(u['chat_id']) for u in users))
+    job_id = db.create_broadcast_job(message, target_days, len(chat_ids), tenant_id)
+    if not job_id:
+        raise Exception("Failed to create broadcast job")
+    repo.add_recipients(job_id, tenant_id, chat_ids)
+    queue_job(job_id, tenant_id)
+    return {
+        'success': True,
+        'job_id': job_id,
+        'total_users': len(chat_ids),
+        'status': 'processing'
+    }
+
+
+def resume_interrupted_broadcasts() -> int:
+    """Queue unfinished jobs whose hand-off was interrupted (e.g. by a restart). Returns jobs found."""
+    try:
+        jobs = repo.find_interrupted_jobs(STALE_JOB_SECONDS)
+    except Exception as e:
+        logger.warning(f"[BROADCAST] Could not check for interrupted broadcasts: {e}")
+        return 0
+    if jobs:
+        logger.info(f"[BROADCAST] Resuming {len(jobs)} interrupted broadcast job(s)")
+    for job_id, tenant_id in jobs:
+        queue_job(job_id, tenant_id)
+    return len(jobs)
+
+
+def start_resume_sweeper(interval_seconds: float = STALE_JOB_SECONDS) -> threading.Thread:
+    """
+    Check for interrupted jobs now and every interval_seconds.
+
+    A job orphaned by the restart that started this process only looks stale
+    once its last heartbeat is STALE_JOB_SECONDS old, so one check at startup
+    is not enough.
+    """
+    def _loop():
+        set_pool_role(SCHEDULER)
+        while True:
+            resume_interrupted_broadcasts()
+            time.sleep(interval_seconds)
+
+    thread = threading.Thread(target=_loop, daemon=True, name="broadcast-resume")
+    thread.start()
+    return thread
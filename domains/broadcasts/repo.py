@@ -0,0 +1,206 @@
+"""
+Broadcast Repository - job claims, outbox hand-off, delivery results and
+blocked-user cleanup.
+
+A job is owned by one worker at a time (broadcast_jobs.worker_id) while it
+is handed to the outbox; the hand-off is fenced on worker_id, so a worker
+that lost its job to a resumer writes nothing. Delivery results come from
+the outbox dispatcher and only settle recipients still 'queued', so a
+redelivered row is not counted twice.
+"""
+import json
+from collections import defaultdict
+from typing import Iterable, List, Optional, Tuple
+
+import db
+from core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+def _connection():
+    if not db.db_pool or not db.db_pool.connection_pool:
+        raise RuntimeError("Database connection pool not initialized")
+    return db.db_pool.get_connection()
+
+
+def add_recipients(job_id: int, tenant_id: str, chat_ids: Iterable[int]) -> int:
+    """Record every recipient as pending."""
+    from psycopg2.extras import execute_values
+    rows = [(job_id, tenant_id, int(chat_id)) for chat_id in chat_ids]
+    if not rows:
+        return 0
+    with _connection() as conn:
+        cursor = conn.cursor()
+        execute_values(cursor, """
+            INSERT INTO broadcast_recipients (job_id, tenant_id, chat_id)
+            VALUES %s
+            ON CONFLICT (job_id, chat_id) DO NOTHING
+        """, rows, page_size=1000)
+        conn.commit()
+    return len(rows)
+
+
+def claim_job(job_id: int, tenant_id: str, worker_id: str, stale_seconds: float) -> Optional[dict]:
+    """
+    Take ownership of a pending/processing job.
+
+    Succeeds when the job is unowned, already ours, or its owner's heartbeat
+    is older than stale_seconds. Returns the job's message or None.
+    """
+    with _connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            UPDATE broadcast_jobs
+            SET worker_id = %s, heartbeat_at = NOW(), status = 'processing'
+            WHERE id = %s AND tenant_id = %s
+              AND status IN ('pending', 'processing')
+              AND (worker_id IS NULL OR worker_id = %s
+                   OR COALESCE(heartbeat_at, created_at) < NOW() - make_interval(secs => %s))
+            RETURNING message
+        """, (worker_id, job_id, tenant_id, worker_id, stale_seconds))
+        row = cursor.fetchone()
+        conn.commit()
+    return {'id': job_id, 'tenant_id': tenant_id, 'message': row[0]} if row else None
+
+
+def find_interrupted_jobs(stale_seconds: float) -> List[Tuple[int, str]]:
+    """
+    (job_id, tenant_id) of unfinished jobs whose worker stopped heartbeating
+    with recipients still pending (or none recorded at all).
+
+    Jobs already handed to the outbox have no pending recipients and are
+    left to the dispatcher.
+    """
+    with _connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT j.id, j.tenant_id FROM broadcast_jobs j
+            WHERE j.status IN ('pending', 'processing')
+              AND COALESCE(j.heartbeat_at, j.created_at) < NOW() - make_interval(secs => %s)
+              AND (EXISTS (SELECT 1 FROM broadcast_recipients r
+                           WHERE r.job_id = j.id AND r.tenant_id = j.tenant_id AND r.status = 'pending')
+                   OR NOT EXISTS (SELECT 1 FROM broadcast_recipients r
+                                  WHERE r.job_id = j.id AND r.tenant_id = j.tenant_id))
+            ORDER BY j.id
+        """, (stale_seconds,))
+        return [(row[0], row[1]) for row in cursor.fetchall()]
+
+
+def queue_to_outbox(job_id: int, tenant_id: str, worker_id: str, bot_role: str,
+                    parse_mode: str, priority: int) -> Optional[Tuple[int, int]]:
+    """
+    Move every pending recipient into telegram_outbound_queue in one transaction.
+
+    Recipients become 'queued'; each outbox row carries broadcast_job_id so
+    the dispatcher can report back. Returns (total recipients, rows queued),
+    or None (and writes nothing) if the job is no longer ours.
+    """
+    with _connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            UPDATE broadcast_jobs SET heartbeat_at = NOW()
+            WHERE id = %s AND tenant_id = %s AND worker_id = %s
+            RETURNING message
+        """, (job_id, tenant_id, worker_id))
+        row = cursor.fetchone()
+        if row is None:
+            conn.rollback()
+            return None
+        payload = json.dumps({'text': row[0], 'parse_mode': parse_mode, 'broadcast_job_id': job_id})
+        cursor.execute("""
+            SELECT COUNT(*) FROM broadcast_recipients WHERE job_id = %s AND tenant_id = %s
+        """, (job_id, tenant_id))
+        total = cursor.fetchone()[0]
+        cursor.execute("""
+            WITH queued AS (
+                UPDATE broadcast_recipients
+                SET status = 'queued', updated_at = NOW()
+                WHERE job_id = %s AND tenant_id = %s AND status = 'pending'
+                RETURNING chat_id
+            )
+            INSERT INTO telegram_outbound_queue
+                (tenant_id, bot_role, chat_id, kind, payload, priority, not_before)
+            SELECT %s, %s, chat_id::text, 'message', %s::jsonb, %s, NOW()
+            FROM queued
+            ORDER BY chat_id
+        """, (job_id, tenant_id, tenant_id, bot_role, payload, priority))
+        queued = cursor.rowcount
+        conn.commit()
+    return total, queued
+
+
+def record_outbox_results(results: Iterable[Tuple[int, str, str, str, Optional[str]]],
+                          cursor=None) -> None:
+    """
+    Settle (job_id, tenant_id, chat_id, status, error) outcomes from the outbox.
+
+    Per job: recipients still 'queued' take their final status, the job's
+    sent/failed counters grow by what was settled, users who blocked the bot
+    are deleted with one DELETE, and the job completes once no recipient is
+    pending or queued. With `cursor` this runs in the caller's transaction
+    (the dispatcher settles in the same commit that marks its outbox row);
+    otherwise in one transaction of its own.
+    """
+    by_job = defaultdict(list)
+    for job_id, tenant_id, chat_id, status, error in results:
+        by_job[(int(job_id), tenant_id)].append((int(chat_id), status, error))
+    if not by_job:
+        return
+    if cursor is not None:
+        _settle(cursor, by_job)
+        return
+    with _connection() as conn:
+        _settle(conn.cursor(), by_job)
+        conn.commit()
+
+
+def _settle(cursor, by_job: dict) -> None:
+    from psycopg2.extras import execute_values
+    for (job_id, tenant_id), outcomes in by_job.items():
+        settled = execute_values(cursor, """
+            UPDATE broadcast_recipients AS r
+            SET status = v.status, error = v.error, updated_at = NOW()
+            FROM (VALUES %s) AS v(job_id, tenant_id, chat_id, status, error)
+            WHERE r.job_id = v.job_id AND r.tenant_id = v.tenant_id AND r.chat_id = v.chat_id
+              AND r.status = 'queued'
+            RETURNING r.chat_id, r.status
+        """, [(job_id, tenant_id, chat_id, status, error) for chat_id, status, error in outcomes],
+            template="(%s::integer, %s, %s::bigint, %s, %s)", page_size=1000, fetch=True)
+        sent = sum(1 for _, status in settled if status == 'sent')
+        failed = len(settled) - sent
+        blocked = [chat_id for chat_id, status in settled if status == 'blocked']
+        cursor.execute("""
+            UPDATE broadcast_jobs
+            SET sent_count = COALESCE(sent_count, 0) + %s,
+                failed_count = COALESCE(failed_count, 0) + %s
+            WHERE id = %s AND tenant_id = %s
+        """, (sent, failed, job_id, tenant_id))
+        if blocked:
+            cursor.execute("""
+                DELETE FROM bot_users WHERE tenant_id = %s AND chat_id = ANY(%s)
+            """, (tenant_id, blocked))
+            logger.info(f"[BROADCAST] Job {job_id}: removed {len(blocked)} users who blocked the bot")
+        cursor.execute("""
+            UPDATE broadcast_jobs
+            SET status = 'completed', completed_at = CURRENT_TIMESTAMP
+            WHERE id = %s AND tenant_id = %s AND status = 'processing'
+              AND NOT EXISTS (
+                  SELECT 1 FROM broadcast_recipients
+                  WHERE job_id = %s AND tenant_id = %s AND status IN ('pending', 'queued')
+              )
+        """, (job_id, tenant_id, job_id, tenant_id))
+        if cursor.rowcount:
+            logger.info(f"[BROADCAST] Job {job_id} completed")
+
+
+def finish_job(job_id: int, tenant_id: str, worker_id: str, status: str) -> None:
+    """Mark the job completed/failed if we still own it."""
+    with _connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            UPDATE broadcast_jobs
+            SET status = %s, completed_at = CURRENT_TIMESTAMP, heartbeat_at = NOW()
+            WHERE id = %s AND tenant_id = %s AND worker_id = %s
+        """, (status, job_id, tenant_id, worker_id))
+        conn.commit()
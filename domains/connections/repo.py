@@ -155,6 +155,8 @@ def delete_connection(tenant_id: str, bot_role: str) -> bool:
             deleted = cursor.rowcount > 0
             if deleted:
                 logger.info(f"Deleted connection: tenant={tenant_id}, role={bot_role}")
+                from db import invalidate_webhook_secret_cache
+                invalidate_webhook_secret_cache()
             return True
     except Exception as e:
         logger.exception(f"Error deleting connection for tenant {tenant_id}, role {bot_role}: {e}")
@@ -8,10 +8,13 @@ import traceback
 import time
 import os
 import subprocess
+import uuid
 from urllib.parse import urlparse, parse_qs
 
 from utils.multipart import parse_multipart_formdata
 
+from domains.coupons import template_cache
+
 from core.config import Config
 
 from core.logging import get_logger
@@ -40,10 +43,8 @@ def handle_campaigns_list(handler):
 def handle_campaign_by_id(handler):
     """GET /api/campaigns/<id>"""
     import server
-    parsed_path = urlparse(handler.path)
-    
     try:
-        campaign_id = int(parsed_path.path.split('/')[3])
+        campaign_id = int(handler.path_params['campaign_id'])
         campaign = server.db.get_campaign_by_id(campaign_id, tenant_id=handler.tenant_id)
         
         if campaign:
@@ -72,10 +73,8 @@ def handle_campaign_by_id(handler):
 def handle_campaign_submissions(handler):
     """GET /api/campaigns/<id>/submissions"""
     import server
-    parsed_path = urlparse(handler.path)
-    
     try:
-        campaign_id = int(parsed_path.path.split('/')[3])
+        campaign_id = int(handler.path_params['campaign_id'])
         submissions = server.db.get_campaign_submissions(campaign_id, tenant_id=handler.tenant_id)
         handler.send_response(200)
         handler.send_header('Content-type', 'application/json')
@@ -163,10 +162,8 @@ def handle_bot_users(handler):
 def handle_broadcast_status(handler):
     """GET /api/broadcast-status/<id>"""
     import server
-    parsed_path = urlparse(handler.path)
-    
     try:
-        job_id = int(parsed_path.path.split('/')[-1])
+        job_id = int(handler.path_params['job_id'])
         job = server.db.get_broadcast_job(job_id, tenant_id=handler.tenant_id)
         
         if job:
@@ -213,10 +210,8 @@ def handle_broadcast_jobs(handler):
 def handle_user_activity(handler):
     """GET /api/user-activity/<id>"""
     import server
-    parsed_path = urlparse(handler.path)
-    
     try:
-        chat_id = int(parsed_path.path.split('/')[-1])
+        chat_id = int(handler.path_params['chat_id'])
         
         user = server.db.get_bot_user(chat_id, tenant_id=handler.tenant_id)
         history = server.db.get_user_activity_history(chat_id, limit=100, tenant_id=handler.tenant_id)
@@ -360,10 +355,8 @@ def handle_campaigns_create(handler):
 def handle_campaign_submit(handler):
     """POST /api/campaigns/<id>/submit"""
     import server
-    parsed_path = urlparse(handler.path)
-    
     try:
-        campaign_id = int(parsed_path.path.split('/')[3])
+        campaign_id = int(handler.path_params['campaign_id'])
         content_length = int(handler.headers['Content-Length'])
         post_data = handler.rfile.read(content_length)
         data = json.loads(post_data.decode('utf-8'))
@@ -385,10 +378,8 @@ def handle_campaign_submit(handler):
 def handle_campaign_update(handler):
     """POST /api/campaigns/<id>/update"""
     import server
-    parsed_path = urlparse(handler.path)
-    
     try:
-        campaign_id = int(parsed_path.path.split('/')[3])
+        campaign_id = int(handler.path_params['campaign_id'])
         content_length = int(handler.headers['Content-Length'])
         post_data = handler.rfile.read(content_length)
         data = json.loads(post_data.decode('utf-8'))
@@ -416,10 +407,8 @@ def handle_campaign_update(handler):
 def handle_campaign_delete(handler):
     """POST /api/campaigns/<id>/delete"""
     import server
-    parsed_path = urlparse(handler.path)
-    
     try:
-        campaign_id = int(parsed_path.path.split('/')[3])
+        campaign_id = int(handler.path_params['campaign_id'])
         
         result = server.db.delete_campaign(campaign_id, tenant_id=handler.tenant_id)
         
@@ -488,7 +477,7 @@ def handle_broadcast(handler):
             }).encode())
             return
         
-        result = server.telegram_bot.send_broadcast(users, message)
+        result = server.telegram_bot.send_broadcast(users, message, tenant_id=handler.tenant_id, target_days=days)
         
         handler.send_response(200)
         handler.send_header('Content-type', 'application/json')
@@ -736,7 +725,9 @@ def handle_upload_template(handler):
         
         meta = {
             'name': name,
-            'telegramEnabled': existing_telegram_enabled
+            'telegramEnabled': existing_telegram_enabled,
+            # Changes on every upload; render workers key cached base images on it
+            'version': uuid.uuid4().hex[:12]
         }
         
         if square_image_url or has_square_image or existing_square_data:
@@ -776,6 +767,8 @@ def handle_upload_template(handler):
             meta_json_str = json.dumps(meta, indent=2)
             storage_service.upload_file(meta_json_str.encode(), f"templates/{slug}/meta.json")
         
+        template_cache.invalidate_template(slug)
+        
         result = subprocess.run(
             ['python3', 'regenerate_index.py'],
             capture_output=True,
@@ -856,6 +849,8 @@ def handle_delete_template(handler):
         if not deleted_something:
             raise ValueError(f'Template "{slug}" not found in storage or locally')
         
+        template_cache.invalidate_template(slug)
+        
         result = subprocess.run(
             ['python3', 'regenerate_index.py'],
             capture_output=True,
@@ -1026,6 +1021,7 @@ def handle_clear_telegram_cache(handler):
 def handle_regenerate_index(handler):
     """POST /api/regenerate-index"""
     try:
+        template_cache.invalidate_all()
         result = subprocess.run(
             ['python3', 'regenerate_index.py'],
             capture_output=True,
@@ -1078,10 +1074,28 @@ def handle_day_of_week_stats(handler):
 
 
 def handle_retention_rates(handler):
-    """GET /api/retention-rates"""
+    """
+    GET /api/retention-rates
+    
+    Default: Day 1/7/30 rates. With ?view=cohorts the full cohort grid
+    (optional period=day|week|month, periods=N).
+    """
     import server
     try:
-        rates = server.db.get_retention_rates(tenant_id=handler.tenant_id)
+        query_params = parse_qs(urlparse(handler.path).query)
+        if query_params.get('view', [None])[0] == 'cohorts':
+            period = query_params.get('period', ['week'])[0]
+            try:
+                periods = int(query_params.get('periods', ['12'])[0])
+                rates = server.db.get_retention_cohorts(handler.tenant_id, period=period, periods=periods)
+            except ValueError as e:
+                handler.send_response(400)
+                handler.send_header('Content-type', 'application/json')
+                handler.end_headers()
+                handler.wfile.write(json.dumps({'error': str(e)}).encode())
+                return
+        else:
+            rates = server.db.get_retention_rates(tenant_id=handler.tenant_id)
         handler.send_response(200)
         handler.send_header('Content-type', 'application/json')
         handler.end_headers()
@@ -0,0 +1,192 @@
+"""
+Template asset and render caches for coupon image generation.
+
+Generating a coupon image used to download templates/<slug>/meta.json and
+the base template image, and decode it, on every request. Two in-process
+LRU caches, each under a byte budget, avoid that:
+
+- Assets: parsed meta.json per slug and the decoded RGBA base image per
+  (slug, variant). Renders draw on a copy, the cached image is never mutated.
+- Renders: finished PNG bytes per (slug, variant, sanitized coupon code), so
+  a repeat request for the same coupon is served without touching PIL.
+
+Entries also expire after TEMPLATE_CACHE_TTL_SECONDS, so an edit made through
+another process is picked up eventually. In this process the template
+upload/delete/regenerate-index handlers invalidate immediately.
+
+Render worker processes (core/render_service.py) keep their own base-image
+cache that these invalidations cannot reach, so base images and renders are
+also keyed on template_version(): the 'version' stamped into meta.json on
+every upload plus a generation bumped by each local invalidation. A
+re-upload under the same image URL therefore misses in every worker.
+
+NO side effects at import time (caches are created on first use).
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+from core.config import Config
+from core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class ByteBudgetLRU:
+    """Thread-safe LRU cache bounded by the total size of its values."""
+
+    def __init__(self, name: str, max_bytes: int, ttl_seconds: float):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, key: Hashable, value: Any, size: int) -> None:
+        if size > self.max_bytes:
+            logger.debug(f"[TEMPLATE-CACHE] {self.name}: {key} ({size} bytes) exceeds budget, not cached")
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, size, value)
+            self.size_bytes += size
+            while self.size_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+
+    def _remove(self, key: Hashable) -> None:
+        _, size, _ = self._entries.pop(key)
+        self.size_bytes -= size
+
+    def discard_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.size_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+_assets: Optional[ByteBudgetLRU] = None
+_renders: Optional[ByteBudgetLRU] = None
+_init_lock = threading.Lock()
+_generations: dict = {}
+_generation_all = 0
+
+
+def _caches():
+    global _assets, _renders
+    with _init_lock:
+        if _assets is None:
+            ttl = Config.get_template_cache_ttl_seconds()
+            _assets = ByteBudgetLRU('assets', Config.get_template_cache_max_bytes(), ttl)
+            _renders = ByteBudgetLRU('renders', Config.get_render_cache_max_bytes(), ttl)
+        return _assets, _renders
+
+
+def get_metadata(slug: str, loader: Callable[[], Optional[bytes]]) -> Optional[dict]:
+    """Parsed meta.json for slug; loader() returns the raw JSON bytes on a miss."""
+    import json
+    assets, _ = _caches()
+    key = ('meta', slug)
+    metadata = assets.get(key)
+    if metadata is None:
+        raw = loader()
+        if not raw:
+            return None
+        metadata = json.loads(raw.decode('utf-8'))
+        assets.put(key, metadata, len(raw))
+    return metadata
+
+
+def template_version(slug: str, metadata: Optional[dict]) -> str:
+    """Version of a template's assets: meta.json 'version' plus the local invalidation generation."""
+    with _init_lock:
+        generation = f"{_generation_all}.{_generations.get(slug, 0)}"
+    return f"{(metadata or {}).get('version', '')}:{generation}"
+
+
+def get_base_image(slug: str, variant: str, image_url: str, loader: Callable[[str], Any],
+                   version: str = ''):
+    """
+    Decoded RGBA base image for (slug, variant).
+
+    Keyed on image_url and the template version as well, so a re-uploaded
+    variant is never served stale. Callers must copy() before drawing.
+    """
+    assets, _ = _caches()
+    key = ('image', slug, variant, image_url, version)
+    image = assets.get(key)
+    if image is None:
+        image = loader(image_url).convert('RGBA')
+        width, height = image.size
+        assets.put(key, image, width * height * len(image.getbands()))
+    return image
+
+
+def get_render(slug: str, variant: str, coupon_code: str, version: str = '') -> Optional[bytes]:
+    """PNG bytes of a previous render of this template version, or None."""
+    _, renders = _caches()
+    return renders.get((slug, variant, coupon_code, version))
+
+
+def put_render(slug: str, variant: str, coupon_code: str, png: bytes, version: str = '') -> None:
+    _, renders = _caches()
+    renders.put((slug, variant, coupon_code, version), png, len(png))
+
+
+def invalidate_template(slug: str) -> None:
+    """Drop metadata, base images and renders of one template."""
+    assets, renders = _caches()
+    with _init_lock:
+        _generations[slug] = _generations.get(slug, 0) + 1
+    dropped = assets.discard_where(lambda key: key[1] == slug)
+    dropped += renders.discard_where(lambda key: key[0] == slug)
+    logger.info(f"[TEMPLATE-CACHE] Invalidated '{slug}' ({dropped} entries)")
+
+
+def invalidate_all() -> None:
+    """Drop every cached template asset and render."""
+    global _generation_all
+    assets, renders = _caches()
+    with _init_lock:
+        _generation_all += 1
+    assets.clear()
+    renders.clear()
+    logger.info("[TEMPLATE-CACHE] Cleared all template assets and renders")
+
+
+def get_cache_stats() -> dict:
+    assets, renders = _caches()
+    return {'assets': assets.stats(), 'renders': renders.stats()}
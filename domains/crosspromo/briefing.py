@@ -347,11 +347,15 @@ def compute_briefing_data() -> Optional[BriefingData]:
     )
 
 
-def generate_ai_briefing(data: BriefingData) -> Optional[str]:
+def generate_ai_briefing(data: BriefingData, tenant_id: Optional[str] = None) -> Optional[str]:
     """
     Use OpenAI to generate a natural-sounding briefing from computed data.
+    
+    Goes through the LLM gateway: every tenant briefing the same market data
+    reuses one completion.
     """
     from openai import OpenAI
+    from integrations.openai.gateway import complete as llm_complete
     
     try:
         api_key = os.environ.get("AI_INTEGRATIONS_OPENAI_API_KEY") or os.environ.get("OPENAI_API_KEY")
@@ -424,13 +428,15 @@ Stay tuned for signals. 📊
 
 Write ONLY the briefing message:"""
 
-        response = client.chat.completions.create(
+        completion = llm_complete(
             model="gpt-4o-mini",
             messages=[{"role": "user", "content": prompt}],
-            max_tokens=400
+            max_tokens=400,
+            tenant_id=tenant_id,
+            client=client
         )
         
-        message = response.choices[0].message.content.strip()
+        message = (completion.content or "").strip()
         
         # Validate response
         if len(message) < 100 or len(message) > 1000:
@@ -505,7 +511,7 @@ def generate_morning_briefing(tenant_id: str = "default") -> str:
         return build_fallback_briefing()
     
     # Step 2: Try AI generation
-    ai_message = generate_ai_briefing(data)
+    ai_message = generate_ai_briefing(data, tenant_id=tenant_id)
     
     if ai_message:
         logger.info(f"Generated AI briefing for {tenant_id}")
@@ -109,6 +109,7 @@ def handle_signal_bot_status(handler):
     """GET /api/signal-bot/status"""
     from db import get_active_bot, get_open_signal, get_signals_by_bot_type, get_queued_bot, get_daily_pnl
     from forex_api import twelve_data_client
+    from core.offload import get_loop_lag_stats
     
     try:
         active_bot = get_active_bot(tenant_id=handler.tenant_id)
@@ -158,7 +159,9 @@ def handle_signal_bot_status(handler):
                 'conservative': len(conservative_signals),
                 'custom': len(custom_signals),
                 'legacy': len(legacy_signals)
-            }
+            },
+            # Scheduler event-loop lag and AI/image offload pools (this process only)
+            'scheduler_loop': get_loop_lag_stats()
         }
         
         handler.send_response(200)
@@ -464,8 +464,15 @@ def _get_arc_instruction(step: int, total: int) -> str:
     return "Build on what you said. Add a NEW angle. Do NOT reuse opener/closing lines from prior messages."
 
 
-def _generate_messages_internal(tenant_id: str, custom_prompt: str, message_count: int = 3, signal_context: str = None, context_override: str = None) -> tuple:
+def _generate_messages_internal(tenant_id: str, custom_prompt: str, message_count: int = 3, signal_context: str = None, context_override: str = None, cache: bool = True) -> tuple:
+    """Generate a validated message sequence; returns (messages, error).
+
+    cache=False always asks the model for fresh drafts (previews). Retries
+    after a rejected draft never use the LLM cache, since a cached draft
+    that failed validation would fail again.
+    """
     from openai import OpenAI
+    from integrations.openai.gateway import complete as llm_complete
 
     try:
         api_key = os.environ.get("AI_INTEGRATIONS_OPENAI_API_KEY") or os.environ.get("OPENAI_API_KEY")
@@ -512,13 +519,16 @@ Write ONLY the Telegram message body. No preface, no explanation, no link, no em
             attempt_conversation = list(conversation)
             MAX_ATTEMPTS = 3  # initial + 2 retries
             for attempt in range(1, MAX_ATTEMPTS + 1):
-                response = client.chat.completions.create(
+                completion = llm_complete(
                     model="gpt-4o-mini",
                     messages=attempt_conversation,
                     max_tokens=220,
+                    tenant_id=tenant_id,
+                    client=client,
+                    cache=cache and attempt == 1,
                 )
 
-                candidate = (response.choices[0].message.content or "").strip()
+                candidate = (completion.content or "").strip()
 
                 if len(candidate) < 10 or len(candidate) > 2100:
                     logger.warning(
@@ -581,7 +591,8 @@ def generate_message(tenant_id: str, custom_prompt: str, signal_context: str = N
 
 def preview_message(tenant_id: str, custom_prompt: str, message_count: int = 3) -> Dict:
     context = build_context(tenant_id)
-    messages, error = _generate_messages_internal(tenant_id, custom_prompt, message_count)
+    # Every preview click should show new drafts, not the cached ones
+    messages, error = _generate_messages_internal(tenant_id, custom_prompt, message_count, cache=False)
 
     result = {
         "messages": messages,
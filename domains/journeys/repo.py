@@ -1892,53 +1892,19 @@ def get_sessions_by_chat_id(tenant_id: str, chat_id: int) -> List[Dict]:
 def check_message_dedupe(tenant_id: str, chat_id: int, message_id: int) -> bool:
     """Check if a message has already been processed (dedupe).
     
-    Returns True if this is a NEW message (inserted), False if duplicate.
+    Returns True if this is a NEW message (claimed), False if duplicate or
+    if the idempotency store is unavailable.
     """
-    db_pool = _get_db_pool()
-    if not db_pool or not db_pool.connection_pool:
-        return False
+    from core.idempotency import CLAIMED, IdempotencyUnavailable, get_idempotency_store
 
     try:
-        with db_pool.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO journey_inbound_dedupe (tenant_id, chat_id, message_id)
-                VALUES (%s, %s, %s)
-                ON CONFLICT (tenant_id, chat_id, message_id) DO NOTHING
-            """, (tenant_id, chat_id, message_id))
-            conn.commit()
-            return cursor.rowcount > 0
-    except Exception as e:
-        logger.exception(f"Error checking message dedupe: {e}")
+        claim = get_idempotency_store().claim('journey_message', tenant_id, f"{chat_id}:{message_id}")
+        return claim == CLAIMED
+    except IdempotencyUnavailable as e:
+        logger.error(f"Error checking message dedupe: {e}")
         return False
 
 
-def cleanup_old_dedupe_records(days: int = 7) -> int:
-    """Delete journey_inbound_dedupe records older than N days. Returns count deleted."""
-    db_pool = _get_db_pool()
-    if not db_pool or not db_pool.connection_pool:
-        return 0
-
-    try:
-        with db_pool.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                "DELETE FROM journey_inbound_dedupe WHERE received_at < NOW() - make_interval(days => %s)",
-                (days,)
-            )
-            deleted = cursor.rowcount
-            conn.commit()
-            if deleted > 0:
-                logger.info(f"Cleaned up {deleted} old dedupe records (>{days} days)")
-            return deleted
-    except Exception as e:
-        if 'relation "journey_inbound_dedupe" does not exist' in str(e):
-            logger.debug("journey_inbound_dedupe table does not exist yet, skipping cleanup")
-            return 0
-        logger.exception(f"Error cleaning up dedupe records: {e}")
-        return 0
-
-
 def cancel_pending_scheduled_messages(session_id: str) -> int:
     """Cancel all pending scheduled messages for a session.
     
@@ -14,6 +14,7 @@ import time
 from datetime import datetime
 from typing import Optional
 
+from core.db_pool import SCHEDULER, set_pool_role
 from core.logging import get_logger
 
 logger = get_logger(__name__)
@@ -337,6 +338,7 @@ def _scheduler_loop(interval_seconds: int):
     """Main scheduler loop."""
     global _scheduler_running, _last_dedupe_cleanup, _last_email_only_check
     
+    set_pool_role(SCHEDULER)
     logger.info(f"[JOURNEY-SCHEDULER] Started (interval={interval_seconds}s)")
     
     while _scheduler_running:
@@ -353,13 +355,13 @@ def _scheduler_loop(interval_seconds: int):
                     logger.exception(f"[JOURNEY-SCHEDULER] email_only_captured check error: {e}")
                     _last_email_only_check = now
             
-            # Hourly dedupe table cleanup
+            # Hourly idempotency partition maintenance (create upcoming, drop expired)
             if now - _last_dedupe_cleanup > 3600:  # Once per hour
                 try:
-                    from . import repo
-                    deleted = repo.cleanup_old_dedupe_records(days=7)
-                    if deleted > 0:
-                        logger.info(f"[JOURNEY-SCHEDULER] Cleaned up {deleted} old dedupe records")
+                    from core.idempotency import get_idempotency_store
+                    dropped = get_idempotency_store().maintain()
+                    if dropped:
+                        logger.info(f"[JOURNEY-SCHEDULER] Dropped {len(dropped)} expired idempotency partitions")
                     _last_dedupe_cleanup = now
                 except Exception as e:
                     logger.exception(f"[JOURNEY-SCHEDULER] Dedupe cleanup error: {e}")
@@ -7,6 +7,7 @@ All functions remain here for backward compatibility.
 """
 from datetime import datetime
 from integrations.openai.client import get_openai_client
+from integrations.openai.gateway import complete as llm_complete
 from db import (
     get_forex_signals_by_period, get_forex_stats_by_period,
     get_recent_signal_streak, get_recent_phrases, add_recent_phrase
@@ -252,17 +253,18 @@ Style: 2-3 sentences max. Analytical and professional. Reference market conditio
 
 Generate the analytical recap commentary (don't repeat the numbers, focus on insights):"""
         
-        response = _get_client().chat.completions.create(
+        content = llm_complete(
             model="gpt-4o-mini",
             messages=[
                 {"role": "system", "content": "You are a professional, data-driven forex analyst who provides analytical daily recaps. Focus on market conditions, technical analysis, and strategy performance metrics."},
                 {"role": "user", "content": prompt}
             ],
             max_tokens=150,
-            temperature=0.7
-        )
+            temperature=0.7,
+            tenant_id=tenant_id,
+            client=_get_client()
+        ).content
         
-        content = response.choices[0].message.content
         commentary = content.strip() if content else "Markets were active today."
         
         return f"\n<b>Today's Signals:</b>\n{signal_list}\n\n{commentary}"
@@ -452,13 +454,14 @@ Style: Analytical and insightful. Reference yesterday's market conditions or str
         }
 
 
-def generate_morning_summary(current_price, news_items=None):
+def generate_morning_summary(current_price, news_items=None, tenant_id='entrylab'):
     """
     Generate a personalized morning summary for the trading day.
     
     Args:
         current_price: Current gold price
         news_items: List of news items with title and sentiment
+        tenant_id: Tenant charged for the tokens
     
     Returns:
         str: Short, human-sounding summary (1-2 sentences)
@@ -491,17 +494,18 @@ Examples of good tone:
 
 Generate the morning message:"""
         
-        response = _get_client().chat.completions.create(
+        content = llm_complete(
             model="gpt-4o-mini",
             messages=[
                 {"role": "system", "content": "You are a friendly, experienced gold trading analyst giving morning updates to your team. Keep it brief, human, and actionable."},
                 {"role": "user", "content": prompt}
             ],
             max_tokens=60,
-            temperature=0.8
-        )
+            temperature=0.8,
+            tenant_id=tenant_id,
+            client=_get_client()
+        ).content
         
-        content = response.choices[0].message.content
         return content.strip().strip('"\'') if content else "Stay sharp out there."
         
     except Exception as e:
@@ -543,17 +547,18 @@ Style: 3-4 sentences. Professional and data-focused. Analyze strategy effectiven
 
 Generate the analytical recap:"""
         
-        response = _get_client().chat.completions.create(
+        content = llm_complete(
             model="gpt-4o-mini",
             messages=[
                 {"role": "system", "content": "You are a professional, data-driven forex analyst who provides analytical weekly performance recaps. Focus on strategy metrics, market conditions, and technical analysis patterns."},
                 {"role": "user", "content": prompt}
             ],
             max_tokens=200,
-            temperature=0.7
-        )
+            temperature=0.7,
+            tenant_id=tenant_id,
+            client=_get_client()
+        ).content
         
-        content = response.choices[0].message.content
         return content.strip() if content else None
         
     except Exception as e:
@@ -10,6 +10,7 @@ from db import create_forex_signal, get_forex_signals, get_forex_stats_by_period
 from core.logging import get_logger
 from core.bot_credentials import BotNotConfiguredError, SIGNAL_BOT
 from core.telegram_sender import send_to_channel, get_connection_for_send, SendResult
+from core.telegram_outbox import PRIORITY_SIGNAL, PRIORITY_NOTIFICATION
 from core.pip_calculator import PIPS_MULTIPLIER, calculate_pips
 
 logger = get_logger(__name__)
@@ -30,7 +31,7 @@ class ForexTelegramBot:
     
     All sends go through core/telegram_sender.py which:
     - Resolves fresh credentials from DB (with short TTL cache)
-    - Constructs short-lived Bot per send
+    - Reuses pooled Bot clients within the bot's rate limits
     - Fails fast if credentials missing
     """
     
@@ -48,14 +49,18 @@ class ForexTelegramBot:
             logger.debug(f"is_configured=False: vip_channel_id={connection.vip_channel_id}")
         return is_ready
     
-    async def _send(self, text: str, channel_type: str = 'vip') -> SendResult:
-        """Internal send helper - all channel sends go through VIP channel by default."""
+    async def _send(self, text: str, channel_type: str = 'vip', priority: int = PRIORITY_SIGNAL) -> SendResult:
+        """
+        Internal send helper - all channel sends go through VIP channel by default.
+        Signal lifecycle posts use PRIORITY_SIGNAL; recaps pass PRIORITY_NOTIFICATION.
+        """
         return await send_to_channel(
             tenant_id=self.tenant_id,
             bot_role=SIGNAL_BOT,
             text=text,
             parse_mode='HTML',
-            channel_type=channel_type
+            channel_type=channel_type,
+            priority=priority
         )
     
     async def post_signal(self, signal_data):
@@ -74,7 +79,8 @@ class ForexTelegramBot:
             return None
         
         try:
-            pending_signals = get_forex_signals(tenant_id=self.tenant_id, status='pending')
+            pending_signals = get_forex_signals(tenant_id=self.tenant_id, status='pending', limit=1,
+                                                columns=('id', 'entry_price', 'posted_at'), as_records=True)
             if pending_signals and len(pending_signals) > 0:
                 existing = pending_signals[0]
                 logger.error(f"Cannot post new signal - signal #{existing['id']} is still pending")
@@ -658,7 +664,7 @@ No signals posted today. Markets were quiet."""
                 if ai_message:
                     message += f"\n\n{ai_message}"
             
-            result = await self._send(message)
+            result = await self._send(message, priority=PRIORITY_NOTIFICATION)
             
             if result.success:
                 logger.info(f"Posted daily recap for {date_str or 'today'}")
@@ -685,7 +691,7 @@ No signals posted today. Markets were quiet."""
             return None
         
         try:
-            result = await self._send(message)
+            result = await self._send(message, priority=PRIORITY_NOTIFICATION)
             
             if result.success:
                 logger.info("Posted detailed daily recap to VIP channel")
@@ -736,7 +742,7 @@ No signals posted this week."""
                 if ai_message:
                     message += f"\n\n{ai_message}"
             
-            result = await self._send(message)
+            result = await self._send(message, priority=PRIORITY_NOTIFICATION)
             
             if result.success:
                 logger.info(f"Posted weekly recap for {week_str or 'this week'} (msg_id: {result.message_id})")
@@ -768,7 +774,7 @@ No signals posted this week."""
 Good morning! Markets are open. Stay disciplined and follow the signals. 💪"""
             
             # ai_message already includes the header from crosspromo service, so send directly
-            result = await self._send(ai_message)
+            result = await self._send(ai_message, priority=PRIORITY_NOTIFICATION)
             
             if result.success:
                 logger.info("Posted morning briefing")
@@ -795,7 +801,7 @@ Good morning! Markets are open. Stay disciplined and follow the signals. 💪"""
             return False
         
         try:
-            result = await self._send(message)
+            result = await self._send(message, priority=PRIORITY_NOTIFICATION)
             return result.success
         except Exception as e:
             logger.exception(f"Failed to send custom message: {e}")
@@ -7,10 +7,15 @@ Handles CLI argument parsing and main loop orchestration.
 import argparse
 import asyncio
 import os
+import random
 import sys
+import time
 from datetime import datetime
+from typing import Dict, Optional, Set
 
+from core.config import Config
 from core.logging import get_logger
+from core.offload import run_ai, ensure_loop_lag_monitor
 from core.runtime import require_tenant_runtime, TenantRuntime
 from core.alerts import notify_error
 from scheduler import SignalGenerator, SignalMonitor, Messenger
@@ -156,7 +161,8 @@ class ForexSchedulerRunner:
                 if last_posted != current_date_str:
                     logger.info("Generating detailed daily recap for yesterday...")
                     
-                    recap_result = generate_detailed_daily_recap(
+                    recap_result = await run_ai(
+                        generate_detailed_daily_recap,
                         tenant_id=self.tenant_id, 
                         period='yesterday'
                     )
@@ -218,7 +224,7 @@ class ForexSchedulerRunner:
                 if last_posted != week_number:
                     logger.info("Generating weekly recap...")
                     
-                    ai_recap = generate_weekly_recap(tenant_id=self.tenant_id)
+                    ai_recap = await run_ai(generate_weekly_recap, tenant_id=self.tenant_id)
                     bot = self.runtime.get_telegram_bot()
                     result = await bot.post_weekly_recap(ai_recap)
                     
@@ -287,8 +293,15 @@ class ForexSchedulerRunner:
             await self.generator.run_signal_check()
             logger.info("Single check completed")
     
-    async def run_forever(self):
-        """Main scheduler loop"""
+    async def run_forever(self, tick_timeout: Optional[float] = None):
+        """
+        Main scheduler loop.
+        
+        Args:
+            tick_timeout: Optional per-tick time budget in seconds. A tick that
+                          exceeds it is cancelled and the loop moves on, so one
+                          stuck tenant cannot hold a shared event loop forever.
+        """
         logger.info("")
         logger.info("=" * 60)
         logger.info("🚀 FOREX SIGNALS SCHEDULER STARTED")
@@ -307,34 +320,20 @@ class ForexSchedulerRunner:
         logger.info("⏰ Trading hours: 8AM-10PM GMT (Mon-Fri only)")
         logger.info("=" * 60)
         
+        ensure_loop_lag_monitor(f"scheduler:{self.tenant_id}")
+        
+        # Share one upstream price fetch per symbol across all tenants in this process
+        self.runtime.subscribe_prices(self.runtime.get_signal_engine().symbol)
+        self.runtime.get_price_client().start_polling()
+        
         tick_counter = 0
-        signal_every = self.signal_check_interval // self.monitor_interval       # 900/5 = 180 ticks
-        stagnant_every = STAGNANT_CHECK_INTERVAL // self.monitor_interval         # 300/5 = 60 ticks
-        scheduled_every = SCHEDULED_CHECK_INTERVAL // self.monitor_interval       # 60/5 = 12 ticks
         
         while True:
             try:
-                with self.runtime.request_context():
-                    # Signal generation check (every 15 minutes)
-                    if tick_counter % signal_every == 0:
-                        await self.generator.run_signal_check()
-                    
-                    # Price monitoring (every 5 seconds)
-                    await self.monitor.run_signal_monitoring()
-                    
-                    # Milestone guidance (every 5 seconds, reuses cached price from monitoring)
-                    await self.monitor.run_signal_guidance()
-                    
-                    # Stagnant signal checks (every 5 minutes)
-                    if tick_counter % stagnant_every == 0:
-                        await self.monitor.run_stagnant_signal_checks()
-                    
-                    # Scheduled messages (every 1 minute)
-                    if tick_counter % scheduled_every == 0:
-                        await self.check_morning_briefing()
-                        await self.check_daily_recap()
-                        await self.check_weekly_recap()
-                        await self.check_crosspromo_daily()
+                if tick_timeout:
+                    await asyncio.wait_for(self.run_tick(tick_counter), timeout=tick_timeout)
+                else:
+                    await self.run_tick(tick_counter)
                 
                 tick_counter += 1
                 await asyncio.sleep(self.monitor_interval)
@@ -342,18 +341,55 @@ class ForexSchedulerRunner:
             except KeyboardInterrupt:
                 logger.info("Shutting down...")
                 break
+            except asyncio.TimeoutError:
+                logger.warning(f"Tenant {self.tenant_id} tick exceeded {tick_timeout}s, skipping to next tick")
+                notify_error(
+                    f"Scheduler tick timeout after {tick_timeout}s",
+                    tenant_id=self.tenant_id,
+                    context={"error_type": "timeout", "duration_s": tick_timeout}
+                )
+                tick_counter += 1
+                await asyncio.sleep(self.monitor_interval)
             except Exception as e:
                 logger.exception(f"❌ Unexpected error: {e}")
                 await asyncio.sleep(60)
-
+    
+    async def run_tick(self, tick_counter: int):
+        """Run one scheduler tick (monitoring every tick, other work on its cadence)."""
+        signal_every = self.signal_check_interval // self.monitor_interval       # 900/5 = 180 ticks
+        stagnant_every = STAGNANT_CHECK_INTERVAL // self.monitor_interval         # 300/5 = 60 ticks
+        scheduled_every = SCHEDULED_CHECK_INTERVAL // self.monitor_interval       # 60/5 = 12 ticks
+        
+        with self.runtime.request_context():
+            # Signal generation check (every 15 minutes)
+            if tick_counter % signal_every == 0:
+                await self.generator.run_signal_check()
+            
+            # Price monitoring (every 5 seconds)
+            await self.monitor.run_signal_monitoring()
+            
+            # Milestone guidance (every 5 seconds, reuses cached price from monitoring)
+            await self.monitor.run_signal_guidance()
+            
+            # Stagnant signal checks (every 5 minutes)
+            if tick_counter % stagnant_every == 0:
+                await self.monitor.run_stagnant_signal_checks()
+            
+            # Scheduled messages (every 1 minute)
+            if tick_counter % scheduled_every == 0:
+                await self.check_morning_briefing()
+                await self.check_daily_recap()
+                await self.check_weekly_recap()
+                await self.check_crosspromo_daily()
 
 def parse_args():
     """Parse command line arguments"""
     parser = argparse.ArgumentParser(description='Forex Signals Scheduler')
     parser.add_argument('--once', action='store_true', help='Run one signal check cycle and exit')
     parser.add_argument('--tenant', type=str, help='Tenant ID (single tenant mode)')
-    parser.add_argument('--all-tenants', action='store_true', help='Run for all active tenants')
+    parser.add_argument('--all-tenants', action='store_true', help='Run for all active tenants (continuously on one event loop unless --once)')
     parser.add_argument('--shard', type=str, help='Shard assignment N/M (e.g., 0/3 for shard 0 of 3)')
+    parser.add_argument('--leases', action='store_true', help='With --all-tenants: balance tenants across nodes via heartbeat leases')
     return parser.parse_args()
 
 
@@ -431,17 +467,207 @@ async def run_tenant_with_timeout(tenant_id: str, once: bool) -> dict:
     return result
 
 
-async def run_all_tenants(once: bool, shard_index: int = None, total_shards: int = None):
+TENANT_REFRESH_INTERVAL = 60        # Re-read db.get_active_tenants() every minute
+TENANT_RESTART_BACKOFF_MAX = 300     # Cap on crash-restart backoff per tenant
+
+
+class MultiTenantScheduler:
+    """
+    Runs every tenant's ForexSchedulerRunner loop as a task on ONE event loop.
+    
+    - Each tenant is an independent asyncio.Task with its own per-tick timeout
+    - A crashed tenant is logged, alerted and restarted with exponential backoff
+      without affecting the others
+    - The tenant set is reconciled against db.get_active_tenants() every
+      refresh interval: new tenants are started, removed ones cancelled
+    - Tenant loops start at a random offset within one monitor interval so
+      hundreds of tenants don't all tick at the same instant
+    - With a LeaseManager (--leases), tenants are split across every live
+      scheduler node instead of a fixed --shard, and only run while this node
+      holds their lease (see scheduler/leases.py)
+    - An OutboxDispatcher drains telegram_outbound_queue for the tenants
+      running here (the web leader's all-tenant outbox worker may claim rows
+      too; SKIP LOCKED claims keep a row from being sent twice)
+    
+    Note: tasks are cooperative. Blocking calls inside a tenant tick still
+    stall the loop; the per-tick timeout only fires once control returns.
+    """
+    
+    def __init__(
+        self,
+        shard_index: Optional[int] = None,
+        total_shards: Optional[int] = None,
+        refresh_interval: Optional[float] = None,
+        tick_timeout: float = TENANT_TIMEOUT_SECONDS,
+        lease_manager=None
+    ):
+        self.shard_index = shard_index
+        self.total_shards = total_shards
+        self.lease_manager = lease_manager
+        if refresh_interval is None:
+            refresh_interval = Config.get_scheduler_heartbeat_seconds() if lease_manager else TENANT_REFRESH_INTERVAL
+        self.refresh_interval = refresh_interval
+        self.tick_timeout = tick_timeout
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self.restarts: Dict[str, int] = {}
+        self.leases_renewed_at: Optional[float] = None
+        self.outbox_task: Optional[asyncio.Task] = None
+        self.lag_monitor = None
+    
+    def desired_tenants(self, all_tenants) -> Set[str]:
+        """Tenants this process should run (shard-filtered active tenants)."""
+        if self.shard_index is not None and self.total_shards is not None:
+            return {t for t in all_tenants if tenant_in_shard(t, self.shard_index, self.total_shards)}
+        return set(all_tenants)
+    
+    async def _fetch_active_tenants(self):
+        import db as db_module
+        return await asyncio.to_thread(db_module.get_active_tenants)
+    
+    async def _run_tenant(self, tenant_id: str):
+        """Run one tenant forever, restarting it with backoff if it crashes."""
+        await asyncio.sleep(random.uniform(0, MONITOR_INTERVAL))
+        
+        while True:
+            try:
+                runtime = require_tenant_runtime(tenant_id)
+                signal_engine = runtime.get_signal_engine()
+                signal_engine.set_tenant_id(runtime.tenant_id)
+                
+                scheduler = ForexSchedulerRunner(runtime)
+                await scheduler.run_forever(tick_timeout=self.tick_timeout)
+                return
+            except asyncio.CancelledError:
+                logger.info(f"Tenant {tenant_id} task cancelled")
+                raise
+            except Exception as e:
+                restarts = self.restarts.get(tenant_id, 0) + 1
+                self.restarts[tenant_id] = restarts
+                backoff = min(TENANT_RESTART_BACKOFF_MAX, 5 * 2 ** min(restarts, 6))
+                logger.exception(f"Tenant {tenant_id} crashed (restart #{restarts} in {backoff}s): {e}")
+                notify_error(
+                    f"Scheduler crashed: {e}",
+                    tenant_id=tenant_id,
+                    context={"error_type": "exception", "exception_class": type(e).__name__, "restarts": restarts}
+                )
+                await asyncio.sleep(backoff)
+    
+    def start_tenant(self, tenant_id: str):
+        """Start a tenant task if it isn't already running."""
+        task = self.tasks.get(tenant_id)
+        if task is not None and not task.done():
+            return
+        self.tasks[tenant_id] = asyncio.create_task(self._run_tenant(tenant_id), name=f"tenant:{tenant_id}")
+        logger.info(f"▶️ Started tenant {tenant_id} ({len(self.tasks)} running)")
+    
+    async def stop_tenant(self, tenant_id: str):
+        """Cancel a tenant task and wait for it to finish."""
+        task = self.tasks.pop(tenant_id, None)
+        if task is None:
+            return
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        self.restarts.pop(tenant_id, None)
+        logger.info(f"⏹️ Stopped tenant {tenant_id} ({len(self.tasks)} running)")
+    
+    async def reconcile(self, all_tenants=None):
+        """Start/stop tenant tasks to match the current active tenant set."""
+        if all_tenants is None:
+            all_tenants = await self._fetch_active_tenants()
+        desired = self.desired_tenants(all_tenants or [])
+        if self.lease_manager is not None:
+            desired = await asyncio.to_thread(self.lease_manager.sync, desired)
+            self.leases_renewed_at = time.monotonic()
+        
+        removed = set(self.tasks) - desired
+        for tenant_id in sorted(removed):
+            await self.stop_tenant(tenant_id)
+        if self.lease_manager is not None and removed:
+            # Release only after the task is gone so two nodes never run a tenant at once
+            await asyncio.to_thread(self.lease_manager.release, removed)
+        for tenant_id in sorted(desired):
+            self.start_tenant(tenant_id)
+    
+    async def _drop_expired_leases(self):
+        """Stop every tenant once our leases may have expired without renewal."""
+        if self.lease_manager is None or self.leases_renewed_at is None:
+            return
+        if time.monotonic() - self.leases_renewed_at < self.lease_manager.lease_ttl:
+            return
+        if self.tasks:
+            logger.warning(f"⚠️ Tenant leases not renewed for {self.lease_manager.lease_ttl}s, stopping {len(self.tasks)} tenants")
+        for tenant_id in list(self.tasks):
+            await self.stop_tenant(tenant_id)
+    
+    async def shutdown(self):
+        """Cancel all tenant tasks, hand their leases back and close pooled Bot clients."""
+        if self.outbox_task is not None:
+            self.outbox_task.cancel()
+            await asyncio.gather(self.outbox_task, return_exceptions=True)
+            self.outbox_task = None
+        if self.lag_monitor is not None and self.lag_monitor.task is not None:
+            self.lag_monitor.task.cancel()
+            self.lag_monitor = None
+        for tenant_id in list(self.tasks):
+            await self.stop_tenant(tenant_id)
+        if self.lease_manager is not None:
+            try:
+                await asyncio.to_thread(self.lease_manager.deregister)
+            except Exception as e:
+                logger.warning(f"Failed to deregister scheduler node: {e}")
+        from core.telegram_sender import close_bot_clients
+        await close_bot_clients()
+    
+    async def run(self):
+        """Reconcile tenants every refresh interval until cancelled."""
+        logger.info("=" * 60)
+        logger.info("🚀 MULTI-TENANT SCHEDULER STARTED (continuous)")
+        if self.shard_index is not None:
+            logger.info(f"   Shard: {self.shard_index}/{self.total_shards}")
+        if self.lease_manager is not None:
+            logger.info(f"   Leases: node {self.lease_manager.node_id}, ttl {self.lease_manager.lease_ttl}s")
+        logger.info(f"   Tenant refresh: every {self.refresh_interval}s, tick timeout: {self.tick_timeout}s")
+        logger.info("=" * 60)
+        
+        self.lag_monitor = ensure_loop_lag_monitor("multi-tenant-scheduler")
+        from core.telegram_outbox import OutboxDispatcher
+        self.outbox_task = asyncio.create_task(
+            OutboxDispatcher(tenants=lambda: list(self.tasks)).run(), name="telegram-outbox"
+        )
+        try:
+            while True:
+                try:
+                    await self.reconcile()
+                except Exception as e:
+                    logger.exception(f"❌ Tenant reconcile failed: {e}")
+                    await self._drop_expired_leases()
+                await asyncio.sleep(self.refresh_interval)
+        finally:
+            await self.shutdown()
+
+
+async def run_all_tenants(once: bool, shard_index: int = None, total_shards: int = None, leases: bool = False):
     """
     Run scheduler for all active tenants (or a shard of them).
     
     Args:
-        once: If True, run once and exit. If False, run forever (not supported in multi-tenant).
+        once: If True, run once and exit. If False, run all tenants continuously
+              on this event loop (see MultiTenantScheduler).
         shard_index: Optional shard index (0-based)
         total_shards: Optional total number of shards
+        leases: Continuous mode only. Balance tenants across scheduler nodes
+                with heartbeats and tenant leases instead of a fixed shard.
     """
     import db as db_module
     
+    if not once:
+        lease_manager = None
+        if leases:
+            from scheduler.leases import LeaseManager
+            lease_manager = LeaseManager()
+        await MultiTenantScheduler(shard_index, total_shards, lease_manager=lease_manager).run()
+        return
+    
     all_tenants = db_module.get_active_tenants()
     
     if not all_tenants:
@@ -459,10 +685,6 @@ async def run_all_tenants(once: bool, shard_index: int = None, total_shards: int
         logger.info("No tenants in this shard, exiting")
         return
     
-    if not once:
-        logger.error("--all-tenants mode requires --once flag (continuous multi-tenant not supported)")
-        return
-    
     succeeded = 0
     failed = 0
     skipped = 0
@@ -496,7 +718,7 @@ async def main():
     
     if args.all_tenants:
         shard_index, total_shards = parse_shard(args.shard) if args.shard else (None, None)
-        await run_all_tenants(args.once, shard_index, total_shards)
+        await run_all_tenants(args.once, shard_index, total_shards, leases=args.leases)
     else:
         runtime = require_tenant_runtime(args.tenant)
         
@@ -10,7 +10,7 @@ from forex_api import twelve_data_client
 from db import (
     create_forex_signal, get_forex_signals, update_forex_signal_status, get_forex_config,
     get_daily_pnl, get_last_completed_signal, add_signal_narrative, get_bot_config,
-    update_tp_hit, update_breakeven_triggered, get_active_bot
+    update_tp_hit, update_breakeven_triggered, get_active_bot, apply_signal_state_batch
 )
 from indicator_config import (
     get_validation_indicators,
@@ -22,6 +22,9 @@ from strategies import get_active_strategy, get_available_strategies, STRATEGY_R
 from strategies.base_strategy import SignalData
 from core.logging import get_logger
 from core.pip_calculator import PIPS_MULTIPLIER
+from core.signal_book import OpenSignalBook
+from bots.core.indicator_utils import IndicatorUtils
+from integrations.market_data.price_feed import get_price_feed
 
 logger = get_logger(__name__)
 
@@ -38,12 +41,53 @@ BREAKEVEN_ZONE_THRESHOLD = 70     # 70% toward TP - breakeven advisory (updated
 DECISION_ZONE_THRESHOLD = 85      # 85% toward TP - final push update
 GUIDANCE_COOLDOWN_MINUTES = 10    # Minimum time between guidance messages
 
+class SignalStateBatch:
+    """
+    Unit of work for one monitoring pass.
+    
+    Collects TP hits, breakevens (breakeven_set plus effective_sl moved to
+    the breakeven price) and closes, then writes them in a single
+    transaction via apply_signal_state_batch(). Events for the pass must only
+    be emitted after flush() succeeds, preserving "close in DB before emitting
+    event".
+    """
+    
+    def __init__(self, tenant_id):
+        self.tenant_id = tenant_id
+        self.tp_hits = []
+        self.breakevens = []
+        self.closes = []
+    
+    def tp_hit(self, signal_id, tp_level):
+        self.tp_hits.append((signal_id, tp_level))
+    
+    def breakeven(self, signal_id, breakeven_price):
+        self.breakevens.append((signal_id, breakeven_price))
+    
+    def close(self, signal_id, status, result_pips=None, close_price=None):
+        self.closes.append((signal_id, status, result_pips, close_price))
+    
+    def __bool__(self):
+        return bool(self.tp_hits or self.breakevens or self.closes)
+    
+    def flush(self):
+        """Commit all collected transitions; raises if the transaction fails."""
+        if not self:
+            return 0
+        updated = apply_signal_state_batch(
+            self.tenant_id, tp_hits=self.tp_hits, breakevens=self.breakevens, closes=self.closes
+        )
+        self.tp_hits, self.breakevens, self.closes = [], [], []
+        return updated
+
+
 class ForexSignalEngine:
     def __init__(self, tenant_id=None):
         self.symbol = 'XAU/USD'
         self.tenant_id = tenant_id or os.environ.get('TENANT_ID', 'entrylab')
         self._active_strategy = None
         self._active_bot_type = 'aggressive'
+        self._signal_book = None
         
         # Load config from database
         self.load_config()
@@ -90,7 +134,8 @@ class ForexSignalEngine:
             logger.warning(f"Unknown strategy: {bot_type}")
             return False
         
-        pending_signals = get_forex_signals(tenant_id=self.tenant_id, status='pending')
+        pending_signals = get_forex_signals(tenant_id=self.tenant_id, status='pending', limit=1,
+                                            columns=('id',), as_records=True)
         if pending_signals and len(pending_signals) > 0:
             logger.warning(f"Cannot switch strategy while signal #{pending_signals[0]['id']} is active")
             return False
@@ -268,6 +313,12 @@ class ForexSignalEngine:
             logger.exception(f"❌ Error checking for signals: {e}")
             return None
     
+    def _get_signal_book(self, active_signals):
+        """Reuse the parsed OpenSignalBook until the pending signals change."""
+        if self._signal_book is None or not self._signal_book.is_current(active_signals):
+            self._signal_book = OpenSignalBook(active_signals, tenant_id=self.tenant_id)
+        return self._signal_book
+    
     async def monitor_active_signals(self):
         """
         Monitor active signals for multi-TP hits, SL hits, breakeven trigger, and expiration.
@@ -278,6 +329,12 @@ class ForexSignalEngine:
         - TP3: 20% position close (full exit)
         - Breakeven alert at 70% toward TP1
         
+        Pending signals are parsed once into an OpenSignalBook (rebuilt only
+        when they change) and evaluated against the price in one vectorized
+        pass. All DB transitions of the pass are collected in a
+        SignalStateBatch and committed in one transaction before any event is
+        returned.
+        
         Returns list of events that need updates/notifications
         """
         try:
@@ -288,7 +345,7 @@ class ForexSignalEngine:
             
             logger.info(f"Checking {len(active_signals)} active signals...")
             
-            current_price = twelve_data_client.get_price(self.symbol)
+            current_price = get_price_feed().get_price(self.symbol)
             if not current_price:
                 logger.error("❌ Could not fetch current price")
                 return []
@@ -297,43 +354,35 @@ class ForexSignalEngine:
             logger.info(f"Current {self.symbol} price: {current_price:.2f}")
             
             updates = []
+            batch = SignalStateBatch(self.tenant_id)
             now = datetime.utcnow()
             
-            for signal in active_signals:
+            book = self._get_signal_book(active_signals)
+            events = book.evaluate(current_price, now)
+            
+            for i in events.rows():
+                signal = book.signals[i]
                 signal_id = signal['id']
                 signal_type = signal['signal_type']
-                entry = float(signal['entry_price'])
-                tp1 = float(signal['take_profit'])
-                tp2 = float(signal.get('take_profit_2') or 0)
-                tp3 = float(signal.get('take_profit_3') or 0)
-                original_sl = float(signal['stop_loss'])
-                effective_sl = signal.get('effective_sl')
-                sl = float(effective_sl) if effective_sl else original_sl
-                posted_at = signal['posted_at']
-                
-                tp1_hit = signal.get('tp1_hit', False) or signal.get('tp_hit_1', False)
-                tp2_hit = signal.get('tp2_hit', False) or signal.get('tp_hit_2', False)
-                tp3_hit = signal.get('tp3_hit', False) or signal.get('tp_hit_3', False)
-                breakeven_triggered = signal.get('breakeven_triggered', False)
-                
-                tp1_pct = signal.get('tp1_percentage') or 50
-                tp2_pct = signal.get('tp2_percentage') or 30
-                tp3_pct = signal.get('tp3_percentage') or 20
+                is_buy = bool(book.is_buy[i])
+                entry = float(book.entry[i])
+                tp1 = float(book.tp1[i])
+                tp2 = float(book.tp2[i])
+                tp3 = float(book.tp3[i])
+                original_sl = float(book.original_sl[i])
+                sl = float(book.sl[i])
+                tp1_pct = int(book.tp1_pct[i])
+                tp2_pct = int(book.tp2_pct[i])
+                tp3_pct = int(book.tp3_pct[i])
                 
-                if isinstance(posted_at, str):
-                    posted_at = datetime.fromisoformat(posted_at.replace('Z', '+00:00'))
-                
-                hours_elapsed = (now - posted_at).total_seconds() / 3600
-                
-                is_buy = signal_type == 'BUY'
-                
-                if hours_elapsed >= 4:
+                if events.timeout[i]:
+                    hours_elapsed = float(events.hours_elapsed[i])
                     pips = round((current_price - entry) * PIPS_MULTIPLIER, 1) if is_buy else round((entry - current_price) * PIPS_MULTIPLIER, 1)
                     final_status = 'won' if pips > 0 else 'expired'
                     minutes_elapsed = hours_elapsed * 60
                     logger.info(f"⏱️  Signal #{signal_id} timed out after 4 hours - closing as {final_status} ({pips:+.1f} pips)")
-                    # ATOMIC: Close signal in DB BEFORE emitting event
-                    update_forex_signal_status(signal_id, final_status, self.tenant_id, result_pips=pips, close_price=current_price)
+                    # ATOMIC: Close signal in DB (batch flush) BEFORE emitting event
+                    batch.close(signal_id, final_status, result_pips=pips, close_price=current_price)
                     updates.append({
                         'id': signal_id,
                         'event': 'timeout',
@@ -352,192 +401,100 @@ class ForexSignalEngine:
                 has_tp3 = tp3 > 0
                 tp_count = 1 + (1 if has_tp2 else 0) + (1 if has_tp3 else 0)
                 
-                if is_buy:
-                    # XAU/USD: 1 pip = $0.01, multiply by 100
-                    if not tp1_hit and current_price >= tp1:
-                        pips = round((tp1 - entry) * PIPS_MULTIPLIER, 1)
-                        remaining = (tp2_pct if has_tp2 else 0) + (tp3_pct if has_tp3 else 0)
-                        logger.info(f"✅ Signal #{signal_id} TP1 HIT! +{pips} pips ({tp1_pct}% closed)")
-                        update_tp_hit(signal_id, 1, tenant_id=self.tenant_id)
-                        updates.append({
-                            'id': signal_id,
-                            'event': 'tp1_hit',
-                            'pips': pips,
-                            'percentage': tp1_pct,
-                            'remaining': remaining
-                        })
-                        if tp_count == 1:
-                            # ATOMIC: Single-TP signal closed on TP1 hit
-                            update_forex_signal_status(signal_id, 'won', self.tenant_id, result_pips=pips, close_price=current_price)
-                            updates.append({
-                                'id': signal_id,
-                                'status': 'won',
-                                'pips': pips,
-                                'exit_price': current_price,
-                                'closed': True
-                            })
-                            continue
-                    
-                    if has_tp2 and tp1_hit and not tp2_hit and current_price >= tp2:
-                        pips = round((tp2 - entry) * PIPS_MULTIPLIER, 1)
-                        remaining = tp3_pct if has_tp3 else 0
-                        logger.info(f"✅ Signal #{signal_id} TP2 HIT! +{pips} pips ({tp2_pct}% closed)")
-                        update_tp_hit(signal_id, 2, tenant_id=self.tenant_id)
-                        updates.append({
-                            'id': signal_id,
-                            'event': 'tp2_hit',
-                            'pips': pips,
-                            'percentage': tp2_pct,
-                            'remaining': remaining
-                        })
-                        if tp_count == 2:
-                            # ATOMIC: 2-TP signal closed on TP2 hit
-                            update_forex_signal_status(signal_id, 'won', self.tenant_id, result_pips=pips, close_price=current_price)
-                            updates.append({
-                                'id': signal_id,
-                                'status': 'won',
-                                'pips': pips,
-                                'exit_price': current_price,
-                                'closed': True
-                            })
-                            continue
-                    
-                    if has_tp3 and tp2_hit and not tp3_hit and current_price >= tp3:
-                        pips = round((tp3 - entry) * PIPS_MULTIPLIER, 1)
-                        logger.info(f"🎯 Signal #{signal_id} TP3 HIT! +{pips} pips - FULL EXIT")
-                        update_tp_hit(signal_id, 3, tenant_id=self.tenant_id)
-                        # ATOMIC: 3-TP signal closed on TP3 hit
-                        update_forex_signal_status(signal_id, 'won', self.tenant_id, result_pips=pips, close_price=current_price)
+                # XAU/USD: 1 pip = $0.01, multiply by 100
+                if events.tp1[i]:
+                    pips = round(((tp1 - entry) if is_buy else (entry - tp1)) * PIPS_MULTIPLIER, 1)
+                    remaining = (tp2_pct if has_tp2 else 0) + (tp3_pct if has_tp3 else 0)
+                    logger.info(f"✅ Signal #{signal_id} TP1 HIT! +{pips} pips ({tp1_pct}% closed)")
+                    batch.tp_hit(signal_id, 1)
+                    updates.append({
+                        'id': signal_id,
+                        'event': 'tp1_hit',
+                        'pips': pips,
+                        'percentage': tp1_pct,
+                        'remaining': remaining
+                    })
+                    if tp_count == 1:
+                        # ATOMIC: Single-TP signal closed on TP1 hit
+                        batch.close(signal_id, 'won', result_pips=pips, close_price=current_price)
                         updates.append({
                             'id': signal_id,
-                            'event': 'tp3_hit',
                             'status': 'won',
                             'pips': pips,
                             'exit_price': current_price,
-                            'percentage': tp3_pct,
                             'closed': True
                         })
                         continue
-                    
-                    if current_price <= sl:
-                        pips = round((sl - entry) * PIPS_MULTIPLIER, 1)
-                        sl_type = "effective" if effective_sl else "original"
-                        if pips > 0:
-                            status = 'won'
-                            event = 'sl_hit_profit_locked'
-                            logger.info(f"✅ Signal #{signal_id} SL ({sl_type}) HIT @ ${sl:.2f}! Locked profit: +{pips} pips")
-                        elif pips == 0:
-                            status = 'won'
-                            event = 'sl_hit_breakeven'
-                            logger.info(f"🔒 Signal #{signal_id} SL ({sl_type}) HIT @ ${sl:.2f}! Breakeven exit")
-                        else:
-                            status = 'lost'
-                            event = 'sl_hit'
-                            logger.error(f"❌ Signal #{signal_id} SL ({sl_type}) HIT @ ${sl:.2f}! Loss: {pips} pips")
-                        # ATOMIC: Close signal in DB on SL hit
-                        update_forex_signal_status(signal_id, status, self.tenant_id, result_pips=pips, close_price=current_price)
-                        updates.append({
-                            'id': signal_id,
-                            'event': event,
-                            'status': status,
-                            'pips': pips,
-                            'exit_price': current_price,
-                            'closed': True
-                        })
-                    
-                else:
-                    # XAU/USD: 1 pip = $0.01, multiply by 100
-                    if not tp1_hit and current_price <= tp1:
-                        pips = round((entry - tp1) * PIPS_MULTIPLIER, 1)
-                        remaining = (tp2_pct if has_tp2 else 0) + (tp3_pct if has_tp3 else 0)
-                        logger.info(f"✅ Signal #{signal_id} TP1 HIT! +{pips} pips ({tp1_pct}% closed)")
-                        update_tp_hit(signal_id, 1, tenant_id=self.tenant_id)
-                        updates.append({
-                            'id': signal_id,
-                            'event': 'tp1_hit',
-                            'pips': pips,
-                            'percentage': tp1_pct,
-                            'remaining': remaining
-                        })
-                        if tp_count == 1:
-                            # ATOMIC: Single-TP signal closed on TP1 hit
-                            update_forex_signal_status(signal_id, 'won', self.tenant_id, result_pips=pips, close_price=current_price)
-                            updates.append({
-                                'id': signal_id,
-                                'status': 'won',
-                                'pips': pips,
-                                'exit_price': current_price,
-                                'closed': True
-                            })
-                            continue
-                    
-                    if has_tp2 and tp1_hit and not tp2_hit and current_price <= tp2:
-                        pips = round((entry - tp2) * PIPS_MULTIPLIER, 1)
-                        remaining = tp3_pct if has_tp3 else 0
-                        logger.info(f"✅ Signal #{signal_id} TP2 HIT! +{pips} pips ({tp2_pct}% closed)")
-                        update_tp_hit(signal_id, 2, tenant_id=self.tenant_id)
-                        updates.append({
-                            'id': signal_id,
-                            'event': 'tp2_hit',
-                            'pips': pips,
-                            'percentage': tp2_pct,
-                            'remaining': remaining
-                        })
-                        if tp_count == 2:
-                            # ATOMIC: 2-TP signal closed on TP2 hit
-                            update_forex_signal_status(signal_id, 'won', self.tenant_id, result_pips=pips, close_price=current_price)
-                            updates.append({
-                                'id': signal_id,
-                                'status': 'won',
-                                'pips': pips,
-                                'exit_price': current_price,
-                                'closed': True
-                            })
-                            continue
-                    
-                    if has_tp3 and tp2_hit and not tp3_hit and current_price <= tp3:
-                        pips = round((entry - tp3) * PIPS_MULTIPLIER, 1)
-                        logger.info(f"🎯 Signal #{signal_id} TP3 HIT! +{pips} pips - FULL EXIT")
-                        update_tp_hit(signal_id, 3, tenant_id=self.tenant_id)
-                        # ATOMIC: 3-TP signal closed on TP3 hit
-                        update_forex_signal_status(signal_id, 'won', self.tenant_id, result_pips=pips, close_price=current_price)
+                
+                if events.tp2[i]:
+                    pips = round(((tp2 - entry) if is_buy else (entry - tp2)) * PIPS_MULTIPLIER, 1)
+                    remaining = tp3_pct if has_tp3 else 0
+                    logger.info(f"✅ Signal #{signal_id} TP2 HIT! +{pips} pips ({tp2_pct}% closed)")
+                    batch.tp_hit(signal_id, 2)
+                    updates.append({
+                        'id': signal_id,
+                        'event': 'tp2_hit',
+                        'pips': pips,
+                        'percentage': tp2_pct,
+                        'remaining': remaining
+                    })
+                    if tp_count == 2:
+                        # ATOMIC: 2-TP signal closed on TP2 hit
+                        batch.close(signal_id, 'won', result_pips=pips, close_price=current_price)
                         updates.append({
                             'id': signal_id,
-                            'event': 'tp3_hit',
                             'status': 'won',
                             'pips': pips,
                             'exit_price': current_price,
-                            'percentage': tp3_pct,
                             'closed': True
                         })
                         continue
-                    
-                    if current_price >= sl:
-                        pips = round((entry - sl) * PIPS_MULTIPLIER, 1)
-                        sl_type = "effective" if effective_sl else "original"
-                        if pips > 0:
-                            status = 'won'
-                            event = 'sl_hit_profit_locked'
-                            logger.info(f"✅ Signal #{signal_id} SL ({sl_type}) HIT @ ${sl:.2f}! Locked profit: +{pips} pips")
-                        elif pips == 0:
-                            status = 'won'
-                            event = 'sl_hit_breakeven'
-                            logger.info(f"🔒 Signal #{signal_id} SL ({sl_type}) HIT @ ${sl:.2f}! Breakeven exit")
-                        else:
-                            status = 'lost'
-                            event = 'sl_hit'
-                            logger.error(f"❌ Signal #{signal_id} SL ({sl_type}) HIT @ ${sl:.2f}! Loss: {pips} pips")
-                        # ATOMIC: Close signal in DB on SL hit
-                        update_forex_signal_status(signal_id, status, self.tenant_id, result_pips=pips, close_price=current_price)
-                        updates.append({
-                            'id': signal_id,
-                            'event': event,
-                            'status': status,
-                            'pips': pips,
-                            'exit_price': current_price,
-                            'closed': True
-                        })
+                
+                if events.tp3[i]:
+                    pips = round(((tp3 - entry) if is_buy else (entry - tp3)) * PIPS_MULTIPLIER, 1)
+                    logger.info(f"🎯 Signal #{signal_id} TP3 HIT! +{pips} pips - FULL EXIT")
+                    batch.tp_hit(signal_id, 3)
+                    # ATOMIC: 3-TP signal closed on TP3 hit
+                    batch.close(signal_id, 'won', result_pips=pips, close_price=current_price)
+                    updates.append({
+                        'id': signal_id,
+                        'event': 'tp3_hit',
+                        'status': 'won',
+                        'pips': pips,
+                        'exit_price': current_price,
+                        'percentage': tp3_pct,
+                        'closed': True
+                    })
+                    continue
+                
+                if events.sl[i]:
+                    pips = round(((sl - entry) if is_buy else (entry - sl)) * PIPS_MULTIPLIER, 1)
+                    sl_type = "effective" if book.has_effective_sl[i] else "original"
+                    if pips > 0:
+                        status = 'won'
+                        event = 'sl_hit_profit_locked'
+                        logger.info(f"✅ Signal #{signal_id} SL ({sl_type}) HIT @ ${sl:.2f}! Locked profit: +{pips} pips")
+                    elif pips == 0:
+                        status = 'won'
+                        event = 'sl_hit_breakeven'
+                        logger.info(f"🔒 Signal #{signal_id} SL ({sl_type}) HIT @ ${sl:.2f}! Breakeven exit")
+                    else:
+                        status = 'lost'
+                        event = 'sl_hit'
+                        logger.error(f"❌ Signal #{signal_id} SL ({sl_type}) HIT @ ${sl:.2f}! Loss: {pips} pips")
+                    # ATOMIC: Close signal in DB on SL hit
+                    batch.close(signal_id, status, result_pips=pips, close_price=current_price)
+                    updates.append({
+                        'id': signal_id,
+                        'event': event,
+                        'status': status,
+                        'pips': pips,
+                        'exit_price': current_price,
+                        'closed': True
+                    })
             
+            # ATOMIC: every transition of this pass commits before any event is emitted
+            batch.flush()
             return updates
             
         except Exception as e:
@@ -581,7 +538,7 @@ class ForexSignalEngine:
             if not active_signals:
                 return []
             
-            current_price = twelve_data_client.get_price(self.symbol)
+            current_price = get_price_feed().get_price(self.symbol)
             if not current_price:
                 return []
             
@@ -871,26 +828,32 @@ class ForexSignalEngine:
             
             logger.info(f"Fetching current indicators for signal #{signal_id}...")
             
-            # Fetch current indicator values (no rate limiting needed with unlimited API plan)
-            rsi = twelve_data_client.get_rsi(self.symbol, timeframe)
-            macd_data = twelve_data_client.get_macd(self.symbol, timeframe)
-            adx = twelve_data_client.get_adx(self.symbol, timeframe)
-            stoch = twelve_data_client.get_stoch(self.symbol, timeframe)
-            
-            if not all([rsi, macd_data, adx, stoch]):
-                logger.warning(f"⚠️ Could not fetch all indicators for signal #{signal_id}")
-                return None
-            
-            # Type assertions for type checker (we know these are not None after the check above)
-            assert macd_data is not None
-            assert stoch is not None
-            
-            current_indicators = {
-                'rsi': rsi,
-                'macd': macd_data['macd'],
-                'adx': adx,
-                'stochastic': stoch['k']
-            }
+            # Read current values from the shared incremental engine when available
+            # (updated once per bar for every tenant on this symbol)
+            revalidation_keys = ['rsi', 'macd', 'adx', 'stochastic']
+            current_indicators = IndicatorUtils(self.symbol).get_current_values(timeframe, revalidation_keys)
+            
+            if not current_indicators or len(current_indicators) < len(revalidation_keys):
+                # Fetch current indicator values (no rate limiting needed with unlimited API plan)
+                rsi = twelve_data_client.get_rsi(self.symbol, timeframe)
+                macd_data = twelve_data_client.get_macd(self.symbol, timeframe)
+                adx = twelve_data_client.get_adx(self.symbol, timeframe)
+                stoch = twelve_data_client.get_stoch(self.symbol, timeframe)
+                
+                if not all([rsi, macd_data, adx, stoch]):
+                    logger.warning(f"⚠️ Could not fetch all indicators for signal #{signal_id}")
+                    return None
+                
+                # Type assertions for type checker (we know these are not None after the check above)
+                assert macd_data is not None
+                assert stoch is not None
+                
+                current_indicators = {
+                    'rsi': rsi,
+                    'macd': macd_data['macd'],
+                    'adx': adx,
+                    'stochastic': stoch['k']
+                }
             
             # Validate thesis
             validation = self.validate_thesis(signal, current_indicators)
@@ -245,6 +245,40 @@ def get_indicator_config(indicator_key):
     return INDICATOR_REGISTRY.get(indicator_key)
 
 
+def get_engine_specs(indicator_keys=None):
+    """
+    Incremental engine specs for enabled indicators.
+    
+    Args:
+        indicator_keys: Optional subset of registry keys (default: all enabled)
+    
+    Returns:
+        dict: {indicator_key: (api_indicator, api_params)} as consumed by
+              integrations.market_data.incremental.IndicatorEngine
+    """
+    keys = indicator_keys if indicator_keys is not None else get_enabled_indicators()
+    specs = {}
+    for key in keys:
+        config = INDICATOR_REGISTRY.get(key)
+        if config and config.get('enabled', True):
+            specs[key] = (config['api_indicator'], dict(config.get('api_params', {})))
+    return specs
+
+
+def extract_indicator_value(indicator_key, value):
+    """
+    Reduce an engine value to the scalar used by signal/validation logic.
+    
+    Dict-valued indicators (MACD, Stochastic, Bollinger) are read through the
+    registry's 'value_key'; scalars pass through unchanged.
+    """
+    if not isinstance(value, dict):
+        return value
+    config = INDICATOR_REGISTRY.get(indicator_key) or {}
+    value_key = config.get('value_key')
+    return value.get(value_key) if value_key else None
+
+
 def check_signal_condition(indicator_key, value, signal_type, forex_config):
     """
     Check if an indicator supports the given signal type.
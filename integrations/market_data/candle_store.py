@@ -0,0 +1,336 @@
+"""
+Shared OHLC candle store with locally computed indicators.
+
+Strategies used to call one Twelve Data indicator endpoint per value they
+needed (EMA, RSI, ADX, ATR, BBands, ...), i.e. 7-8 blocking HTTP round trips
+and API credits per check. The candle store fetches OHLC bars once per
+(symbol, interval), keeps a rolling window in memory and computes every
+indicator from that window with integrations.market_data.indicators.
+
+Refresh policy:
+- Cold window: one `time_series` request for `max_bars` candles
+- Warm window older than the TTL: one small `time_series` request for the
+  bars since the last fetch, merged by datetime (the forming bar is replaced)
+- Concurrent callers for the same key share a single refresh
+
+Windows can also drive an IndicatorEngine (integrations.market_data.incremental):
+get_engine() warms it from the window once, and every later refresh feeds it
+only the newly closed bars plus the forming bar.
+
+All public helpers return values in the SAME shapes as the TwelveDataClient
+methods they back (newest-first lists, dicts with the same keys), or None
+when the window cannot support the request so callers can fall back.
+NO side effects at import time.
+"""
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from core.config import Config
+from core.logging import get_logger
+from integrations.market_data import indicators
+from integrations.market_data.incremental import IndicatorEngine
+
+logger = get_logger(__name__)
+
+INTERVAL_SECONDS = {
+    '1min': 60,
+    '5min': 300,
+    '15min': 900,
+    '30min': 1800,
+    '45min': 2700,
+    '1h': 3600,
+    '2h': 7200,
+    '4h': 14400,
+    '1day': 86400,
+}
+
+# Extra history fetched on top of the bars a request needs so recursive
+# smoothers (EMA200, Wilder ADX) converge before the values we return.
+WARMUP_MULTIPLIER = 4
+INCREMENTAL_FETCH_PADDING = 3
+
+
+@dataclass
+class CandleWindow:
+    """Rolling OHLC window for one (symbol, interval), oldest -> newest."""
+    symbol: str
+    interval: str
+    datetimes: List[str] = field(default_factory=list)
+    open: np.ndarray = field(default_factory=lambda: np.empty(0))
+    high: np.ndarray = field(default_factory=lambda: np.empty(0))
+    low: np.ndarray = field(default_factory=lambda: np.empty(0))
+    close: np.ndarray = field(default_factory=lambda: np.empty(0))
+    fetched_at: float = 0.0
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def __len__(self) -> int:
+        return len(self.datetimes)
+
+    def bar(self, i: int) -> dict:
+        return {
+            'datetime': self.datetimes[i],
+            'open': float(self.open[i]),
+            'high': float(self.high[i]),
+            'low': float(self.low[i]),
+            'close': float(self.close[i]),
+        }
+
+    def closed_bars(self, after: Optional[str] = None):
+        """Yield closed bars (all but the newest, forming bar) newer than `after`."""
+        start = 0
+        if after is not None:
+            start = len(self.datetimes) - 1
+            while start > 0 and self.datetimes[start - 1] > after:
+                start -= 1
+        for i in range(start, len(self.datetimes) - 1):
+            yield self.bar(i)
+
+    def merge(self, values: List[dict], max_bars: int) -> None:
+        """
+        Merge Twelve Data `time_series` values (newest-first) into the window.
+
+        Bars at or after the oldest incoming datetime are replaced, which also
+        refreshes the still-forming bar.
+        """
+        incoming = [v for v in reversed(values) if v.get('datetime')]
+        if not incoming:
+            return
+
+        first_new = incoming[0]['datetime']
+        keep = len(self.datetimes)
+        while keep > 0 and self.datetimes[keep - 1] >= first_new:
+            keep -= 1
+
+        new_dt = [v['datetime'] for v in incoming]
+        columns = {
+            key: np.array([float(v.get(key, 0)) for v in incoming])
+            for key in ('open', 'high', 'low', 'close')
+        }
+
+        self.datetimes = (self.datetimes[:keep] + new_dt)[-max_bars:]
+        for key, new_values in columns.items():
+            merged = np.concatenate((getattr(self, key)[:keep], new_values))
+            setattr(self, key, merged[-max_bars:])
+
+
+class CandleStore:
+    """Process-wide store of candle windows keyed by (symbol, interval)."""
+
+    def __init__(self, client, max_bars: Optional[int] = None, ttl_seconds: Optional[int] = None):
+        """
+        Args:
+            client: TwelveDataClient used for raw `time_series` requests
+            max_bars: Rolling window size per (symbol, interval)
+            ttl_seconds: Max age of a window before the next read refreshes it
+        """
+        self.client = client
+        self.max_bars = max_bars or Config.get_candle_store_max_bars()
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else Config.get_candle_store_ttl_seconds()
+        self._windows: Dict[Tuple[str, str], CandleWindow] = {}
+        self._engines: Dict[Tuple[str, str], IndicatorEngine] = {}
+        self._lock = threading.Lock()
+        self.fetch_count = 0
+
+    def _get_window(self, symbol: str, interval: str) -> CandleWindow:
+        key = (symbol, interval)
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None:
+                window = CandleWindow(symbol=symbol, interval=interval)
+                self._windows[key] = window
+            return window
+
+    def _fetch_size(self, window: CandleWindow, now: float) -> int:
+        """Number of bars to request: a full window when cold, else the gap since last fetch."""
+        if len(window) == 0:
+            return self.max_bars
+        bar_seconds = INTERVAL_SECONDS.get(window.interval, 60)
+        elapsed_bars = int((now - window.fetched_at) // bar_seconds)
+        return min(self.max_bars, elapsed_bars + INCREMENTAL_FETCH_PADDING)
+
+    def get_window(self, symbol: str, interval: str, min_bars: int = 1) -> Optional[CandleWindow]:
+        """
+        Return the candle window for (symbol, interval), refreshing it if stale.
+
+        Returns None if the window has fewer than `min_bars` candles after refresh.
+        """
+        if min_bars > self.max_bars:
+            return None
+
+        window = self._get_window(symbol, interval)
+
+        with window.lock:
+            now = time.time()
+            if len(window) == 0 or now - window.fetched_at >= self.ttl_seconds:
+                outputsize = self._fetch_size(window, now)
+                try:
+                    data = self.client._make_request('time_series', {
+                        'symbol': symbol,
+                        'interval': interval,
+                        'outputsize': outputsize
+                    })
+                    self.fetch_count += 1
+                    window.merge(data.get('values') or [], self.max_bars)
+                    window.fetched_at = now
+                    self._sync_engine(window)
+                    logger.debug(f"Candle store refreshed {symbol} {interval}: +{outputsize} bars, {len(window)} held")
+                except Exception as e:
+                    logger.warning(f"Candle store refresh failed for {symbol} {interval}: {e}")
+                    if len(window) == 0:
+                        return None
+
+            if len(window) < min_bars:
+                return None
+            return window
+
+    def _sync_engine(self, window: CandleWindow) -> None:
+        """Feed newly closed bars and the forming bar to the window's engine, if any."""
+        engine = self._engines.get((window.symbol, window.interval))
+        if engine is None or len(window) == 0:
+            return
+        engine.replay(window.closed_bars(after=engine.last_closed))
+        engine.on_forming_bar(window.bar(len(window) - 1))
+
+    def get_engine(self, symbol: str, interval: str, specs: Dict[str, Tuple[str, dict]],
+                   min_bars: int = 1) -> Optional[IndicatorEngine]:
+        """
+        Return the incremental IndicatorEngine for (symbol, interval).
+
+        Args:
+            specs: {key: (api_indicator, api_params)}; missing keys are added
+                   and warmed from the held window
+            min_bars: Minimum candles the window must hold
+
+        Returns None if the window cannot be loaded.
+        """
+        window = self.get_window(symbol, interval, min_bars)
+        if window is None:
+            return None
+
+        key = (symbol, interval)
+        with window.lock:
+            engine = self._engines.get(key)
+            if engine is None:
+                engine = IndicatorEngine(symbol, interval, specs)
+                self._engines[key] = engine
+                self._sync_engine(window)
+            else:
+                for name, (api_indicator, params) in specs.items():
+                    engine.ensure(name, api_indicator, params, window.closed_bars())
+            return engine
+
+    def invalidate(self, symbol: Optional[str] = None, interval: Optional[str] = None) -> None:
+        """Drop cached windows (all, per symbol, or a single key)."""
+        with self._lock:
+            for key in list(self._windows):
+                if symbol is not None and key[0] != symbol:
+                    continue
+                if interval is not None and key[1] != interval:
+                    continue
+                del self._windows[key]
+                self._engines.pop(key, None)
+
+    # ------------------------------------------------------------------
+    # TwelveDataClient-shaped helpers
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _newest_first(series: np.ndarray, outputsize: int) -> Optional[List[float]]:
+        tail = series[-outputsize:][::-1]
+        if len(tail) < outputsize or np.isnan(tail).any():
+            return None
+        return [float(v) for v in tail]
+
+    def _warm_bars(self, period: int, outputsize: int) -> int:
+        return period * WARMUP_MULTIPLIER + outputsize
+
+    def get_time_series(self, symbol: str, interval: str, outputsize: int) -> Optional[List[dict]]:
+        window = self.get_window(symbol, interval, outputsize)
+        if window is None:
+            return None
+        start = len(window) - outputsize
+        return [window.bar(i) for i in range(len(window) - 1, start - 1, -1)]
+
+    def get_ema_series(self, symbol: str, interval: str, period: int, outputsize: int) -> Optional[List[float]]:
+        window = self.get_window(symbol, interval, self._warm_bars(period, outputsize))
+        if window is None:
+            return None
+        return self._newest_first(indicators.ema(window.close, period), outputsize)
+
+    def get_rsi_series(self, symbol: str, interval: str, period: int, outputsize: int) -> Optional[List[float]]:
+        window = self.get_window(symbol, interval, self._warm_bars(period, outputsize))
+        if window is None:
+            return None
+        return self._newest_first(indicators.rsi(window.close, period), outputsize)
+
+    def get_atr_series(self, symbol: str, interval: str, period: int, outputsize: int) -> Optional[List[float]]:
+        window = self.get_window(symbol, interval, self._warm_bars(period, outputsize))
+        if window is None:
+            return None
+        return self._newest_first(indicators.atr(window.high, window.low, window.close, period), outputsize)
+
+    def get_adx_series(self, symbol: str, interval: str, period: int, outputsize: int) -> Optional[List[float]]:
+        window = self.get_window(symbol, interval, self._warm_bars(period * 2, outputsize))
+        if window is None:
+            return None
+        return self._newest_first(indicators.adx(window.high, window.low, window.close, period), outputsize)
+
+    def get_bbands_series(self, symbol: str, interval: str, period: int, outputsize: int,
+                          sd: float = 2.0) -> Optional[List[dict]]:
+        window = self.get_window(symbol, interval, period + outputsize)
+        if window is None:
+            return None
+        upper, middle, lower = indicators.bbands(window.close, period, sd)
+        uppers = self._newest_first(upper, outputsize)
+        middles = self._newest_first(middle, outputsize)
+        lowers = self._newest_first(lower, outputsize)
+        if uppers is None or middles is None or lowers is None:
+            return None
+        return [
+            {'upper': u, 'middle': m, 'lower': l}
+            for u, m, l in zip(uppers, middles, lowers)
+        ]
+
+    def get_stoch(self, symbol: str, interval: str, k_period: int = 14, d_period: int = 3) -> Optional[dict]:
+        window = self.get_window(symbol, interval, k_period + d_period * 2 + 1)
+        if window is None:
+            return None
+        slow_k, slow_d = indicators.stoch(window.high, window.low, window.close, k_period, 3, d_period)
+        k_values = self._newest_first(slow_k, 1)
+        d_values = self._newest_first(slow_d, 1)
+        if k_values is None or d_values is None:
+            return None
+        k_value, d_value = k_values[0], d_values[0]
+        return {
+            'k': k_value,
+            'd': d_value,
+            'is_oversold': k_value < 20,
+            'is_overbought': k_value > 80
+        }
+
+    def get_macd(self, symbol: str, interval: str, fast: int = 12, slow: int = 26,
+                 signal: int = 9) -> Optional[dict]:
+        window = self.get_window(symbol, interval, self._warm_bars(slow + signal, 2))
+        if window is None:
+            return None
+        macd_line, signal_line, hist = indicators.macd(window.close, fast, slow, signal)
+        macd_values = self._newest_first(macd_line, 2)
+        signal_values = self._newest_first(signal_line, 2)
+        hist_values = self._newest_first(hist, 2)
+        if macd_values is None or signal_values is None or hist_values is None:
+            return None
+
+        macd_current, macd_previous = macd_values
+        signal_current, signal_previous = signal_values
+        return {
+            'macd': macd_current,
+            'signal': signal_current,
+            'histogram': hist_values[0],
+            'histogram_slope': hist_values[0] - hist_values[1],
+            'is_bullish_cross': macd_previous <= signal_previous and macd_current > signal_current,
+            'is_bearish_cross': macd_previous >= signal_previous and macd_current < signal_current
+        }
@@ -0,0 +1,560 @@
+"""
+Incremental (streaming) indicator engine.
+
+The batch functions in integrations.market_data.indicators recompute a whole
+window on every call. For the monitor loop, which reads indicators every few
+seconds for every tenant, this module keeps stateful accumulators that advance
+in constant time per closed bar and can preview the still-forming bar without
+mutating their state:
+
+- update(bar): commit a CLOSED bar
+- peek(bar):   value as if `bar` were appended, state untouched
+- snapshot() / restore(state): JSON-serializable state for replay
+
+Formulas match indicators.py exactly (same SMA seeding and Wilder smoothing),
+so a replayed engine returns the same values as the batch code.
+
+IndicatorEngine groups accumulators for one (symbol, interval), built from
+indicator_config specs: {key: (api_indicator, api_params)}.
+NO side effects at import time.
+"""
+import math
+import threading
+from collections import deque
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+
+class _Smoother:
+    """SMA-seeded recursive smoother shared by EMA (2/(n+1)) and Wilder (1/n)."""
+
+    def __init__(self, period: int, alpha: float):
+        self.period = period
+        self.alpha = alpha
+        self.count = 0
+        self.seed_sum = 0.0
+        self.value: Optional[float] = None
+
+    def _next(self, x: float) -> Tuple[int, float, Optional[float]]:
+        if self.value is not None:
+            return self.count, self.seed_sum, x * self.alpha + self.value * (1.0 - self.alpha)
+        count = self.count + 1
+        seed_sum = self.seed_sum + x
+        return count, seed_sum, (seed_sum / self.period if count == self.period else None)
+
+    def update(self, x: float) -> Optional[float]:
+        self.count, self.seed_sum, self.value = self._next(x)
+        return self.value
+
+    def peek(self, x: float) -> Optional[float]:
+        return self._next(x)[2]
+
+    def snapshot(self) -> dict:
+        return {'count': self.count, 'seed_sum': self.seed_sum, 'value': self.value}
+
+    def restore(self, state: dict) -> None:
+        self.count = state['count']
+        self.seed_sum = state['seed_sum']
+        self.value = state['value']
+
+
+def _ema_smoother(period: int) -> _Smoother:
+    return _Smoother(period, 2.0 / (period + 1))
+
+
+def _wilder_smoother(period: int) -> _Smoother:
+    return _Smoother(period, 1.0 / period)
+
+
+def _true_range(bar: dict, prev_close: float) -> float:
+    high, low = bar['high'], bar['low']
+    return max(high - low, abs(high - prev_close), abs(low - prev_close))
+
+
+class EMAState:
+    """Exponential moving average of closes."""
+
+    def __init__(self, time_period: int = 50):
+        self.ema = _ema_smoother(time_period)
+
+    def update(self, bar: dict) -> Optional[float]:
+        return self.ema.update(bar['close'])
+
+    def peek(self, bar: dict) -> Optional[float]:
+        return self.ema.peek(bar['close'])
+
+    def current(self) -> Optional[float]:
+        return self.ema.value
+
+    def snapshot(self) -> dict:
+        return {'ema': self.ema.snapshot()}
+
+    def restore(self, state: dict) -> None:
+        self.ema.restore(state['ema'])
+
+
+class RSIState:
+    """Wilder RSI of closes."""
+
+    def __init__(self, time_period: int = 14):
+        self.gain = _wilder_smoother(time_period)
+        self.loss = _wilder_smoother(time_period)
+        self.prev_close: Optional[float] = None
+
+    @staticmethod
+    def _rsi(avg_gain: Optional[float], avg_loss: Optional[float]) -> Optional[float]:
+        if avg_gain is None or avg_loss is None:
+            return None
+        if avg_loss == 0:
+            return 100.0
+        return 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+    def update(self, bar: dict) -> Optional[float]:
+        close = bar['close']
+        if self.prev_close is not None:
+            delta = close - self.prev_close
+            self.gain.update(max(delta, 0.0))
+            self.loss.update(max(-delta, 0.0))
+        self.prev_close = close
+        return self.current()
+
+    def peek(self, bar: dict) -> Optional[float]:
+        if self.prev_close is None:
+            return None
+        delta = bar['close'] - self.prev_close
+        return self._rsi(self.gain.peek(max(delta, 0.0)), self.loss.peek(max(-delta, 0.0)))
+
+    def current(self) -> Optional[float]:
+        return self._rsi(self.gain.value, self.loss.value)
+
+    def snapshot(self) -> dict:
+        return {'gain': self.gain.snapshot(), 'loss': self.loss.snapshot(), 'prev_close': self.prev_close}
+
+    def restore(self, state: dict) -> None:
+        self.gain.restore(state['gain'])
+        self.loss.restore(state['loss'])
+        self.prev_close = state['prev_close']
+
+
+class ATRState:
+    """Wilder-smoothed average true range."""
+
+    def __init__(self, time_period: int = 14):
+        self.tr = _wilder_smoother(time_period)
+        self.prev_close: Optional[float] = None
+
+    def update(self, bar: dict) -> Optional[float]:
+        if self.prev_close is not None:
+            self.tr.update(_true_range(bar, self.prev_close))
+        self.prev_close = bar['close']
+        return self.tr.value
+
+    def peek(self, bar: dict) -> Optional[float]:
+        if self.prev_close is None:
+            return None
+        return self.tr.peek(_true_range(bar, self.prev_close))
+
+    def current(self) -> Optional[float]:
+        return self.tr.value
+
+    def snapshot(self) -> dict:
+        return {'tr': self.tr.snapshot(), 'prev_close': self.prev_close}
+
+    def restore(self, state: dict) -> None:
+        self.tr.restore(state['tr'])
+        self.prev_close = state['prev_close']
+
+
+class ADXState:
+    """Average directional index with Wilder-smoothed TR/+DM/-DM and DX."""
+
+    def __init__(self, time_period: int = 14):
+        self.tr = _wilder_smoother(time_period)
+        self.plus_dm = _wilder_smoother(time_period)
+        self.minus_dm = _wilder_smoother(time_period)
+        self.dx = _wilder_smoother(time_period)
+        self.prev: Optional[Tuple[float, float, float]] = None
+
+    def _inputs(self, bar: dict) -> Tuple[float, float, float]:
+        prev_high, prev_low, prev_close = self.prev
+        up_move = bar['high'] - prev_high
+        down_move = prev_low - bar['low']
+        plus_dm = up_move if up_move > down_move and up_move > 0 else 0.0
+        minus_dm = down_move if down_move > up_move and down_move > 0 else 0.0
+        return _true_range(bar, prev_close), plus_dm, minus_dm
+
+    @staticmethod
+    def _dx(tr: Optional[float], plus: Optional[float], minus: Optional[float]) -> Optional[float]:
+        if tr is None or plus is None or minus is None:
+            return None
+        if tr == 0:
+            return None
+        plus_di = 100.0 * plus / tr
+        minus_di = 100.0 * minus / tr
+        di_sum = plus_di + minus_di
+        return 0.0 if di_sum == 0 else 100.0 * abs(plus_di - minus_di) / di_sum
+
+    def update(self, bar: dict) -> Optional[float]:
+        if self.prev is not None:
+            tr, plus_dm, minus_dm = self._inputs(bar)
+            dx = self._dx(self.tr.update(tr), self.plus_dm.update(plus_dm), self.minus_dm.update(minus_dm))
+            if dx is not None:
+                self.dx.update(dx)
+        self.prev = (bar['high'], bar['low'], bar['close'])
+        return self.dx.value
+
+    def peek(self, bar: dict) -> Optional[float]:
+        if self.prev is None:
+            return None
+        tr, plus_dm, minus_dm = self._inputs(bar)
+        dx = self._dx(self.tr.peek(tr), self.plus_dm.peek(plus_dm), self.minus_dm.peek(minus_dm))
+        return self.dx.value if dx is None else self.dx.peek(dx)
+
+    def current(self) -> Optional[float]:
+        return self.dx.value
+
+    def snapshot(self) -> dict:
+        return {
+            'tr': self.tr.snapshot(),
+            'plus_dm': self.plus_dm.snapshot(),
+            'minus_dm': self.minus_dm.snapshot(),
+            'dx': self.dx.snapshot(),
+            'prev': list(self.prev) if self.prev else None,
+        }
+
+    def restore(self, state: dict) -> None:
+        self.tr.restore(state['tr'])
+        self.plus_dm.restore(state['plus_dm'])
+        self.minus_dm.restore(state['minus_dm'])
+        self.dx.restore(state['dx'])
+        self.prev = tuple(state['prev']) if state['prev'] else None
+
+
+class MACDState:
+    """MACD line, signal line and histogram, in TwelveDataClient.get_macd shape."""
+
+    def __init__(self, fast_period: int = 12, slow_period: int = 26, signal_period: int = 9):
+        self.fast = _ema_smoother(fast_period)
+        self.slow = _ema_smoother(slow_period)
+        self.signal = _ema_smoother(signal_period)
+        self.last: Optional[Tuple[float, float]] = None
+        self.prev: Optional[Tuple[float, float]] = None
+
+    def _line(self, fast: Optional[float], slow: Optional[float]) -> Optional[float]:
+        if fast is None or slow is None:
+            return None
+        return fast - slow
+
+    @staticmethod
+    def _shape(current: Optional[Tuple[float, float]], previous: Optional[Tuple[float, float]]) -> Optional[dict]:
+        if current is None or previous is None:
+            return None
+        macd_current, signal_current = current
+        macd_previous, signal_previous = previous
+        hist_current = macd_current - signal_current
+        hist_previous = macd_previous - signal_previous
+        return {
+            'macd': macd_current,
+            'signal': signal_current,
+            'histogram': hist_current,
+            'histogram_slope': hist_current - hist_previous,
+            'is_bullish_cross': macd_previous <= signal_previous and macd_current > signal_current,
+            'is_bearish_cross': macd_previous >= signal_previous and macd_current < signal_current
+        }
+
+    def update(self, bar: dict) -> Optional[dict]:
+        line = self._line(self.fast.update(bar['close']), self.slow.update(bar['close']))
+        if line is not None:
+            signal = self.signal.update(line)
+            if signal is not None:
+                self.prev, self.last = self.last, (line, signal)
+        return self.current()
+
+    def peek(self, bar: dict) -> Optional[dict]:
+        line = self._line(self.fast.peek(bar['close']), self.slow.peek(bar['close']))
+        if line is None:
+            return None
+        signal = self.signal.peek(line)
+        if signal is None:
+            return None
+        return self._shape((line, signal), self.last)
+
+    def current(self) -> Optional[dict]:
+        return self._shape(self.last, self.prev)
+
+    def snapshot(self) -> dict:
+        return {
+            'fast': self.fast.snapshot(),
+            'slow': self.slow.snapshot(),
+            'signal': self.signal.snapshot(),
+            'last': list(self.last) if self.last else None,
+            'prev': list(self.prev) if self.prev else None,
+        }
+
+    def restore(self, state: dict) -> None:
+        self.fast.restore(state['fast'])
+        self.slow.restore(state['slow'])
+        self.signal.restore(state['signal'])
+        self.last = tuple(state['last']) if state['last'] else None
+        self.prev = tuple(state['prev']) if state['prev'] else None
+
+
+class BollingerState:
+    """Bollinger Bands from rolling sum / sum of squares (population std)."""
+
+    def __init__(self, time_period: int = 20, sd: float = 2.0):
+        self.period = time_period
+        self.sd = sd
+        self.window: deque = deque()
+        self.shift: Optional[float] = None
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def _bands(self, total: float, total_sq: float) -> dict:
+        n = self.period
+        mean = total / n
+        variance = max(total_sq / n - mean * mean, 0.0)
+        middle = mean + self.shift
+        width = self.sd * math.sqrt(variance)
+        return {'upper': middle + width, 'middle': middle, 'lower': middle - width}
+
+    def update(self, bar: dict) -> Optional[dict]:
+        if self.shift is None:
+            # Shifting by the first close keeps sum-of-squares precise at FX price levels
+            self.shift = bar['close']
+        x = bar['close'] - self.shift
+        self.window.append(x)
+        self.total += x
+        self.total_sq += x * x
+        if len(self.window) > self.period:
+            old = self.window.popleft()
+            self.total -= old
+            self.total_sq -= old * old
+        return self.current()
+
+    def peek(self, bar: dict) -> Optional[dict]:
+        if self.shift is None or len(self.window) < self.period - 1:
+            return None
+        x = bar['close'] - self.shift
+        total = self.total + x
+        total_sq = self.total_sq + x * x
+        if len(self.window) == self.period:
+            old = self.window[0]
+            total -= old
+            total_sq -= old * old
+        return self._bands(total, total_sq)
+
+    def current(self) -> Optional[dict]:
+        if len(self.window) < self.period:
+            return None
+        return self._bands(self.total, self.total_sq)
+
+    def snapshot(self) -> dict:
+        return {'window': list(self.window), 'shift': self.shift}
+
+    def restore(self, state: dict) -> None:
+        self.window = deque(state['window'])
+        self.shift = state['shift']
+        self.total = sum(self.window)
+        self.total_sq = sum(x * x for x in self.window)
+
+
+class StochasticState:
+    """
+    Slow stochastic in TwelveDataClient.get_stoch shape.
+
+    Rolling high/low extremes cost O(fast_k_period) per bar, a small fixed
+    constant; the %K/%D smoothing is O(1).
+    """
+
+    def __init__(self, fast_k_period: int = 14, slow_k_period: int = 3, slow_d_period: int = 3):
+        self.k_period = fast_k_period
+        self.slow_k_period = slow_k_period
+        self.d_period = slow_d_period
+        self.highs: deque = deque(maxlen=fast_k_period)
+        self.lows: deque = deque(maxlen=fast_k_period)
+        self.fast_k: deque = deque(maxlen=slow_k_period)
+        self.slow_k: deque = deque(maxlen=slow_d_period)
+
+    def _fast_k(self, highs: Iterable[float], lows: Iterable[float], close: float) -> float:
+        highest, lowest = max(highs), min(lows)
+        span = highest - lowest
+        return 50.0 if span == 0 else 100.0 * (close - lowest) / span
+
+    @staticmethod
+    def _append(values: deque, x: float) -> list:
+        """Values as if x were appended to the bounded deque, without mutating it."""
+        return (list(values) + [x])[-values.maxlen:]
+
+    def _shape(self, fast_k: list, slow_k: list) -> Optional[dict]:
+        if len(fast_k) < self.slow_k_period or len(slow_k) < self.d_period:
+            return None
+        k_value = slow_k[-1]
+        d_value = sum(slow_k) / self.d_period
+        return {
+            'k': k_value,
+            'd': d_value,
+            'is_oversold': k_value < 20,
+            'is_overbought': k_value > 80
+        }
+
+    def update(self, bar: dict) -> Optional[dict]:
+        self.highs.append(bar['high'])
+        self.lows.append(bar['low'])
+        if len(self.highs) == self.k_period:
+            self.fast_k.append(self._fast_k(self.highs, self.lows, bar['close']))
+            if len(self.fast_k) == self.slow_k_period:
+                self.slow_k.append(sum(self.fast_k) / self.slow_k_period)
+        return self.current()
+
+    def peek(self, bar: dict) -> Optional[dict]:
+        highs = self._append(self.highs, bar['high'])
+        lows = self._append(self.lows, bar['low'])
+        if len(highs) < self.k_period:
+            return None
+        fast_k = self._append(self.fast_k, self._fast_k(highs, lows, bar['close']))
+        if len(fast_k) < self.slow_k_period:
+            return None
+        slow_k = self._append(self.slow_k, sum(fast_k) / self.slow_k_period)
+        return self._shape(fast_k, slow_k)
+
+    def current(self) -> Optional[dict]:
+        return self._shape(list(self.fast_k), list(self.slow_k))
+
+    def snapshot(self) -> dict:
+        return {
+            'highs': list(self.highs),
+            'lows': list(self.lows),
+            'fast_k': list(self.fast_k),
+            'slow_k': list(self.slow_k),
+        }
+
+    def restore(self, state: dict) -> None:
+        self.highs.clear()
+        self.highs.extend(state['highs'])
+        self.lows.clear()
+        self.lows.extend(state['lows'])
+        self.fast_k.clear()
+        self.fast_k.extend(state['fast_k'])
+        self.slow_k.clear()
+        self.slow_k.extend(state['slow_k'])
+
+
+# Twelve Data `api_indicator` name -> accumulator class (params are api_params)
+ACCUMULATORS = {
+    'ema': EMAState,
+    'rsi': RSIState,
+    'atr': ATRState,
+    'adx': ADXState,
+    'macd': MACDState,
+    'bbands': BollingerState,
+    'stoch': StochasticState,
+}
+
+
+def create_accumulator(api_indicator: str, params: Optional[dict] = None):
+    """Build an accumulator for a Twelve Data indicator name and its api_params."""
+    cls = ACCUMULATORS.get(api_indicator)
+    if cls is None:
+        raise ValueError(f"No incremental accumulator for indicator '{api_indicator}'")
+    return cls(**(params or {}))
+
+
+class IndicatorEngine:
+    """
+    Accumulators for one (symbol, interval).
+
+    Closed bars are committed with on_bar_close(); the forming bar is recorded
+    with on_forming_bar() and previewed lazily on read. Bars at or before the
+    last committed datetime are ignored, so feeding overlapping history is safe.
+    """
+
+    def __init__(self, symbol: str, interval: str, specs: Optional[Dict[str, Tuple[str, dict]]] = None):
+        self.symbol = symbol
+        self.interval = interval
+        self.specs: Dict[str, Tuple[str, dict]] = {}
+        self.accumulators: Dict[str, Any] = {}
+        self.last_closed: Optional[str] = None
+        self.forming: Optional[dict] = None
+        self._cached_values: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+        for key, (api_indicator, params) in (specs or {}).items():
+            self._add(key, api_indicator, params)
+
+    def _add(self, key: str, api_indicator: str, params: Optional[dict]) -> Any:
+        accumulator = create_accumulator(api_indicator, params)
+        self.specs[key] = (api_indicator, dict(params or {}))
+        self.accumulators[key] = accumulator
+        self._cached_values = None
+        return accumulator
+
+    def ensure(self, key: str, api_indicator: str, params: Optional[dict] = None,
+               history: Iterable[dict] = ()) -> None:
+        """Add an accumulator if missing, warming it from closed `history` bars."""
+        with self._lock:
+            if key in self.accumulators:
+                return
+            accumulator = self._add(key, api_indicator, params)
+            if self.last_closed is None:
+                return
+            for bar in history:
+                if bar['datetime'] > self.last_closed:
+                    break
+                accumulator.update(bar)
+
+    def on_bar_close(self, bar: dict) -> bool:
+        """Commit a closed bar. Returns False if it was already applied."""
+        with self._lock:
+            if self.last_closed is not None and bar['datetime'] <= self.last_closed:
+                return False
+            for accumulator in self.accumulators.values():
+                accumulator.update(bar)
+            self.last_closed = bar['datetime']
+            if self.forming is not None and self.forming['datetime'] <= bar['datetime']:
+                self.forming = None
+            self._cached_values = None
+            return True
+
+    def on_forming_bar(self, bar: dict) -> None:
+        """Record the current forming bar (replaces any previous one)."""
+        with self._lock:
+            if self.last_closed is not None and bar['datetime'] <= self.last_closed:
+                return
+            if self.forming != bar:
+                self.forming = dict(bar)
+                self._cached_values = None
+
+    def replay(self, bars: Iterable[dict]) -> int:
+        """Commit closed bars oldest -> newest; returns how many were applied."""
+        return sum(1 for bar in bars if self.on_bar_close(bar))
+
+    def values(self, include_forming: bool = True) -> Dict[str, Any]:
+        """Current value of every indicator, previewing the forming bar if present."""
+        with self._lock:
+            if include_forming and self.forming is not None:
+                if self._cached_values is None:
+                    self._cached_values = {
+                        key: acc.peek(self.forming) for key, acc in self.accumulators.items()
+                    }
+                return dict(self._cached_values)
+            return {key: acc.current() for key, acc in self.accumulators.items()}
+
+    def snapshot(self) -> dict:
+        """JSON-serializable snapshot of committed state."""
+        with self._lock:
+            return {
+                'symbol': self.symbol,
+                'interval': self.interval,
+                'last_closed': self.last_closed,
+                'specs': {key: [api, params] for key, (api, params) in self.specs.items()},
+                'state': {key: acc.snapshot() for key, acc in self.accumulators.items()},
+            }
+
+    @classmethod
+    def from_snapshot(cls, snapshot: dict) -> 'IndicatorEngine':
+        """Rebuild an engine from snapshot(); replay() newer bars to catch up."""
+        specs = {key: (api, params) for key, (api, params) in snapshot['specs'].items()}
+        engine = cls(snapshot['symbol'], snapshot['interval'], specs)
+        for key, state in snapshot['state'].items():
+            engine.accumulators[key].restore(state)
+        engine.last_closed = snapshot['last_closed']
+        return engine
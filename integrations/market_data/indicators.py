@@ -0,0 +1,180 @@
+"""
+Local technical indicator math over OHLC arrays.
+
+All functions take NumPy arrays ordered OLDEST -> NEWEST and return arrays of
+the same length, with NaN during each indicator's warm-up period. Formulas
+follow Twelve Data's definitions so locally computed values line up with the
+remote endpoints they replace:
+
+- EMA: SMA seed over the first `period` values, then alpha = 2 / (period + 1)
+- RSI / ATR / ADX: Wilder smoothing (alpha = 1 / period)
+- Bollinger Bands: SMA +/- k * population standard deviation
+- Stochastic: fast %K smoothed by SMA into slow %K, slow %D = SMA(slow %K)
+- MACD: EMA(fast) - EMA(slow), signal = EMA(macd, signal_period)
+
+Element-wise work (true range, directional movement, rolling windows) is
+vectorized. The recursive smoothers are a single tight pass over the array,
+since each value depends on the previous one.
+"""
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def _recursive_smooth(values: np.ndarray, period: int, alpha: float) -> np.ndarray:
+    """Seed with the SMA of the first `period` finite values, then smooth by `alpha`."""
+    out = np.full(len(values), np.nan)
+    finite = np.flatnonzero(~np.isnan(values))
+    if len(finite) < period:
+        return out
+
+    start = finite[0]
+    seed_end = start + period
+    if np.isnan(values[start:seed_end]).any():
+        return out
+
+    prev = float(values[start:seed_end].mean())
+    out[seed_end - 1] = prev
+    decay = 1.0 - alpha
+    for i in range(seed_end, len(values)):
+        prev = values[i] * alpha + prev * decay
+        out[i] = prev
+    return out
+
+
+def ema(values: np.ndarray, period: int) -> np.ndarray:
+    """Exponential moving average."""
+    return _recursive_smooth(np.asarray(values, dtype=float), period, 2.0 / (period + 1))
+
+
+def wilder(values: np.ndarray, period: int) -> np.ndarray:
+    """Wilder's running moving average (RMA)."""
+    return _recursive_smooth(np.asarray(values, dtype=float), period, 1.0 / period)
+
+
+def sma(values: np.ndarray, period: int) -> np.ndarray:
+    """Simple moving average."""
+    values = np.asarray(values, dtype=float)
+    out = np.full(len(values), np.nan)
+    if len(values) < period:
+        return out
+    out[period - 1:] = sliding_window_view(values, period).mean(axis=1)
+    return out
+
+
+def rsi(close: np.ndarray, period: int = 14) -> np.ndarray:
+    """Relative Strength Index (0-100)."""
+    close = np.asarray(close, dtype=float)
+    out = np.full(len(close), np.nan)
+    if len(close) <= period:
+        return out
+
+    delta = np.diff(close)
+    avg_gain = wilder(np.clip(delta, 0, None), period)
+    avg_loss = wilder(np.clip(-delta, 0, None), period)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = avg_gain / avg_loss
+        values = 100.0 - 100.0 / (1.0 + rs)
+    values = np.where((avg_loss == 0) & ~np.isnan(avg_gain), 100.0, values)
+    out[1:] = values
+    return out
+
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """True range; the first bar falls back to high - low."""
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    close = np.asarray(close, dtype=float)
+
+    prev_close = np.concatenate(([np.nan], close[:-1]))
+    ranges = np.vstack((high - low, np.abs(high - prev_close), np.abs(low - prev_close)))
+    tr = np.nanmax(ranges, axis=0)
+    return tr
+
+
+def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = 14) -> np.ndarray:
+    """Average True Range (Wilder-smoothed, first bar excluded like Twelve Data)."""
+    tr = true_range(high, low, close)
+    out = np.full(len(tr), np.nan)
+    if len(tr) <= period:
+        return out
+    out[1:] = wilder(tr[1:], period)
+    return out
+
+
+def adx(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = 14) -> np.ndarray:
+    """Average Directional Index (0-100)."""
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    out = np.full(len(high), np.nan)
+    if len(high) <= period * 2:
+        return out
+
+    up_move = np.diff(high)
+    down_move = -np.diff(low)
+    plus_dm = np.where((up_move > down_move) & (up_move > 0), up_move, 0.0)
+    minus_dm = np.where((down_move > up_move) & (down_move > 0), down_move, 0.0)
+    tr = true_range(high, low, close)[1:]
+
+    smoothed_tr = wilder(tr, period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        plus_di = 100.0 * wilder(plus_dm, period) / smoothed_tr
+        minus_di = 100.0 * wilder(minus_dm, period) / smoothed_tr
+        di_sum = plus_di + minus_di
+        dx = np.where(di_sum == 0, 0.0, 100.0 * np.abs(plus_di - minus_di) / di_sum)
+    dx = np.where(np.isnan(plus_di), np.nan, dx)
+
+    out[1:] = wilder(dx, period)
+    return out
+
+
+def bbands(close: np.ndarray, period: int = 20, sd: float = 2.0):
+    """Bollinger Bands -> (upper, middle, lower)."""
+    close = np.asarray(close, dtype=float)
+    middle = np.full(len(close), np.nan)
+    std = np.full(len(close), np.nan)
+    if len(close) >= period:
+        windows = sliding_window_view(close, period)
+        middle[period - 1:] = windows.mean(axis=1)
+        std[period - 1:] = windows.std(axis=1)
+    return middle + sd * std, middle, middle - sd * std
+
+
+def stoch(high: np.ndarray, low: np.ndarray, close: np.ndarray,
+          k_period: int = 14, slow_k_period: int = 3, d_period: int = 3):
+    """Stochastic oscillator -> (slow_k, slow_d)."""
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    close = np.asarray(close, dtype=float)
+    fast_k = np.full(len(close), np.nan)
+    if len(close) >= k_period:
+        highest = sliding_window_view(high, k_period).max(axis=1)
+        lowest = sliding_window_view(low, k_period).min(axis=1)
+        span = highest - lowest
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fast_k[k_period - 1:] = np.where(
+                span == 0, 50.0, 100.0 * (close[k_period - 1:] - lowest) / span
+            )
+
+    slow_k = _nan_aware_sma(fast_k, slow_k_period)
+    slow_d = _nan_aware_sma(slow_k, d_period)
+    return slow_k, slow_d
+
+
+def macd(close: np.ndarray, fast: int = 12, slow: int = 26, signal: int = 9):
+    """MACD -> (macd_line, signal_line, histogram)."""
+    close = np.asarray(close, dtype=float)
+    macd_line = ema(close, fast) - ema(close, slow)
+    signal_line = ema(macd_line, signal)
+    return macd_line, signal_line, macd_line - signal_line
+
+
+def _nan_aware_sma(values: np.ndarray, period: int) -> np.ndarray:
+    """SMA that starts after a leading NaN warm-up run."""
+    out = np.full(len(values), np.nan)
+    finite = np.flatnonzero(~np.isnan(values))
+    if len(finite) < period:
+        return out
+    start = finite[0]
+    out[start:] = sma(values[start:], period)
+    return out
@@ -0,0 +1,244 @@
+"""
+Process-wide price feed with per-symbol tick fan-out.
+
+Every tenant's monitor loop, SignalMonitor and PriceMonitor used to call
+twelve_data_client.get_price() on their own, so upstream price requests
+grew with tenants x call sites. The price feed keeps ONE PriceFeed per
+symbol:
+
+- Coalescing cache: reads within `max_age_seconds` of the last tick are
+  served from memory; concurrent cache misses share a single upstream fetch
+- Staleness bound: if an upstream fetch fails, the last tick is still served
+  while younger than `max_stale_seconds`, never older
+- Fan-out: each fresh tick is published to subscribers (TenantRuntime
+  instances) via on_price_tick(tick)
+- Optional poller thread refreshes every subscribed symbol on an interval so
+  readers never wait on the network
+
+Upstream calls therefore scale with the number of symbols, not tenants.
+NO side effects at import time.
+"""
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from core.config import Config
+from core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class PriceTick:
+    """A single price observation for a symbol."""
+    symbol: str
+    price: float
+    fetched_at: float
+
+    def age(self, now: Optional[float] = None) -> float:
+        return (now if now is not None else time.time()) - self.fetched_at
+
+
+class PriceFeed:
+    """Coalescing price cache and subscriber fan-out for one symbol."""
+
+    def __init__(self, symbol: str, fetcher: Callable[[str], Optional[float]],
+                 max_age_seconds: float, max_stale_seconds: float):
+        self.symbol = symbol
+        self.fetcher = fetcher
+        self.max_age_seconds = max_age_seconds
+        self.max_stale_seconds = max_stale_seconds
+        self.last_tick: Optional[PriceTick] = None
+        self.fetch_count = 0
+        self._fetch_lock = threading.Lock()
+        self._subscribers_lock = threading.Lock()
+        self._subscribers: "weakref.WeakSet" = weakref.WeakSet()
+
+    def _fresh_tick(self, max_age: float) -> Optional[PriceTick]:
+        tick = self.last_tick
+        if tick is not None and tick.age() <= max_age:
+            return tick
+        return None
+
+    def get_tick(self, max_age: Optional[float] = None) -> Optional[PriceTick]:
+        """
+        Return a tick no older than `max_age` seconds, fetching at most once
+        across concurrent callers. Falls back to a tick within the staleness
+        bound if the upstream fetch fails.
+        """
+        max_age = self.max_age_seconds if max_age is None else max_age
+
+        tick = self._fresh_tick(max_age)
+        if tick is not None:
+            return tick
+
+        with self._fetch_lock:
+            # Another caller may have refreshed while we waited for the lock
+            tick = self._fresh_tick(max_age)
+            if tick is not None:
+                return tick
+            return self.refresh()
+
+    def refresh(self) -> Optional[PriceTick]:
+        """Fetch upstream now and publish the tick. Caller should hold _fetch_lock or be the poller."""
+        price = None
+        try:
+            price = self.fetcher(self.symbol)
+            self.fetch_count += 1
+        except Exception as e:
+            logger.warning(f"Price feed fetch failed for {self.symbol}: {e}")
+
+        if not price:
+            stale = self._fresh_tick(self.max_stale_seconds)
+            if stale is not None:
+                logger.warning(f"Serving stale {self.symbol} price ({stale.age():.1f}s old)")
+            return stale
+
+        tick = PriceTick(symbol=self.symbol, price=float(price), fetched_at=time.time())
+        self.last_tick = tick
+        self._publish(tick)
+        return tick
+
+    def get_price(self, max_age: Optional[float] = None) -> Optional[float]:
+        tick = self.get_tick(max_age)
+        return tick.price if tick else None
+
+    def subscribe(self, subscriber) -> None:
+        """Register an object with on_price_tick(tick); held weakly."""
+        with self._subscribers_lock:
+            self._subscribers.add(subscriber)
+
+    def unsubscribe(self, subscriber) -> None:
+        with self._subscribers_lock:
+            self._subscribers.discard(subscriber)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def _publish(self, tick: PriceTick) -> None:
+        with self._subscribers_lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.on_price_tick(tick)
+            except Exception as e:
+                logger.warning(f"Price tick subscriber {subscriber!r} failed: {e}")
+
+
+class PriceFeedService:
+    """
+    Registry of PriceFeeds keyed by symbol.
+
+    Exposes get_price(symbol) so it can stand in for TwelveDataClient wherever
+    only prices are needed (see TenantRuntime.get_price_client).
+    """
+
+    def __init__(self, fetcher: Optional[Callable[[str], Optional[float]]] = None,
+                 max_age_seconds: Optional[float] = None,
+                 max_stale_seconds: Optional[float] = None):
+        if fetcher is None:
+            from integrations.market_data.twelve_data import get_twelve_data_client
+            fetcher = lambda symbol: get_twelve_data_client().get_price(symbol)
+        self.fetcher = fetcher
+        self.max_age_seconds = Config.get_price_feed_max_age_seconds() if max_age_seconds is None else max_age_seconds
+        self.max_stale_seconds = Config.get_price_feed_max_stale_seconds() if max_stale_seconds is None else max_stale_seconds
+        self._feeds: Dict[str, PriceFeed] = {}
+        self._lock = threading.Lock()
+        self._poller: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def get_feed(self, symbol: str) -> PriceFeed:
+        with self._lock:
+            feed = self._feeds.get(symbol)
+            if feed is None:
+                feed = PriceFeed(symbol, self.fetcher, self.max_age_seconds, self.max_stale_seconds)
+                self._feeds[symbol] = feed
+            return feed
+
+    def get_tick(self, symbol: str = 'XAU/USD', max_age: Optional[float] = None) -> Optional[PriceTick]:
+        return self.get_feed(symbol).get_tick(max_age)
+
+    def get_price(self, symbol: str = 'XAU/USD', max_age: Optional[float] = None) -> Optional[float]:
+        return self.get_feed(symbol).get_price(max_age)
+
+    def subscribe(self, symbol: str, subscriber) -> None:
+        self.get_feed(symbol).subscribe(subscriber)
+
+    def unsubscribe(self, symbol: str, subscriber) -> None:
+        self.get_feed(symbol).unsubscribe(subscriber)
+
+    def symbols(self) -> List[str]:
+        with self._lock:
+            return list(self._feeds)
+
+    def stats(self) -> Dict[str, dict]:
+        """Per-symbol fetch counts, subscriber counts and last tick age."""
+        with self._lock:
+            feeds = list(self._feeds.values())
+        return {
+            feed.symbol: {
+                'fetch_count': feed.fetch_count,
+                'subscribers': feed.subscriber_count,
+                'last_tick_age': feed.last_tick.age() if feed.last_tick else None,
+            }
+            for feed in feeds
+        }
+
+    def _poll_loop(self, interval_seconds: float) -> None:
+        logger.info(f"Price feed poller started (interval={interval_seconds}s)")
+        while not self._stop.is_set():
+            for symbol in self.symbols():
+                feed = self.get_feed(symbol)
+                if feed.subscriber_count == 0:
+                    continue
+                with feed._fetch_lock:
+                    feed.refresh()
+            self._stop.wait(interval_seconds)
+        logger.info("Price feed poller stopped")
+
+    def start_polling(self, interval_seconds: Optional[float] = None) -> Optional[threading.Thread]:
+        """
+        Start a background thread that refreshes subscribed symbols every interval.
+
+        Returns None (on-demand mode) when no positive interval is configured.
+        """
+        if self._poller and self._poller.is_alive():
+            return self._poller
+        interval = interval_seconds or Config.get_price_feed_poll_seconds()
+        if interval <= 0:
+            return None
+        self._stop.clear()
+        self._poller = threading.Thread(
+            target=self._poll_loop, args=(interval,), daemon=True, name="price-feed-poller"
+        )
+        self._poller.start()
+        return self._poller
+
+    def stop_polling(self) -> None:
+        self._stop.set()
+
+
+_service: Optional[PriceFeedService] = None
+_service_lock = threading.Lock()
+
+
+def get_price_feed() -> PriceFeedService:
+    """Get or create the process-wide PriceFeedService."""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = PriceFeedService()
+    return _service
+
+
+def reset_price_feed() -> None:
+    """Drop the process-wide service (useful for testing)."""
+    global _service
+    with _service_lock:
+        if _service is not None:
+            _service.stop_polling()
+        _service = None
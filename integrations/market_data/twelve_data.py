@@ -4,10 +4,19 @@ Fetches RSI, MACD, ATR, and real-time price data for XAU/USD
 
 NOTE: Extracted from forex_api.py for modular organization.
 All function names, signatures, and behavior preserved exactly.
+
+Indicator methods are served from the shared CandleStore (one `time_series`
+fetch per symbol/interval, indicators computed locally) when
+MARKET_DATA_LOCAL_INDICATORS is enabled. If the store cannot answer (cold
+start failure, insufficient history) they fall back to the remote endpoint.
+Return shapes are identical either way.
 """
 import os
 import requests
 
+from core.config import Config
+from integrations.market_data.candle_store import CandleStore
+
 
 class TwelveDataClient:
     def __init__(self):
@@ -16,6 +25,8 @@ class TwelveDataClient:
         
         if not self.api_key:
             print("⚠️  TWELVE_DATA_API_KEY not set - forex signals will not work")
+        
+        self.candle_store = CandleStore(self) if Config.is_local_indicators_enabled() else None
     
     def _make_request(self, endpoint, params):
         """Make API request to Twelve Data"""
@@ -58,6 +69,11 @@ class TwelveDataClient:
         Returns:
             float: RSI value (0-100) or None if error
         """
+        if self.candle_store:
+            series = self.candle_store.get_rsi_series(symbol, interval, period, 1)
+            if series:
+                return series[0]
+        
         try:
             data = self._make_request('rsi', {
                 'symbol': symbol,
@@ -91,6 +107,11 @@ class TwelveDataClient:
                 'is_bearish_cross': True if MACD just crossed below signal
             } or None if error
         """
+        if self.candle_store:
+            local = self.candle_store.get_macd(symbol, interval)
+            if local:
+                return local
+        
         try:
             data = self._make_request('macd', {
                 'symbol': symbol,
@@ -140,6 +161,11 @@ class TwelveDataClient:
         Returns:
             float: ATR value or None if error
         """
+        if self.candle_store:
+            series = self.candle_store.get_atr_series(symbol, interval, period, 1)
+            if series:
+                return series[0]
+        
         try:
             data = self._make_request('atr', {
                 'symbol': symbol,
@@ -181,6 +207,11 @@ class TwelveDataClient:
         Returns:
             float: EMA value or None if error
         """
+        if self.candle_store:
+            series = self.candle_store.get_ema_series(symbol, interval, period, 1)
+            if series:
+                return series[0]
+        
         try:
             data = self._make_request('ema', {
                 'symbol': symbol,
@@ -204,6 +235,11 @@ class TwelveDataClient:
         Returns:
             list: List of EMA values [newest, ..., oldest] or None
         """
+        if self.candle_store:
+            series = self.candle_store.get_ema_series(symbol, interval, period, outputsize)
+            if series:
+                return series
+        
         try:
             data = self._make_request('ema', {
                 'symbol': symbol,
@@ -227,6 +263,11 @@ class TwelveDataClient:
         Returns:
             list: List of RSI values [newest, ..., oldest] or None
         """
+        if self.candle_store:
+            series = self.candle_store.get_rsi_series(symbol, interval, period, outputsize)
+            if series:
+                return series
+        
         try:
             data = self._make_request('rsi', {
                 'symbol': symbol,
@@ -249,6 +290,11 @@ class TwelveDataClient:
         Returns:
             list: List of BB dicts [newest, ..., oldest] or None
         """
+        if self.candle_store:
+            series = self.candle_store.get_bbands_series(symbol, interval, period, outputsize)
+            if series:
+                return series
+        
         try:
             data = self._make_request('bbands', {
                 'symbol': symbol,
@@ -282,6 +328,11 @@ class TwelveDataClient:
             float: ADX value (0-100) or None if error
             ADX > 20 indicates strong trend
         """
+        if self.candle_store:
+            series = self.candle_store.get_adx_series(symbol, interval, period, 1)
+            if series:
+                return series[0]
+        
         try:
             data = self._make_request('adx', {
                 'symbol': symbol,
@@ -313,6 +364,11 @@ class TwelveDataClient:
                 'lower': Lower band value
             } or None if error
         """
+        if self.candle_store:
+            series = self.candle_store.get_bbands_series(symbol, interval, period, 1)
+            if series:
+                return series[0]
+        
         try:
             data = self._make_request('bbands', {
                 'symbol': symbol,
@@ -353,6 +409,11 @@ class TwelveDataClient:
                 'is_overbought': True if %K > 80
             } or None if error
         """
+        if self.candle_store:
+            local = self.candle_store.get_stoch(symbol, interval, k_period, d_period)
+            if local:
+                return local
+        
         try:
             data = self._make_request('stoch', {
                 'symbol': symbol,
@@ -391,6 +452,11 @@ class TwelveDataClient:
             list: List of candle dicts with {datetime, open, high, low, close} 
                   ordered from most recent to oldest, or None if error
         """
+        if self.candle_store:
+            candles = self.candle_store.get_time_series(symbol, interval, outputsize)
+            if candles:
+                return candles
+        
         try:
             data = self._make_request('time_series', {
                 'symbol': symbol,
@@ -0,0 +1,221 @@
+"""
+LLM gateway - cached, coalesced and metered chat completions.
+
+Many tenants trade the same symbol, so the recap/briefing prompts they build
+are often byte-for-byte identical. Calls that go through complete():
+
+- Are cached by content: sha256 of (model, messages, parameters), with a TTL
+  and LRU eviction (LLM_CACHE_TTL_SECONDS, LLM_CACHE_MAX_ENTRIES)
+- Are single-flight: while one identical request is in flight, other callers
+  wait for its result instead of issuing their own
+- Share a concurrency cap on upstream requests (LLM_MAX_CONCURRENCY)
+- Record prompt/completion tokens per tenant (get_token_usage); cache hits
+  and coalesced waits are counted but cost no tokens
+
+Errors are never cached; every waiter of a failed request gets the exception.
+
+NO side effects at import time (the gateway is created on first use).
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from core.config import Config
+from core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class Completion:
+    """Text and usage of one chat completion."""
+    content: Optional[str]
+    model: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached: bool = False
+
+
+def cache_key(model: str, messages: List[Dict[str, Any]], params: Dict[str, Any]) -> str:
+    """Content address of a request: same model, messages and params -> same key."""
+    payload = json.dumps({'model': model, 'messages': messages, 'params': params},
+                         sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class LLMGateway:
+    """Process-wide front for chat.completions.create."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float, max_concurrency: int):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max(1, max_concurrency))
+        self._usage: Dict[str, Dict[str, int]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def _account(self, tenant_id: Optional[str], completion: Completion, outcome: str) -> None:
+        usage = self._usage.setdefault(tenant_id or '_shared', {
+            'requests': 0, 'cache_hits': 0, 'coalesced': 0,
+            'prompt_tokens': 0, 'completion_tokens': 0,
+        })
+        usage['requests'] += 1
+        if outcome == 'hit':
+            usage['cache_hits'] += 1
+        elif outcome == 'coalesced':
+            usage['coalesced'] += 1
+        else:
+            usage['prompt_tokens'] += completion.prompt_tokens
+            usage['completion_tokens'] += completion.completion_tokens
+
+    def _lookup(self, key: str) -> Optional[Completion]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        expires_at, completion = entry
+        if expires_at <= time.monotonic():
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return completion
+
+    def _store(self, key: str, completion: Completion, ttl: float) -> None:
+        self._cache[key] = (time.monotonic() + ttl, completion)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    def _call(self, client, model: str, messages: List[Dict[str, Any]], params: Dict[str, Any]) -> Completion:
+        if client is None:
+            from integrations.openai.client import get_openai_client
+            client = get_openai_client()
+        with self._slots:
+            response = client.chat.completions.create(model=model, messages=messages, **params)
+        usage = getattr(response, 'usage', None)
+        return Completion(
+            content=response.choices[0].message.content,
+            model=model,
+            prompt_tokens=getattr(usage, 'prompt_tokens', 0) or 0,
+            completion_tokens=getattr(usage, 'completion_tokens', 0) or 0,
+        )
+
+    def complete(self, model: str, messages: List[Dict[str, Any]], tenant_id: Optional[str] = None,
+                 client=None, cache: bool = True, ttl: Optional[float] = None, **params) -> Completion:
+        """
+        Run (or reuse) a chat completion.
+
+        Args:
+            model, messages, **params: passed to chat.completions.create
+            tenant_id: tenant charged for the tokens
+            client: OpenAI client to use (default: integrations.openai.client)
+            cache: False to always call upstream (still capped and metered)
+            ttl: cache lifetime for this result (default LLM_CACHE_TTL_SECONDS)
+        """
+        if not cache:
+            completion = self._call(client, model, messages, params)
+            with self._lock:
+                self.misses += 1
+                self._account(tenant_id, completion, 'miss')
+            return completion
+
+        key = cache_key(model, messages, params)
+        with self._lock:
+            cached = self._lookup(key)
+            if cached is not None:
+                self.hits += 1
+                self._account(tenant_id, cached, 'hit')
+                return Completion(cached.content, cached.model, cached.prompt_tokens,
+                                  cached.completion_tokens, cached=True)
+            leader = self._inflight.get(key)
+            if leader is None:
+                future: Future = Future()
+                self._inflight[key] = future
+            else:
+                self.coalesced += 1
+
+        if leader is not None:
+            completion = leader.result()
+            with self._lock:
+                self._account(tenant_id, completion, 'coalesced')
+            return Completion(completion.content, completion.model, completion.prompt_tokens,
+                              completion.completion_tokens, cached=True)
+
+        try:
+            completion = self._call(client, model, messages, params)
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self.misses += 1
+            self._inflight.pop(key, None)
+            if completion.content:
+                self._store(key, completion, self.ttl_seconds if ttl is None else ttl)
+            self._account(tenant_id, completion, 'miss')
+        future.set_result(completion)
+        return completion
+
+    def get_token_usage(self, tenant_id: Optional[str] = None) -> Dict[str, Any]:
+        """Usage counters for one tenant, or for all tenants keyed by tenant_id."""
+        with self._lock:
+            if tenant_id is not None:
+                return dict(self._usage.get(tenant_id, {}))
+            return {tenant: dict(usage) for tenant, usage in self._usage.items()}
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'entries': len(self._cache),
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'in_flight': len(self._inflight),
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+
+_gateway: Optional[LLMGateway] = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway() -> LLMGateway:
+    """Get or create the shared gateway (sized from Config on first use)."""
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = LLMGateway(
+                max_entries=Config.get_llm_cache_max_entries(),
+                ttl_seconds=Config.get_llm_cache_ttl_seconds(),
+                max_concurrency=Config.get_llm_max_concurrency(),
+            )
+        return _gateway
+
+
+def complete(model: str, messages: List[Dict[str, Any]], **kwargs) -> Completion:
+    """Shortcut for get_gateway().complete(...)."""
+    return get_gateway().complete(model, messages, **kwargs)
+
+
+def get_token_usage(tenant_id: Optional[str] = None) -> Dict[str, Any]:
+    """Shortcut for get_gateway().get_token_usage(...)."""
+    return get_gateway().get_token_usage(tenant_id)
+
+
+def reset_gateway():
+    """Drop the shared gateway (useful for testing)"""
+    global _gateway
+    with _gateway_lock:
+        _gateway = None
@@ -119,7 +119,9 @@ def handle_stripe_webhook(handler, stripe_available, telegram_bot_available, db_
         db_module: Database module for idempotency and subscription updates
     """
     from core.config import Config
+    from core.idempotency import DUPLICATE, IN_PROGRESS
     
+    claimed_event_id = None
     try:
         content_length = int(handler.headers['Content-Length'])
         payload = handler.rfile.read(content_length)
@@ -167,13 +169,24 @@ def handle_stripe_webhook(handler, stripe_available, telegram_bot_available, db_
         
         print(f"[STRIPE WEBHOOK] Received event: {event_type} ({event_id})")
         
-        if event_id and db_module.is_webhook_event_processed(event_id, tenant_id='stripe'):
-            print(f"[STRIPE WEBHOOK] ⏭️ Event {event_id} already processed, skipping")
-            handler.send_response(200)
-            handler.send_header('Content-type', 'application/json')
-            handler.end_headers()
-            handler.wfile.write(json.dumps({'received': True, 'duplicate': True}).encode())
-            return
+        if event_id:
+            claim = db_module.claim_webhook_event(event_id, tenant_id='stripe', event_source='stripe')
+            if claim == DUPLICATE:
+                print(f"[STRIPE WEBHOOK] ⏭️ Event {event_id} already processed, skipping")
+                handler.send_response(200)
+                handler.send_header('Content-type', 'application/json')
+                handler.end_headers()
+                handler.wfile.write(json.dumps({'received': True, 'duplicate': True}).encode())
+                return
+            if claim == IN_PROGRESS:
+                # Another delivery is still processing it; a non-2xx makes Stripe retry later
+                print(f"[STRIPE WEBHOOK] ⏳ Event {event_id} is being processed, asking Stripe to retry")
+                handler.send_response(409)
+                handler.send_header('Content-type', 'application/json')
+                handler.end_headers()
+                handler.wfile.write(json.dumps({'error': 'Event is being processed'}).encode())
+                return
+            claimed_event_id = event_id
         
         if event_type == 'checkout.session.completed':
             subscription_id = event_data.get('subscription') if isinstance(event_data, dict) else getattr(event_data, 'subscription', None)
@@ -499,13 +512,9 @@ def handle_stripe_webhook(handler, stripe_available, telegram_bot_available, db_
                 else:
                     print(f"[STRIPE WEBHOOK] Could not find subscription {subscription_id} to mark as failed")
         
-        if event_id:
-            db_module.record_webhook_event_processed(event_id, tenant_id='stripe', event_source='stripe')
-            print(f"[STRIPE WEBHOOK] ✅ Event {event_id} recorded as processed")
-        
-        import random
-        if random.random() < 0.01:
-            db_module.cleanup_old_webhook_events(hours=24)
+        if claimed_event_id:
+            db_module.complete_webhook_event(claimed_event_id, tenant_id='stripe', event_source='stripe')
+            print(f"[STRIPE WEBHOOK] ✅ Event {claimed_event_id} recorded as processed")
         
         handler.send_response(200)
         handler.send_header('Content-type', 'application/json')
@@ -516,6 +525,8 @@ def handle_stripe_webhook(handler, stripe_available, telegram_bot_available, db_
         print(f"[STRIPE WEBHOOK] ❌ Error processing webhook: {e}")
         import traceback
         traceback.print_exc()
+        if claimed_event_id:
+            db_module.release_webhook_event(claimed_event_id, tenant_id='stripe', event_source='stripe')
         handler.send_response(500)
         handler.send_header('Content-type', 'application/json')
         handler.end_headers()
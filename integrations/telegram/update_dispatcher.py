@@ -0,0 +1,140 @@
+"""
+Telegram update dispatcher - ack-then-process for bot webhooks.
+
+With TELEGRAM_WEBHOOK_MODE=ingest, handle_bot_webhook authenticates and
+parses the update, hands it here and answers 200 straight away, so slow
+journey/chat-member handling no longer makes Telegram retry.
+
+- A fixed set of worker threads, each with its own FIFO queue
+- An update goes to the worker picked by its chat id (falling back to the
+  sender id), so the updates of one chat are processed one at a time and
+  in arrival order, while different chats run in parallel
+- Queues are bounded (TELEGRAM_WEBHOOK_QUEUE_SIZE spread over the
+  workers); submit() returns False when the chat's queue is full and the
+  webhook answers 503 so Telegram redelivers the update later (processing
+  it inline would overtake that chat's queued updates)
+
+Queued updates live in memory only: an update acked but still queued when
+the process dies is lost (Telegram will not resend it).
+
+NO side effects at import time (workers start on first use).
+"""
+import queue
+import threading
+from typing import Callable, List, Optional
+
+from core.config import Config
+from core.logging import get_logger
+
+logger = get_logger(__name__)
+
+_STOP = object()
+
+
+def update_chat_key(update: dict) -> int:
+    """Ordering key of an update: its chat id, else the sender id, else 0."""
+    for field in ('message', 'edited_message', 'channel_post', 'edited_channel_post',
+                  'chat_member', 'my_chat_member', 'chat_join_request'):
+        body = update.get(field)
+        if body:
+            chat_id = (body.get('chat') or {}).get('id')
+            if chat_id is not None:
+                return int(chat_id)
+    callback = update.get('callback_query')
+    if callback:
+        chat_id = ((callback.get('message') or {}).get('chat') or {}).get('id')
+        if chat_id is not None:
+            return int(chat_id)
+        sender = (callback.get('from') or {}).get('id')
+        if sender is not None:
+            return int(sender)
+    return 0
+
+
+class UpdateDispatcher:
+    """Keyed worker pool: jobs with the same key run sequentially, in order."""
+
+    def __init__(self, name: str, workers: int, queue_size: int):
+        self.name = name
+        self.workers = max(1, workers)
+        per_worker = max(1, queue_size // self.workers)
+        self._queues: List[queue.Queue] = [queue.Queue(maxsize=per_worker) for _ in range(self.workers)]
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self.processed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._threads:
+                return
+            for i, jobs in enumerate(self._queues):
+                thread = threading.Thread(target=self._work, args=(jobs,), daemon=True,
+                                          name=f"{self.name}-{i}")
+                thread.start()
+                self._threads.append(thread)
+            logger.info(f"[UPDATES] Started {self.workers} {self.name} workers")
+
+    def _work(self, jobs: queue.Queue) -> None:
+        while True:
+            job = jobs.get()
+            try:
+                if job is _STOP:
+                    return
+                fn, args = job
+                fn(*args)
+                self.processed += 1
+            except Exception as e:
+                self.failed += 1
+                logger.exception(f"[UPDATES] {self.name} job failed: {e}")
+            finally:
+                jobs.task_done()
+
+    def submit(self, key: int, fn: Callable, *args) -> bool:
+        """Queue fn(*args) behind earlier jobs with the same key. False if that queue is full."""
+        self._start()
+        try:
+            self._queues[hash(key) % self.workers].put_nowait((fn, args))
+            return True
+        except queue.Full:
+            self.rejected += 1
+            return False
+
+    def join(self) -> None:
+        """Wait until every queued job has run."""
+        for jobs in self._queues:
+            jobs.join()
+
+    def stats(self) -> dict:
+        return {
+            'workers': self.workers,
+            'queued': sum(jobs.qsize() for jobs in self._queues),
+            'processed': self.processed,
+            'failed': self.failed,
+            'rejected': self.rejected,
+        }
+
+    def shutdown(self) -> None:
+        """Stop workers after the jobs already queued."""
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for jobs in self._queues[:len(threads)]:
+            jobs.put(_STOP)
+
+
+_dispatcher: Optional[UpdateDispatcher] = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_update_dispatcher() -> UpdateDispatcher:
+    """Get or create the shared bot-webhook dispatcher (sized from Config)."""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = UpdateDispatcher(
+                'bot-updates',
+                workers=Config.get_telegram_webhook_workers(),
+                queue_size=Config.get_telegram_webhook_queue_size(),
+            )
+        return _dispatcher
@@ -508,8 +508,54 @@ def _handle_chat_member_update(webhook_data, tenant_id, connection):
             return {'success': True, 'message': f'VIP: user {telegram_user_id} joined (no matching subscription)'}
 
 
+def _respond_json(handler, status: int, body: dict) -> None:
+    handler.send_response(status)
+    handler.send_header('Content-type', 'application/json')
+    handler.end_headers()
+    handler.wfile.write(json.dumps(body).encode())
+
+
+def process_bot_update(webhook_data: dict, connection: dict) -> dict:
+    """
+    Run journey trigger/reply and chat_member handling for one tenant bot update.
+    
+    Returns the response body for the webhook. Called inline (sync mode) or
+    from the update dispatcher (ingest mode).
+    """
+    start_time = time.time()
+    tenant_id = connection['tenant_id']
+    bot_username = connection['bot_username']
+    
+    if check_journey_trigger(webhook_data, tenant_id, bot_username):
+        elapsed = time.time() - start_time
+        logger.info(f"Bot webhook: journey trigger handled in {elapsed:.2f}s")
+        return {'status': 'ok', 'handler': 'journey'}
+    
+    if check_journey_reply(webhook_data, tenant_id, bot_username):
+        elapsed = time.time() - start_time
+        logger.info(f"Bot webhook: journey reply handled in {elapsed:.2f}s")
+        return {'status': 'ok', 'handler': 'journey_reply'}
+    
+    if 'chat_member' in webhook_data:
+        result = _handle_chat_member_update(webhook_data, tenant_id, connection)
+        elapsed = time.time() - start_time
+        logger.info(f"Bot webhook: chat_member handled in {elapsed:.2f}s, result: {result}")
+        return {'status': 'ok', 'handler': 'chat_member', **result}
+    
+    elapsed = time.time() - start_time
+    logger.debug(f"Bot webhook: no handler matched in {elapsed:.2f}s")
+    return {'status': 'ok', 'handler': 'none'}
+
+
 def handle_bot_webhook(handler, webhook_secret: str):
-    """POST /api/bot-webhook/<secret> - Generic bot webhook for tenant-scoped bots."""
+    """
+    POST /api/bot-webhook/<secret> - Generic bot webhook for tenant-scoped bots.
+    
+    TELEGRAM_WEBHOOK_MODE=ingest queues the update (ordered per chat) and
+    answers 200 before processing. If the chat's queue is full the update is
+    answered 503 so Telegram redelivers it later; processing it inline would
+    overtake the updates still queued for that chat.
+    """
     start_time = time.time()
     
     try:
@@ -518,15 +564,11 @@ def handle_bot_webhook(handler, webhook_secret: str):
         
         if not connection:
             logger.warning("Bot webhook: invalid or unknown webhook secret")
-            handler.send_response(401)
-            handler.send_header('Content-type', 'application/json')
-            handler.end_headers()
-            handler.wfile.write(json.dumps({'error': 'Invalid webhook secret'}).encode())
+            _respond_json(handler, 401, {'error': 'Invalid webhook secret'})
             return
         
         tenant_id = connection['tenant_id']
         bot_role = connection['bot_role']
-        bot_username = connection['bot_username']
         
         logger.info(f"Bot webhook: tenant={tenant_id}, role={bot_role}")
         
@@ -537,45 +579,19 @@ def handle_bot_webhook(handler, webhook_secret: str):
         update_id = webhook_data.get('update_id', 'unknown')
         logger.debug(f"Bot webhook: processing update_id={update_id}")
         
-        if check_journey_trigger(webhook_data, tenant_id, bot_username):
-            elapsed = time.time() - start_time
-            logger.info(f"Bot webhook: journey trigger handled in {elapsed:.2f}s")
-            handler.send_response(200)
-            handler.send_header('Content-type', 'application/json')
-            handler.end_headers()
-            handler.wfile.write(json.dumps({'status': 'ok', 'handler': 'journey'}).encode())
-            return
-        
-        if check_journey_reply(webhook_data, tenant_id, bot_username):
-            elapsed = time.time() - start_time
-            logger.info(f"Bot webhook: journey reply handled in {elapsed:.2f}s")
-            handler.send_response(200)
-            handler.send_header('Content-type', 'application/json')
-            handler.end_headers()
-            handler.wfile.write(json.dumps({'status': 'ok', 'handler': 'journey_reply'}).encode())
-            return
-        
-        if 'chat_member' in webhook_data:
-            result = _handle_chat_member_update(webhook_data, tenant_id, connection)
-            elapsed = time.time() - start_time
-            logger.info(f"Bot webhook: chat_member handled in {elapsed:.2f}s, result: {result}")
-            handler.send_response(200)
-            handler.send_header('Content-type', 'application/json')
-            handler.end_headers()
-            handler.wfile.write(json.dumps({'status': 'ok', 'handler': 'chat_member', **result}).encode())
+        if Config.get_telegram_webhook_mode() == 'ingest':
+            from integrations.telegram.update_dispatcher import get_update_dispatcher, update_chat_key
+            key = update_chat_key(webhook_data)
+            if get_update_dispatcher().submit(key, process_bot_update, webhook_data, connection):
+                _respond_json(handler, 200, {'status': 'ok', 'handler': 'queued'})
+            else:
+                logger.warning(f"Bot webhook: update queue full, asking Telegram to redeliver update_id={update_id}")
+                _respond_json(handler, 503, {'error': 'Update queue full'})
             return
         
-        elapsed = time.time() - start_time
-        logger.debug(f"Bot webhook: no handler matched in {elapsed:.2f}s")
-        handler.send_response(200)
-        handler.send_header('Content-type', 'application/json')
-        handler.end_headers()
-        handler.wfile.write(json.dumps({'status': 'ok', 'handler': 'none'}).encode())
+        _respond_json(handler, 200, process_bot_update(webhook_data, connection))
         
     except Exception as e:
         elapsed = time.time() - start_time
         logger.exception(f"Bot webhook error after {elapsed:.2f}s: {e}")
-        handler.send_response(500)
-        handler.send_header('Content-type', 'application/json')
-        handler.end_headers()
-        handler.wfile.write(json.dumps({'error': 'Internal server error'}).encode())
+        _respond_json(handler, 500, {'error': 'Internal server error'})
@@ -0,0 +1,7 @@
+"""
+Versioned database migrations.
+
+Numbered migration files live in migrations/versions/ and are applied in
+order by migrations.runner, which db.DatabasePool.initialize_schema calls at
+boot.
+"""
@@ -0,0 +1,216 @@
+"""
+Migration Runner
+
+Applies the numbered files in migrations/versions/ and records each one in
+schema_migrations(version, name, applied_at):
+
+    NNNN_name.sql   executed as a single script
+    NNNN_name.py    module with upgrade(conn, pool)
+
+Boot (db.DatabasePool.initialize_schema) takes the fast path first: one
+SELECT MAX(version) FROM schema_migrations; if it is at the latest automatic
+migration nothing else runs. Otherwise the runner takes a session advisory
+lock, so concurrent boots wait for one applier instead of racing the same
+DDL, re-reads the applied set and applies what is missing, each migration in
+its own transaction together with its schema_migrations row.
+
+A migration whose leading comment block has a "-- migrate: manual" line (or a
+.py module with MANUAL = True) is never applied at boot, only with
+--include-manual:
+
+    python -m migrations.runner status
+    python -m migrations.runner apply [--include-manual]
+
+NO side effects at import time.
+"""
+import importlib.util
+import os
+import re
+import sys
+from dataclasses import dataclass
+from typing import List, Optional, Set
+
+from core.logging import get_logger
+
+logger = get_logger(__name__)
+
+VERSIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'versions')
+MIGRATION_LOCK = 7_310_021
+MANUAL_MARKER = '-- migrate: manual'
+
+_FILENAME = re.compile(r'^(\d{4})_([a-z0-9_]+)\.(sql|py)$')
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    path: str
+    manual: bool = False
+
+    @property
+    def is_python(self) -> bool:
+        return self.path.endswith('.py')
+
+
+def discover(directory: str = VERSIONS_DIR) -> List[Migration]:
+    """Migrations in directory, ordered by version. Raises ValueError on a duplicate version."""
+    migrations = {}
+    for filename in sorted(os.listdir(directory)):
+        match = _FILENAME.match(filename)
+        if not match:
+            continue
+        version = int(match.group(1))
+        path = os.path.join(directory, filename)
+        if version in migrations:
+            raise ValueError(f"Duplicate migration version {version}: {filename}")
+        if match.group(3) == 'sql':
+            manual = _has_manual_marker(path)
+        else:
+            manual = bool(getattr(_load_module(path), 'MANUAL', False))
+        migrations[version] = Migration(version, match.group(2), path, manual)
+    return [migrations[v] for v in sorted(migrations)]
+
+
+def _has_manual_marker(path: str) -> bool:
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line.startswith('--'):
+                return False
+            if line == MANUAL_MARKER:
+                return True
+    return False
+
+
+def _load_module(path: str):
+    spec = importlib.util.spec_from_file_location(f"migrations.versions.m{os.path.basename(path)[:4]}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def latest_automatic_version(migrations: List[Migration]) -> int:
+    return max((m.version for m in migrations if not m.manual), default=0)
+
+
+def current_version(conn) -> Optional[int]:
+    """Highest applied version, or None when schema_migrations does not exist yet."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")
+        return cursor.fetchone()[0]
+    except Exception:
+        conn.rollback()
+        return None
+
+
+def _ensure_table(conn) -> None:
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name VARCHAR(200) NOT NULL,
+            applied_at TIMESTAMP NOT NULL DEFAULT NOW()
+        )
+    """)
+    conn.commit()
+
+
+def _applied_versions(conn) -> Set[int]:
+    cursor = conn.cursor()
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def _apply(conn, pool, migration: Migration) -> None:
+    logger.info(f"[MIGRATE] Applying {migration.version:04d}_{migration.name}")
+    cursor = conn.cursor()
+    if migration.is_python:
+        _load_module(migration.path).upgrade(conn, pool)
+    else:
+        with open(migration.path, encoding='utf-8') as f:
+            cursor.execute(f.read())
+    cursor.execute(
+        "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+        (migration.version, migration.name)
+    )
+    conn.commit()
+
+
+def migrate(pool, include_manual: bool = False, migrations: Optional[List[Migration]] = None) -> List[int]:
+    """
+    Apply pending migrations through pool.
+
+    Args:
+        pool: db.DatabasePool (or anything with get_connection())
+        include_manual: Also apply migrations marked manual
+        migrations: Override discovery (tests)
+
+    Returns:
+        List[int]: Versions applied by this call (empty on the fast path)
+    """
+    if migrations is None:
+        migrations = discover()
+    target = latest_automatic_version(migrations)
+
+    with pool.get_connection() as conn:
+        version = current_version(conn)
+        if not include_manual and version is not None and version >= target:
+            logger.info(f"[MIGRATE] Schema current at version {version}")
+            return []
+
+        # Lock before creating schema_migrations: concurrent CREATE TABLE IF NOT
+        # EXISTS can still collide on pg_type
+        cursor = conn.cursor()
+        cursor.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK,))
+        try:
+            _ensure_table(conn)
+            applied = _applied_versions(conn)
+            done = []
+            for migration in migrations:
+                if migration.version in applied or (migration.manual and not include_manual):
+                    continue
+                _apply(conn, pool, migration)
+                done.append(migration.version)
+            logger.info(f"[MIGRATE] Applied {done or 'nothing'}; schema at version {current_version(conn)}")
+            return done
+        finally:
+            try:
+                conn.rollback()
+                cursor.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK,))
+                conn.commit()
+            except Exception as e:
+                logger.warning(f"[MIGRATE] Could not release migration lock: {e}")
+
+
+def status(pool, migrations: Optional[List[Migration]] = None) -> List[dict]:
+    """Every known migration with whether it has been applied."""
+    if migrations is None:
+        migrations = discover()
+    with pool.get_connection() as conn:
+        applied = _applied_versions(conn) if current_version(conn) is not None else set()
+    return [
+        {'version': m.version, 'name': m.name, 'manual': m.manual, 'applied': m.version in applied}
+        for m in migrations
+    ]
+
+
+def main(argv: List[str]) -> int:
+    import db
+    if not db.db_pool.connection_pool:
+        print("Database not configured (DATABASE_URL)")
+        return 1
+    if argv[:1] == ['apply']:
+        applied = migrate(db.db_pool, include_manual='--include-manual' in argv)
+        print(f"Applied: {applied or 'nothing'}")
+        return 0
+    for row in status(db.db_pool):
+        flags = ' (manual)' if row['manual'] else ''
+        mark = 'x' if row['applied'] else ' '
+        print(f"[{mark}] {row['version']:04d}_{row['name']}{flags}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,12 @@
+"""
+0001 baseline: the schema as DatabasePool.apply_baseline_schema creates it.
+
+That DDL is idempotent (CREATE ... IF NOT EXISTS, column probes), so this
+migration is safe on databases created before schema_migrations existed.
+It runs on its own pool connection and commits there.
+"""
+
+
+def upgrade(conn, pool):
+    if not pool.apply_baseline_schema():
+        raise RuntimeError("Baseline schema failed to apply")
@@ -1,8 +1,11 @@
 -- RLS Phase 2: Row-Level Security Policies for Multi-Tenant Isolation
 -- 
+-- migrate: manual
+--
 -- WARNING: DO NOT AUTO-RUN THIS MIGRATION
 -- This file is a scaffold for future RLS implementation.
 -- Run manually after thorough testing in staging environment.
+-- (The "migrate: manual" marker above keeps it out of the boot-time runner.)
 --
 -- Prerequisites:
 -- 1. All tenant-aware tables must have tenant_id column
@@ -10,7 +13,7 @@
 -- 3. ENABLE_RLS=1 environment variable must be set
 --
 -- Usage:
---   psql $DATABASE_URL -f migrations/rls_phase2.sql
+--   python -m migrations.runner apply --include-manual
 --
 
 -- ============================================================================
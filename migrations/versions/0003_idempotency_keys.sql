@@ -0,0 +1,42 @@
+-- Idempotency keys for Stripe events and journey inbound messages
+-- (core/idempotency.py). Daily range partitions on bucket; the store creates
+-- upcoming partitions and drops expired ones, so rows are never DELETEd.
+--
+-- The last 7 days of processed_webhook_events and journey_inbound_dedupe are
+-- copied in so deliveries already handled stay deduplicated. The old tables
+-- are left in place and no longer written.
+
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    scope VARCHAR(50) NOT NULL,
+    tenant_id VARCHAR(100) NOT NULL,
+    key VARCHAR(255) NOT NULL,
+    bucket DATE NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    claimed_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    lease_until TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (scope, tenant_id, key, bucket)
+) PARTITION BY RANGE (bucket);
+
+DO $$
+DECLARE
+    day DATE;
+BEGIN
+    FOR day IN SELECT generate_series(CURRENT_DATE - 7, CURRENT_DATE + 2, INTERVAL '1 day')::date LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF idempotency_keys FOR VALUES FROM (%L) TO (%L)',
+            'idempotency_keys_p' || to_char(day, 'YYYYMMDD'), day, day + 1
+        );
+    END LOOP;
+END $$;
+
+INSERT INTO idempotency_keys (scope, tenant_id, key, bucket, status, claimed_at, lease_until)
+SELECT COALESCE(event_source, 'stripe'), tenant_id, event_id, processed_at::date, 'done', processed_at, processed_at
+FROM processed_webhook_events
+WHERE processed_at >= CURRENT_DATE - 7
+ON CONFLICT DO NOTHING;
+
+INSERT INTO idempotency_keys (scope, tenant_id, key, bucket, status, claimed_at, lease_until)
+SELECT 'journey_message', tenant_id, chat_id || ':' || message_id, received_at::date, 'done', received_at, received_at
+FROM journey_inbound_dedupe
+WHERE received_at >= CURRENT_DATE - 7
+ON CONFLICT DO NOTHING;
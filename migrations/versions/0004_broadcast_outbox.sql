@@ -0,0 +1,13 @@
+-- Broadcast recipients are handed to telegram_outbound_queue and marked
+-- 'queued' until the outbox dispatcher records their outcome
+-- (domains/broadcasts/repo.py record_outbox_results). Completion checks look
+-- up a job's queued recipients.
+--
+-- The shard column and its pending index were only read by the sharded
+-- inline runner this replaces.
+
+CREATE INDEX IF NOT EXISTS idx_broadcast_recipients_queued
+    ON broadcast_recipients(job_id) WHERE status = 'queued';
+
+DROP INDEX IF EXISTS idx_broadcast_recipients_pending;
+ALTER TABLE broadcast_recipients DROP COLUMN IF EXISTS shard;
@@ -0,0 +1,63 @@
+-- Hourly bot_usage rollups (db.compact_bot_usage) keyed on
+-- (tenant, hour, template, coupon, outcome) only, so a rollup row covers
+-- every user of a coupon in that hour. The first version also keyed on
+-- chat_id and device_type and came out about as large as bot_usage itself.
+-- It is rebuilt from raw bot_usage: the watermark is cleared and the next
+-- compaction backfills.
+--
+-- The per-user figures the stats need come from small side tables written
+-- by db.log_bot_usage on every successful generation:
+--   bot_coupon_activity    one row per (coupon, user, day): unique users per coupon
+--   bot_coupon_first_user  one row per coupon: who generated it first
+-- Unique users overall come from bot_user_activity.
+
+DROP TABLE IF EXISTS bot_usage_rollup;
+
+CREATE TABLE bot_usage_rollup (
+    tenant_id VARCHAR(50) NOT NULL,
+    bucket_hour TIMESTAMP NOT NULL,
+    template_slug VARCHAR(255) NOT NULL DEFAULT '',
+    coupon_code VARCHAR(255) NOT NULL DEFAULT '',
+    success BOOLEAN NOT NULL,
+    error_type VARCHAR(100) NOT NULL DEFAULT '',
+    uses INTEGER NOT NULL,
+    PRIMARY KEY (tenant_id, bucket_hour, template_slug, coupon_code, success, error_type)
+);
+
+CREATE TABLE IF NOT EXISTS bot_usage_rollup_state (
+    id SMALLINT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    watermark TIMESTAMP NOT NULL
+);
+DELETE FROM bot_usage_rollup_state;
+
+CREATE TABLE IF NOT EXISTS bot_coupon_activity (
+    tenant_id VARCHAR(50) NOT NULL,
+    coupon_code VARCHAR(255) NOT NULL,
+    chat_id BIGINT NOT NULL,
+    active_day DATE NOT NULL,
+    template_slug VARCHAR(255) NOT NULL DEFAULT '',
+    PRIMARY KEY (tenant_id, coupon_code, chat_id, active_day, template_slug)
+);
+CREATE INDEX IF NOT EXISTS idx_bot_coupon_activity_day
+    ON bot_coupon_activity(tenant_id, active_day);
+
+INSERT INTO bot_coupon_activity (tenant_id, coupon_code, chat_id, active_day, template_slug)
+SELECT DISTINCT tenant_id, coupon_code, chat_id, created_at::date, COALESCE(template_slug, '')
+FROM bot_usage
+WHERE success = true AND tenant_id IS NOT NULL AND coupon_code IS NOT NULL AND created_at IS NOT NULL
+ON CONFLICT DO NOTHING;
+
+CREATE TABLE IF NOT EXISTS bot_coupon_first_user (
+    tenant_id VARCHAR(50) NOT NULL,
+    coupon_code VARCHAR(255) NOT NULL,
+    chat_id BIGINT NOT NULL,
+    first_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (tenant_id, coupon_code)
+);
+
+INSERT INTO bot_coupon_first_user (tenant_id, coupon_code, chat_id, first_at)
+SELECT DISTINCT ON (tenant_id, coupon_code) tenant_id, coupon_code, chat_id, created_at
+FROM bot_usage
+WHERE success = true AND tenant_id IS NOT NULL AND coupon_code IS NOT NULL AND created_at IS NOT NULL
+ORDER BY tenant_id, coupon_code, created_at, id
+ON CONFLICT DO NOTHING;
@@ -5,6 +5,7 @@ Safe for multi-instance deployment via FOR UPDATE SKIP LOCKED.
 """
 import time
 import threading
+from core.db_pool import SCHEDULER, set_pool_role
 from core.logging import get_logger
 from domains.crosspromo import repo, service
 
@@ -51,6 +52,7 @@ def process_jobs():
 
 def run_worker():
     """Main worker loop. Runs indefinitely, polling every 10 seconds."""
+    set_pool_role(SCHEDULER)
     logger.info("Cross Promo worker started")
     
     while True:
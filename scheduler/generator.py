@@ -126,7 +126,10 @@ class SignalGenerator:
                     )
                     return None
 
-                pending_signals = self.runtime.get_forex_signals(status='pending')
+                pending_signals = self.runtime.get_forex_signals(
+                    status='pending', limit=1, as_records=True,
+                    columns=('id', 'entry_price', 'take_profit', 'stop_loss')
+                )
                 if pending_signals and len(pending_signals) > 0:
                     signal = pending_signals[0]
                     logger.info(f"⏸️ Active signal #{signal['id']} still pending - skipping new signal check")
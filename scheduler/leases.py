@@ -0,0 +1,156 @@
+"""
+Scheduler node registry and tenant leases.
+
+Replaces the fixed `--shard i/N` assignment for continuous multi-tenant mode:
+
+- Every scheduler process registers a row in scheduler_nodes and refreshes
+  heartbeat_at on each reconcile
+- Tenants are spread over the live nodes with rendezvous hashing, so a node
+  joining or leaving only moves the tenants it gains or loses
+- A node runs a tenant only while it holds an unexpired row in
+  scheduler_tenant_leases; leases are renewed on every heartbeat and can only
+  be taken over once the previous holder released them or let them expire
+
+When a node dies its heartbeat and leases expire, the survivors see a smaller
+node set and claim its tenants. When a node joins, the others release the
+tenants that now hash to it.
+
+NO side effects at import time.
+"""
+import hashlib
+import os
+import socket
+import uuid
+from typing import Iterable, List, Set
+
+from core.config import Config
+from core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+def make_node_id() -> str:
+    """Unique id for this scheduler process (host:pid:random)."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def _score(tenant_id: str, node_id: str) -> int:
+    return int(hashlib.sha256(f"{tenant_id}|{node_id}".encode()).hexdigest(), 16)
+
+
+def assign_tenants(tenants: Iterable[str], nodes: Iterable[str], node_id: str) -> Set[str]:
+    """
+    Tenants owned by `node_id` under rendezvous (highest random weight) hashing.
+
+    Deterministic across processes: every node computes the same split from
+    the same tenant and node lists.
+    """
+    nodes = list(nodes)
+    if node_id not in nodes:
+        nodes.append(node_id)
+    return {
+        tenant_id for tenant_id in tenants
+        if max(nodes, key=lambda n: _score(tenant_id, n)) == node_id
+    }
+
+
+class LeaseManager:
+    """Heartbeats this node and claims/renews/releases its tenant leases."""
+
+    def __init__(self, node_id: str = None, lease_ttl: float = None):
+        self.node_id = node_id or make_node_id()
+        self.lease_ttl = Config.get_scheduler_lease_ttl_seconds() if lease_ttl is None else lease_ttl
+
+    def _connection(self):
+        import db as db_module
+        if not db_module.db_pool or not db_module.db_pool.connection_pool:
+            raise RuntimeError("Database connection pool not initialized")
+        return db_module.db_pool.get_connection()
+
+    def heartbeat(self) -> None:
+        """Register this node or refresh its heartbeat."""
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO scheduler_nodes (node_id, hostname, heartbeat_at)
+                VALUES (%s, %s, NOW())
+                ON CONFLICT (node_id) DO UPDATE SET heartbeat_at = NOW()
+            """, (self.node_id, socket.gethostname()))
+            # Garbage-collect nodes that died without deregistering
+            cursor.execute("""
+                DELETE FROM scheduler_nodes
+                WHERE heartbeat_at < NOW() - make_interval(secs => %s)
+            """, (self.lease_ttl * 10,))
+            conn.commit()
+
+    def live_nodes(self) -> List[str]:
+        """Nodes whose heartbeat is younger than the lease TTL."""
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT node_id FROM scheduler_nodes
+                WHERE heartbeat_at > NOW() - make_interval(secs => %s)
+                ORDER BY node_id
+            """, (self.lease_ttl,))
+            return [row[0] for row in cursor.fetchall()]
+
+    def claim(self, tenants: Iterable[str]) -> Set[str]:
+        """
+        Claim or renew leases for `tenants` in one statement.
+
+        A lease is only taken when it is unheld, already ours, or expired.
+        Returns the tenants whose lease this node now holds.
+        """
+        tenants = sorted(set(tenants))
+        if not tenants:
+            return set()
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO scheduler_tenant_leases (tenant_id, node_id, acquired_at, expires_at)
+                SELECT t.tenant_id, %s, NOW(), NOW() + make_interval(secs => %s)
+                FROM unnest(%s::text[]) AS t(tenant_id)
+                ON CONFLICT (tenant_id) DO UPDATE
+                SET node_id = EXCLUDED.node_id,
+                    acquired_at = CASE WHEN scheduler_tenant_leases.node_id = EXCLUDED.node_id
+                                       THEN scheduler_tenant_leases.acquired_at ELSE NOW() END,
+                    expires_at = EXCLUDED.expires_at
+                WHERE scheduler_tenant_leases.node_id = EXCLUDED.node_id
+                   OR scheduler_tenant_leases.expires_at < NOW()
+                RETURNING tenant_id
+            """, (self.node_id, self.lease_ttl, tenants))
+            owned = {row[0] for row in cursor.fetchall()}
+            conn.commit()
+        return owned
+
+    def release(self, tenants: Iterable[str]) -> None:
+        """Drop this node's leases for `tenants` so another node can claim them now."""
+        tenants = sorted(set(tenants))
+        if not tenants:
+            return
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                DELETE FROM scheduler_tenant_leases
+                WHERE tenant_id = ANY(%s) AND node_id = %s
+            """, (tenants, self.node_id))
+            conn.commit()
+
+    def sync(self, tenants: Iterable[str]) -> Set[str]:
+        """
+        Heartbeat, compute this node's share of `tenants` and claim it.
+
+        Returns the tenants this node may run until the next sync.
+        """
+        self.heartbeat()
+        desired = assign_tenants(tenants, self.live_nodes(), self.node_id)
+        return self.claim(desired)
+
+    def deregister(self) -> None:
+        """Release every lease and remove this node so survivors rebalance immediately."""
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM scheduler_tenant_leases WHERE node_id = %s", (self.node_id,))
+            cursor.execute("DELETE FROM scheduler_nodes WHERE node_id = %s", (self.node_id,))
+            conn.commit()
+        logger.info(f"Scheduler node {self.node_id} deregistered")
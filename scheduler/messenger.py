@@ -10,10 +10,14 @@ import asyncio
 from datetime import datetime
 from typing import Optional, Any, Dict, List, Tuple
 from core.logging import get_logger
+from core.offload import run_ai
+from core.render_service import get_render_service, render_trade_win_png
 from core.runtime import TenantRuntime
-from core.telegram_sender import send_to_channel, send_photo_to_channel, SendResult
+from core.telegram_sender import (
+    send_to_channel, send_photo_to_channel, enqueue_to_channel, SendResult, PRIORITY_NOTIFICATION
+)
 from core.bot_credentials import SIGNAL_BOT
-from showcase.trade_win_generator import generate_trade_win_image, TradeWinData
+from showcase.trade_win_generator import TradeWinData
 from showcase.profit_calculator import calculate_trade_profit, COMMISSION_PER_LOT
 
 logger = get_logger(__name__)
@@ -25,8 +29,8 @@ class Messenger:
     
     Centralizes all messaging operations:
     - Signal posting (delegates to ForexTelegramBot)
-    - TP/SL hit notifications (uses send_to_channel directly)
-    - Milestone celebrations
+    - TP/SL hit notifications and milestone celebrations (queued in the
+      Telegram outbox; TP celebrations are sent inline for their message_id)
     - Daily/weekly recaps
     - Revalidation updates
     
@@ -74,6 +78,29 @@ class Messenger:
             channel_type=channel_type
         )
     
+    async def _queue_channel_message(self, text: str, channel_type: str = 'vip') -> bool:
+        """
+        Queue a fire-and-forget message in the Telegram outbox.
+
+        The outbox dispatcher delivers it within the bot's rate limits and
+        retries on RetryAfter. Falls back to an inline send if it cannot be
+        queued. Returns True once queued or sent.
+        """
+        try:
+            queued = await asyncio.to_thread(
+                enqueue_to_channel, self.tenant_id, SIGNAL_BOT, text,
+                parse_mode='HTML', channel_type=channel_type, priority=PRIORITY_NOTIFICATION
+            )
+        except Exception as e:
+            logger.warning(f"Could not queue {channel_type} channel message, sending inline: {e}")
+            queued = None
+        if queued is not None:
+            return True
+        result = await self._send_channel_message(text, channel_type)
+        if not result.success:
+            logger.error(f"Failed to send {channel_type} channel message: {result.error}")
+        return result.success
+    
     def _build_trades_for_showcase(
         self,
         signal_data: Dict[str, Any],
@@ -154,7 +181,7 @@ class Messenger:
         
         for attempt in range(1, max_attempts + 1):
             try:
-                img_bytes = generate_trade_win_image(trades)
+                img_bytes = await get_render_service().render_async(render_trade_win_png, trades)
                 if img_bytes:
                     logger.debug(f"Generated showcase image on attempt {attempt}")
                     return img_bytes
@@ -369,14 +396,10 @@ class Messenger:
         """Send SL hit message."""
         try:
             message = self.milestone_tracker.generate_sl_hit_message(abs(pips))
-            result = await self._send_channel_message(message)
-            
-            if result.success:
-                logger.info(f"Posted SL hit notification ({pips} pips)")
+            if await self._queue_channel_message(message):
+                logger.info(f"Queued SL hit notification ({pips} pips)")
                 return True
-            else:
-                logger.error(f"Failed to send SL hit message: {result.error}")
-                return False
+            return False
         except Exception as e:
             logger.exception("Failed to send SL hit message")
             return False
@@ -385,14 +408,10 @@ class Messenger:
         """Send profit-locked SL hit message."""
         try:
             message = self.milestone_tracker.generate_profit_locked_message(pips)
-            result = await self._send_channel_message(message)
-            
-            if result.success:
-                logger.info(f"Posted profit-locked notification (+{pips} pips)")
+            if await self._queue_channel_message(message):
+                logger.info(f"Queued profit-locked notification (+{pips} pips)")
                 return True
-            else:
-                logger.error(f"Failed to send profit locked message: {result.error}")
-                return False
+            return False
         except Exception as e:
             logger.exception("Failed to send profit locked message")
             return False
@@ -401,14 +420,10 @@ class Messenger:
         """Send breakeven exit message."""
         try:
             message = self.milestone_tracker.generate_breakeven_exit_message()
-            result = await self._send_channel_message(message)
-            
-            if result.success:
-                logger.info("Posted breakeven exit notification")
+            if await self._queue_channel_message(message):
+                logger.info("Queued breakeven exit notification")
                 return True
-            else:
-                logger.error(f"Failed to send breakeven exit message: {result.error}")
-                return False
+            return False
         except Exception as e:
             logger.exception("Failed to send breakeven exit message")
             return False
@@ -416,18 +431,15 @@ class Messenger:
     async def send_milestone_message(self, milestone_event: Dict[str, Any]) -> bool:
         """Send a milestone progress message."""
         try:
-            message = self.milestone_tracker.generate_milestone_message(milestone_event)
+            # AI-written for motivational milestones; keep it off the price monitor's loop
+            message = await run_ai(self.milestone_tracker.generate_milestone_message, milestone_event)
             if not message:
                 return False
                 
-            result = await self._send_channel_message(message)
-            
-            if result.success:
-                logger.info(f"Posted milestone: {milestone_event.get('milestone')}")
+            if await self._queue_channel_message(message):
+                logger.info(f"Queued milestone: {milestone_event.get('milestone')}")
                 return True
-            else:
-                logger.error(f"Failed to send milestone message: {result.error}")
-                return False
+            return False
         except Exception as e:
             logger.exception("Failed to send milestone message")
             return False
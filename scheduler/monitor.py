@@ -13,6 +13,7 @@ Responsible for monitoring active signals:
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 from core.logging import get_logger
+from core.offload import run_ai
 from core.runtime import TenantRuntime
 from scheduler.messenger import Messenger
 from forex_ai import (
@@ -252,7 +253,8 @@ class SignalMonitor:
             minutes_elapsed = update.get('minutes_elapsed', 240)
             
             try:
-                ai_message = generate_timeout_message(
+                ai_message = await run_ai(
+                    generate_timeout_message,
                     signal_id=signal_id,
                     signal_type=timeout_signal_type,
                     minutes_elapsed=minutes_elapsed,
@@ -316,7 +318,9 @@ class SignalMonitor:
                 if not active_signals:
                     return
                 
+                from forex_signals import SignalStateBatch
                 db = self.runtime.db
+                batch = SignalStateBatch(self.tenant_id)
                 
                 for signal in active_signals:
                     signal_id = signal['id']
@@ -336,9 +340,13 @@ class SignalMonitor:
                         success = await self.messenger.send_milestone_message(milestone_event)
                         
                         if success and milestone == 'tp1_70_breakeven':
-                            db.update_signal_breakeven(signal_id, milestone_event['entry_price'], tenant_id=self.tenant_id)
-                            db.update_effective_sl(signal_id, milestone_event['entry_price'], tenant_id=self.tenant_id)
-                            logger.info(f"🔒 Set effective_sl to entry (breakeven) for signal #{signal_id}")
+                            # Sets breakeven_set/breakeven_price and effective_sl in the pass's batch
+                            batch.breakeven(signal_id, milestone_event['entry_price'])
+                
+                breakeven_ids = [signal_id for signal_id, _ in batch.breakevens]
+                batch.flush()
+                for signal_id in breakeven_ids:
+                    logger.info(f"🔒 Set effective_sl to entry (breakeven) for signal #{signal_id}")
                 
         except Exception as e:
             logger.exception("❌ Error in signal guidance")
@@ -437,7 +445,8 @@ class SignalMonitor:
             db.update_signal_revalidation(signal_id, thesis_status, self.tenant_id, notes=f"Check: {thesis_status}")
             
             if should_post:
-                ai_message = generate_revalidation_message(
+                ai_message = await run_ai(
+                    generate_revalidation_message,
                     signal_id=signal_id,
                     signal_type=signal_type,
                     thesis_status=thesis_status,
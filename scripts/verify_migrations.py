@@ -123,34 +123,24 @@ def check_webhook_events_table(cursor):
 
 def check_db_py_functions():
     results = {
-        'is_webhook': False,
-        'record_webhook': False,
-        'cleanup_webhook': False
+        'claim_webhook': False,
+        'complete_webhook': False,
+        'release_webhook': False
     }
     
     try:
         with open('db.py', 'r') as f:
             content = f.read()
         
-        is_match = re.search(r'def is_webhook_event_processed.*?(?=\ndef |\Z)', content, re.DOTALL)
-        if is_match:
-            func_body = is_match.group(0)
-            results['is_webhook'] = 'tenant_id' in func_body and 'WHERE' in func_body
-        
-        record_match = re.search(r'def record_webhook_event_processed.*?(?=\ndef |\Z)', content, re.DOTALL)
-        if record_match:
-            func_body = record_match.group(0)
-            results['record_webhook'] = (
-                'INSERT INTO' in func_body and
-                'tenant_id' in func_body and
-                'event_id' in func_body and
-                'event_source' in func_body
-            )
-        
-        cleanup_match = re.search(r'def cleanup_old_webhook_events.*?(?=\ndef |\Z)', content, re.DOTALL)
-        if cleanup_match:
-            func_body = cleanup_match.group(0)
-            results['cleanup_webhook'] = "(%s * INTERVAL '1 hour')" in func_body
+        for name in ('claim', 'complete', 'release'):
+            match = re.search(rf'def {name}_webhook_event.*?(?=\ndef |\Z)', content, re.DOTALL)
+            if match:
+                func_body = match.group(0)
+                results[f'{name}_webhook'] = (
+                    'tenant_id' in func_body and
+                    'event_source' in func_body and
+                    'get_idempotency_store()' in func_body
+                )
     except Exception as e:
         print(f"  ERROR reading db.py: {e}")
     
@@ -161,7 +151,7 @@ def check_stripe_webhook():
     try:
         with open('integrations/stripe/webhooks.py', 'r') as f:
             content = f.read()
-        return 'record_webhook_event_processed(event_id, event_source=' in content
+        return "claim_webhook_event(event_id, tenant_id='stripe', event_source=" in content
     except Exception as e:
         print(f"  ERROR reading stripe webhooks.py: {e}")
         return False
@@ -224,9 +214,9 @@ def main():
     
     print("[E] db.py Helper Functions")
     db_results = check_db_py_functions()
-    check("is_webhook_event_processed uses tenant_id", db_results['is_webhook'])
-    check("record_webhook_event_processed inserts tenant_id, event_id, event_source", db_results['record_webhook'])
-    check("cleanup_old_webhook_events uses safe SQL", db_results['cleanup_webhook'])
+    check("claim_webhook_event uses the idempotency store", db_results['claim_webhook'])
+    check("complete_webhook_event uses the idempotency store", db_results['complete_webhook'])
+    check("release_webhook_event uses the idempotency store", db_results['release_webhook'])
     print()
     
     print("[F] Stripe Webhook Caller")
@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 """Thin HTTP server - all request dispatching goes through api/dispatch.py"""
-import http.server, socketserver, os, json, mimetypes, time
+import http.server, os, json, mimetypes, time
 from urllib.parse import urlparse
 from http import cookies
 from dotenv import load_dotenv
@@ -10,7 +10,7 @@ from core.logging import get_logger, set_request_context, clear_request_context
 logger = get_logger(__name__)
 from core.config import Config
 from core.host_context import parse_host_context, HostType
-from api.routes import GET_ROUTES, POST_ROUTES, PUT_ROUTES, DELETE_ROUTES, PAGE_ROUTES, AUTH_ROUTES, ADMIN_ROUTES
+from api.routes import get_route_index
 from api.dispatch import dispatch_request
 from domains.subscriptions import handlers as sub_h
 from domains.coupons import handlers as coupon_h
@@ -246,11 +246,11 @@ class MyHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
 
     def handle_api_journey_get(self):
         from domains.journeys import handlers as jh
-        jh.handle_journey_get(self, urlparse(self.path).path.split('/')[3])
+        jh.handle_journey_get(self, self.path_params['journey_id'])
 
     def handle_api_journey_steps_get(self):
         from domains.journeys import handlers as jh
-        jh.handle_journey_steps_get(self, urlparse(self.path).path.split('/')[3])
+        jh.handle_journey_steps_get(self, self.path_params['journey_id'])
 
     def handle_api_journeys_debug_sessions(self):
         from domains.journeys import handlers as jh
@@ -262,45 +262,43 @@ class MyHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
 
     def handle_api_journey_update(self):
         from domains.journeys import handlers as jh
-        jh.handle_journey_update(self, urlparse(self.path).path.split('/')[3])
+        jh.handle_journey_update(self, self.path_params['journey_id'])
 
     def handle_api_journey_steps_set(self):
         from domains.journeys import handlers as jh
-        jh.handle_journey_steps_set(self, urlparse(self.path).path.split('/')[3])
+        jh.handle_journey_steps_set(self, self.path_params['journey_id'])
 
     def handle_api_journey_triggers(self):
         from domains.journeys import handlers as jh
-        jh.handle_journey_triggers(self, urlparse(self.path).path.split('/')[3])
+        jh.handle_journey_triggers(self, self.path_params['journey_id'])
 
     def handle_api_journey_delete(self):
         from domains.journeys import handlers as jh
-        jh.handle_journey_delete(self, urlparse(self.path).path.split('/')[3])
+        jh.handle_journey_delete(self, self.path_params['journey_id'])
 
     def handle_api_journey_publish(self):
         from domains.journeys import handlers as jh
-        jh.handle_journey_publish(self, urlparse(self.path).path.split('/')[3])
+        jh.handle_journey_publish(self, self.path_params['journey_id'])
 
     def handle_api_journey_stop(self):
         from domains.journeys import handlers as jh
-        jh.handle_journey_stop(self, urlparse(self.path).path.split('/')[3])
+        jh.handle_journey_stop(self, self.path_params['journey_id'])
 
     def handle_api_journey_duplicate(self):
         from domains.journeys import handlers as jh
-        jh.handle_journey_duplicate(self, urlparse(self.path).path.split('/')[3])
+        jh.handle_journey_duplicate(self, self.path_params['journey_id'])
 
     def handle_api_journey_lock(self):
         from domains.journeys import handlers as jh
-        jh.handle_journey_lock(self, urlparse(self.path).path.split('/')[3])
+        jh.handle_journey_lock(self, self.path_params['journey_id'])
 
     def handle_api_journey_analytics(self):
         from domains.journeys import handlers as jh
-        jh.handle_journey_analytics(self, urlparse(self.path).path.split('/')[3])
+        jh.handle_journey_analytics(self, self.path_params['journey_id'])
 
     def handle_api_journey_link_click(self):
         from domains.journeys import handlers as jh
-        path_parts = urlparse(self.path).path.rstrip('/').split('/')
-        track_id = path_parts[-1] if len(path_parts) > 4 else ''
-        jh.handle_link_click(self, track_id)
+        jh.handle_link_click(self, self.path_params['track_id'])
 
     # Connection handlers
     def handle_api_connections_list(self):
@@ -325,8 +323,7 @@ class MyHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
 
     def handle_api_connection_delete(self):
         from domains.connections import handlers as conn_h
-        bot_role = urlparse(self.path).path.split('/')[3]
-        conn_h.handle_connection_delete(self, bot_role)
+        conn_h.handle_connection_delete(self, self.path_params['bot_role'])
 
     # Telethon handlers
     def handle_api_telethon_status(self):
@@ -421,11 +418,11 @@ class MyHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
 
     def handle_api_hypechat_prompt_update(self):
         from domains.hypechat import handlers as hc_h
-        hc_h.handle_update_prompt(self, urlparse(self.path).path.split('/')[4])
+        hc_h.handle_update_prompt(self, self.path_params['prompt_id'])
 
     def handle_api_hypechat_prompt_delete(self):
         from domains.hypechat import handlers as hc_h
-        hc_h.handle_delete_prompt(self, urlparse(self.path).path.split('/')[4])
+        hc_h.handle_delete_prompt(self, self.path_params['prompt_id'])
 
     def handle_api_hypechat_flows_list(self):
         from domains.hypechat import handlers as hc_h
@@ -433,8 +430,7 @@ class MyHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
 
     def handle_api_hypechat_flow_get(self):
         from domains.hypechat import handlers as hc_h
-        flow_id = urlparse(self.path).path.rstrip('/').split('/')[4]
-        hc_h.handle_flow_analytics(self, flow_id)
+        hc_h.handle_flow_analytics(self, self.path_params['flow_id'])
 
     def handle_api_hypechat_flow_create(self):
         from domains.hypechat import handlers as hc_h
@@ -442,49 +438,47 @@ class MyHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
 
     def handle_api_hypechat_flow_update(self):
         from domains.hypechat import handlers as hc_h
-        hc_h.handle_update_flow(self, urlparse(self.path).path.split('/')[4])
+        hc_h.handle_update_flow(self, self.path_params['flow_id'])
 
     def handle_api_hypechat_flow_delete(self):
         from domains.hypechat import handlers as hc_h
-        hc_h.handle_delete_flow(self, urlparse(self.path).path.split('/')[4])
+        hc_h.handle_delete_flow(self, self.path_params['flow_id'])
 
     def handle_api_hypechat_flow_status(self):
         from domains.hypechat import handlers as hc_h
-        hc_h.handle_set_flow_status(self, urlparse(self.path).path.split('/')[4])
+        hc_h.handle_set_flow_status(self, self.path_params['flow_id'])
 
     def handle_api_hypechat_flow_trigger(self):
         from domains.hypechat import handlers as hc_h
-        hc_h.handle_trigger_flow(self, urlparse(self.path).path.split('/')[4])
+        hc_h.handle_trigger_flow(self, self.path_params['flow_id'])
 
     def handle_api_hypechat_flow_analytics(self):
         from domains.hypechat import handlers as hc_h
-        hc_h.handle_flow_analytics(self, urlparse(self.path).path.split('/')[4])
+        hc_h.handle_flow_analytics(self, self.path_params['flow_id'])
 
     def handle_api_hypechat_flow_steps_list(self):
         from domains.hypechat import handlers as hc_h
-        hc_h.handle_list_steps(self, urlparse(self.path).path.split('/')[4])
+        hc_h.handle_list_steps(self, self.path_params['flow_id'])
 
     def handle_api_hypechat_flow_step_create(self):
         from domains.hypechat import handlers as hc_h
-        hc_h.handle_create_step(self, urlparse(self.path).path.split('/')[4])
+        hc_h.handle_create_step(self, self.path_params['flow_id'])
 
     def handle_api_hypechat_flow_step_insert(self):
         from domains.hypechat import handlers as hc_h
-        hc_h.handle_insert_step(self, urlparse(self.path).path.split('/')[4])
+        hc_h.handle_insert_step(self, self.path_params['flow_id'])
 
     def handle_api_hypechat_flow_step_reorder(self):
         from domains.hypechat import handlers as hc_h
-        hc_h.handle_reorder_steps(self, urlparse(self.path).path.split('/')[4])
+        hc_h.handle_reorder_steps(self, self.path_params['flow_id'])
 
     def handle_api_hypechat_flow_step_update(self):
         from domains.hypechat import handlers as hc_h
-        parts = urlparse(self.path).path.split('/')
-        hc_h.handle_update_step(self, parts[4], parts[6])
+        hc_h.handle_update_step(self, self.path_params['flow_id'], self.path_params['step_id'])
 
     def handle_api_hypechat_flow_step_delete(self):
         from domains.hypechat import handlers as hc_h
-        parts = urlparse(self.path).path.split('/')
-        hc_h.handle_delete_step(self, parts[4], parts[6])
+        hc_h.handle_delete_step(self, self.path_params['flow_id'], self.path_params['step_id'])
 
     def handle_api_hypechat_preview(self):
         from domains.hypechat import handlers as hc_h
@@ -567,7 +561,7 @@ class MyHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
             self.send_header('Location', '/admin')
             self.end_headers()
             return clear_request_context()
-        if dispatch_request(self, 'GET', self.path, GET_ROUTES + PAGE_ROUTES + ADMIN_ROUTES, hc, DATABASE_AVAILABLE):
+        if dispatch_request(self, 'GET', self.path, get_route_index('GET'), hc, DATABASE_AVAILABLE):
             return clear_request_context()
         super().do_GET()
         clear_request_context()
@@ -576,7 +570,7 @@ class MyHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
         set_request_context(request_id=None)
         hc = parse_host_context(self.headers.get('Host', '').lower())
         self.host_context = hc
-        if dispatch_request(self, 'POST', self.path, POST_ROUTES + AUTH_ROUTES, hc, DATABASE_AVAILABLE):
+        if dispatch_request(self, 'POST', self.path, get_route_index('POST'), hc, DATABASE_AVAILABLE):
             return clear_request_context()
         self.send_response(404)
         self.send_header('Content-type', 'application/json')
@@ -588,7 +582,7 @@ class MyHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
         set_request_context(request_id=None)
         hc = parse_host_context(self.headers.get('Host', '').lower())
         self.host_context = hc
-        if dispatch_request(self, 'PUT', self.path, PUT_ROUTES, hc, DATABASE_AVAILABLE):
+        if dispatch_request(self, 'PUT', self.path, get_route_index('PUT'), hc, DATABASE_AVAILABLE):
             return clear_request_context()
         self.send_response(404)
         self.send_header('Content-type', 'application/json')
@@ -600,7 +594,7 @@ class MyHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
         set_request_context(request_id=None)
         hc = parse_host_context(self.headers.get('Host', '').lower())
         self.host_context = hc
-        if dispatch_request(self, 'DELETE', self.path, DELETE_ROUTES, hc, DATABASE_AVAILABLE):
+        if dispatch_request(self, 'DELETE', self.path, get_route_index('DELETE'), hc, DATABASE_AVAILABLE):
             return clear_request_context()
         self.send_response(404)
         self.send_header('Content-type', 'application/json')
@@ -623,7 +617,5 @@ if __name__ == "__main__":
     FOREX_SCHEDULER_AVAILABLE = ctx.forex_scheduler_available
     STRIPE_AVAILABLE = ctx.stripe_available
     OBJECT_STORAGE_AVAILABLE = ctx.object_storage_available
-    socketserver.TCPServer.allow_reuse_address = True
-    with socketserver.ThreadingTCPServer(("0.0.0.0", PORT), MyHTTPRequestHandler) as httpd:
-        print(f"Server running at http://0.0.0.0:{PORT}/")
-        httpd.serve_forever()
+    from api.serving import serve_forever
+    serve_forever(MyHTTPRequestHandler, PORT, directory=DIRECTORY)
@@ -7,6 +7,7 @@ Matches Figma specs: 430x205px, SF Pro fonts (fallback to DejaVu Sans).
 Data source: forex_signals table (Phase 1), MT4/MT5 API (Phase 2)
 """
 
+import functools
 import io
 import os
 from dataclasses import dataclass
@@ -82,8 +83,9 @@ class TradeWinData:
         return f"{self.lot_size:.2f}"
 
 
+@functools.lru_cache(maxsize=32)
 def _get_font(weight: str, size: int) -> Any:
-    """Load font with fallback chain."""
+    """Load font with fallback chain (cached per weight and size)."""
     paths = FONT_PATHS.get(weight, FONT_PATHS['regular'])
     
     for path in paths:
@@ -209,6 +211,26 @@ def _draw_trade_row(
     )
 
 
+@functools.lru_cache(maxsize=1)
+def _load_arrow_image() -> Optional[Image.Image]:
+    """Decoded arrow asset, loaded once per process (None if missing)."""
+    arrow_path = os.path.join(os.path.dirname(__file__), 'arrow.png')
+    if not os.path.exists(arrow_path):
+        return None
+    try:
+        return Image.open(arrow_path).convert('RGBA')
+    except Exception as e:
+        logger.warning(f"Failed to load arrow image: {e}")
+        return None
+
+
+def warm_assets() -> None:
+    """Load the fonts and arrow asset used by every render."""
+    for weight, size in (('medium', 56), ('regular', 53), ('regular', 36)):
+        _get_font(weight, size)
+    _load_arrow_image()
+
+
 def calculate_canvas_height(num_rows: int) -> int:
     """Calculate dynamic canvas height based on number of trade rows."""
     rows = max(1, min(num_rows, 3))  # Clamp between 1-3
@@ -231,13 +253,7 @@ def generate_trade_win_image(trades: List[TradeWinData]) -> bytes:
     img = Image.new('RGB', (CANVAS_WIDTH, canvas_height), _hex_to_rgb(BACKGROUND_COLOR))
     draw = ImageDraw.Draw(img)
     
-    arrow_img = None
-    arrow_path = os.path.join(os.path.dirname(__file__), 'arrow.png')
-    if os.path.exists(arrow_path):
-        try:
-            arrow_img = Image.open(arrow_path).convert('RGBA')
-        except Exception as e:
-            logger.warning(f"Failed to load arrow image: {e}")
+    arrow_img = _load_arrow_image()
     
     for i, trade in enumerate(trades[:3]):
         _draw_trade_row(draw, trade, i, arrow_img)
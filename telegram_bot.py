@@ -23,8 +23,7 @@ from telegram.ext import (
     ContextTypes,
     AIORateLimiter
 )
-from telegram.error import Forbidden, RetryAfter, TelegramError
-from telegram_image_gen import generate_promo_image
+from telegram_image_gen import sanitize_coupon_code
 import coupon_validator
 from coupon_validator import coupon_cache_lock
 
@@ -343,15 +342,17 @@ def _generate_image_sync(template_slug, coupon_code, variant=None):
     Returns: (image_bio, error_message) tuple
     """
     from object_storage import download_from_spaces
+    from domains.coupons import template_cache
+    from core.render_service import get_render_service, render_promo_png, RenderQueueFull
 
     try:
-        # Download template metadata
-        meta_content = download_from_spaces(f'templates/{template_slug}/meta.json')
-        if not meta_content:
+        # Template metadata (cached; invalidated by template upload/delete)
+        metadata = template_cache.get_metadata(
+            template_slug, lambda: download_from_spaces(f'templates/{template_slug}/meta.json')
+        )
+        if not metadata:
             return None, 'template_not_found'
 
-        metadata = json.loads(meta_content.decode('utf-8'))
-
         # Use the explicit variant if it exists, else smart fallback
         if variant and variant in metadata and isinstance(metadata[variant], dict):
             pass
@@ -375,24 +376,22 @@ def _generate_image_sync(template_slug, coupon_code, variant=None):
         if not image_url:
             return None, 'image_url_missing'
         
-        # Generate image (blocking operation)
-        image = generate_promo_image(
-            template_image_url=image_url,
-            coupon_code=coupon_code,
-            box=box,
-            max_font_px=max_font_px,
-            font_color=font_color,
-            logo_url=None,
-            variant=variant
-        )
-        
-        # Convert to BytesIO
-        bio = io.BytesIO()
-        image.save(bio, format='PNG')
-        bio.seek(0)
+        render_code = sanitize_coupon_code(coupon_code)
+        version = template_cache.template_version(template_slug, metadata)
+        png = template_cache.get_render(template_slug, variant, render_code, version)
+        if png is None:
+            # Rendered in a worker process, off this process's GIL; the version
+            # keys the worker's base-image cache so re-uploads are not served stale
+            png = get_render_service().render(
+                render_promo_png, template_slug, variant, image_url,
+                coupon_code, box, max_font_px, font_color, version
+            )
+            template_cache.put_render(template_slug, variant, render_code, png, version)
         
-        return bio, None
+        return io.BytesIO(png), None
         
+    except RenderQueueFull:
+        return None, 'render_busy'
     except Exception as e:
         print(f"[TELEGRAM] Image generation error: {e}")
         return None, 'generation_failed'
@@ -421,7 +420,8 @@ async def _generate_and_send(message, chat_id, template_slug, coupon_code, varia
                 'template_not_found': f"❌ Template {template_slug} not found.",
                 'no_variants': f"❌ Template {template_slug} has no available variants.",
                 'image_url_missing': f"❌ Template image URL not found.",
-                'generation_failed': f"❌ Failed to generate image. Please try again."
+                'generation_failed': f"❌ Failed to generate image. Please try again.",
+                'render_busy': f"⏳ Image generator is busy right now. Please try again in a moment."
             }
             await message.reply_text(error_messages.get(error, "❌ An error occurred."))
             print(f"[TELEGRAM] About to log FAILED usage: chat_id={chat_id}, error={error}", flush=True)
@@ -661,127 +661,19 @@ def create_bot_application(bot_token):
     return application
 
 
-async def _send_broadcast_messages(job_id, users, message, bot_token):
-    """
-    Async function to send broadcast messages with rate limiting.
-    
-    Args:
-        job_id (int): Broadcast job ID
-        users (list): List of user dicts with chat_id
-        message (str): Message to send
-        bot_token (str): Bot token to use for sending
-    """
-    import db
-    
-    # Create a temporary bot application for sending
-    from telegram import Bot
-    bot = Bot(token=bot_token)
-    
-    sent_count = 0
-    failed_count = 0
-    
-    # Update job status to processing (non-blocking)
-    await asyncio.to_thread(db.update_broadcast_job, job_id, status='processing')
-    
-    # Rate limiting: 20 messages per second (safe buffer below Telegram's 30/s limit)
-    rate_limit_delay = 0.05  # 50ms between messages = 20 messages/second
-    
-    for user in users:
-        chat_id = user['chat_id']
-        
-        try:
-            await bot.send_message(
-                chat_id=chat_id,
-                text=message,
-                parse_mode='Markdown'
-            )
-            sent_count += 1
-            print(f"[BROADCAST] Sent to {chat_id} ({sent_count}/{len(users)})")
-            
-            # Update progress every 10 messages (non-blocking)
-            if sent_count % 10 == 0:
-                await asyncio.to_thread(db.update_broadcast_job, job_id, sent_count=sent_count, failed_count=failed_count)
-            
-            # Rate limit
-            await asyncio.sleep(rate_limit_delay)
-            
-        except Forbidden:
-            # User blocked the bot - remove them (non-blocking)
-            print(f"[BROADCAST] User {chat_id} blocked bot, removing")
-            await asyncio.to_thread(db.remove_bot_user, chat_id)
-            failed_count += 1
-            
-        except RetryAfter as e:
-            # Rate limit hit, wait and retry
-            print(f"[BROADCAST] Rate limit hit, waiting {e.retry_after}s")
-            await asyncio.sleep(e.retry_after)
-            try:
-                await bot.send_message(chat_id=chat_id, text=message, parse_mode='Markdown')
-                sent_count += 1
-            except Exception as retry_error:
-                print(f"[BROADCAST] Retry failed for {chat_id}: {retry_error}")
-                failed_count += 1
-                
-        except TelegramError as e:
-            # Other Telegram errors
-            print(f"[BROADCAST] Error sending to {chat_id}: {e}")
-            failed_count += 1
-            
-        except Exception as e:
-            # Unexpected errors
-            print(f"[BROADCAST] Unexpected error sending to {chat_id}: {e}")
-            failed_count += 1
-    
-    # Final update (non-blocking)
-    await asyncio.to_thread(
-        db.update_broadcast_job,
-        job_id,
-        status='completed',
-        sent_count=sent_count,
-        failed_count=failed_count,
-        completed=True
-    )
-    
-    print(f"[BROADCAST] Job {job_id} completed: {sent_count} sent, {failed_count} failed")
-
-
-def _broadcast_worker(job_id, users, message, bot_token):
-    """
-    Worker function to run broadcast in background thread.
-    
-    Args:
-        job_id (int): Broadcast job ID
-        users (list): List of users to broadcast to
-        message (str): Message to send
-        bot_token (str): Bot token
-    """
-    # Create new event loop for this thread
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    
-    try:
-        loop.run_until_complete(_send_broadcast_messages(job_id, users, message, bot_token))
-    except Exception as e:
-        print(f"[BROADCAST] Worker error: {e}")
-        import traceback
-        traceback.print_exc()
-        
-        # Mark job as failed
-        import db
-        db.update_broadcast_job(job_id, status='failed', completed=True)
-    finally:
-        loop.close()
-
-
-def send_broadcast(users, message, tenant_id='entrylab'):
+def send_broadcast(users, message, tenant_id='entrylab', target_days=30):
     """
     Send broadcast message to users asynchronously.
     Creates a job and returns immediately while processing in background.
     
+    Delivery is handled by domains/broadcasts (queued in the Telegram
+    outbox, rate-shaped and resumable after a restart).
+    
     Args:
         users (list): List of user dicts with chat_id
         message (str): Message to broadcast
         tenant_id (str): Tenant ID for bot credentials (defaults to 'entrylab')
+        target_days (int): Activity window the users were selected with
     
     Returns:
         dict: Job info with job_id and total_users
@@ -789,36 +681,16 @@ def send_broadcast(users, message, tenant_id='entrylab'):
     Raises:
         ValueError: If bot token not configured for tenant
     """
-    import db
     from core.bot_credentials import get_bot_credentials, BotNotConfiguredError
+    from domains.broadcasts.engine import start_broadcast
     
-    # Get bot token from database
+    # Fail fast before creating a job nobody can send
     try:
-        creds = get_bot_credentials(tenant_id, 'message')
-        bot_token = creds['bot_token']
+        get_bot_credentials(tenant_id, 'message')
     except BotNotConfiguredError as e:
         raise ValueError(f"No bot token available for broadcasting: {e}")
     
-    # Create broadcast job
-    job_id = db.create_broadcast_job(message, 30, len(users))
-    
-    if not job_id:
-        raise Exception("Failed to create broadcast job")
-    
-    # Start background worker
-    worker_thread = threading.Thread(
-        target=_broadcast_worker,
-        args=(job_id, users, message, bot_token),
-        daemon=True
-    )
-    worker_thread.start()
-    
-    return {
-        'success': True,
-        'job_id': job_id,
-        'total_users': len(users),
-        'status': 'processing'
-    }
+    return start_broadcast(tenant_id, users, message, target_days=target_days)
 
 
 # Global persistent bot application and event loop for webhook mode
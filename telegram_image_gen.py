@@ -8,6 +8,7 @@ Generates promotional images with auto-fitted text and optional logo overlay.
 import re
 import os
 import io
+import functools
 from urllib.parse import urlparse
 from urllib.request import urlopen
 from PIL import Image, ImageDraw, ImageFont
@@ -66,19 +67,8 @@ def load_image_from_url_or_path(url_or_path):
         return Image.open(url_or_path)
 
 
-def get_font(size, bold=True):
-    """
-    Get font with specified size and weight.
-    Tries to find system fonts, falls back to default.
-    
-    Args:
-        size (int): Font size in pixels
-        bold (bool): Whether to use bold weight
-        
-    Returns:
-        ImageFont: Font object
-    """
-    font_names = [
+FONT_CANDIDATES = {
+    True: [
         'Arial Bold',
         'Arial-Bold',
         'ArialBold',
@@ -86,40 +76,93 @@ def get_font(size, bold=True):
         'Helvetica-Bold',
         'DejaVuSans-Bold',
         'FreeSansBold',
-    ] if bold else [
+        '/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf',
+        '/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf',
+        '/usr/share/fonts/truetype/freefont/FreeSansBold.ttf',
+    ],
+    False: [
         'Arial',
         'Helvetica',
         'DejaVuSans',
         'FreeSans',
-    ]
-    
-    # Try to load system fonts
-    for font_name in font_names:
-        try:
-            return ImageFont.truetype(font_name, size)
-        except (OSError, IOError):
-            pass
-    
-    # Try common font paths on Linux
-    common_paths = [
-        '/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf',
-        '/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf',
-        '/usr/share/fonts/truetype/freefont/FreeSansBold.ttf',
-    ] if bold else [
         '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
         '/usr/share/fonts/truetype/liberation/LiberationSans.ttf',
         '/usr/share/fonts/truetype/freefont/FreeSans.ttf',
-    ]
+    ],
+}
+
+# bold -> resolved font name/path (None = Pillow default font)
+_FONT_SOURCES = {}
+
+
+def resolve_font_source(bold=True):
+    """
+    Find the first loadable font for the given weight, once per process.
+    
+    Tries system font names, then common Linux font paths (same order as
+    before the registry existed).
     
-    for path in common_paths:
-        if os.path.exists(path):
+    Returns:
+        str or None: Font name/path for ImageFont.truetype, None for the default font
+    """
+    if bold not in _FONT_SOURCES:
+        source = None
+        for candidate in FONT_CANDIDATES[bool(bold)]:
+            if candidate.startswith('/') and not os.path.exists(candidate):
+                continue
             try:
-                return ImageFont.truetype(path, size)
+                ImageFont.truetype(candidate, 12)
+                source = candidate
+                break
             except (OSError, IOError):
                 pass
+        _FONT_SOURCES[bold] = source
+    return _FONT_SOURCES[bold]
+
+
+def discover_fonts():
+    """Resolve bold and regular fonts up front (call at startup)."""
+    return {bold: resolve_font_source(bold) for bold in (True, False)}
+
+
+@functools.lru_cache(maxsize=256)
+def _load_font(source, size):
+    if source is None:
+        return ImageFont.load_default()
+    return ImageFont.truetype(source, size)
+
+
+def get_font(size, bold=True):
+    """
+    Get font at specified size.
+    Tries to find system fonts, falls back to default.
+    Font objects are cached per (face, size) and shared between renders.
     
-    # Fall back to default font
-    return ImageFont.load_default()
+    Args:
+        size (int): Font size in pixels
+        bold (bool): Whether to use bold weight
+        
+    Returns:
+        ImageFont: Font object
+    """
+    return _load_font(resolve_font_source(bold), int(size))
+
+
+@functools.lru_cache(maxsize=4096)
+def measure_text_width(text, size, bold=True):
+    """
+    Width in pixels of text at the given font size (memoized).
+    
+    Args:
+        text (str): Text to measure
+        size (int): Font size in pixels
+        bold (bool): Whether to use bold weight
+        
+    Returns:
+        int: Width of the text's bounding box
+    """
+    bbox = get_font(size, bold=bold).getbbox(text)
+    return bbox[2] - bbox[0]
 
 
 def compute_auto_font_px(draw, text, max_width_px, max_px, min_px=8):
@@ -127,9 +170,10 @@ def compute_auto_font_px(draw, text, max_width_px, max_px, min_px=8):
     Binary search to find largest font size that fits within max_width_px.
     
     Port of computeAutoFontPx from index.html (lines 315-326).
+    Widths come from measure_text_width, so repeat probes are dictionary lookups.
     
     Args:
-        draw (ImageDraw.Draw): Draw object for text measurement
+        draw (ImageDraw.Draw): Draw object (unused; kept for API compatibility)
         text (str): Text to measure
         max_width_px (float): Maximum width in pixels
         max_px (float): Maximum font size
@@ -148,9 +192,7 @@ def compute_auto_font_px(draw, text, max_width_px, max_px, min_px=8):
     # Binary search for optimal font size
     while hi - lo > 0.5:
         mid = (hi + lo) / 2
-        font = get_font(int(mid), bold=True)
-        bbox = draw.textbbox((0, 0), text, font=font)
-        width = bbox[2] - bbox[0]
+        width = measure_text_width(text, int(mid), bold=True)
         
         if width <= max_width_px:
             lo = mid
@@ -248,7 +290,8 @@ def generate_promo_image(
     max_font_px=None,
     font_color=None,
     logo_url=None,
-    variant='square'
+    variant='square',
+    template_image=None
 ):
     """
     Generate promotional image with coupon code and optional logo.
@@ -263,13 +306,18 @@ def generate_promo_image(
         font_color (str, optional): Font color (default: '#ffffff')
         logo_url (str, optional): URL or path to logo image
         variant (str): Variant type for default box sizing ('square' or 'story')
+        template_image (PIL.Image, optional): Already decoded RGBA template; drawn
+            on a copy, so a cached image can be passed in. Skips loading template_image_url.
         
     Returns:
         PIL.Image: Generated promotional image
     """
     # Load template image
-    template = load_image_from_url_or_path(template_image_url)
-    template = template.convert('RGBA')
+    if template_image is not None:
+        template = template_image.copy()
+    else:
+        template = load_image_from_url_or_path(template_image_url)
+        template = template.convert('RGBA')
     
     # Get natural dimensions
     nat_w, nat_h = template.size
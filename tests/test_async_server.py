@@ -0,0 +1,83 @@
+"""
+Tests for the asyncio HTTP server adapter.
+"""
+import asyncio
+import http.server
+import json
+
+import pytest
+
+from api.async_server import AsyncHTTPServer, frame_response
+
+
+class EchoHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-type', 'application/json')
+        self.end_headers()
+        self.wfile.write(json.dumps({'path': self.path}).encode())
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.send_response(200)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+async def _read_response(reader):
+    head = await reader.readuntil(b'\r\n\r\n')
+    length = 0
+    for line in head.split(b'\r\n'):
+        if line.lower().startswith(b'content-length:'):
+            length = int(line.split(b':', 1)[1])
+    body = await reader.readexactly(length)
+    return head.decode('latin-1'), body
+
+
+@pytest.fixture
+async def server():
+    srv = AsyncHTTPServer(EchoHandler, '127.0.0.1', 0, max_concurrency=2,
+                          max_body_bytes=16, keepalive_timeout=5, shutdown_grace=1)
+    await srv.start()
+    srv.port = srv._server.sockets[0].getsockname()[1]
+    yield srv
+    await srv.shutdown()
+
+
+class TestAsyncHTTPServer:
+    """Keep-alive, body limits and response framing."""
+
+    @pytest.mark.asyncio
+    async def test_keep_alive_serves_several_requests(self, server):
+        reader, writer = await asyncio.open_connection('127.0.0.1', server.port)
+        for path in ('/a', '/b'):
+            writer.write(f'GET {path} HTTP/1.1\r\nHost: x\r\n\r\n'.encode())
+            await writer.drain()
+            head, body = await _read_response(reader)
+            assert head.startswith('HTTP/1.1 200')
+            assert 'Connection: keep-alive' in head
+            assert json.loads(body) == {'path': path}
+
+        writer.write(b'POST /echo HTTP/1.1\r\nContent-Length: 5\r\nConnection: close\r\n\r\nhello')
+        await writer.drain()
+        head, body = await _read_response(reader)
+        assert body == b'hello'
+        assert 'Connection: close' in head
+        writer.close()
+
+    @pytest.mark.asyncio
+    async def test_oversized_body_rejected(self, server):
+        reader, writer = await asyncio.open_connection('127.0.0.1', server.port)
+        writer.write(b'POST /echo HTTP/1.1\r\nContent-Length: 1000\r\n\r\n')
+        await writer.drain()
+        head, _ = await _read_response(reader)
+        assert head.startswith('HTTP/1.1 413')
+        assert await reader.read() == b''
+        writer.close()
+
+    def test_frame_response_adds_content_length(self):
+        raw = b'HTTP/1.0 200 OK\r\nServer: x\r\nConnection: close\r\n\r\nabc'
+        framed = frame_response(raw, keep_alive=True)
+        assert framed.startswith(b'HTTP/1.1 200 OK\r\n')
+        assert b'Content-Length: 3\r\n' in framed
+        assert b'Connection: keep-alive' in framed and b'Connection: close' not in framed
@@ -0,0 +1,144 @@
+"""
+Tests for bot_usage rollups behind get_bot_stats.
+
+The SQL shape tests run without a database: every statement get_bot_stats
+issues must bind one parameter per placeholder and only read tables or
+CTEs that exist. The parity test needs a database (skipped otherwise):
+stats must be identical before and after raw rows are compacted into
+bot_usage_rollup.
+"""
+import os
+import re
+import sys
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db
+from db import database_url_is_set, can_connect
+
+TENANT = "tenant_test_usage_rollups"
+
+
+class TestUsageSource:
+    """The rollup + tail source binds one parameter per placeholder."""
+
+    @pytest.mark.parametrize("days", ['today', 'yesterday', 7, 30])
+    def test_placeholders_match_params(self, days):
+        sql, params = db._bot_usage_source(TENANT, days)
+        assert sql.count('%s') == len(params)
+        assert params[-2:] == (TENANT, TENANT)
+
+
+TABLES = {'bot_usage', 'bot_usage_rollup', 'bot_usage_rollup_state', 'bot_users', 'bot_user_activity',
+          'bot_coupon_activity', 'bot_coupon_first_user', 'bot_stats_usage'}
+
+
+class RecordingCursor:
+    def __init__(self):
+        self.calls = []
+
+    def execute(self, sql, params=None):
+        self.calls.append((sql, params or ()))
+
+    def fetchone(self):
+        return (0, 0, 0)
+
+    def fetchall(self):
+        return []
+
+
+class TestBotStatsSqlShape:
+    """get_bot_stats statements are well formed, checked without a database."""
+
+    @pytest.mark.parametrize("days,template_filter", [('today', None), (7, None), (30, 'tpl')])
+    def test_statements_reference_defined_relations(self, monkeypatch, days, template_filter):
+        cursor = RecordingCursor()
+
+        @contextmanager
+        def get_connection(tenant_id=None):
+            yield SimpleNamespace(cursor=lambda: cursor, commit=lambda: None)
+
+        monkeypatch.setattr(db, 'db_pool', SimpleNamespace(connection_pool=object(), get_connection=get_connection))
+        assert db.get_bot_stats(TENANT, days=days, template_filter=template_filter) is not None
+        assert cursor.calls
+        # The rollup + raw tail is expanded once, into the temp table the breakdowns read
+        assert sum('usage_rows AS (' in sql for sql, _ in cursor.calls) == 1
+
+        for sql, params in cursor.calls:
+            assert sql.count('%s') == len(params)
+            defined = set(re.findall(r'(\w+) AS \(', sql))
+            relations_sql = re.sub(r'EXTRACT\([^)]*\)', '', sql)
+            referenced = set(re.findall(r'\b(?:FROM|JOIN)\s+(\w+)', relations_sql)) - {'SELECT'}
+            assert referenced <= defined | TABLES, referenced - defined - TABLES
+
+
+class TestLogBotUsage:
+    """Successful coupon generations feed the per-coupon user tables."""
+
+    def _log(self, monkeypatch, **kwargs):
+        cursor = RecordingCursor()
+
+        @contextmanager
+        def get_connection(tenant_id=None):
+            yield SimpleNamespace(cursor=lambda: cursor, commit=lambda: None)
+
+        monkeypatch.setattr(db, 'db_pool', SimpleNamespace(connection_pool=object(), get_connection=get_connection))
+        db.log_bot_usage(42, 'tpl', kwargs.pop('coupon_code', 'SAVE10'), tenant_id=TENANT, **kwargs)
+        return [sql for sql, _ in cursor.calls]
+
+    def test_success_records_coupon_users(self, monkeypatch):
+        statements = self._log(monkeypatch, success=True)
+        assert any('bot_coupon_activity' in sql and 'bot_coupon_first_user' in sql for sql in statements)
+
+    def test_failure_records_only_the_event(self, monkeypatch):
+        statements = self._log(monkeypatch, success=False, error_type='network')
+        assert len(statements) == 1 and 'INSERT INTO bot_usage' in statements[0]
+
+
+class TestRollupParity:
+    """Stats read the same whether rows are raw or rolled up."""
+
+    @classmethod
+    def setup_class(cls):
+        if not database_url_is_set() or not can_connect():
+            pytest.skip("DATABASE_URL not set or DB unreachable")
+        if not db.db_pool.connection_pool:
+            db.db_pool.initialize_pool()
+
+    def _cleanup(self):
+        with db.db_pool.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM bot_usage WHERE tenant_id = %s", (TENANT,))
+            cursor.execute("DELETE FROM bot_usage_rollup WHERE tenant_id = %s", (TENANT,))
+            conn.commit()
+
+    def test_stats_unchanged_by_compaction(self):
+        self._cleanup()
+        try:
+            with db.db_pool.get_connection() as conn:
+                cursor = conn.cursor()
+                for hours_ago, chat_id, coupon, success in [
+                    (30, 1, 'SAVE10', True), (30, 1, 'SAVE10', True), (29, 2, 'SAVE10', True),
+                    (5, 3, 'GOLD', True), (5, 3, 'GOLD', False), (0, 4, 'SAVE10', True),
+                ]:
+                    cursor.execute("""
+                        INSERT INTO bot_usage (tenant_id, chat_id, template_slug, coupon_code, success,
+                                               error_type, created_at)
+                        VALUES (%s, %s, 'tpl', %s, %s, %s, NOW() - make_interval(hours => %s))
+                    """, (TENANT, chat_id, coupon, success, None if success else 'network', hours_ago))
+                conn.commit()
+
+            before = db.get_bot_stats(TENANT, days=7)
+            before_dow = db.get_day_of_week_stats(TENANT, days=7)
+            db.compact_bot_usage(settle_minutes=0)
+            after = db.get_bot_stats(TENANT, days=7)
+
+            assert before['total_uses'] == 6
+            assert after == before
+            assert db.get_day_of_week_stats(TENANT, days=7) == before_dow
+        finally:
+            self._cleanup()
@@ -0,0 +1,61 @@
+"""
+Tests for the broadcast engine's hand-off of recipients to the Telegram outbox.
+"""
+import pytest
+
+from core.telegram_outbox import PRIORITY_BROADCAST
+from domains.broadcasts import engine, repo
+
+
+@pytest.fixture
+def fake_repo(monkeypatch):
+    state = {'claimed': True, 'counts': (9, 9), 'queued': [], 'finished': []}
+
+    def claim_job(job_id, tenant_id, worker_id, stale_seconds):
+        return {'id': job_id, 'tenant_id': tenant_id, 'message': 'hi'} if state['claimed'] else None
+
+    def queue_to_outbox(job_id, tenant_id, worker_id, bot_role, parse_mode, priority):
+        state['queued'].append((job_id, tenant_id, bot_role, parse_mode, priority))
+        if isinstance(state['counts'], Exception):
+            raise state['counts']
+        return state['counts']
+
+    monkeypatch.setattr(repo, 'claim_job', claim_job)
+    monkeypatch.setattr(repo, 'queue_to_outbox', queue_to_outbox)
+    monkeypatch.setattr(repo, 'finish_job',
+                        lambda job_id, tenant_id, worker_id, status: state['finished'].append(status))
+    return state
+
+
+class TestQueueJob:
+    """A claimed job's pending recipients are queued in the outbox."""
+
+    def test_queues_recipients_at_broadcast_priority(self, fake_repo):
+        assert engine.queue_job(1, 't1', 'w1') == 'queued'
+        assert fake_repo['queued'] == [(1, 't1', 'message_bot', 'Markdown', PRIORITY_BROADCAST)]
+        assert fake_repo['finished'] == []
+
+    def test_skips_job_owned_elsewhere(self, fake_repo):
+        fake_repo['claimed'] = False
+        assert engine.queue_job(1, 't1', 'w1') is None
+        assert fake_repo['queued'] == []
+
+    def test_stops_when_job_taken_over(self, fake_repo):
+        fake_repo['counts'] = None
+        assert engine.queue_job(1, 't1', 'w1') == 'lost'
+        assert fake_repo['finished'] == []
+
+    def test_job_without_recipients_fails(self, fake_repo):
+        fake_repo['counts'] = (0, 0)
+        assert engine.queue_job(1, 't1', 'w1') == 'failed'
+        assert fake_repo['finished'] == ['failed']
+
+    def test_hand_off_error_fails_job(self, fake_repo):
+        fake_repo['counts'] = RuntimeError('db down')
+        assert engine.queue_job(1, 't1', 'w1') == 'failed'
+        assert fake_repo['finished'] == ['failed']
+
+    def test_resume_queues_interrupted_jobs(self, fake_repo, monkeypatch):
+        monkeypatch.setattr(repo, 'find_interrupted_jobs', lambda stale_seconds: [(1, 't1'), (2, 't2')])
+        assert engine.resume_interrupted_broadcasts() == 2
+        assert [(job_id, tenant_id) for job_id, tenant_id, *_ in fake_repo['queued']] == [(1, 't1'), (2, 't2')]
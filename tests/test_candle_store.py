@@ -0,0 +1,202 @@
+"""
+Tests for the shared candle store and locally computed indicators.
+"""
+import json
+
+import numpy as np
+import pytest
+
+from integrations.market_data import indicators
+from integrations.market_data.candle_store import CandleStore
+from integrations.market_data.incremental import IndicatorEngine
+from integrations.market_data.twelve_data import TwelveDataClient
+
+
+def _make_values(n, seed=0):
+    """Build Twelve Data style time_series values (newest-first)."""
+    rng = np.random.default_rng(seed)
+    close = 2000 + np.cumsum(rng.normal(0, 2, n))
+    high = close + rng.random(n) * 3
+    low = close - rng.random(n) * 3
+    values = [
+        {
+            'datetime': f"2024-01-01 {i:05d}",
+            'open': str(close[i]),
+            'high': str(high[i]),
+            'low': str(low[i]),
+            'close': str(close[i]),
+        }
+        for i in range(n)
+    ]
+    return values[::-1]
+
+
+class FakeClient(TwelveDataClient):
+    """TwelveDataClient whose transport returns canned candles."""
+
+    def __init__(self, values):
+        super().__init__()
+        self.values = values
+        self.requests = []
+
+    def _make_request(self, endpoint, params):
+        self.requests.append((endpoint, dict(params)))
+        if endpoint != 'time_series':
+            raise AssertionError(f"unexpected remote indicator call: {endpoint}")
+        return {'values': self.values[:params['outputsize']]}
+
+
+class TestIndicatorMath:
+    """Local formulas match their textbook definitions."""
+
+    def test_ema_seeds_with_sma(self):
+        values = np.arange(1, 11, dtype=float)
+        result = indicators.ema(values, 3)
+        assert np.isnan(result[:2]).all()
+        assert result[2] == pytest.approx(2.0)
+        assert result[3] == pytest.approx(4 * 0.5 + 2.0 * 0.5)
+
+    def test_rsi_all_gains_is_100(self):
+        result = indicators.rsi(np.arange(30, dtype=float), 14)
+        assert result[-1] == pytest.approx(100.0)
+
+    def test_bbands_flat_series_collapses(self):
+        upper, middle, lower = indicators.bbands(np.full(25, 5.0), 20)
+        assert upper[-1] == middle[-1] == lower[-1] == pytest.approx(5.0)
+
+    def test_stoch_at_top_of_range(self):
+        close = np.arange(30, dtype=float)
+        slow_k, slow_d = indicators.stoch(close, close, close)
+        assert slow_k[-1] == pytest.approx(100.0)
+        assert slow_d[-1] == pytest.approx(100.0)
+
+
+class TestCandleStore:
+    """Candle store fetches once per (symbol, interval) and keeps client shapes."""
+
+    def test_strategy_indicator_set_uses_one_fetch_per_interval(self, monkeypatch):
+        monkeypatch.setenv('MARKET_DATA_LOCAL_INDICATORS', 'true')
+        client = FakeClient(_make_values(1000))
+
+        assert len(client.get_ema_series('XAU/USD', '1h', 200, 6)) == 6
+        assert isinstance(client.get_ema('XAU/USD', '15min', 20), float)
+        assert len(client.get_rsi_series('XAU/USD', '15min', 14, 5)) == 5
+        assert 0 <= client.get_adx('XAU/USD', '15min') <= 100
+        assert client.get_atr('XAU/USD', '15min') > 0
+        assert set(client.get_bbands('XAU/USD', '15min')) == {'upper', 'middle', 'lower'}
+        assert len(client.get_bbands_series('XAU/USD', '15min', 20, 20)) == 20
+        assert set(client.get_stoch('XAU/USD', '15min')) == {'k', 'd', 'is_oversold', 'is_overbought'}
+        assert 'histogram_slope' in client.get_macd('XAU/USD', '15min')
+
+        candles = client.get_time_series('XAU/USD', '15min', 20)
+        assert len(candles) == 20
+        assert candles[0]['datetime'] > candles[1]['datetime']
+
+        assert [r[1]['interval'] for r in client.requests] == ['1h', '15min']
+
+    def test_merge_replaces_forming_bar(self):
+        store = CandleStore(client=None, max_bars=10, ttl_seconds=0)
+        window = store._get_window('XAU/USD', '15min')
+        window.merge(_make_values(5), store.max_bars)
+
+        updated = dict(_make_values(5)[0], close='1.0')
+        window.merge([updated], store.max_bars)
+
+        assert len(window) == 5
+        assert window.close[-1] == 1.0
+
+    def test_falls_back_to_remote_when_history_too_short(self, monkeypatch):
+        monkeypatch.setenv('MARKET_DATA_LOCAL_INDICATORS', 'true')
+        client = FakeClient(_make_values(1000))
+        client.candle_store.max_bars = 100
+
+        assert client.candle_store.get_ema_series('XAU/USD', '1h', 200, 1) is None
+        assert client.requests == []
+
+
+class TestIncrementalEngine:
+    """Streaming accumulators agree with the batch formulas and replay from snapshots."""
+
+    SPECS = {
+        'ema': ('ema', {'time_period': 20}),
+        'rsi': ('rsi', {'time_period': 14}),
+        'atr': ('atr', {'time_period': 14}),
+        'adx': ('adx', {'time_period': 14}),
+        'macd': ('macd', {'fast_period': 12, 'slow_period': 26, 'signal_period': 9}),
+        'bollinger': ('bbands', {'time_period': 20, 'sd': 2}),
+        'stochastic': ('stoch', {'fast_k_period': 14, 'slow_k_period': 3, 'slow_d_period': 3}),
+    }
+
+    @staticmethod
+    def _bars(n):
+        return [
+            {k: (float(v) if k != 'datetime' else v) for k, v in bar.items()}
+            for bar in reversed(_make_values(n, seed=3))
+        ]
+
+    def _batch(self, bars):
+        close = np.array([b['close'] for b in bars])
+        high = np.array([b['high'] for b in bars])
+        low = np.array([b['low'] for b in bars])
+        macd_line, signal_line, _ = indicators.macd(close)
+        upper, middle, lower = indicators.bbands(close, 20)
+        slow_k, slow_d = indicators.stoch(high, low, close)
+        return {
+            'ema': indicators.ema(close, 20)[-1],
+            'rsi': indicators.rsi(close, 14)[-1],
+            'atr': indicators.atr(high, low, close, 14)[-1],
+            'adx': indicators.adx(high, low, close, 14)[-1],
+            'macd': macd_line[-1],
+            'macd_signal': signal_line[-1],
+            'bb_upper': upper[-1],
+            'stoch_k': slow_k[-1],
+            'stoch_d': slow_d[-1],
+        }
+
+    def _flatten(self, values):
+        return {
+            'ema': values['ema'],
+            'rsi': values['rsi'],
+            'atr': values['atr'],
+            'adx': values['adx'],
+            'macd': values['macd']['macd'],
+            'macd_signal': values['macd']['signal'],
+            'bb_upper': values['bollinger']['upper'],
+            'stoch_k': values['stochastic']['k'],
+            'stoch_d': values['stochastic']['d'],
+        }
+
+    def test_matches_batch_and_previews_forming_bar(self):
+        bars = self._bars(200)
+        engine = IndicatorEngine('XAU/USD', '15min', self.SPECS)
+        engine.replay(bars[:-1])
+
+        closed = self._flatten(engine.values())
+        assert closed == pytest.approx(self._batch(bars[:-1]))
+
+        engine.on_forming_bar(bars[-1])
+        assert self._flatten(engine.values()) == pytest.approx(self._batch(bars))
+        assert self._flatten(engine.values(include_forming=False)) == pytest.approx(closed)
+
+    def test_snapshot_replay_continues_identically(self):
+        bars = self._bars(150)
+        full = IndicatorEngine('XAU/USD', '15min', self.SPECS)
+        full.replay(bars)
+
+        partial = IndicatorEngine('XAU/USD', '15min', self.SPECS)
+        partial.replay(bars[:100])
+        restored = IndicatorEngine.from_snapshot(json.loads(json.dumps(partial.snapshot())))
+        assert restored.replay(bars) == 50
+
+        assert self._flatten(restored.values()) == pytest.approx(self._flatten(full.values()))
+
+    def test_store_engine_feeds_only_new_bars(self):
+        client = FakeClient(_make_values(300))
+        store = CandleStore(client, max_bars=300, ttl_seconds=0)
+        engine = store.get_engine('XAU/USD', '15min', {'rsi': ('rsi', {'time_period': 14})})
+        assert engine.last_closed == client.values[1]['datetime']
+        assert engine.forming['datetime'] == client.values[0]['datetime']
+
+        client.values = _make_values(301)
+        store.get_window('XAU/USD', '15min')
+        assert engine.last_closed == client.values[1]['datetime']
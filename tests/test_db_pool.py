@@ -0,0 +1,169 @@
+"""
+Tests for the thread-safe database pool (core/db_pool.py).
+
+Connections are fakes, so no database is needed.
+"""
+import os
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from psycopg2 import extensions
+from psycopg2.pool import PoolError
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.db_pool import (
+    HTTP, SCHEDULER, BoundedPool, PartitionedPool, PoolTimeout, pool_role, set_pool_role
+)
+
+
+class FakeConn:
+    def __init__(self, n):
+        self.n = n
+        self.closed = 0
+        self.alive = True
+        self.rollbacks = 0
+        self.info = SimpleNamespace(transaction_status=extensions.TRANSACTION_STATUS_IDLE)
+
+    def cursor(self):
+        conn = self
+
+        class _Cursor:
+            def execute(self, sql):
+                if not conn.alive:
+                    raise RuntimeError("server closed the connection unexpectedly")
+
+            def close(self):
+                pass
+        return _Cursor()
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.info.transaction_status = extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+class Factory:
+    def __init__(self):
+        self.made = []
+
+    def __call__(self):
+        conn = FakeConn(len(self.made))
+        self.made.append(conn)
+        return conn
+
+
+def make_pool(factory, **overrides):
+    options = dict(max_size=2, acquire_timeout=0.2, max_age_seconds=60, health_check_idle_seconds=60)
+    options.update(overrides)
+    return BoundedPool('test', factory, **options)
+
+
+def test_reuses_returned_connection():
+    factory = Factory()
+    pool = make_pool(factory)
+    conn = pool.getconn()
+    pool.putconn(conn)
+    assert pool.getconn() is conn
+    assert len(factory.made) == 1
+
+
+def test_exhaustion_blocks_then_times_out():
+    pool = make_pool(Factory(), max_size=1, acquire_timeout=0.05)
+    pool.getconn()
+    with pytest.raises(PoolTimeout):
+        pool.getconn()
+    assert issubclass(PoolTimeout, PoolError)
+    assert pool.stats()['timeouts'] == 1
+
+
+def test_waiter_gets_connection_when_returned():
+    pool = make_pool(Factory(), max_size=1, acquire_timeout=2)
+    conn = pool.getconn()
+    threading.Timer(0.05, pool.putconn, args=(conn,)).start()
+    assert pool.getconn() is conn
+    stats = pool.stats()
+    assert stats['waits'] == 1 and stats['wait_seconds_max'] > 0
+
+
+def test_closed_and_dead_connections_replaced_on_checkout():
+    factory = Factory()
+    pool = make_pool(factory, health_check_idle_seconds=0)
+    a, b = pool.getconn(), pool.getconn()
+    pool.putconn(a)
+    pool.putconn(b)
+    a.closed = 1
+    b.alive = False
+    got = {pool.getconn().n, pool.getconn().n}
+    assert got == {2, 3}
+    assert pool.stats()['health_check_failures'] == 2
+    assert pool.stats()['size'] == 2
+
+
+def test_old_connections_recycled():
+    factory = Factory()
+    pool = make_pool(factory, max_age_seconds=0.01)
+    conn = pool.getconn()
+    time.sleep(0.02)
+    pool.putconn(conn)
+    assert conn.closed
+    assert pool.getconn() is not conn
+    assert pool.stats()['recycled'] == 1
+
+
+def test_open_transaction_rolled_back_on_return():
+    pool = make_pool(Factory())
+    conn = pool.getconn()
+    conn.info.transaction_status = extensions.TRANSACTION_STATUS_INTRANS
+    pool.putconn(conn)
+    assert conn.rollbacks == 1 and not conn.closed
+
+
+def test_put_close_and_unknown_connection():
+    pool = make_pool(Factory())
+    conn = pool.getconn()
+    pool.putconn(conn, close=True)
+    assert conn.closed and pool.stats()['size'] == 0
+    with pytest.raises(PoolError):
+        pool.putconn(FakeConn(99))
+
+
+def test_roles_use_separate_sub_pools():
+    factory = Factory()
+    pool = PartitionedPool(factory, {HTTP: 1, SCHEDULER: 1}, min_size=1, acquire_timeout=0.05)
+    assert len(factory.made) == 1
+
+    http_conn = pool.getconn()
+    with pytest.raises(PoolTimeout):
+        pool.getconn()
+
+    results = {}
+
+    def scheduler_thread():
+        set_pool_role(SCHEDULER)
+        results['conn'] = pool.getconn()
+
+    thread = threading.Thread(target=scheduler_thread)
+    thread.start()
+    thread.join()
+    assert results['conn'] is not http_conn
+
+    pool.putconn(results['conn'])
+    pool.putconn(http_conn)
+    stats = pool.stats()
+    assert stats[HTTP]['in_use'] == 0 and stats[SCHEDULER]['in_use'] == 0
+    assert stats[HTTP]['timeouts'] == 1
+
+
+def test_pool_role_context_manager():
+    factory = Factory()
+    pool = PartitionedPool(factory, {HTTP: 1, SCHEDULER: 1}, min_size=0, acquire_timeout=0.05)
+    with pool_role(SCHEDULER):
+        conn = pool.getconn()
+    assert pool.stats()[SCHEDULER]['in_use'] == 1
+    assert pool.getconn() is not conn
@@ -0,0 +1,154 @@
+"""
+Tests for the idempotency store (core/idempotency.py) and its callers:
+Stripe webhook claims in db.py and journey message dedupe.
+"""
+import os
+import sys
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+import pytest
+from psycopg2 import errors
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import idempotency
+from core.idempotency import (
+    CLAIMED, DUPLICATE, IN_PROGRESS, IdempotencyStore, IdempotencyUnavailable,
+    expired_partitions, partition_name,
+)
+
+TODAY = date(2026, 3, 10)
+
+
+class FakeDatabase:
+    """Plays the store's statements against a dict of (scope, tenant, key, bucket) -> status."""
+
+    def __init__(self, partitions=(TODAY,)):
+        self.rows = {}
+        self.partitions = set(partitions)
+        self.statements = []
+        self.connection_pool = object()
+
+    @contextmanager
+    def get_connection(self, tenant_id=None):
+        yield self
+
+    def cursor(self):
+        return self
+
+    def commit(self):
+        pass
+
+    def execute(self, sql, params=None):
+        self.statements.append(sql)
+        self.result = None
+        if 'pg_advisory_xact_lock' in sql:
+            self._claim(params)
+        elif sql.lstrip().startswith('INSERT'):
+            self._require_partition()
+            self.rows[params[:3] + (TODAY,)] = 'done'
+        elif sql.lstrip().startswith('DELETE'):
+            for entry in [e for e, status in self.rows.items() if e[:3] == params[:3] and status == 'processing']:
+                del self.rows[entry]
+        elif 'CURRENT_DATE' in sql and 'pg_inherits' not in sql:
+            self.result = (TODAY,)
+        elif 'PARTITION OF' in sql:
+            self.partitions.add(params[0])
+
+    def _require_partition(self):
+        if TODAY not in self.partitions:
+            raise errors.CheckViolation("no partition of relation found for row")
+
+    def _claim(self, params):
+        entry = (params['scope'], params['tenant_id'], params['key'])
+        live = [status for e, status in self.rows.items() if e[:3] == entry]
+        if live:
+            self.result = (None, 'done' if 'done' in live else 'processing')
+            return
+        self._require_partition()
+        self.rows[entry + (TODAY,)] = params['status']
+        self.result = (params['status'], None)
+
+    def fetchone(self):
+        return self.result
+
+
+@pytest.fixture
+def store():
+    return IdempotencyStore(FakeDatabase(), retention_days=7, lru_size=100)
+
+
+def test_claim_then_duplicate_answered_from_memory(store):
+    assert store.claim('journey_message', 'tenant_a', '5:1') == CLAIMED
+    calls = len(store.pool.statements)
+    assert store.claim('journey_message', 'tenant_a', '5:1') == DUPLICATE
+    assert len(store.pool.statements) == calls
+    assert store.claim('journey_message', 'tenant_b', '5:1') == CLAIMED
+    assert store.stats()['local_hits'] == 1
+
+
+def test_claim_is_one_statement_with_atomic_insert(store):
+    store.claim('stripe', 'stripe', 'evt_1', lease_seconds=60)
+    [sql] = store.pool.statements
+    assert 'pg_advisory_xact_lock' in sql and 'ON CONFLICT' in sql and 'RETURNING' in sql
+
+
+def test_duplicate_seen_by_other_process(store):
+    other = IdempotencyStore(store.pool, lru_size=100)
+    assert other.claim('stripe', 'stripe', 'evt_1') == CLAIMED
+    assert store.claim('stripe', 'stripe', 'evt_1') == DUPLICATE
+
+
+def test_lease_blocks_until_complete_or_release(store):
+    other = IdempotencyStore(store.pool, lru_size=100)
+    assert store.claim('stripe', 'stripe', 'evt_2', lease_seconds=60) == CLAIMED
+    assert store.claim('stripe', 'stripe', 'evt_2', lease_seconds=60) == IN_PROGRESS
+    assert other.claim('stripe', 'stripe', 'evt_2', lease_seconds=60) == IN_PROGRESS
+
+    store.release('stripe', 'stripe', 'evt_2')
+    assert other.claim('stripe', 'stripe', 'evt_2', lease_seconds=60) == CLAIMED
+    other.complete('stripe', 'stripe', 'evt_2')
+    assert store.claim('stripe', 'stripe', 'evt_2', lease_seconds=60) == DUPLICATE
+
+
+def test_missing_partition_created_and_claim_retried():
+    store = IdempotencyStore(FakeDatabase(partitions=()), lru_size=100)
+    assert store.claim('stripe', 'stripe', 'evt_3') == CLAIMED
+    assert TODAY in store.pool.partitions
+
+
+def test_lru_is_bounded():
+    store = IdempotencyStore(FakeDatabase(), lru_size=2)
+    for key in ('a', 'b', 'c'):
+        store.claim('journey_message', 'tenant_a', key)
+    assert store.stats()['recent'] == 2
+
+
+def test_expired_partitions():
+    names = [partition_name(TODAY - timedelta(days=offset)) for offset in range(10)] + ['idempotency_keys']
+    assert expired_partitions(names, TODAY, 7) == [
+        'idempotency_keys_p20260301', 'idempotency_keys_p20260302'
+    ]
+
+
+def test_no_pool_raises():
+    store = IdempotencyStore(None)
+    with pytest.raises(IdempotencyUnavailable):
+        store.claim('stripe', 'stripe', 'evt_4')
+
+
+def test_callers_handle_unavailable_store(monkeypatch):
+    import db
+    from domains.journeys import repo
+    monkeypatch.setattr(idempotency, '_store', IdempotencyStore(None))
+    assert db.claim_webhook_event('evt_5', tenant_id='stripe') == CLAIMED
+    assert db.complete_webhook_event('evt_5', tenant_id='stripe') is False
+    assert repo.check_message_dedupe('tenant_a', 5, 1) is False
+
+
+def test_journey_dedupe_uses_store(monkeypatch):
+    from domains.journeys import repo
+    monkeypatch.setattr(idempotency, '_store', IdempotencyStore(FakeDatabase()))
+    assert repo.check_message_dedupe('tenant_a', 5, 1) is True
+    assert repo.check_message_dedupe('tenant_a', 5, 1) is False
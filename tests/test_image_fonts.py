@@ -0,0 +1,30 @@
+"""
+Tests for the telegram_image_gen font registry and text-width memo.
+"""
+from PIL import Image, ImageDraw
+
+import telegram_image_gen
+from telegram_image_gen import compute_auto_font_px, get_font, measure_text_width
+
+
+class TestFontRegistry:
+    """Fonts are resolved once and reused per (face, size)."""
+
+    def test_font_objects_are_shared(self):
+        assert get_font(40) is get_font(40)
+        assert get_font(40) is not get_font(41)
+
+    def test_auto_fit_matches_uncached_measurement(self, monkeypatch):
+        draw = ImageDraw.Draw(Image.new('RGBA', (600, 200)))
+        px = compute_auto_font_px(draw, 'SAVE-30', 300, 120, 8)
+        font = get_font(px)
+        bbox = draw.textbbox((0, 0), 'SAVE-30', font=font)
+        assert bbox[2] - bbox[0] <= 300
+        assert measure_text_width('SAVE-30', px) == bbox[2] - bbox[0]
+
+        # A second fit never touches the font loader
+        def fail(*args, **kwargs):
+            raise AssertionError("font reloaded")
+
+        monkeypatch.setattr(telegram_image_gen.ImageFont, 'truetype', fail)
+        assert compute_auto_font_px(draw, 'SAVE-30', 300, 120, 8) == px
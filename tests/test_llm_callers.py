@@ -0,0 +1,47 @@
+"""
+Tests for how LLM callers use the gateway: tenant metering and cache bypass.
+"""
+import pytest
+
+from integrations.openai.gateway import Completion
+
+
+@pytest.fixture
+def llm_calls(monkeypatch):
+    calls = []
+
+    def fake_complete(model, messages, **kwargs):
+        calls.append(kwargs)
+        return Completion("Quiet session ahead, focus on clean setups.", model, 10, 10)
+
+    return calls, fake_complete
+
+
+def test_morning_summary_charges_tenant(llm_calls, monkeypatch):
+    import forex_ai
+    calls, fake_complete = llm_calls
+    monkeypatch.setattr(forex_ai, 'llm_complete', fake_complete)
+    monkeypatch.setattr(forex_ai, '_get_client', lambda: None)
+
+    assert forex_ai.generate_morning_summary(2400.0, tenant_id='tenant_a')
+    assert calls[0]['tenant_id'] == 'tenant_a'
+
+
+def test_hypechat_preview_and_retries_bypass_cache(llm_calls, monkeypatch):
+    from domains.hypechat import service
+    from integrations.openai import gateway
+    calls, fake_complete = llm_calls
+    monkeypatch.setenv('OPENAI_API_KEY', 'test')
+    monkeypatch.setattr(gateway, 'complete', fake_complete)
+    monkeypatch.setattr(service, 'build_context', lambda tenant_id, signal_context=None: 'context')
+    verdicts = iter(["Too generic.", None])
+    monkeypatch.setattr(service, '_validate_message', lambda message, context: next(verdicts))
+
+    result = service.preview_message('tenant_a', 'prompt', message_count=1)
+    assert result['messages'] == ["Quiet session ahead, focus on clean setups."]
+    assert [call['cache'] for call in calls] == [False, False]
+
+    calls.clear()
+    verdicts = iter(["Too generic.", None])
+    service.generate_message('tenant_a', 'prompt', context_override='context')
+    assert [call['cache'] for call in calls] == [True, False]
@@ -0,0 +1,94 @@
+"""
+Tests for the LLM gateway: content-addressed cache, single-flight and token accounting.
+"""
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from integrations.openai.gateway import LLMGateway
+
+
+class FakeClient:
+    """Stands in for OpenAI(): counts upstream calls, optionally slow or failing."""
+
+    def __init__(self, delay=0.0, fail=False):
+        self.calls = 0
+        self.delay = delay
+        self.fail = fail
+        self.lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, messages, **params):
+        with self.lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("upstream down")
+        text = f"reply to {messages[-1]['content']}"
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=text))],
+            usage=SimpleNamespace(prompt_tokens=10, completion_tokens=5),
+        )
+
+
+def _messages(text):
+    return [{"role": "user", "content": text}]
+
+
+class TestLLMGateway:
+    """Identical requests share one upstream completion."""
+
+    def test_cache_hit_and_token_accounting(self):
+        gateway = LLMGateway(max_entries=10, ttl_seconds=60, max_concurrency=2)
+        client = FakeClient()
+        first = gateway.complete("m", _messages("gold"), tenant_id="a", client=client, temperature=0.7)
+        second = gateway.complete("m", _messages("gold"), tenant_id="b", client=client, temperature=0.7)
+        other = gateway.complete("m", _messages("gold"), tenant_id="b", client=client, temperature=0.2)
+
+        assert client.calls == 2
+        assert first.content == second.content and second.cached and not first.cached
+        assert not other.cached
+        assert gateway.get_token_usage("a")["prompt_tokens"] == 10
+        usage_b = gateway.get_token_usage("b")
+        assert usage_b["cache_hits"] == 1 and usage_b["completion_tokens"] == 5
+
+    def test_ttl_and_lru_eviction(self):
+        gateway = LLMGateway(max_entries=2, ttl_seconds=60, max_concurrency=2)
+        client = FakeClient()
+        for text in ("a", "b", "c"):
+            gateway.complete("m", _messages(text), client=client)
+        gateway.complete("m", _messages("a"), client=client)
+        assert client.calls == 4
+
+        gateway.complete("m", _messages("d"), client=client, ttl=0)
+        gateway.complete("m", _messages("d"), client=client)
+        assert client.calls == 6
+
+    def test_single_flight_coalesces_concurrent_requests(self):
+        gateway = LLMGateway(max_entries=10, ttl_seconds=60, max_concurrency=2)
+        client = FakeClient(delay=0.1)
+        results = []
+        threads = [
+            threading.Thread(target=lambda t=t: results.append(
+                gateway.complete("m", _messages("same"), tenant_id=t, client=client)))
+            for t in ("a", "b", "c", "d")
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert client.calls == 1
+        assert len({r.content for r in results}) == 1
+        assert gateway.stats()["coalesced"] == 3
+
+    def test_errors_are_not_cached(self):
+        gateway = LLMGateway(max_entries=10, ttl_seconds=60, max_concurrency=2)
+        client = FakeClient(fail=True)
+        with pytest.raises(RuntimeError):
+            gateway.complete("m", _messages("x"), client=client)
+        client.fail = False
+        assert gateway.complete("m", _messages("x"), client=client).content == "reply to x"
+        assert client.calls == 2
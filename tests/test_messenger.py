@@ -0,0 +1,80 @@
+"""
+Tests for Messenger's fire-and-forget sends going through the Telegram outbox.
+"""
+import threading
+
+import pytest
+
+from core.runtime import TenantRuntime
+from core.telegram_sender import PRIORITY_NOTIFICATION, SendResult
+from scheduler import messenger as messenger_module
+from scheduler.messenger import Messenger
+
+
+class FakeTracker:
+    def __init__(self):
+        self.milestone_threads = []
+
+    def generate_sl_hit_message(self, pips):
+        return f"SL hit {pips}"
+
+    def generate_milestone_message(self, event):
+        self.milestone_threads.append(threading.current_thread())
+        return f"Milestone {event['milestone']}"
+
+
+@pytest.fixture
+def messenger(monkeypatch):
+    runtime = TenantRuntime(tenant_id='msg-test')
+    tracker = FakeTracker()
+    monkeypatch.setattr(runtime, 'get_milestone_tracker', lambda: tracker)
+    return Messenger(runtime)
+
+
+@pytest.mark.asyncio
+async def test_sl_hit_is_queued(messenger, monkeypatch):
+    queued, inline = [], []
+    monkeypatch.setattr(messenger_module, 'enqueue_to_channel',
+                        lambda *args, **kwargs: queued.append((args, kwargs)) or 1)
+
+    async def fake_send(text, channel_type='vip'):
+        inline.append(text)
+        return SendResult(success=True, message_id=1)
+
+    monkeypatch.setattr(messenger, '_send_channel_message', fake_send)
+
+    assert await messenger.send_sl_hit_message(-12.5) is True
+    [(args, kwargs)] = queued
+    assert args == ('msg-test', 'signal_bot', 'SL hit 12.5')
+    assert kwargs['channel_type'] == 'vip' and kwargs['priority'] == PRIORITY_NOTIFICATION
+    assert inline == []
+
+
+@pytest.mark.asyncio
+async def test_sends_inline_when_queue_unavailable(messenger, monkeypatch):
+    inline = []
+
+    def broken_enqueue(*args, **kwargs):
+        raise RuntimeError("Database connection pool not initialized")
+
+    async def fake_send(text, channel_type='vip'):
+        inline.append(text)
+        return SendResult(success=True, message_id=1)
+
+    monkeypatch.setattr(messenger_module, 'enqueue_to_channel', broken_enqueue)
+    monkeypatch.setattr(messenger, '_send_channel_message', fake_send)
+
+    assert await messenger.send_sl_hit_message(3) is True
+    assert inline == ['SL hit 3']
+
+
+@pytest.mark.asyncio
+async def test_milestone_generated_off_the_loop(messenger, monkeypatch):
+    queued = []
+    monkeypatch.setattr(messenger_module, 'enqueue_to_channel',
+                        lambda tenant_id, bot_role, text, **kwargs: queued.append(text) or 1)
+
+    assert await messenger.send_milestone_message({'milestone': 'tp1_40_motivational'}) is True
+    assert queued == ['Milestone tp1_40_motivational']
+    [thread] = messenger.milestone_tracker.milestone_threads
+    assert thread is not threading.current_thread()
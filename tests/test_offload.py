@@ -0,0 +1,82 @@
+"""
+Tests for the blocking-work offload pools and the loop-lag monitor.
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from core import offload
+
+
+class TestBlockingPool:
+    """Offloaded calls run off the loop, bounded and with a time budget."""
+
+    @pytest.mark.asyncio
+    async def test_runs_off_loop_with_concurrency_cap(self):
+        pool = offload.BlockingPool('test', max_workers=2, timeout=5)
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def work(x):
+            with lock:
+                active.append(x)
+                peak.append(len(active))
+            time.sleep(0.05)
+            with lock:
+                active.remove(x)
+            return x * 2
+
+        results = await asyncio.gather(*(pool.run(work, i) for i in range(6)))
+        pool.shutdown()
+        assert results == [0, 2, 4, 6, 8, 10]
+        assert max(peak) <= 2
+        assert pool.stats()['completed'] == 6 and pool.stats()['in_flight'] == 0
+
+    @pytest.mark.asyncio
+    async def test_timeout_raises_and_is_counted(self):
+        pool = offload.BlockingPool('test', max_workers=1, timeout=0.05)
+        with pytest.raises(offload.OffloadTimeout):
+            await pool.run(time.sleep, 0.3)
+        pool.shutdown()
+        assert pool.timeouts == 1
+
+    @pytest.mark.asyncio
+    async def test_context_vars_carry_over(self):
+        from core.db_pool import SCHEDULER, current_pool_role, pool_role
+        from core.logging import clear_request_context, get_tenant_id, set_request_context
+        pool = offload.BlockingPool('test', max_workers=1, timeout=5)
+        set_request_context(tenant_id='t1')
+        try:
+            with pool_role(SCHEDULER):
+                seen = await pool.run(lambda: (current_pool_role(), get_tenant_id()))
+        finally:
+            clear_request_context()
+            pool.shutdown()
+        assert seen == (SCHEDULER, 't1')
+
+
+class TestLoopLagMonitor:
+    """The monitor records how long the loop was blocked."""
+
+    @pytest.mark.asyncio
+    async def test_records_blocking_call(self):
+        monitor = offload.LoopLagMonitor('test', interval=0.01, warn_threshold=10)
+        task = asyncio.create_task(monitor.run())
+        await asyncio.sleep(0.02)
+        time.sleep(0.15)
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        assert monitor.max >= 0.1
+        assert monitor.stats()['samples'] >= 2
+
+    @pytest.mark.asyncio
+    async def test_one_monitor_per_loop(self):
+        first = offload.ensure_loop_lag_monitor('a')
+        second = offload.ensure_loop_lag_monitor('b')
+        assert first is second
+        first.task.cancel()
+        await asyncio.gather(first.task, return_exceptions=True)
@@ -0,0 +1,100 @@
+"""
+Tests for the pooled HTTP server (bounded worker lanes + 503 load shedding).
+"""
+import http.client
+import http.server
+import socket
+import threading
+import time
+
+import pytest
+
+from api.pooled_server import DASHBOARD_LANE, WEBHOOK_LANE, PooledHTTPServer, lane_for_path
+
+release = threading.Event()
+
+
+class BlockingHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.startswith('/slow'):
+            release.wait(5)
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'ok')
+
+    do_POST = do_GET
+
+    def log_message(self, *args):
+        pass
+
+
+def _wait_for(predicate, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def _send(port, method, path):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+    conn.request(method, path)
+    return conn
+
+
+@pytest.fixture
+def server():
+    release.clear()
+    srv = PooledHTTPServer(('127.0.0.1', 0), BlockingHandler, workers=1, webhook_workers=1,
+                           queue_size=1, retry_after=7)
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield srv
+    release.set()
+    srv.shutdown()
+    srv.server_close()
+
+
+class TestPooledHTTPServer:
+    """Saturated dashboard lane sheds load while webhooks keep flowing."""
+
+    def test_lane_for_path(self):
+        assert lane_for_path('/api/stripe/webhook') == WEBHOOK_LANE
+        assert lane_for_path('/api/bot-webhook/abc') == WEBHOOK_LANE
+        assert lane_for_path('/api/forex-stats') == DASHBOARD_LANE
+        assert lane_for_path(None) == DASHBOARD_LANE
+
+    def test_sheds_with_503_and_keeps_webhook_lane(self, server):
+        port = server.server_address[1]
+        lane = server.lanes[DASHBOARD_LANE]
+
+        running = _send(port, 'GET', '/slow/1')
+        assert _wait_for(lambda: lane.busy == 1)
+        queued = _send(port, 'GET', '/slow/2')
+        assert _wait_for(lambda: lane.queue.qsize() == 1)
+
+        shed = _send(port, 'GET', '/slow/3').getresponse()
+        assert shed.status == 503
+        assert shed.getheader('Retry-After') == '7'
+        assert lane.rejected == 1
+
+        webhook = _send(port, 'POST', '/api/stripe/webhook').getresponse()
+        assert webhook.status == 200
+
+        release.set()
+        assert running.getresponse().status == 200
+        assert queued.getresponse().status == 200
+
+    def test_silent_clients_do_not_block_accept(self, server):
+        port = server.server_address[1]
+        silent = [socket.create_connection(('127.0.0.1', port)) for _ in range(5)]
+        try:
+            started = time.monotonic()
+            response = _send(port, 'POST', '/api/stripe/webhook').getresponse()
+            assert response.status == 200
+            assert time.monotonic() - started < 0.2
+        finally:
+            for sock in silent:
+                sock.close()
@@ -0,0 +1,61 @@
+"""
+Tests for the process-wide price feed (coalescing cache + tick fan-out).
+"""
+import threading
+import time
+
+from core.runtime import TenantRuntime
+from integrations.market_data.price_feed import PriceFeedService
+
+
+class CountingFetcher:
+    def __init__(self, price=2000.0, delay=0.0):
+        self.price = price
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, symbol):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        return self.price
+
+
+class TestPriceFeed:
+    def test_many_tenants_share_one_fetch(self):
+        fetcher = CountingFetcher(delay=0.05)
+        service = PriceFeedService(fetcher, max_age_seconds=10, max_stale_seconds=30)
+
+        threads = [threading.Thread(target=service.get_price, args=('XAU/USD',)) for _ in range(20)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert fetcher.calls == 1
+        assert service.get_price('EUR/USD') == 2000.0
+        assert fetcher.calls == 2
+
+    def test_ticks_published_to_subscribed_runtimes(self):
+        service = PriceFeedService(CountingFetcher(price=2010.5), max_age_seconds=0, max_stale_seconds=30)
+        runtimes = [TenantRuntime(tenant_id=f"tenant-{i}") for i in range(3)]
+        for runtime in runtimes:
+            service.subscribe('XAU/USD', runtime)
+
+        service.get_price('XAU/USD')
+
+        assert all(r.latest_ticks['XAU/USD'].price == 2010.5 for r in runtimes)
+        assert service.stats()['XAU/USD']['subscribers'] == 3
+
+    def test_stale_tick_served_only_within_bound(self):
+        fetcher = CountingFetcher(price=2000.0)
+        service = PriceFeedService(fetcher, max_age_seconds=0, max_stale_seconds=30)
+        assert service.get_price('XAU/USD') == 2000.0
+
+        fetcher.price = None
+        assert service.get_price('XAU/USD') == 2000.0
+
+        service.get_feed('XAU/USD').max_stale_seconds = 0
+        time.sleep(0.01)
+        assert service.get_price('XAU/USD') is None
@@ -0,0 +1,168 @@
+"""
+Tests for prepared statements and compiled row mappers (core/query_layer.py)
+and their use by db.get_forex_signals / db.get_forex_signal_by_id.
+"""
+import os
+import sys
+from contextlib import contextmanager
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+from psycopg2 import errors
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.query_layer import FLOAT, ISO, RAW, PreparedStatement, Record, RowMapper, default
+
+
+class FakeConnection:
+    def __init__(self):
+        self.server_prepared = set()
+        self.rollbacks = 0
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+class FakeCursor:
+    def __init__(self, connection, rows=()):
+        self.connection = connection
+        self.rows = list(rows)
+        self.calls = []
+
+    def execute(self, sql, params=None):
+        self.calls.append((sql, params))
+        if sql.startswith('PREPARE '):
+            self.connection.server_prepared.add(sql.split()[1])
+        elif sql.startswith('EXECUTE '):
+            if sql.split()[1] not in self.connection.server_prepared:
+                raise errors.InvalidSqlStatementName("prepared statement does not exist")
+
+    def fetchall(self):
+        return self.rows
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+
+@pytest.fixture
+def prepared_on(monkeypatch):
+    monkeypatch.setenv('DB_PREPARED_STATEMENTS', '1')
+
+
+def test_statement_numbers_placeholders():
+    statement = PreparedStatement('q1', "SELECT a FROM t WHERE x = %s AND y = %s LIMIT %s")
+    assert statement.prepare_sql == "PREPARE q1 AS SELECT a FROM t WHERE x = $1 AND y = $2 LIMIT $3"
+    assert statement.execute_sql == "EXECUTE q1 (%s, %s, %s)"
+
+
+def test_prepared_once_per_connection(prepared_on):
+    statement = PreparedStatement('q2', "SELECT 1 WHERE %s")
+    conn = FakeConnection()
+    for _ in range(3):
+        statement.execute(FakeCursor(conn), (True,))
+    cursor = FakeCursor(conn)
+    statement.execute(cursor, (True,))
+    assert cursor.calls == [("EXECUTE q2 (%s)", (True,))]
+
+    other = FakeCursor(FakeConnection())
+    statement.execute(other, (True,))
+    assert [sql.split()[0] for sql, _ in other.calls] == ['PREPARE', 'EXECUTE']
+
+
+def test_lost_statement_prepared_again(prepared_on):
+    statement = PreparedStatement('q3', "SELECT 1")
+    conn = FakeConnection()
+    statement.execute(FakeCursor(conn))
+    conn.server_prepared.clear()
+
+    cursor = FakeCursor(conn)
+    statement.execute(cursor)
+    assert [sql.split()[0] for sql, _ in cursor.calls] == ['EXECUTE', 'PREPARE', 'EXECUTE']
+    assert conn.rollbacks == 1
+
+
+def test_disabled_runs_plain_sql(monkeypatch):
+    monkeypatch.setenv('DB_PREPARED_STATEMENTS', '0')
+    cursor = FakeCursor(FakeConnection())
+    PreparedStatement('q4', "SELECT %s").execute(cursor, (1,))
+    assert cursor.calls == [("SELECT %s", (1,))]
+
+
+MAPPER = RowMapper('Sample', [
+    ('id', RAW),
+    ('price', FLOAT),
+    ('posted_at', ISO),
+    ('bot_type', default('custom')),
+    ('count', default(0)),
+])
+
+
+def test_dict_mapper_conversions():
+    columns, to_dict, _ = MAPPER.for_columns()
+    assert columns == ('id', 'price', 'posted_at', 'bot_type', 'count')
+    when = datetime(2026, 1, 2, 3, 4, 5)
+    assert to_dict((7, Decimal('1.5'), when, None, None)) == {
+        'id': 7, 'price': 1.5, 'posted_at': when.isoformat(), 'bot_type': 'custom', 'count': 0
+    }
+    assert to_dict((7, 0, None, 'aggressive', 3))['price'] is None
+
+
+def test_record_mapper_for_column_subset():
+    columns, _, to_record = MAPPER.for_columns(('price', 'id'))
+    record = to_record((Decimal('2.25'), 9))
+    assert isinstance(record, Record) and not hasattr(record, '__dict__')
+    assert record.id == 9 and record['price'] == 2.25
+    assert record.get('bot_type', 'missing') == 'missing'
+    assert 'id' in record and 'count' not in record
+    assert record.to_dict() == {'price': 2.25, 'id': 9}
+    with pytest.raises(KeyError):
+        record['count']
+
+
+def test_mappers_compiled_once_and_unknown_columns_rejected():
+    assert MAPPER.for_columns(('id',)) is MAPPER.for_columns(('id',))
+    with pytest.raises(ValueError):
+        MAPPER.for_columns(('id', 'nope'))
+
+
+def test_get_forex_signals_uses_prepared_subset(prepared_on, monkeypatch):
+    import db
+    conn = FakeConnection()
+    cursor = FakeCursor(conn, rows=[(12, Decimal('2650.5'))])
+    conn.cursor = lambda: cursor
+
+    @contextmanager
+    def get_connection(tenant_id=None):
+        yield conn
+
+    monkeypatch.setattr(db, 'db_pool', SimpleNamespace(connection_pool=object(), get_connection=get_connection))
+    signals = db.get_forex_signals('tenant_a', status='pending', limit=1,
+                                   columns=('id', 'entry_price'), as_records=True)
+
+    assert [(s.id, s['entry_price']) for s in signals] == [(12, 2650.5)]
+    prepare_sql, execute = cursor.calls[0][0], cursor.calls[1]
+    assert 'SELECT id, entry_price' in prepare_sql and 'tenant_id = $1 AND status = $2' in prepare_sql
+    assert execute[1] == ('tenant_a', 'pending', 1)
+
+
+def test_get_forex_signal_by_id_full_row_matches_columns(prepared_on, monkeypatch):
+    import db
+    conn = FakeConnection()
+    row = [None] * len(db.FOREX_SIGNAL_ROWS.all_columns)
+    row[0] = 5
+    cursor = FakeCursor(conn, rows=[tuple(row)])
+    conn.cursor = lambda: cursor
+
+    @contextmanager
+    def get_connection(tenant_id=None):
+        yield conn
+
+    monkeypatch.setattr(db, 'db_pool', SimpleNamespace(connection_pool=object(), get_connection=get_connection))
+    signal = db.get_forex_signal_by_id(5, 'tenant_a')
+
+    assert signal['id'] == 5 and signal['bot_type'] == 'custom' and signal['tp1_percentage'] == 100
+    assert len(signal) == 46
+    assert cursor.calls[1][1] == (5, 'tenant_a')
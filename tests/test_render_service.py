@@ -0,0 +1,50 @@
+"""
+Tests for the process-pool render service.
+"""
+import time
+from datetime import datetime
+
+import pytest
+
+from core.render_service import RenderQueueFull, RenderService, RenderTimeout, render_trade_win_png
+from showcase.trade_win_generator import TradeWinData
+
+PNG_MAGIC = b'\x89PNG'
+
+
+def _trades():
+    return [TradeWinData('XAU/USD', 'BUY', 1.0, 2000.0, 2005.0, 500.0, datetime(2026, 1, 5, 9, 30))]
+
+
+class TestRenderService:
+    """Renders run in worker processes and return PNG bytes."""
+
+    @pytest.mark.asyncio
+    async def test_renders_in_worker_process(self):
+        service = RenderService(workers=1, queue_size=1, timeout=60)
+        try:
+            png = await service.render_async(render_trade_win_png, _trades())
+            assert png.startswith(PNG_MAGIC)
+            assert service.render(render_trade_win_png, _trades()) == png
+            assert service.stats()['completed'] == 2
+        finally:
+            service.shutdown()
+
+    def test_bounded_queue_and_timeout(self):
+        service = RenderService(workers=1, queue_size=1, timeout=0.2)
+        try:
+            running = service.submit(time.sleep, 2)
+            queued = service.submit(time.sleep, 0)
+            with pytest.raises(RenderQueueFull):
+                service.submit(time.sleep, 0)
+            assert service.stats()['rejected'] == 1
+            queued.cancel()
+            with pytest.raises(RenderTimeout):
+                service.render(time.sleep, 0)
+            running.cancel()
+        finally:
+            service.shutdown()
+
+    def test_inline_mode_without_workers(self):
+        service = RenderService(workers=0, queue_size=0, timeout=5)
+        assert service.render(render_trade_win_png, _trades()).startswith(PNG_MAGIC)
@@ -0,0 +1,137 @@
+"""
+Tests for the cohort retention engine and the /api/retention-rates cohort view.
+"""
+import json
+import sys
+from contextlib import contextmanager
+from datetime import date, timedelta
+from io import BytesIO
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+import db
+from db import database_url_is_set, can_connect
+
+TENANT = "tenant_test_retention"
+
+
+def _call(monkeypatch, path, fake_db):
+    from domains.coupons import handlers
+    monkeypatch.setitem(sys.modules, 'server', SimpleNamespace(db=fake_db))
+    handler = MagicMock()
+    handler.path = path
+    handler.tenant_id = 't1'
+    handler.wfile = BytesIO()
+    handlers.handle_retention_rates(handler)
+    return handler, json.loads(handler.wfile.getvalue())
+
+
+class TestRetentionEndpoint:
+    """The endpoint keeps its Day 1/7/30 shape and adds a cohort grid view."""
+
+    def test_default_returns_rates(self, monkeypatch):
+        fake_db = MagicMock()
+        fake_db.get_retention_rates.return_value = {'day1': 10.0, 'day7': 5.0, 'day30': 1.0}
+        handler, body = _call(monkeypatch, '/api/retention-rates', fake_db)
+        handler.send_response.assert_called_with(200)
+        assert body == {'day1': 10.0, 'day7': 5.0, 'day30': 1.0}
+        fake_db.get_retention_cohorts.assert_not_called()
+
+    def test_cohort_view(self, monkeypatch):
+        fake_db = MagicMock()
+        fake_db.get_retention_cohorts.return_value = {'period': 'day', 'periods': 3, 'cohorts': []}
+        handler, body = _call(monkeypatch, '/api/retention-rates?view=cohorts&period=day&periods=3', fake_db)
+        handler.send_response.assert_called_with(200)
+        fake_db.get_retention_cohorts.assert_called_once_with('t1', period='day', periods=3)
+        assert body['period'] == 'day'
+
+    def test_cohort_view_rejects_bad_period(self, monkeypatch):
+        fake_db = MagicMock()
+        fake_db.get_retention_cohorts.side_effect = ValueError("Invalid period")
+        handler, body = _call(monkeypatch, '/api/retention-rates?view=cohorts&period=year', fake_db)
+        handler.send_response.assert_called_with(400)
+
+
+class TestRetentionEngine:
+    """Curves and grids come from bot_user_activity (needs a database)."""
+
+    @classmethod
+    def setup_class(cls):
+        if not database_url_is_set() or not can_connect():
+            pytest.skip("DATABASE_URL not set or DB unreachable")
+        if not db.db_pool.connection_pool:
+            db.db_pool.initialize_pool()
+
+    def test_curve_and_grid(self):
+        today = date.today()
+        users = {
+            1: (today - timedelta(days=70), [1, 8, 35]),
+            2: (today - timedelta(days=70), [2]),
+            3: (today - timedelta(days=3), [1]),
+        }
+        with db.db_pool.get_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                for chat_id, (first_day, offsets) in users.items():
+                    cursor.execute("""
+                        INSERT INTO bot_users (tenant_id, chat_id, first_used, last_used)
+                        VALUES (%s, %s, %s, %s)
+                    """, (TENANT, chat_id, first_day, first_day))
+                    for offset in offsets:
+                        cursor.execute("""
+                            INSERT INTO bot_user_activity (tenant_id, chat_id, active_day) VALUES (%s, %s, %s)
+                        """, (TENANT, chat_id, first_day + timedelta(days=offset)))
+                conn.commit()
+
+                curve = db.get_retention_curve(TENANT, (1, 7, 30))
+                assert curve[1] == {'cohort': 3, 'returned': 2, 'rate': 66.7}
+                assert curve[7]['returned'] == 1 and curve[7]['cohort'] == 2
+                assert curve[30]['rate'] == 50.0
+
+                grid = db.get_retention_cohorts(TENANT, period='day', periods=5)
+                assert grid['cohorts'][0]['size'] == 1
+                # Day 3 after first use is today, so that cell is still open
+                assert grid['cohorts'][0]['retention'][:4] == [100.0, 100.0, 0.0, None]
+            finally:
+                conn.rollback()
+                cursor.execute("DELETE FROM bot_user_activity WHERE tenant_id = %s", (TENANT,))
+                cursor.execute("DELETE FROM bot_users WHERE tenant_id = %s", (TENANT,))
+                conn.commit()
+
+
+class TestCohortCompleteness:
+    """A cell stays open until the cohort's last possible joiner has lived through it."""
+
+    @staticmethod
+    def _grid(monkeypatch, rows, today, **kwargs):
+        cursor = MagicMock()
+        cursor.fetchall.return_value = rows
+        cursor.fetchone.return_value = (today,)
+        conn = MagicMock()
+        conn.cursor.return_value = cursor
+
+        @contextmanager
+        def get_connection(tenant_id=None):
+            yield conn
+
+        monkeypatch.setattr(db, 'db_pool', SimpleNamespace(connection_pool=object(), get_connection=get_connection))
+        return db.get_retention_cohorts(TENANT, **kwargs), cursor
+
+    def test_mid_cohort_joiner_holds_back_cell(self, monkeypatch):
+        # Week cohort Mon 2024-01-01..Sun 2024-01-07; a user who joins on Sunday
+        # is still inside week 1 until Sunday 2024-01-21
+        cohort = date(2024, 1, 1)
+        rows = [(cohort, None, 2), (cohort, 1, 1)]
+        grid, cursor = self._grid(monkeypatch, rows, date(2024, 1, 20), period='week', periods=4)
+        assert grid['cohorts'][0]['retention'] == [100.0, None, None, None]
+
+        grid, _ = self._grid(monkeypatch, rows, date(2024, 1, 21), period='week', periods=4)
+        assert grid['cohorts'][0]['retention'] == [100.0, 50.0, None, None]
+
+    def test_month_cohorts_are_thirty_day_blocks(self, monkeypatch):
+        _, cursor = self._grid(monkeypatch, [], date(2024, 1, 20), period='month', periods=3)
+        sql, params = cursor.execute.call_args_list[0][0]
+        assert 'date_trunc' not in sql
+        assert params['days'] == 30 and params['span'] == 60
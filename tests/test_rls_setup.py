@@ -255,7 +255,7 @@ class TestRLSIsolation:
         import db as db_module
         
         if not self._is_rls_enforced(db_module):
-            pytest.skip("RLS not enforced at database level - run migrations/rls_phase2.sql first")
+            pytest.skip("RLS not enforced at database level - apply migrations/versions/0002_rls_phase2.sql first")
         
         original_value = os.environ.get('ENABLE_RLS')
         
@@ -300,7 +300,7 @@ class TestRLSIsolation:
         import db as db_module
         
         if not self._is_rls_enforced(db_module):
-            pytest.skip("RLS not enforced at database level - run migrations/rls_phase2.sql first")
+            pytest.skip("RLS not enforced at database level - apply migrations/versions/0002_rls_phase2.sql first")
         
         original_value = os.environ.get('ENABLE_RLS')
         
@@ -344,7 +344,7 @@ class TestRLSIsolation:
         import db as db_module
         
         if not self._is_rls_enforced(db_module):
-            pytest.skip("RLS not enforced at database level - run migrations/rls_phase2.sql first")
+            pytest.skip("RLS not enforced at database level - apply migrations/versions/0002_rls_phase2.sql first")
         
         original_value = os.environ.get('ENABLE_RLS')
         
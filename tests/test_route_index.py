@@ -0,0 +1,48 @@
+"""
+Tests for the compiled route index.
+"""
+import pytest
+
+from api.routes import ROUTE_TABLES, RouteIndex, get_route_index, match_route
+
+SUFFIXES = ['', '42', '42/', '42/steps', '42/steps/7', '42/analytics', '42/submit',
+            '42/publish', '42/status', '42/steps/insert', 'x/y/z']
+
+
+def _sample_paths():
+    paths = {'/', '/unknown', '/api/', '/api/nope'}
+    for routes in ROUTE_TABLES.values():
+        for route in routes:
+            base = route.path
+            paths.add(base)
+            paths.add(base.rstrip('/'))
+            if base.endswith('/'):
+                paths.update(base + suffix for suffix in SUFFIXES)
+    return sorted(paths)
+
+
+class TestRouteIndex:
+    """RouteIndex agrees with the linear match_route scan."""
+
+    @pytest.mark.parametrize('method', sorted(ROUTE_TABLES))
+    def test_same_route_as_linear_scan(self, method):
+        routes = ROUTE_TABLES[method]
+        index = RouteIndex(routes)
+        for path in _sample_paths():
+            match = index.match(method, path)
+            expected = match_route(method, path, routes)
+            assert (match.route if match else None) is expected, path
+
+    def test_contains_precedence(self):
+        index = get_route_index('GET')
+        assert index.match('GET', '/api/journeys/5/steps').route.handler == 'handle_api_journey_steps_get'
+        assert index.match('GET', '/api/journeys/5').route.handler == 'handle_api_journey_get'
+        assert index.match('GET', '/api/journeys/user-account').route.handler == 'handle_api_journey_user_account'
+
+    def test_captures_path_params(self):
+        match = get_route_index('PUT').match('PUT', '/api/hypechat/flows/f1/steps/s9')
+        assert match.route.handler == 'handle_api_hypechat_flow_step_update'
+        assert match.params == {'flow_id': 'f1', 'step_id': 's9'}
+
+        match = get_route_index('GET').match('GET', '/api/campaigns/12/submissions')
+        assert match.params == {'campaign_id': '12'}
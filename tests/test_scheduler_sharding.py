@@ -212,3 +212,104 @@ class TestFailureIsolation:
             for other_shard in range(total_shards):
                 if other_shard != expected_shard:
                     assert tenant_in_shard(tenant_id, other_shard, total_shards) is False
+
+
+class TestMultiTenantScheduler:
+    """Tests for continuous multi-tenant mode task reconciliation."""
+    
+    @pytest.mark.asyncio
+    async def test_reconcile_starts_and_cancels_tenant_tasks(self):
+        """New tenants get a task, removed tenants are cancelled."""
+        import asyncio
+        from forex_scheduler import MultiTenantScheduler
+        
+        supervisor = MultiTenantScheduler()
+        
+        async def fake_run_tenant(tenant_id):
+            await asyncio.sleep(3600)
+        
+        supervisor._run_tenant = fake_run_tenant
+        
+        await supervisor.reconcile(['alpha', 'beta'])
+        assert set(supervisor.tasks) == {'alpha', 'beta'}
+        beta_task = supervisor.tasks['beta']
+        
+        await supervisor.reconcile(['alpha', 'gamma'])
+        assert set(supervisor.tasks) == {'alpha', 'gamma'}
+        assert beta_task.cancelled()
+        
+        await supervisor.shutdown()
+        assert supervisor.tasks == {}
+    
+    def test_desired_tenants_respects_shard(self):
+        """Only tenants in this process's shard are scheduled."""
+        from forex_scheduler import MultiTenantScheduler
+        
+        tenants = ['alpha', 'beta', 'gamma', 'delta', 'epsilon']
+        supervisor = MultiTenantScheduler(shard_index=1, total_shards=3)
+        
+        assert supervisor.desired_tenants(tenants) == {t for t in tenants if tenant_in_shard(t, 1, 3)}
+
+
+class TestTenantLeases:
+    """Tests for lease-based tenant balancing across scheduler nodes."""
+    
+    def test_assign_tenants_partitions_and_moves_minimally(self):
+        """Every tenant has exactly one owner; a joining node only takes tenants."""
+        from scheduler.leases import assign_tenants
+        
+        tenants = [f"tenant-{i}" for i in range(300)]
+        nodes = ['node-a', 'node-b', 'node-c']
+        owned = {n: assign_tenants(tenants, nodes, n) for n in nodes}
+        
+        assert set().union(*owned.values()) == set(tenants)
+        assert sum(len(v) for v in owned.values()) == len(tenants)
+        assert all(len(v) > 50 for v in owned.values())
+        
+        grown = nodes + ['node-d']
+        for n in nodes:
+            assert assign_tenants(tenants, grown, n) <= owned[n]
+    
+    @pytest.mark.asyncio
+    async def test_reconcile_releases_lease_after_stopping_task(self):
+        """Tenants no longer leased are stopped first, then released."""
+        import asyncio
+        from forex_scheduler import MultiTenantScheduler
+        
+        events = []
+        
+        class FakeLeaseManager:
+            node_id = 'node-a'
+            lease_ttl = 60
+            owned = {'alpha', 'beta'}
+            
+            def sync(self, tenants):
+                return self.owned & set(tenants)
+            
+            def release(self, tenants):
+                events.append(('release', set(tenants)))
+            
+            def deregister(self):
+                events.append(('deregister',))
+        
+        lease_manager = FakeLeaseManager()
+        supervisor = MultiTenantScheduler(lease_manager=lease_manager)
+        
+        async def fake_run_tenant(tenant_id):
+            try:
+                await asyncio.sleep(3600)
+            finally:
+                events.append(('stopped', tenant_id))
+        
+        supervisor._run_tenant = fake_run_tenant
+        
+        await supervisor.reconcile(['alpha', 'beta', 'gamma'])
+        assert set(supervisor.tasks) == {'alpha', 'beta'}
+        
+        lease_manager.owned = {'alpha'}
+        await supervisor.reconcile(['alpha', 'beta', 'gamma'])
+        assert set(supervisor.tasks) == {'alpha'}
+        assert events == [('stopped', 'beta'), ('release', {'beta'})]
+        
+        await supervisor.shutdown()
+        assert events[-1] == ('deregister',)
@@ -0,0 +1,150 @@
+"""
+Tests for the versioned migration runner (migrations/runner.py).
+
+Uses a fake pool that understands the runner's few schema_migrations
+statements, so no database is needed.
+"""
+import os
+import sys
+from contextlib import contextmanager
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from migrations import runner
+
+
+class FakeCursor:
+    def __init__(self, db):
+        self.db = db
+        self._result = []
+
+    def execute(self, sql, params=None):
+        self.db.statements.append(sql.strip())
+        text = ' '.join(sql.split())
+        if text.startswith('SELECT COALESCE(MAX(version), 0) FROM schema_migrations'):
+            if self.db.applied is None:
+                raise RuntimeError('relation "schema_migrations" does not exist')
+            self._result = [(max(self.db.applied, default=0),)]
+        elif text.startswith('CREATE TABLE IF NOT EXISTS schema_migrations'):
+            if self.db.applied is None:
+                self.db.applied = set()
+        elif text.startswith('SELECT version FROM schema_migrations'):
+            self._result = [(v,) for v in sorted(self.db.applied)]
+        elif text.startswith('INSERT INTO schema_migrations'):
+            self.db.applied.add(params[0])
+        elif text.startswith('SELECT pg_advisory_lock'):
+            self.db.locks += 1
+        elif text.startswith('SELECT pg_advisory_unlock'):
+            self.db.locks -= 1
+        else:
+            self.db.scripts.append(text)
+
+    def fetchone(self):
+        return self._result[0] if self._result else None
+
+    def fetchall(self):
+        return list(self._result)
+
+
+class FakeConn:
+    def __init__(self, db):
+        self.db = db
+
+    def cursor(self):
+        return FakeCursor(self.db)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+class FakePool:
+    def __init__(self, applied=None):
+        self.applied = applied
+        self.statements = []
+        self.scripts = []
+        self.locks = 0
+
+    @contextmanager
+    def get_connection(self):
+        yield FakeConn(self)
+
+
+@pytest.fixture
+def versions_dir(tmp_path):
+    (tmp_path / '0001_baseline.sql').write_text("CREATE TABLE IF NOT EXISTS a (id INT);\n")
+    (tmp_path / '0002_policies.sql').write_text("-- migrate: manual\nALTER TABLE a ENABLE ROW LEVEL SECURITY;\n")
+    (tmp_path / '0003_add_b.py').write_text(
+        "def upgrade(conn, pool):\n"
+        "    conn.cursor().execute('CREATE TABLE IF NOT EXISTS b (id INT)')\n"
+    )
+    (tmp_path / 'README.txt').write_text("not a migration")
+    return str(tmp_path)
+
+
+def test_repo_migrations_baseline_auto_rls_manual():
+    migrations = runner.discover()
+    by_version = {m.version: m for m in migrations}
+    assert by_version[1].name == 'baseline' and not by_version[1].manual
+    assert by_version[2].name == 'rls_phase2' and by_version[2].manual
+    assert [m.version for m in migrations] == sorted(by_version)
+
+
+def test_discover_orders_and_flags_manual(versions_dir):
+    migrations = runner.discover(versions_dir)
+    assert [(m.version, m.manual) for m in migrations] == [(1, False), (2, True), (3, False)]
+    assert runner.latest_automatic_version(migrations) == 3
+
+
+def test_duplicate_version_rejected(versions_dir):
+    with open(os.path.join(versions_dir, '0003_other.sql'), 'w') as f:
+        f.write("SELECT 1;")
+    with pytest.raises(ValueError):
+        runner.discover(versions_dir)
+
+
+def test_fresh_database_applies_automatic_migrations_in_order(versions_dir):
+    pool = FakePool(applied=None)
+    applied = runner.migrate(pool, migrations=runner.discover(versions_dir))
+
+    assert applied == [1, 3]
+    assert pool.applied == {1, 3}
+    assert pool.scripts == [
+        'CREATE TABLE IF NOT EXISTS a (id INT);',
+        'CREATE TABLE IF NOT EXISTS b (id INT)',
+    ]
+    assert pool.locks == 0
+    statements = [' '.join(sql.split()) for sql in pool.statements]
+    lock = next(i for i, sql in enumerate(statements) if sql.startswith('SELECT pg_advisory_lock'))
+    create = next(i for i, sql in enumerate(statements) if sql.startswith('CREATE TABLE IF NOT EXISTS schema_migrations'))
+    assert lock < create
+
+
+def test_fast_path_is_a_single_query_when_current(versions_dir):
+    pool = FakePool(applied={1, 3})
+    assert runner.migrate(pool, migrations=runner.discover(versions_dir)) == []
+    assert len(pool.statements) == 1
+
+
+def test_only_missing_migrations_applied(versions_dir):
+    pool = FakePool(applied={1})
+    assert runner.migrate(pool, migrations=runner.discover(versions_dir)) == [3]
+
+
+def test_manual_migration_applied_on_request(versions_dir):
+    pool = FakePool(applied={1, 3})
+    applied = runner.migrate(pool, include_manual=True, migrations=runner.discover(versions_dir))
+    assert applied == [2]
+    assert pool.scripts == ['-- migrate: manual ALTER TABLE a ENABLE ROW LEVEL SECURITY;']
+
+
+def test_status_reports_applied_and_manual(versions_dir):
+    pool = FakePool(applied={1})
+    rows = runner.status(pool, migrations=runner.discover(versions_dir))
+    assert [(r['version'], r['applied'], r['manual']) for r in rows] == [
+        (1, True, False), (2, False, True), (3, False, False)
+    ]
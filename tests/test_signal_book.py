@@ -0,0 +1,73 @@
+"""
+Tests for the array-backed open signal book and vectorized evaluator.
+"""
+from datetime import datetime, timedelta
+
+from core.signal_book import OpenSignalBook, evaluate_books
+
+NOW = datetime(2024, 1, 2, 12, 0, 0)
+
+
+def _signal(signal_id, signal_type='BUY', entry=2000.0, tp1=2010.0, tp2=None, tp3=None,
+            sl=1990.0, hours_ago=1, **flags):
+    signal = {
+        'id': signal_id,
+        'signal_type': signal_type,
+        'entry_price': entry,
+        'take_profit': tp1,
+        'take_profit_2': tp2,
+        'take_profit_3': tp3,
+        'stop_loss': sl,
+        'effective_sl': None,
+        'posted_at': NOW - timedelta(hours=hours_ago),
+    }
+    signal.update(flags)
+    return signal
+
+
+class TestOpenSignalBook:
+    """Event masks follow the sequential TP/SL/timeout rules."""
+
+    def test_event_masks(self):
+        book = OpenSignalBook([
+            _signal(1),                                               # tp1, single TP closes
+            _signal(2, tp2=2011.0, tp3=2020.0),                       # tp1 only, stays open
+            _signal(3, tp2=2011.0, tp3=2012.0, tp1_hit=True, tp2_hit=True),  # tp3
+            _signal(4, hours_ago=4),                                  # timeout wins over tp1
+            _signal(5, signal_type='SELL', entry=2020.0, tp1=2000.0, sl=2011.0),  # sl
+            _signal(6, tp1=2014.0),                                   # 85% to tp1 -> breakeven
+        ])
+        events = book.evaluate(2012.0, NOW)
+
+        assert events.tp1.tolist() == [True, True, False, False, False, False]
+        assert events.tp3.tolist() == [False, False, True, False, False, False]
+        assert events.timeout.tolist() == [False, False, False, True, False, False]
+        assert events.sl.tolist() == [False, False, False, False, True, False]
+        assert events.closed_on_tp.tolist() == [True, False, True, False, False, False]
+        assert events.breakeven.tolist() == [False, False, False, False, False, True]
+        assert events.rows().tolist() == [0, 1, 2, 3, 4]
+
+    def test_effective_sl_overrides_original(self):
+        book = OpenSignalBook([_signal(1, effective_sl=2005.0)])
+        assert book.evaluate(2004.0, NOW).sl.tolist() == [True]
+        assert book.has_effective_sl.tolist() == [True]
+
+    def test_is_current_tracks_signal_changes(self):
+        signals = [_signal(1), _signal(2, tp2=2011.0)]
+        book = OpenSignalBook(signals)
+        assert book.is_current([dict(s) for s in signals])
+        assert not book.is_current([signals[0], dict(signals[1], tp1_hit=True)])
+        assert not book.is_current(signals[:1])
+
+    def test_evaluate_books_matches_per_tenant(self):
+        books = {
+            'tenant-a': OpenSignalBook([_signal(1), _signal(2, tp1=2050.0)], tenant_id='tenant-a'),
+            'tenant-b': OpenSignalBook([_signal(3, signal_type='SELL', entry=2020.0, tp1=2000.0, sl=2011.0)],
+                                       tenant_id='tenant-b'),
+        }
+        combined = evaluate_books(books, 2012.0, NOW)
+
+        for tenant_id, book in books.items():
+            alone = book.evaluate(2012.0, NOW)
+            assert combined[tenant_id].tp1.tolist() == alone.tp1.tolist()
+            assert combined[tenant_id].sl.tolist() == alone.sl.tolist()
@@ -0,0 +1,162 @@
+"""
+Tests for batched signal-state writes in ForexSignalEngine.monitor_active_signals.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+import forex_signals
+from forex_signals import ForexSignalEngine
+
+
+def _signal(signal_id, signal_type='BUY', entry=2000.0, tp1=2010.0, tp2=None, tp3=None,
+            sl=1990.0, hours_ago=1, **flags):
+    signal = {
+        'id': signal_id,
+        'signal_type': signal_type,
+        'entry_price': entry,
+        'take_profit': tp1,
+        'take_profit_2': tp2,
+        'take_profit_3': tp3,
+        'stop_loss': sl,
+        'effective_sl': None,
+        'posted_at': datetime.utcnow() - timedelta(hours=hours_ago),
+    }
+    signal.update(flags)
+    return signal
+
+
+class _FakeFeed:
+    def __init__(self, price):
+        self.price = price
+
+    def get_price(self, symbol):
+        return self.price
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    engine = ForexSignalEngine.__new__(ForexSignalEngine)
+    engine.symbol = 'XAU/USD'
+    engine.tenant_id = 'tenant-a'
+    engine._signal_book = None
+    monkeypatch.setattr(forex_signals, 'get_price_feed', lambda: _FakeFeed(2012.0))
+    return engine
+
+
+class TestMonitorBatch:
+    """All transitions of a pass are written in one batch before events are returned."""
+
+    @pytest.mark.asyncio
+    async def test_one_batch_per_pass(self, engine, monkeypatch):
+        signals = [
+            _signal(1),                                        # single TP -> tp1 + close
+            _signal(2, tp2=2011.0, tp3=2020.0, tp1_hit=True),  # tp2 hit, stays open
+            _signal(3, hours_ago=5),                           # timeout
+            _signal(4, signal_type='SELL', entry=2020.0, tp1=2000.0, sl=2010.0),  # SL hit
+        ]
+        monkeypatch.setattr(forex_signals, 'get_forex_signals', lambda tenant_id, status: signals)
+        calls = []
+        monkeypatch.setattr(forex_signals, 'apply_signal_state_batch',
+                            lambda tenant_id, **kw: calls.append((tenant_id, kw)) or 0)
+
+        updates = await engine.monitor_active_signals()
+
+        assert len(calls) == 1
+        tenant_id, batch = calls[0]
+        assert tenant_id == 'tenant-a'
+        assert batch['tp_hits'] == [(1, 1), (2, 2)]
+        assert [(c[0], c[1]) for c in batch['closes']] == [(1, 'won'), (3, 'won'), (4, 'won')]
+        assert [u.get('event') for u in updates] == ['tp1_hit', None, 'tp2_hit', 'timeout', 'sl_hit_profit_locked']
+
+    @pytest.mark.asyncio
+    async def test_no_events_when_batch_fails(self, engine, monkeypatch):
+        monkeypatch.setattr(forex_signals, 'get_forex_signals', lambda tenant_id, status: [_signal(1)])
+
+        def failing_batch(tenant_id, **kw):
+            raise RuntimeError("db down")
+
+        monkeypatch.setattr(forex_signals, 'apply_signal_state_batch', failing_batch)
+
+        assert await engine.monitor_active_signals() == []
+
+
+class _FakeTracker:
+    def check_milestones(self, signal, price):
+        return {'milestone': 'tp1_70_breakeven', 'milestone_key': 'tp1_70',
+                'entry_price': signal['entry_price']}
+
+
+class _FakeDb:
+    def __init__(self):
+        self.per_signal_writes = []
+
+    def update_milestone_sent(self, signal_id, milestone_key, tenant_id):
+        return True
+
+    def update_signal_breakeven(self, *args, **kwargs):
+        self.per_signal_writes.append('breakeven')
+
+    def update_effective_sl(self, *args, **kwargs):
+        self.per_signal_writes.append('effective_sl')
+
+
+class _FakeMessenger:
+    async def send_milestone_message(self, event):
+        return True
+
+
+class TestGuidanceBreakevenBatch:
+    """Breakevens from milestone guidance go through the pass's SignalStateBatch."""
+
+    @pytest.mark.asyncio
+    async def test_breakevens_written_in_one_batch(self, monkeypatch):
+        from core.runtime import TenantRuntime
+        from scheduler.monitor import SignalMonitor
+
+        runtime = TenantRuntime(tenant_id='tenant-a')
+        fake_db = _FakeDb()
+        runtime._db_module = fake_db
+        monkeypatch.setattr(runtime, 'get_forex_signals', lambda status: [_signal(1), _signal(2, entry=2001.0)])
+        monkeypatch.setattr(runtime, 'get_milestone_tracker', lambda: _FakeTracker())
+        calls = []
+        monkeypatch.setattr(forex_signals, 'apply_signal_state_batch',
+                            lambda tenant_id, **kw: calls.append((tenant_id, kw)) or 0)
+
+        monitor = SignalMonitor(runtime, _FakeMessenger())
+        monitor._last_price = 2007.0
+        await monitor.run_signal_guidance()
+
+        assert calls == [('tenant-a', {'tp_hits': [], 'breakevens': [(1, 2000.0), (2, 2001.0)], 'closes': []})]
+        assert fake_db.per_signal_writes == []
+
+
+def test_batch_breakeven_moves_effective_sl(monkeypatch):
+    import db
+
+    statements = []
+
+    class Cursor:
+        rowcount = 1
+
+        def execute(self, sql, params=None):
+            statements.append(sql)
+
+    class Conn:
+        def cursor(self):
+            return Cursor()
+
+        def commit(self):
+            pass
+
+    class Pool:
+        def get_connection(self):
+            from contextlib import nullcontext
+            return nullcontext(Conn())
+
+    monkeypatch.setattr(db, 'db_pool', Pool())
+    monkeypatch.setattr('psycopg2.extras.execute_values',
+                        lambda cursor, sql, rows, template=None: cursor.execute(sql, rows))
+    assert db.apply_signal_state_batch('tenant-a', breakevens=[(1, 2000.0)]) == 1
+    [sql] = statements
+    assert 'breakeven_set = TRUE' in sql and 'effective_sl = v.breakeven_price' in sql
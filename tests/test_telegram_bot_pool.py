@@ -0,0 +1,122 @@
+"""
+Tests for the pooled Telegram Bot clients in core.telegram_sender.
+"""
+import asyncio
+
+import pytest
+
+import core.telegram_sender as sender
+
+
+class FakeRequest:
+    def __init__(self):
+        self.shutdowns = 0
+
+    async def shutdown(self):
+        self.shutdowns += 1
+
+
+class FakeBot:
+    def __init__(self, token):
+        self.token = token
+        self.initialized = False
+        self.request = FakeRequest()
+
+    async def initialize(self):
+        self.initialized = True
+
+    @property
+    def shutdowns(self):
+        return self.request.shutdowns
+
+
+def fake_client(token):
+    bot = FakeBot(token)
+    return sender.PooledBotClient(bot, (bot.request,))
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(sender, 'BOT_EVICT_GRACE_SECONDS', 0)
+    pool = sender.BotClientPool()
+    monkeypatch.setattr(pool, '_new_client', fake_client)
+    return pool
+
+
+async def _drain():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class TestBotClientPool:
+    """Bots are reused per token and shut down on rotation/invalidation."""
+
+    @pytest.mark.asyncio
+    async def test_reuses_bot_per_token_without_get_me(self, pool):
+        first = await pool.get('1:a')
+        assert not first.initialized
+        assert await pool.get('1:a') is first
+        assert await pool.get('2:b') is not first
+        assert len(pool) == 2
+
+    @pytest.mark.asyncio
+    async def test_token_rotation_evicts_old_client(self, pool):
+        pool.track('t1', 'signal_bot', '1:old')
+        old = await pool.get('1:old')
+
+        pool.track('t1', 'signal_bot', '1:old')
+        assert await pool.get('1:old') is old
+
+        pool.track('t1', 'signal_bot', '1:new')
+        await _drain()
+        assert old.shutdowns == 1
+        assert await pool.get('1:old') is not old
+
+    @pytest.mark.asyncio
+    async def test_release_and_close_loop(self, pool):
+        pool.track('t1', 'message_bot', '1:a')
+        bot = await pool.get('1:a')
+        pool.release('t1', 'message_bot')
+        await _drain()
+        assert bot.shutdowns == 1
+        assert len(pool) == 0
+
+        other = await pool.get('2:b')
+        await pool.close_loop()
+        assert other.shutdowns == 1
+        assert len(pool) == 0
+
+
+def test_closed_loop_clients_shut_down_when_pruned(pool):
+    old_loop = asyncio.new_event_loop()
+    stale = old_loop.run_until_complete(pool.get('1:a'))
+    old_loop.close()
+
+    async def use_pool():
+        return await pool.get('1:a')
+
+    fresh = asyncio.run(use_pool())
+    assert fresh is not stale
+    assert stale.shutdowns == 1
+    assert len(pool) == 1
+
+
+def test_evicted_client_of_closed_loop_shut_down_later(pool):
+    old_loop = asyncio.new_event_loop()
+    stale = old_loop.run_until_complete(pool.get('1:a'))
+    old_loop.close()
+    pool.evict_token('1:a')
+    assert stale.shutdowns == 0
+
+    async def use_pool():
+        return await pool.get('2:b')
+
+    asyncio.run(use_pool())
+    assert stale.shutdowns == 1
+
+
+def test_real_client_closes_its_http_pools():
+    client = sender.BotClientPool()._new_client('1:a')
+    assert client.requests[0] is client.bot.request
+    asyncio.run(sender.BotClientPool._shutdown(client))
+    assert all(request._client.is_closed for request in client.requests)
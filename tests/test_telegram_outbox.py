@@ -0,0 +1,173 @@
+"""
+Tests for Telegram rate shaping and the outbox dispatcher.
+"""
+import pytest
+
+from core import telegram_outbox
+from core.telegram_outbox import (
+    PRIORITY_BROADCAST, PRIORITY_SIGNAL, OutboxDispatcher, RateShaper,
+)
+from core.telegram_sender import SendResult
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestRateShaper:
+    """Token buckets enforce global, per-chat and per-group limits."""
+
+    def test_per_chat_one_per_second(self):
+        clock = FakeClock()
+        shaper = RateShaper(clock=clock)
+        assert shaper.try_acquire('111') == 0
+        assert shaper.try_acquire('111') == pytest.approx(1.0)
+        assert shaper.try_acquire('222') == 0
+        clock.now += 1
+        assert shaper.try_acquire('111') == 0
+
+    def test_group_twenty_per_minute(self):
+        clock = FakeClock()
+        shaper = RateShaper(clock=clock)
+        assert shaper.try_acquire('-100123') == 0
+        clock.now += 1
+        assert shaper.try_acquire('-100123') == pytest.approx(2.0)
+        clock.now += 2
+        assert shaper.try_acquire('-100123') == 0
+
+    def test_global_limit_and_priority(self):
+        clock = FakeClock()
+        shaper = RateShaper(global_rate=2, clock=clock)
+        assert shaper.try_acquire('1') == 0
+        assert shaper.try_acquire('2') == 0
+        assert shaper.try_acquire('3') > 0
+
+        clock.now += 0.5
+        shaper._global_waiters[PRIORITY_SIGNAL] += 1
+        assert shaper.try_acquire('4', PRIORITY_BROADCAST) > 0
+        shaper._global_waiters[PRIORITY_SIGNAL] -= 1
+        assert shaper.try_acquire('4', PRIORITY_BROADCAST) == 0
+
+    def test_penalize_blocks_only_that_chat(self):
+        clock = FakeClock()
+        shaper = RateShaper(clock=clock)
+        shaper.penalize('111', 10)
+        assert shaper.try_acquire('111') >= 10
+        assert shaper.try_acquire('222') == 0
+        clock.now += 11
+        assert shaper.try_acquire('111') == 0
+
+
+class TestOutboxDispatcher:
+    """Claimed rows are delivered per chat in order with retries."""
+
+    @pytest.mark.asyncio
+    async def test_run_once_marks_sent_and_reschedules(self, monkeypatch):
+        rows = [
+            {'id': 1, 'tenant_id': 't1', 'bot_role': 'message_bot', 'chat_id': '10', 'kind': 'message',
+             'payload': {'text': 'a'}, 'priority': 9, 'attempts': 1},
+            {'id': 2, 'tenant_id': 't1', 'bot_role': 'message_bot', 'chat_id': '20', 'kind': 'message',
+             'payload': {'text': 'b'}, 'priority': 9, 'attempts': 1},
+            {'id': 3, 'tenant_id': 't1', 'bot_role': 'message_bot', 'chat_id': '20', 'kind': 'message',
+             'payload': {'text': 'c'}, 'priority': 9, 'attempts': 1},
+            {'id': 4, 'tenant_id': 't1', 'bot_role': 'message_bot', 'chat_id': '30', 'kind': 'message',
+             'payload': {'text': 'd'}, 'priority': 9, 'attempts': 1},
+        ]
+        sent, rescheduled, failed = [], [], []
+        monkeypatch.setattr(telegram_outbox, 'claim_due', lambda tenants, limit: rows)
+        monkeypatch.setattr(telegram_outbox, 'mark_sent', lambda results, settled=(): sent.extend(results))
+        monkeypatch.setattr(telegram_outbox, 'reschedule',
+                            lambda row_id, tenant_id, delay, error: rescheduled.append((row_id, delay)))
+        monkeypatch.setattr(telegram_outbox, 'mark_failed',
+                            lambda row_id, tenant_id, error, settled=(): failed.append(row_id))
+
+        async def fake_send(self, row):
+            if row['chat_id'] == '20':
+                return SendResult(success=False, error='flood', error_code=429, retry_after=7)
+            if row['chat_id'] == '30':
+                return SendResult(success=False, error='blocked', error_code=403)
+            return SendResult(success=True, message_id=100 + row['id'])
+
+        monkeypatch.setattr(OutboxDispatcher, '_send', fake_send)
+
+        dispatcher = OutboxDispatcher(tenants=lambda: ['t1'])
+        assert await dispatcher.run_once() == 4
+        assert sent == [(1, 't1', 101)]
+        assert rescheduled == [(2, 7), (3, 7)]
+        assert failed == [4]
+
+    @pytest.mark.asyncio
+    async def test_broadcast_outcomes_reported_to_job(self, monkeypatch):
+        payload = {'text': 'hi', 'broadcast_job_id': 7}
+        rows = [
+            {'id': 1, 'tenant_id': 't1', 'bot_role': 'message_bot', 'chat_id': '10', 'kind': 'message',
+             'payload': payload, 'priority': 9, 'attempts': 1},
+            {'id': 2, 'tenant_id': 't1', 'bot_role': 'message_bot', 'chat_id': '20', 'kind': 'message',
+             'payload': payload, 'priority': 9, 'attempts': 1},
+            {'id': 3, 'tenant_id': 't1', 'bot_role': 'message_bot', 'chat_id': '30', 'kind': 'message',
+             'payload': payload, 'priority': 9, 'attempts': 1},
+            {'id': 4, 'tenant_id': 't1', 'bot_role': 'message_bot', 'chat_id': '40', 'kind': 'message',
+             'payload': {'text': 'not a broadcast'}, 'priority': 9, 'attempts': 1},
+        ]
+        settled = []
+        monkeypatch.setattr(telegram_outbox, 'claim_due', lambda tenants, limit: rows)
+        monkeypatch.setattr(telegram_outbox, 'mark_sent', lambda results, outcomes=(): settled.extend(outcomes))
+        monkeypatch.setattr(telegram_outbox, 'reschedule', lambda *args: None)
+        monkeypatch.setattr(telegram_outbox, 'mark_failed',
+                            lambda row_id, tenant_id, error, outcomes=(): settled.extend(outcomes))
+
+        async def fake_send(self, row):
+            if row['chat_id'] == '20':
+                return SendResult(success=False, error='blocked', error_code=403)
+            if row['chat_id'] == '30':
+                return SendResult(success=False, error='flood', error_code=429, retry_after=3)
+            return SendResult(success=True, message_id=100 + row['id'])
+
+        monkeypatch.setattr(OutboxDispatcher, '_send', fake_send)
+
+        assert await OutboxDispatcher(tenants=None).run_once() == 4
+        assert sorted(settled) == [
+            (7, 't1', '10', 'sent', None),
+            (7, 't1', '20', 'blocked', 'blocked'),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_each_row_marked_before_the_next_send(self, monkeypatch):
+        rows = [
+            {'id': i, 'tenant_id': 't1', 'bot_role': 'message_bot', 'chat_id': '10', 'kind': 'message',
+             'payload': {'text': str(i)}, 'priority': 9, 'attempts': 1}
+            for i in (1, 2, 3)
+        ]
+        events = []
+        monkeypatch.setattr(telegram_outbox, 'claim_due', lambda tenants, limit: rows)
+        monkeypatch.setattr(telegram_outbox, 'mark_sent',
+                            lambda results, settled=(): events.extend(('marked', r[0]) for r in results))
+
+        async def fake_send(self, row):
+            events.append(('sent', row['id']))
+            return SendResult(success=True, message_id=row['id'])
+
+        monkeypatch.setattr(OutboxDispatcher, '_send', fake_send)
+
+        assert await OutboxDispatcher(tenants=None).run_once() == 3
+        assert events == [('sent', 1), ('marked', 1), ('sent', 2), ('marked', 2), ('sent', 3), ('marked', 3)]
+
+
+class TestBroadcastSettlement:
+    """Broadcast outcomes commit with the outbox row that produced them."""
+
+    def test_settles_in_the_callers_transaction(self, monkeypatch):
+        from domains.broadcasts import repo as broadcast_repo
+
+        calls = []
+        monkeypatch.setattr(broadcast_repo, '_connection',
+                            lambda: pytest.fail("opened a second transaction"))
+        monkeypatch.setattr(broadcast_repo, '_settle', lambda cursor, by_job: calls.append((cursor, by_job)))
+
+        cursor = object()
+        broadcast_repo.record_outbox_results([(7, 't1', '10', 'sent', None)], cursor=cursor)
+        assert calls == [(cursor, {(7, 't1'): [(10, 'sent', None)]})]
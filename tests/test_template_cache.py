@@ -0,0 +1,96 @@
+"""
+Tests for the coupon template asset / render caches.
+"""
+import pytest
+from PIL import Image
+
+from domains.coupons import template_cache
+from domains.coupons.template_cache import ByteBudgetLRU
+from telegram_image_gen import generate_promo_image
+
+
+@pytest.fixture
+def fresh_caches(monkeypatch):
+    monkeypatch.setattr(template_cache, '_assets', ByteBudgetLRU('assets', 10_000_000, 60))
+    monkeypatch.setattr(template_cache, '_renders', ByteBudgetLRU('renders', 10_000_000, 60))
+
+
+class TestByteBudgetLRU:
+    """Values are evicted least-recently-used first once over budget."""
+
+    def test_evicts_by_bytes(self):
+        cache = ByteBudgetLRU('t', max_bytes=100, ttl_seconds=60)
+        cache.put('a', 'A', 40)
+        cache.put('b', 'B', 40)
+        assert cache.get('a') == 'A'
+        cache.put('c', 'C', 40)
+        assert cache.get('b') is None
+        assert cache.get('a') == 'A' and cache.get('c') == 'C'
+        assert cache.size_bytes == 80
+        cache.put('huge', 'H', 500)
+        assert cache.get('huge') is None
+
+    def test_expired_entries_miss(self):
+        cache = ByteBudgetLRU('t', max_bytes=100, ttl_seconds=0)
+        cache.put('a', 'A', 1)
+        assert cache.get('a') is None
+
+
+class TestTemplateCache:
+    """Assets are decoded once and invalidated per template."""
+
+    def test_base_image_and_metadata_loaded_once(self, fresh_caches):
+        loads = []
+
+        def load_image(url):
+            loads.append(url)
+            return Image.new('RGB', (40, 20), 'black')
+
+        meta_loads = []
+
+        def load_meta():
+            meta_loads.append(1)
+            return b'{"square": {"imageUrl": "u"}}'
+
+        for _ in range(3):
+            assert template_cache.get_metadata('t1', load_meta)['square']['imageUrl'] == 'u'
+            image = template_cache.get_base_image('t1', 'square', 'u', load_image)
+        assert loads == ['u'] and meta_loads == [1]
+        assert image.mode == 'RGBA'
+
+        rendered = generate_promo_image('u', 'SAVE 10', template_image=image)
+        assert rendered is not image
+        assert image.getpixel((20, 18)) == (0, 0, 0, 255)
+
+        template_cache.put_render('t1', 'square', 'SAVE-10', b'png')
+        template_cache.put_render('t2', 'square', 'SAVE-10', b'png')
+        template_cache.invalidate_template('t1')
+        assert template_cache.get_render('t1', 'square', 'SAVE-10') is None
+        assert template_cache.get_render('t2', 'square', 'SAVE-10') == b'png'
+        template_cache.get_base_image('t1', 'square', 'u', load_image)
+        assert loads == ['u', 'u']
+
+        template_cache.invalidate_all()
+        assert template_cache.get_render('t2', 'square', 'SAVE-10') is None
+
+    def test_version_keys_base_images_across_reuploads(self, fresh_caches):
+        loads = []
+
+        def load_image(url):
+            loads.append(url)
+            return Image.new('RGB', (4, 4), 'white')
+
+        v1 = template_cache.template_version('t3', {'version': 'a'})
+        template_cache.get_base_image('t3', 'square', 'u', load_image, v1)
+        template_cache.get_base_image('t3', 'square', 'u', load_image, v1)
+        assert loads == ['u']
+
+        # A re-upload keeps the URL but stamps a new meta.json version
+        v2 = template_cache.template_version('t3', {'version': 'b'})
+        template_cache.get_base_image('t3', 'square', 'u', load_image, v2)
+        assert loads == ['u', 'u']
+
+        # Local invalidation also moves the version, for templates without a stamp
+        before = template_cache.template_version('t3', {})
+        template_cache.invalidate_template('t3')
+        assert template_cache.template_version('t3', {}) != before
@@ -0,0 +1,270 @@
+"""
+Tests for the bot webhook fast path: the in-memory secret index
+(core/secret_index.py, db resolvers) and ingest mode with per-chat ordering
+(integrations/telegram/update_dispatcher.py).
+"""
+import io
+import json
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.secret_index import SecretIndex, hash_secret
+from integrations.telegram import update_dispatcher
+from integrations.telegram.update_dispatcher import UpdateDispatcher, update_chat_key
+
+
+class CountingLoader:
+    def __init__(self, secrets):
+        self.secrets = dict(secrets)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return [(hash_secret(secret), record) for secret, record in self.secrets.items()]
+
+
+def test_index_serves_from_memory_until_invalidated():
+    loader = CountingLoader({'s1': 'tenant_a'})
+    index = SecretIndex('t', loader, ttl_seconds=60, miss_refresh_seconds=60)
+    assert [index.lookup('s1') for _ in range(5)] == ['tenant_a'] * 5
+    assert loader.calls == 1
+
+    loader.secrets = {'s2': 'tenant_b'}
+    index.invalidate()
+    assert index.lookup('s1') is None
+    assert index.lookup('s2') == 'tenant_b'
+    assert loader.calls == 2
+
+
+def test_miss_reloads_at_most_once_per_refresh_window():
+    loader = CountingLoader({})
+    index = SecretIndex('t', loader, ttl_seconds=60, miss_refresh_seconds=0.05)
+    for _ in range(10):
+        assert index.lookup('garbage') is None
+    assert loader.calls == 1
+
+    loader.secrets = {'new': 'tenant_c'}
+    time.sleep(0.06)
+    assert index.lookup('new') == 'tenant_c'
+    assert loader.calls == 2
+
+
+def test_index_expires_after_ttl():
+    loader = CountingLoader({'s1': 'tenant_a'})
+    index = SecretIndex('t', loader, ttl_seconds=0.02, miss_refresh_seconds=60)
+    index.lookup('s1')
+    time.sleep(0.03)
+    index.lookup('s1')
+    assert loader.calls == 2
+
+
+def test_stale_hit_rechecked_and_dropped_when_deleted():
+    loader = CountingLoader({'s1': 'tenant_a', 's2': 'tenant_b'})
+    current = {hash_secret('s1'): 'tenant_a', hash_secret('s2'): 'tenant_b'}
+    checked = []
+
+    def verifier(secret_hash, record):
+        checked.append(record)
+        return current.get(secret_hash)
+
+    index = SecretIndex('t', loader, ttl_seconds=60, miss_refresh_seconds=60,
+                        verifier=verifier, recheck_seconds=0.02)
+    assert index.lookup('s1') == 'tenant_a'
+    assert checked == []
+
+    del current[hash_secret('s1')]
+    time.sleep(0.03)
+    assert index.lookup('s1') is None
+    assert index.lookup('s2') == 'tenant_b'
+    assert index.lookup('s2') == 'tenant_b'
+    assert checked == ['tenant_a', 'tenant_b']
+    assert loader.calls == 1
+
+
+def test_recheck_failure_keeps_cached_secret():
+    def verifier(secret_hash, record):
+        raise RuntimeError("db down")
+
+    index = SecretIndex('t', CountingLoader({'s1': 'tenant_a'}), ttl_seconds=60,
+                        verifier=verifier, recheck_seconds=0)
+    index.lookup('s1')
+    assert index.lookup('s1') == 'tenant_a'
+
+
+def test_concurrent_loads_share_one_query():
+    release = threading.Event()
+    loader = CountingLoader({'s1': 'tenant_a'})
+
+    def slow_loader():
+        release.wait(2)
+        return loader()
+
+    index = SecretIndex('t', slow_loader, ttl_seconds=60, miss_refresh_seconds=60)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(index.lookup('s1'))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join(2)
+    assert results == ['tenant_a'] * 5
+    assert loader.calls == 1
+
+
+def test_recheck_runs_outside_the_lock_and_serves_cached_meanwhile():
+    started, release = threading.Event(), threading.Event()
+    checked = []
+
+    def verifier(secret_hash, record):
+        checked.append(record)
+        started.set()
+        release.wait(2)
+        return record
+
+    index = SecretIndex('t', CountingLoader({'s1': 'tenant_a', 's2': 'tenant_b'}), ttl_seconds=60,
+                        miss_refresh_seconds=60, verifier=verifier, recheck_seconds=0)
+    index.lookup('s1')
+    time.sleep(0.01)
+    slow = threading.Thread(target=index.lookup, args=('s1',))
+    slow.start()
+    assert started.wait(2)
+    # The verifier is blocked: other lookups neither wait for it nor start a second recheck
+    assert index.lookup('s1') == 'tenant_a'
+    assert index.stats()['secrets'] == 2
+    release.set()
+    slow.join(2)
+    assert checked == ['tenant_a']
+
+
+def test_db_resolver_uses_index_and_copies(monkeypatch):
+    import db
+    connection = {'tenant_id': 'tenant_a', 'bot_role': 'signal', 'bot_token': 't', 'bot_username': 'bot'}
+    loader = CountingLoader({'secret-1': connection})
+    monkeypatch.setattr(db, '_load_bot_connection_secrets', loader)
+    monkeypatch.setattr(db, '_webhook_secret_index', None)
+    monkeypatch.setattr(db, '_bot_connection_secret_index', None)
+    monkeypatch.setattr(db.db_pool, 'connection_pool', object())
+
+    found = db.resolve_bot_connection_from_webhook_secret('secret-1')
+    found['tenant_id'] = 'mutated'
+    assert db.resolve_bot_connection_from_webhook_secret('secret-1')['tenant_id'] == 'tenant_a'
+    assert db.resolve_bot_connection_from_webhook_secret('') is None
+    assert loader.calls == 1
+
+    db.invalidate_webhook_secret_cache()
+    db.resolve_bot_connection_from_webhook_secret('secret-1')
+    assert loader.calls == 2
+
+
+def test_chat_key_extraction():
+    assert update_chat_key({'message': {'chat': {'id': 5}}}) == 5
+    assert update_chat_key({'callback_query': {'message': {'chat': {'id': 6}}}}) == 6
+    assert update_chat_key({'callback_query': {'from': {'id': 7}}}) == 7
+    assert update_chat_key({'chat_member': {'chat': {'id': -100}}}) == -100
+    assert update_chat_key({'update_id': 1}) == 0
+
+
+def test_dispatcher_keeps_per_chat_order():
+    dispatcher = UpdateDispatcher('test', workers=3, queue_size=300)
+    seen = {1: [], 2: [], 3: []}
+
+    def record(chat, n):
+        time.sleep(0.001 * (n % 3))
+        seen[chat].append(n)
+
+    for n in range(30):
+        for chat in seen:
+            assert dispatcher.submit(chat, record, chat, n)
+    dispatcher.join()
+    assert all(order == list(range(30)) for order in seen.values())
+    assert dispatcher.stats()['processed'] == 90
+    dispatcher.shutdown()
+
+
+def test_dispatcher_full_queue_rejects():
+    dispatcher = UpdateDispatcher('test', workers=1, queue_size=1)
+    release = threading.Event()
+    assert dispatcher.submit(1, release.wait)
+    time.sleep(0.05)
+    assert dispatcher.submit(1, lambda: None)
+    assert not dispatcher.submit(1, lambda: None)
+    assert dispatcher.stats()['rejected'] == 1
+    release.set()
+    dispatcher.join()
+    dispatcher.shutdown()
+
+
+class FakeHandler:
+    def __init__(self, update):
+        body = json.dumps(update).encode()
+        self.headers = {'Content-Length': str(len(body))}
+        self.rfile = io.BytesIO(body)
+        self.wfile = io.BytesIO()
+        self.status = None
+
+    def send_response(self, status):
+        self.status = status
+
+    def send_header(self, *args):
+        pass
+
+    def end_headers(self):
+        pass
+
+
+@pytest.fixture
+def bot_webhook(monkeypatch):
+    import db
+    from integrations.telegram import webhooks
+    connection = {'tenant_id': 'tenant_a', 'bot_role': 'message', 'bot_token': 't', 'bot_username': 'bot'}
+    monkeypatch.setattr(db, 'resolve_bot_connection_from_webhook_secret', lambda secret: dict(connection))
+    monkeypatch.setattr(update_dispatcher, '_dispatcher', UpdateDispatcher('test', workers=2, queue_size=10))
+    return webhooks
+
+
+def test_ingest_mode_acks_before_processing(bot_webhook, monkeypatch):
+    monkeypatch.setenv('TELEGRAM_WEBHOOK_MODE', 'ingest')
+    release = threading.Event()
+    processed = []
+
+    def slow_trigger(update, tenant_id, bot_id):
+        release.wait(2)
+        processed.append((update['update_id'], tenant_id))
+        return True
+
+    monkeypatch.setattr(bot_webhook, 'check_journey_trigger', slow_trigger)
+    handler = FakeHandler({'update_id': 11, 'message': {'chat': {'id': 3}, 'text': '/start x'}})
+    bot_webhook.handle_bot_webhook(handler, 'secret')
+
+    assert handler.status == 200
+    assert json.loads(handler.wfile.getvalue()) == {'status': 'ok', 'handler': 'queued'}
+    assert processed == []
+    release.set()
+    update_dispatcher.get_update_dispatcher().join()
+    assert processed == [(11, 'tenant_a')]
+
+
+def test_sync_mode_processes_inline(bot_webhook, monkeypatch):
+    monkeypatch.setenv('TELEGRAM_WEBHOOK_MODE', 'sync')
+    monkeypatch.setattr(bot_webhook, 'check_journey_trigger', lambda *a: False)
+    monkeypatch.setattr(bot_webhook, 'check_journey_reply', lambda *a: True)
+    handler = FakeHandler({'update_id': 12, 'message': {'chat': {'id': 3}, 'text': 'hi'}})
+    bot_webhook.handle_bot_webhook(handler, 'secret')
+    assert json.loads(handler.wfile.getvalue()) == {'status': 'ok', 'handler': 'journey_reply'}
+
+
+def test_ingest_mode_full_queue_answers_503(bot_webhook, monkeypatch):
+    monkeypatch.setenv('TELEGRAM_WEBHOOK_MODE', 'ingest')
+    monkeypatch.setattr(update_dispatcher.get_update_dispatcher(), 'submit', lambda *args: False)
+    monkeypatch.setattr(bot_webhook, 'process_bot_update',
+                        lambda *args: pytest.fail("full queue must not process inline"))
+    handler = FakeHandler({'update_id': 13, 'message': {'chat': {'id': 3}, 'text': 'hi'}})
+    bot_webhook.handle_bot_webhook(handler, 'secret')
+    assert handler.status == 503
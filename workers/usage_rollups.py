@@ -0,0 +1,34 @@
+"""
+Bot Usage Rollup Worker
+
+Runs db.compact_bot_usage periodically so dashboard stats (db.get_bot_stats,
+db.get_day_of_week_stats) only scan a short tail of raw bot_usage rows.
+Started on the scheduler leader; the compaction itself is guarded by an
+advisory lock, so a second copy is harmless.
+"""
+import threading
+import time
+
+from core.db_pool import SCHEDULER, set_pool_role
+from core.logging import get_logger
+
+logger = get_logger(__name__)
+
+COMPACT_INTERVAL_SECONDS = 600
+
+
+def start_usage_compactor(interval_seconds: float = COMPACT_INTERVAL_SECONDS) -> threading.Thread:
+    """Compact now (backfilling on first run) and then every interval_seconds."""
+    def _loop():
+        import db
+        set_pool_role(SCHEDULER)
+        while True:
+            try:
+                db.compact_bot_usage()
+            except Exception as e:
+                logger.warning(f"[ROLLUP] bot_usage compaction failed: {e}")
+            time.sleep(interval_seconds)
+
+    thread = threading.Thread(target=_loop, daemon=True, name="bot-usage-rollup")
+    thread.start()
+    return thread